@@ -6,11 +6,13 @@ internal sealed class AppConfig
 {
     public WebServiceAuthConfig Authorization { get; set; } = new();
     public WorkspaceConfig Workspace { get; set; } = new();
+    public OrchestrationConfig Orchestration { get; set; } = new();
 
     public AppConfig Validate()
     {
         this.Workspace.Validate();
         this.Authorization.Validate();
+        this.Orchestration.Validate();
         return this;
     }
 }
@@ -0,0 +1,218 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using Orchestrator.Diagnostics;
+
+namespace Orchestrator.Config;
+
+internal sealed class OrchestrationConfig
+{
+    /// <summary>
+    /// Max number of jobs of a batch running at the same time.
+    /// Clients can request a lower value, but not a higher one.
+    /// </summary>
+    public int MaxBatchParallelism { get; set; } = 4;
+
+    /// <summary>
+    /// Max number of inputs accepted in a single batch request.
+    /// </summary>
+    public int MaxBatchSize { get; set; } = 10000;
+
+    /// <summary>
+    /// Max number of jobs submitted in async mode running at the same time.
+    /// </summary>
+    public int MaxAsyncJobs { get; set; } = 4;
+
+    /// <summary>
+    /// Max number of jobs submitted in async mode waiting to start.
+    /// When the queue is full, new async jobs are rejected.
+    /// </summary>
+    public int MaxQueuedAsyncJobs { get; set; } = 1000;
+
+    /// <summary>
+    /// Max number of elements processed at the same time by a map step ("foreach").
+    /// Used as default when a step doesn't specify "maxParallelism", and as upper limit otherwise.
+    /// </summary>
+    public int MaxMapParallelism { get; set; } = 8;
+
+    /// <summary>
+    /// Max number of parsed JMESPath expressions kept in memory, least recently used first out.
+    /// </summary>
+    public int JmesPathCacheSize { get; set; } = 1000;
+
+    /// <summary>
+    /// Max size of a file uploaded with a multipart request to be included in the job input.
+    /// Larger files are stored in the workspace, and the input contains a reference to the file.
+    /// </summary>
+    public int MaxInMemoryFileSizeKb { get; set; } = 1024;
+
+    /// <summary>
+    /// Max number of seconds to wait for a function to respond, when the step doesn't set "timeout".
+    /// </summary>
+    public double DefaultTimeoutSecs { get; set; } = 100;
+
+    /// <summary>
+    /// Max number of retries after a transient error, when the step doesn't set "retries".
+    /// Zero by default: a timeout doesn't mean the call failed, so retrying could run non-idempotent
+    /// functions (e.g. upserts) more than once. Steps calling idempotent functions can opt in.
+    /// </summary>
+    public int DefaultRetries { get; set; } = 0;
+
+    /// <summary>
+    /// Number of seconds to wait before the first retry, doubled on each retry, when the step doesn't set "backoff".
+    /// </summary>
+    public double DefaultBackoffSecs { get; set; } = 1;
+
+    /// <summary>
+    /// Max number of seconds to wait before a retry, including delays requested by functions with Retry-After.
+    /// </summary>
+    public double MaxRetryDelaySecs { get; set; } = 30;
+
+    /// <summary>
+    /// Number of consecutive failed calls to a tool after which calls to the tool fail immediately,
+    /// for <see cref="CircuitBreakerBreakSecs"/>, to let the tool recover.
+    /// </summary>
+    public int CircuitBreakerFailureThreshold { get; set; } = 5;
+
+    /// <summary>
+    /// Number of seconds calls to a failing tool are blocked, before trying again with a single call.
+    /// </summary>
+    public double CircuitBreakerBreakSecs { get; set; } = 30;
+
+    /// <summary>
+    /// Number of milliseconds to wait for a tool response before sending the same request again, using
+    /// the first response received. Zero (default) to disable hedged requests. Hedging reduces tail latency
+    /// when a tool replica is slow, at the cost of extra calls, so it should be used only with idempotent tools.
+    /// </summary>
+    public int HedgingDelayMs { get; set; } = 0;
+
+    /// <summary>
+    /// Max number of function results kept in memory for steps with "cache" enabled, least recently used first out.
+    /// Zero to keep results only in Redis.
+    /// </summary>
+    public int ResultCacheSize { get; set; } = 1000;
+
+    /// <summary>
+    /// Number of seconds a function result is cached, when the step doesn't set "cacheTtl".
+    /// </summary>
+    public double ResultCacheTtlSecs { get; set; } = 3600;
+
+    /// <summary>
+    /// Max size of a function result to be cached. Larger results are not cached.
+    /// </summary>
+    public int ResultCacheMaxEntrySizeKb { get; set; } = 1024;
+
+    /// <summary>
+    /// Whether to store function results also in Redis, sharing them across orchestrator instances.
+    /// </summary>
+    public bool ResultCacheUseRedis { get; set; } = true;
+
+    /// <summary>
+    /// How often to check in the background which tools are reachable and expose API docs, for /tools.
+    /// </summary>
+    public int ToolProbeIntervalSecs { get; set; } = 60;
+
+    /// <summary>
+    /// Max number of milliseconds to wait for a tool to respond, when checking tools for /tools.
+    /// </summary>
+    public int ToolProbeTimeoutMs { get; set; } = 2000;
+
+    public OrchestrationConfig Validate()
+    {
+        if (this.MaxBatchParallelism < 1)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.MaxBatchParallelism)} must be greater than zero");
+        }
+
+        if (this.MaxBatchSize < 1)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.MaxBatchSize)} must be greater than zero");
+        }
+
+        if (this.MaxAsyncJobs < 1)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.MaxAsyncJobs)} must be greater than zero");
+        }
+
+        if (this.MaxQueuedAsyncJobs < 1)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.MaxQueuedAsyncJobs)} must be greater than zero");
+        }
+
+        if (this.MaxMapParallelism < 1)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.MaxMapParallelism)} must be greater than zero");
+        }
+
+        if (this.JmesPathCacheSize < 1)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.JmesPathCacheSize)} must be greater than zero");
+        }
+
+        if (this.MaxInMemoryFileSizeKb < 1)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.MaxInMemoryFileSizeKb)} must be greater than zero");
+        }
+
+        if (this.DefaultTimeoutSecs <= 0)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.DefaultTimeoutSecs)} must be greater than zero");
+        }
+
+        if (this.DefaultRetries < 0)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.DefaultRetries)} cannot be negative");
+        }
+
+        if (this.DefaultBackoffSecs < 0)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.DefaultBackoffSecs)} cannot be negative");
+        }
+
+        if (this.MaxRetryDelaySecs < 0)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.MaxRetryDelaySecs)} cannot be negative");
+        }
+
+        if (this.CircuitBreakerFailureThreshold < 1)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.CircuitBreakerFailureThreshold)} must be greater than zero");
+        }
+
+        if (this.CircuitBreakerBreakSecs <= 0)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.CircuitBreakerBreakSecs)} must be greater than zero");
+        }
+
+        if (this.HedgingDelayMs < 0)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.HedgingDelayMs)} cannot be negative");
+        }
+
+        if (this.ResultCacheSize < 0)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.ResultCacheSize)} cannot be negative");
+        }
+
+        if (this.ResultCacheTtlSecs <= 0)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.ResultCacheTtlSecs)} must be greater than zero");
+        }
+
+        if (this.ResultCacheMaxEntrySizeKb < 1)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.ResultCacheMaxEntrySizeKb)} must be greater than zero");
+        }
+
+        if (this.ToolProbeIntervalSecs < 1)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.ToolProbeIntervalSecs)} must be greater than zero");
+        }
+
+        if (this.ToolProbeTimeoutMs < 1)
+        {
+            throw new ConfigurationException($"{nameof(OrchestrationConfig)}: {nameof(this.ToolProbeTimeoutMs)} must be greater than zero");
+        }
+
+        return this;
+    }
+}
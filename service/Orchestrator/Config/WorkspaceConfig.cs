@@ -1,9 +1,41 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
+using System.Text.Json.Serialization;
+using Orchestrator.Diagnostics;
+
 namespace Orchestrator.Config;
 
 internal sealed class WorkspaceConfig
 {
+    [JsonConverter(typeof(JsonStringEnumConverter))]
+    public enum ContextCheckpointPolicies
+    {
+        // Don't store the job context, only the initial one
+        None,
+
+        // Store the full job context once, when the job ends
+        EndOfJob,
+
+        // Append the input and output of each step to a log, replayed to rebuild the context
+        PerStep,
+
+        // Store the full job context when a step ends, at most once every few seconds, and when the job ends
+        Interval,
+    }
+
+    [JsonConverter(typeof(JsonStringEnumConverter))]
+    public enum StorageTypes
+    {
+        // Store files only in the file system or Azure blobs, see UseFileSystem
+        Persistent,
+
+        // Store files only in memory, lost when the service stops
+        Memory,
+
+        // Store files in memory, copying them to the file system or Azure blobs in the background
+        Tiered,
+    }
+
     private static readonly string[] s_defaultWorkspace = ["generative-pipelines", "data", "workspace"];
     private static readonly string s_userProfileDir = Environment.GetFolderPath(Environment.SpecialFolder.UserProfile);
 
@@ -11,8 +43,48 @@ internal sealed class WorkspaceConfig
 
     public string WorkspaceDir { get; set; } = string.Empty;
 
+    /// <summary>
+    /// Where to store job files: persistent storage only, memory only, or memory and persistent storage.
+    /// </summary>
+    public StorageTypes StorageType { get; set; } = StorageTypes.Persistent;
+
+    /// <summary>
+    /// Max size of the files kept in memory, when using <see cref="StorageTypes.Memory"/> or <see cref="StorageTypes.Tiered"/>.
+    /// </summary>
+    public int MemoryMaxSizeMb { get; set; } = 256;
+
+    /// <summary>
+    /// Number of seconds files are kept in memory, when using <see cref="StorageTypes.Memory"/> or <see cref="StorageTypes.Tiered"/>.
+    /// </summary>
+    public int MemoryTtlSecs { get; set; } = 3600;
+
+    /// <summary>
+    /// When and how to store the job context while jobs run.
+    /// </summary>
+    public ContextCheckpointPolicies ContextCheckpoint { get; set; } = ContextCheckpointPolicies.PerStep;
+
+    /// <summary>
+    /// Min number of seconds between context checkpoints, when using <see cref="ContextCheckpointPolicies.Interval"/>.
+    /// </summary>
+    public int ContextCheckpointIntervalSecs { get; set; } = 10;
+
     public WorkspaceConfig Validate()
     {
+        if (this.StorageType != StorageTypes.Persistent && this.MemoryMaxSizeMb < 1)
+        {
+            throw new ConfigurationException($"{nameof(WorkspaceConfig)}: {nameof(this.MemoryMaxSizeMb)} must be greater than zero");
+        }
+
+        if (this.StorageType != StorageTypes.Persistent && this.MemoryTtlSecs < 1)
+        {
+            throw new ConfigurationException($"{nameof(WorkspaceConfig)}: {nameof(this.MemoryTtlSecs)} must be greater than zero");
+        }
+
+        if (this.ContextCheckpoint == ContextCheckpointPolicies.Interval && this.ContextCheckpointIntervalSecs < 1)
+        {
+            throw new ConfigurationException($"{nameof(WorkspaceConfig)}: {nameof(this.ContextCheckpointIntervalSecs)} must be greater than zero");
+        }
+
 #pragma warning disable IDE0055
         this.WorkspaceDir = string.IsNullOrWhiteSpace(this.WorkspaceDir)
             ? Path.Join([s_userProfileDir, ..s_defaultWorkspace])
@@ -10,6 +10,7 @@ using Orchestrator.Http;
 using Orchestrator.Orchestration;
 using Orchestrator.ServiceDiscovery;
 using Orchestrator.Storage;
+using StackExchange.Redis;
 
 namespace Orchestrator;
 
@@ -25,9 +26,34 @@ public static partial class DependencyInjection
 
         builder.Services.AddSingleton(workspaceConfig);
         builder.Services.AddSingleton<SimpleWorkspace>();
+        switch (workspaceConfig.StorageType)
+        {
+            case WorkspaceConfig.StorageTypes.Memory:
+                builder.Services.AddSingleton<IFileSystem, MemoryFileSystem>();
+                return builder;
+
+            case WorkspaceConfig.StorageTypes.Tiered:
+                builder.Services.AddSingleton<MemoryFileSystem>();
+                builder.Services.AddSingleton<TieredFileSystem>(sp => new TieredFileSystem(
+                    sp.GetRequiredService<MemoryFileSystem>(),
+                    workspaceConfig.UseFileSystem ? sp.GetRequiredService<FileSystem>() : sp.GetRequiredService<AzureBlobFileSystem>(),
+                    sp.GetService<ILoggerFactory>()));
+                builder.Services.AddSingleton<IFileSystem>(sp => sp.GetRequiredService<TieredFileSystem>());
+                builder.Services.AddHostedService(sp => sp.GetRequiredService<TieredFileSystem>());
+                break;
+        }
+
         if (workspaceConfig.UseFileSystem)
         {
-            builder.Services.AddSingleton<IFileSystem, FileSystem>();
+            if (workspaceConfig.StorageType == WorkspaceConfig.StorageTypes.Tiered)
+            {
+                builder.Services.AddSingleton<FileSystem>();
+            }
+            else
+            {
+                builder.Services.AddSingleton<IFileSystem, FileSystem>();
+            }
+
             return builder;
         }
 
@@ -43,7 +69,14 @@ public static partial class DependencyInjection
         }
 
         builder.Services.AddSingleton(azureBlobFileSystemConfig);
-        builder.Services.AddSingleton<IFileSystem, AzureBlobFileSystem>();
+        if (workspaceConfig.StorageType == WorkspaceConfig.StorageTypes.Tiered)
+        {
+            builder.Services.AddSingleton<AzureBlobFileSystem>();
+        }
+        else
+        {
+            builder.Services.AddSingleton<IFileSystem, AzureBlobFileSystem>();
+        }
 
         // Using Aspire client
         builder.AddAzureBlobClient(blobStorageName,
@@ -100,6 +133,43 @@ public static partial class DependencyInjection
         return builder;
     }
 
+    public static IServiceCollection AddToolRegistry(this IServiceCollection services, IConfiguration configuration, string redisConnectionName)
+    {
+        // Redis is optional: without the registry, functions are called using JSON input and output.
+        // The registry is not registered, so services depending on it receive null.
+        if (!IsRedisConfigured(configuration, redisConnectionName)) { return services; }
+
+        services.AddSingleton<ToolRegistry>(sp =>
+            new ToolRegistry(sp.GetRequiredService<IConnectionMultiplexer>().GetDatabase(), sp.GetService<ILoggerFactory>()));
+
+        return services;
+    }
+
+    public static IServiceCollection AddStepResultCache(this IServiceCollection services)
+    {
+        // Redis is optional: without Redis, function results are cached only in memory
+        services.AddSingleton<StepResultCache>(sp =>
+        {
+            var config = sp.GetRequiredService<AppConfig>();
+            IDatabase? redis = null;
+            if (config.Orchestration.ResultCacheUseRedis)
+            {
+                try
+                {
+                    redis = sp.GetRequiredService<IConnectionMultiplexer>().GetDatabase();
+                }
+                catch (Exception e) when (e is InvalidOperationException or RedisException)
+                {
+                    redis = null;
+                }
+            }
+
+            return new StepResultCache(config, redis, loggerFactory: sp.GetService<ILoggerFactory>());
+        });
+
+        return services;
+    }
+
     public static IServiceCollection AddToolsHttpClients(this IServiceCollection services, IConfiguration configuration)
     {
         var tools = ToolDiscovery.GetTools(configuration);
@@ -109,6 +179,8 @@ public static partial class DependencyInjection
             {
                 client.DefaultRequestHeaders.Add(HeaderNames.Accept, MediaTypeNames.Application.Json);
                 client.BaseAddress = new(t.Value.TrimEnd('/'));
+                // Timeouts are set per call, see OrchestrationConfig.DefaultTimeoutSecs and Step.Timeout
+                client.Timeout = Timeout.InfiniteTimeSpan;
             });
         }
 
@@ -124,4 +196,11 @@ public static partial class DependencyInjection
 
         return services;
     }
+
+    // Same settings used by AddRedisClient, see Aspire.StackExchange.Redis
+    private static bool IsRedisConfigured(IConfiguration configuration, string connectionName)
+    {
+        return !string.IsNullOrWhiteSpace(configuration.GetConnectionString(connectionName))
+               || !string.IsNullOrWhiteSpace(configuration["Aspire:StackExchange:Redis:ConnectionString"]);
+    }
 }
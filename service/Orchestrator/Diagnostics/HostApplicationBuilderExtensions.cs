@@ -29,6 +29,8 @@ internal static partial class HostApplicationBuilderExtensions
             {
                 metrics
                     .AddRuntimeInstrumentation()
+                    .AddMeter(JmesPathCache.MeterName)
+                    .AddMeter(StepResultCache.MeterName)
                     .AddAspNetCoreInstrumentation()
                     .AddHttpClientInstrumentation();
             })
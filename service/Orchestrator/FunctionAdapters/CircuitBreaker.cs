@@ -0,0 +1,93 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+namespace Orchestrator.FunctionAdapters;
+
+/// <summary>
+/// Track the failures of a tool, and block calls to the tool after too many consecutive failures,
+/// rather than waiting for timeouts and retries on each call. After a break, a single call is allowed,
+/// closing the circuit if successful, or starting a new break otherwise.
+/// </summary>
+internal sealed class CircuitBreaker
+{
+    private readonly int _failureThreshold;
+    private readonly TimeSpan _breakDuration;
+    private readonly TimeProvider _timeProvider;
+    private readonly object _lock = new();
+    private int _failures = 0;
+    private bool _open = false;
+    private bool _trialCallRunning = false;
+    private long _openedAt;
+
+    public CircuitBreaker(int failureThreshold, TimeSpan breakDuration, TimeProvider? timeProvider = null)
+    {
+        this._failureThreshold = failureThreshold;
+        this._breakDuration = breakDuration;
+        this._timeProvider = timeProvider ?? TimeProvider.System;
+    }
+
+    /// <summary>
+    /// Whether calls to the tool are currently blocked.
+    /// </summary>
+    public bool IsOpen
+    {
+        get
+        {
+            lock (this._lock) { return this._open; }
+        }
+    }
+
+    /// <summary>
+    /// Check if a call can be made. When the break is over, only one call is allowed,
+    /// until its result is recorded.
+    /// </summary>
+    public bool TryAcquire()
+    {
+        lock (this._lock)
+        {
+            if (!this._open) { return true; }
+
+            if (this._trialCallRunning || this._timeProvider.GetElapsedTime(this._openedAt) < this._breakDuration) { return false; }
+
+            this._trialCallRunning = true;
+            return true;
+        }
+    }
+
+    public void RecordSuccess()
+    {
+        lock (this._lock)
+        {
+            this._failures = 0;
+            this._open = false;
+            this._trialCallRunning = false;
+        }
+    }
+
+    /// <summary>
+    /// Release a call without recording its result, e.g. when the job is cancelled.
+    /// </summary>
+    public void Release()
+    {
+        lock (this._lock)
+        {
+            this._trialCallRunning = false;
+        }
+    }
+
+    /// <summary>
+    /// Record a failed call. Returns true if the circuit has been opened.
+    /// </summary>
+    public bool RecordFailure()
+    {
+        lock (this._lock)
+        {
+            this._failures++;
+            if (!this._trialCallRunning && (this._open || this._failures < this._failureThreshold)) { return false; }
+
+            this._open = true;
+            this._trialCallRunning = false;
+            this._openedAt = this._timeProvider.GetTimestamp();
+            return true;
+        }
+    }
+}
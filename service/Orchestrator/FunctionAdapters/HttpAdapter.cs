@@ -1,24 +1,53 @@
 // Copyright (c) Microsoft. All rights reserved.
 
+using System.Collections.Concurrent;
 using System.Diagnostics;
+using System.Globalization;
 using System.Net;
 using System.Text.Json;
+using System.Text.Json.Nodes;
+using Microsoft.AspNetCore.WebUtilities;
 using Microsoft.Extensions.Logging.Abstractions;
+using Microsoft.Net.Http.Headers;
+using Orchestrator.Config;
 using Orchestrator.Diagnostics;
 using Orchestrator.Models;
+using Orchestrator.Orchestration;
+using Orchestrator.ServiceDiscovery;
+using StackExchange.Redis;
+using ContentDispositionHeaderValue = Microsoft.Net.Http.Headers.ContentDispositionHeaderValue;
+using MediaTypeHeaderValue = System.Net.Http.Headers.MediaTypeHeaderValue;
 
 namespace Orchestrator.FunctionAdapters;
 
 internal sealed class HttpAdapter
 {
+    // Name of the multipart field used to send a single file
+    private const string FileMultipartField = "file";
+
+    // Headers used by some services to request a delay before retrying, in milliseconds
+    private static readonly string[] s_retryAfterMsHeaders = ["retry-after-ms", "x-ms-retry-after-ms"];
+
     private readonly IHttpClientFactory _httpClientFactory;
+    private readonly SimpleWorkspace _workspace;
+    private readonly OrchestrationConfig _config;
+    private readonly ToolRegistry? _toolRegistry;
     private readonly ILogger<HttpAdapter> _log;
 
+    // Circuit breaker of each tool, by tool name
+    private readonly ConcurrentDictionary<string, CircuitBreaker> _circuitBreakers = new(StringComparer.OrdinalIgnoreCase);
+
     public HttpAdapter(
         IHttpClientFactory httpClientFactory,
+        SimpleWorkspace workspace,
+        OrchestrationConfig config,
+        ToolRegistry? toolRegistry = null,
         ILoggerFactory? loggerFactory = null)
     {
         this._httpClientFactory = httpClientFactory;
+        this._workspace = workspace;
+        this._config = config;
+        this._toolRegistry = toolRegistry;
         this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<HttpAdapter>();
     }
 
@@ -45,19 +74,103 @@ internal sealed class HttpAdapter
         // TODO: allow configurations, overrides, paths, query strings, headers, auth, etc.
         this._log.LogDebug("Job {JobId}: Preparing HTTP request", workflow.JobId);
         string path = functionDetails.Function;
-        HttpMethod method = HttpMethod.Post;
-        using HttpRequestMessage request = new(method, path) { Version = HttpVersion.Version11, VersionPolicy = HttpVersionPolicy.RequestVersionOrLower };
-        this._log.LogDebug("Job {JobId}: Serializing request content", workflow.JobId);
-        request.Content = JsonContent.Create(jobContext.State);
-        // ================================================================
+        FunctionDescription? description = await this.GetFunctionDescriptionAsync(functionDetails, workflow.JobId).ConfigureAwait(false);
+        bool isMultipart = description?.InputType == FunctionDescription.ContentType.Multipart;
+
+        // Large files uploaded with the job are stored in the workspace, and sent to JSON functions inline
+        object? payload = isMultipart
+            ? jobContext.State
+            : await this._workspace.ResolveFileHandlesAsync(workflow.JobId, jobContext.State, cancellationToken).ConfigureAwait(false);
+
+        // The content is created for each attempt, e.g. to stream files again. JSON content is
+        // serialized directly into the request stream.
+        async Task<HttpContent?> CreateContentAsync(CancellationToken ct)
+        {
+            if (!isMultipart) { return JsonContent.Create(payload); }
+
+            this._log.LogDebug("Job {JobId}: Preparing multipart request content", workflow.JobId);
+            return await this.CreateMultipartContentAsync(workflow.JobId, payload, ct).ConfigureAwait(false);
+        }
+
+        HttpContent? firstContent = await CreateContentAsync(cancellationToken).ConfigureAwait(false);
+        if (firstContent == null)
+        {
+            activity?.SetStatus(ActivityStatusCode.Error, "Invalid input for multipart function");
+            errorDetails.Message = "Invalid input for multipart function";
+            errorDetails.Description = $"Function '{step.Function}' expects multipart input, the step input must be an object with valid files";
+            return (false, Results.BadRequest(errorDetails));
+        }
+
+        async Task<HttpContent> GetContentAsync(CancellationToken ct)
+        {
+            return Interlocked.Exchange(ref firstContent, null)
+                   ?? await CreateContentAsync(ct).ConfigureAwait(false)
+                   ?? throw new InvalidOperationException("Unable to create the request content");
+        }
 
         this._log.LogDebug("Job {JobId}: Invoking function '{Function}': {Method} {Url}",
-            workflow.JobId, step.Function, request.Method, $"{client.BaseAddress?.AbsoluteUri}{request.RequestUri}");
-        HttpResponseMessage response = await client.SendAsync(request, cancellationToken).ConfigureAwait(false);
+            workflow.JobId, step.Function, HttpMethod.Post, $"{client.BaseAddress?.AbsoluteUri}{path}");
+
+        HttpResponseMessage? result;
+        HttpStatusCode failureStatus;
+        string? failure;
+        CancellationTokenSource? timeoutCts;
+        try
+        {
+            (result, failureStatus, failure, timeoutCts) = await this.SendAsync(
+                client, path, functionDetails, step, GetContentAsync, workflow.JobId, cancellationToken).ConfigureAwait(false);
+        }
+        finally
+        {
+            // Not used if the first attempt failed before sending the request
+            firstContent?.Dispose();
+        }
+
+        // The timeout of the last attempt applies also to reading the response content
+        using CancellationTokenSource? responseTimeoutCts = timeoutCts;
+        CancellationToken responseToken = timeoutCts?.Token ?? cancellationToken;
+
+        if (result == null)
+        {
+            this._log.LogError("Job {JobId}: Function '{Function}' failed: {Failure}", workflow.JobId, step.Function, failure);
+            errorDetails.Message = failureStatus == HttpStatusCode.GatewayTimeout ? "Function timeout" : "Function not available";
+            errorDetails.Description = $"Call to '{path}' failed: {failure}";
+            activity?.SetStatus(ActivityStatusCode.Error, (string)errorDetails.Message);
+            return (false, Results.Json(errorDetails, statusCode: (int)failureStatus));
+        }
+
+        using HttpResponseMessage response = result;
+        try
+        {
+            // errorDetails is cast to object to avoid a dynamic dispatch
+            return await this.ReadResponseAsync(response, path, description, jobContext, (object)errorDetails, activity, responseToken).ConfigureAwait(false);
+        }
+        catch (OperationCanceledException) when (!cancellationToken.IsCancellationRequested)
+        {
+            this._log.LogError("Job {JobId}: Function '{Function}' response not completed in time", workflow.JobId, step.Function);
+            errorDetails.Message = "Function timeout";
+            errorDetails.Description = $"Call to '{path}' failed: response not completed after {step.Timeout ?? this._config.DefaultTimeoutSecs} secs";
+            activity?.SetStatus(ActivityStatusCode.Error, "Function timeout");
+            return (false, Results.Json(errorDetails, statusCode: (int)HttpStatusCode.GatewayTimeout));
+        }
+    }
+
+    /// <summary>
+    /// Read the function response into the job context, or into the error details if the call failed.
+    /// </summary>
+    private async Task<(bool success, IResult? error)> ReadResponseAsync(
+        HttpResponseMessage response,
+        string path,
+        FunctionDescription? description,
+        JobContext jobContext,
+        dynamic errorDetails,
+        Activity? activity,
+        CancellationToken cancellationToken)
+    {
         if (!response.IsSuccessStatusCode)
         {
             errorDetails.Response = Logging.RemovePiiFromMessage(await response.Content.ReadAsStringAsync(cancellationToken).ConfigureAwait(false));
-            errorDetails.Description = $"Call to '{request.RequestUri}' returned {response.StatusCode}";
+            errorDetails.Description = $"Call to '{path}' returned {response.StatusCode}";
 
             switch (response.StatusCode)
             {
@@ -76,12 +189,421 @@ internal sealed class HttpAdapter
             }
         }
 
-        var json = await response.Content.ReadAsStringAsync(cancellationToken).ConfigureAwait(false);
-        jobContext.State = JsonSerializer.Deserialize<object>(json);
+        if (description?.OutputType == FunctionDescription.ContentType.Multipart || IsMultipart(response.Content.Headers.ContentType))
+        {
+            JsonObject? output = await ReadMultipartContentAsync(response.Content, cancellationToken).ConfigureAwait(false);
+            if (output == null)
+            {
+                errorDetails.Message = "Invalid function response";
+                errorDetails.Description = $"Call to '{path}' returned an invalid multipart response";
+                activity?.SetStatus(ActivityStatusCode.Error, "Invalid function response");
+                return (false, Results.InternalServerError(errorDetails));
+            }
+
+            jobContext.State = output;
+            return (true, null);
+        }
+
+        Stream stream = await response.Content.ReadAsStreamAsync(cancellationToken).ConfigureAwait(false);
+        await using (stream.ConfigureAwait(false))
+        {
+            jobContext.State = await JsonSerializer.DeserializeAsync<object>(stream, cancellationToken: cancellationToken).ConfigureAwait(false);
+        }
 
         return (true, null);
     }
 
+    /// <summary>
+    /// Call a function, with a timeout for each attempt, retrying after transient errors, and optionally
+    /// hedging slow calls. Calls to tools failing repeatedly are blocked by a circuit breaker.
+    /// Returns the function response, or the reason of the failure if a response is not available, and
+    /// the timeout of the last attempt, to be disposed by the caller after reading the response content.
+    /// </summary>
+    private async Task<(HttpResponseMessage? response, HttpStatusCode failureStatus, string? failure, CancellationTokenSource? timeoutCts)> SendAsync(
+        HttpClient client,
+        string path,
+        FunctionDetails functionDetails,
+        Step step,
+        Func<CancellationToken, Task<HttpContent>> contentFactory,
+        string jobId,
+        CancellationToken cancellationToken)
+    {
+        CircuitBreaker circuitBreaker = this._circuitBreakers.GetOrAdd(functionDetails.Tool, _ => new CircuitBreaker(
+            this._config.CircuitBreakerFailureThreshold, TimeSpan.FromSeconds(this._config.CircuitBreakerBreakSecs)));
+        TimeSpan timeout = TimeSpan.FromSeconds(step.Timeout ?? this._config.DefaultTimeoutSecs);
+        int retries = step.Retries ?? this._config.DefaultRetries;
+        double backoff = step.Backoff ?? this._config.DefaultBackoffSecs;
+
+        for (int attempt = 0; ; attempt++)
+        {
+            if (!circuitBreaker.TryAcquire())
+            {
+                return (null, HttpStatusCode.ServiceUnavailable, $"calls to '{functionDetails.Tool}' are suspended after repeated failures, try again later", null);
+            }
+
+            HttpResponseMessage? response = null;
+            HttpStatusCode failureStatus = HttpStatusCode.BadGateway;
+            string failure;
+
+            // The timeout covers the whole call, including reading the response content, so it's returned with the response
+            var timeoutCts = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+            timeoutCts.CancelAfter(timeout);
+            try
+            {
+                response = await this.SendHedgedAsync(client, path, contentFactory, timeoutCts.Token).ConfigureAwait(false);
+                if (!IsTransientError(response.StatusCode))
+                {
+                    circuitBreaker.RecordSuccess();
+                    return (response, default, null, timeoutCts);
+                }
+
+                failure = $"returned {response.StatusCode}";
+            }
+            catch (OperationCanceledException) when (!cancellationToken.IsCancellationRequested)
+            {
+                failureStatus = HttpStatusCode.GatewayTimeout;
+                failure = $"no response after {timeout.TotalSeconds} secs";
+            }
+            catch (HttpRequestException e)
+            {
+                failure = e.Message;
+            }
+            catch (Exception)
+            {
+                // E.g. the job has been cancelled, the result of the call is unknown
+                circuitBreaker.Release();
+                timeoutCts.Dispose();
+                throw;
+            }
+
+            if (circuitBreaker.RecordFailure())
+            {
+                this._log.LogWarning("Job {JobId}: Tool '{Tool}' is failing, calls suspended for {Duration} secs",
+                    jobId, functionDetails.Tool, this._config.CircuitBreakerBreakSecs);
+            }
+
+            if (attempt >= retries)
+            {
+                // Return the last response if available, to report the error returned by the function
+                return (response, failureStatus, failure, timeoutCts);
+            }
+
+            timeoutCts.Dispose();
+
+            TimeSpan delay = this.GetRetryDelay(response, backoff, attempt);
+            response?.Dispose();
+
+            this._log.LogWarning("Job {JobId}: Call to '{Tool}' {Function} {Failure}, retrying in {Delay} msecs (retry {Retry} of {Retries})",
+                jobId, functionDetails.Tool, path, failure, delay.TotalMilliseconds, attempt + 1, retries);
+            await Task.Delay(delay, cancellationToken).ConfigureAwait(false);
+        }
+    }
+
+    /// <summary>
+    /// Send a request, and if a response is not received within the hedging delay, send the same request
+    /// again, using the first successful response and cancelling the other request.
+    /// </summary>
+    private async Task<HttpResponseMessage> SendHedgedAsync(
+        HttpClient client,
+        string path,
+        Func<CancellationToken, Task<HttpContent>> contentFactory,
+        CancellationToken cancellationToken)
+    {
+        if (this._config.HedgingDelayMs == 0)
+        {
+            return await SendOnceAsync(client, path, contentFactory, cancellationToken).ConfigureAwait(false);
+        }
+
+        using var primaryCts = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+        Task<HttpResponseMessage> primary = SendOnceAsync(client, path, contentFactory, primaryCts.Token);
+        Task delay = Task.Delay(this._config.HedgingDelayMs, cancellationToken);
+        if (await Task.WhenAny(primary, delay).ConfigureAwait(false) == primary)
+        {
+            return await primary.ConfigureAwait(false);
+        }
+
+        cancellationToken.ThrowIfCancellationRequested();
+
+        using var hedgeCts = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+        Task<HttpResponseMessage> hedge = SendOnceAsync(client, path, contentFactory, hedgeCts.Token);
+        Task<HttpResponseMessage> first = await Task.WhenAny(primary, hedge).ConfigureAwait(false);
+        Task<HttpResponseMessage> second = first == primary ? hedge : primary;
+
+        // If the first call failed, wait for the other one
+        if (!first.IsCompletedSuccessfully || IsTransientError(first.Result.StatusCode))
+        {
+            try
+            {
+                HttpResponseMessage response = await second.ConfigureAwait(false);
+                DisposeWhenCompleted(first);
+                return response;
+            }
+            catch (Exception) when (first.IsCompletedSuccessfully)
+            {
+                return first.Result;
+            }
+        }
+
+        (second == primary ? primaryCts : hedgeCts).Cancel();
+        DisposeWhenCompleted(second);
+        return first.Result;
+    }
+
+    private static async Task<HttpResponseMessage> SendOnceAsync(
+        HttpClient client,
+        string path,
+        Func<CancellationToken, Task<HttpContent>> contentFactory,
+        CancellationToken cancellationToken)
+    {
+        using HttpRequestMessage request = new(HttpMethod.Post, path)
+        {
+            Version = HttpVersion.Version11,
+            VersionPolicy = HttpVersionPolicy.RequestVersionOrLower,
+            Content = await contentFactory(cancellationToken).ConfigureAwait(false),
+        };
+
+        // Return as soon as the headers are available, the content is read from the response stream
+        return await client.SendAsync(request, HttpCompletionOption.ResponseHeadersRead, cancellationToken).ConfigureAwait(false);
+    }
+
+    private static void DisposeWhenCompleted(Task<HttpResponseMessage> task)
+    {
+        task.ContinueWith(t =>
+        {
+            if (t.IsCompletedSuccessfully) { t.Result.Dispose(); }
+            else { _ = t.Exception; }
+        }, CancellationToken.None, TaskContinuationOptions.ExecuteSynchronously, TaskScheduler.Default);
+    }
+
+    /// <summary>
+    /// Delay before the next retry: the delay requested by the function if any, otherwise an
+    /// exponential backoff, e.g. 1, 2, 4 secs. The delay is capped by MaxRetryDelaySecs.
+    /// </summary>
+    private TimeSpan GetRetryDelay(HttpResponseMessage? response, double backoff, int attempt)
+    {
+        TimeSpan delay = TryGetDelayFromResponse(response) ?? TimeSpan.FromSeconds(backoff * Math.Pow(2, attempt));
+        TimeSpan maxDelay = TimeSpan.FromSeconds(this._config.MaxRetryDelaySecs);
+        return delay > maxDelay ? maxDelay : delay;
+    }
+
+    // See CommonDotNet.Http.ClientSequentialRetryPolicy
+    private static TimeSpan? TryGetDelayFromResponse(HttpResponseMessage? response)
+    {
+        if (response == null || (response.StatusCode != HttpStatusCode.TooManyRequests && response.StatusCode != HttpStatusCode.ServiceUnavailable))
+        {
+            return null;
+        }
+
+        foreach (string header in s_retryAfterMsHeaders)
+        {
+            if (response.Headers.TryGetValues(header, out IEnumerable<string>? values)
+                && double.TryParse(values.FirstOrDefault(), NumberStyles.Float, CultureInfo.InvariantCulture, out double msecs)
+                && msecs > 0)
+            {
+                return TimeSpan.FromMilliseconds(msecs);
+            }
+        }
+
+        if (response.Headers.RetryAfter?.Delta is { } delta && delta > TimeSpan.Zero) { return delta; }
+
+        if (response.Headers.RetryAfter?.Date is { } date && date > DateTimeOffset.UtcNow) { return date - DateTimeOffset.UtcNow; }
+
+        return null;
+    }
+
+    private static bool IsTransientError(HttpStatusCode statusCode)
+    {
+        return statusCode is HttpStatusCode.RequestTimeout or HttpStatusCode.TooManyRequests
+            or HttpStatusCode.BadGateway or HttpStatusCode.ServiceUnavailable or HttpStatusCode.GatewayTimeout;
+    }
+
+    /// <summary>
+    /// Get the function content types from the tool registry. Functions not registered, e.g. when
+    /// Redis is not available, are called using JSON.
+    /// </summary>
+    private async Task<FunctionDescription?> GetFunctionDescriptionAsync(FunctionDetails functionDetails, string jobId)
+    {
+        if (this._toolRegistry == null) { return null; }
+
+        try
+        {
+            return await this._toolRegistry.GetFunctionAsync(functionDetails.Tool, $"/{functionDetails.Function.Trim('/')}").ConfigureAwait(false);
+        }
+        catch (Exception e) when (e is RedisException or JsonException)
+        {
+            this._log.LogWarning(e, "Job {JobId}: Unable to fetch details of function '{Tool}{Function}', using JSON",
+                jobId, functionDetails.Tool, functionDetails.Function);
+            return null;
+        }
+    }
+
+    /// <summary>
+    /// Send the step input as multipart form data: files are sent as binary parts, without base64
+    /// encoding, and files stored in the workspace are streamed. Strings are sent as text fields,
+    /// other values as JSON fields. Returns null if the input is not valid.
+    /// </summary>
+    private async Task<MultipartFormDataContent?> CreateMultipartContentAsync(string jobId, object? state, CancellationToken cancellationToken)
+    {
+        if ((state as JsonNode ?? JsonSerializer.SerializeToNode(state)) is not JsonObject input) { return null; }
+
+        var content = new MultipartFormDataContent();
+        try
+        {
+            // Single file, e.g. { "fileName": "...", "content": "..." }
+            if (IsFile(input))
+            {
+                if (!await this.AddFileAsync(jobId, content, FileMultipartField, input, cancellationToken).ConfigureAwait(false)) { return null; }
+            }
+
+            // Multiple files, e.g. { "files": [ { "fileName": "...", "content": "..." }, ... ] }
+            if (input[SimpleWorkspace.FileArrayField] is JsonArray files)
+            {
+                foreach (JsonNode? file in files)
+                {
+                    if (file is not JsonObject fileData || !IsFile(fileData)) { return null; }
+
+                    if (!await this.AddFileAsync(jobId, content, SimpleWorkspace.FileArrayField, fileData, cancellationToken).ConfigureAwait(false)) { return null; }
+                }
+            }
+
+            foreach (KeyValuePair<string, JsonNode?> field in input)
+            {
+                if (field.Value == null || IsFileField(input, field.Key)) { continue; }
+
+                if (field.Value is JsonValue value && value.GetValueKind() == JsonValueKind.String)
+                {
+                    content.Add(new StringContent(value.GetValue<string>()), field.Key);
+                }
+                else
+                {
+                    content.Add(new StringContent(field.Value.ToJsonString(), new MediaTypeHeaderValue("application/json")), field.Key);
+                }
+            }
+
+            MultipartFormDataContent result = content;
+            content = null!;
+            return result;
+        }
+        finally
+        {
+            content?.Dispose();
+        }
+    }
+
+    private async Task<bool> AddFileAsync(string jobId, MultipartFormDataContent content, string name, JsonObject file, CancellationToken cancellationToken)
+    {
+        string fileName = file[SimpleWorkspace.FileNameField]?.GetValue<string>() ?? name;
+
+        HttpContent fileContent;
+        if (file[SimpleWorkspace.FileHandleField] is JsonValue handle)
+        {
+            Stream? stream = await this._workspace.OpenUploadAsync(jobId, handle.GetValue<string>(), cancellationToken).ConfigureAwait(false);
+            if (stream == null) { return false; }
+
+            fileContent = new StreamContent(stream);
+        }
+        else
+        {
+            try
+            {
+                fileContent = new ByteArrayContent(Convert.FromBase64String(file[SimpleWorkspace.FileContentField]?.GetValue<string>() ?? string.Empty));
+            }
+            catch (FormatException)
+            {
+                return false;
+            }
+        }
+
+        fileContent.Headers.ContentType = new MediaTypeHeaderValue("application/octet-stream");
+        content.Add(fileContent, name, fileName);
+        return true;
+    }
+
+    /// <summary>
+    /// Read a multipart response into an object, using the same format of the job input:
+    /// files are base64 encoded, JSON fields are parsed, and other fields are read as text.
+    /// </summary>
+    private static async Task<JsonObject?> ReadMultipartContentAsync(HttpContent httpContent, CancellationToken cancellationToken)
+    {
+        string? boundary = httpContent.Headers.ContentType?.Parameters
+            .FirstOrDefault(x => string.Equals(x.Name, "boundary", StringComparison.OrdinalIgnoreCase))?.Value;
+        if (string.IsNullOrWhiteSpace(boundary)) { return null; }
+
+        var output = new JsonObject();
+        var files = new List<JsonObject>();
+
+        Stream stream = await httpContent.ReadAsStreamAsync(cancellationToken).ConfigureAwait(false);
+        await using (stream.ConfigureAwait(false))
+        {
+            var reader = new MultipartReader(HeaderUtilities.RemoveQuotes(boundary).ToString(), stream);
+            MultipartSection? section;
+            while ((section = await reader.ReadNextSectionAsync(cancellationToken).ConfigureAwait(false)) != null)
+            {
+                if (!ContentDispositionHeaderValue.TryParse(section.ContentDisposition, out ContentDispositionHeaderValue? contentDisposition))
+                {
+                    continue;
+                }
+
+                if (contentDisposition.IsFileDisposition())
+                {
+                    using var data = new MemoryStream();
+                    await section.Body.CopyToAsync(data, cancellationToken).ConfigureAwait(false);
+                    files.Add(new JsonObject
+                    {
+                        [SimpleWorkspace.FileNameField] = HeaderUtilities.RemoveQuotes(contentDisposition.FileNameStar.HasValue
+                            ? contentDisposition.FileNameStar
+                            : contentDisposition.FileName).ToString(),
+                        [SimpleWorkspace.FileContentField] = Convert.ToBase64String(data.GetBuffer(), 0, (int)data.Length),
+                    });
+                    continue;
+                }
+
+                string name = HeaderUtilities.RemoveQuotes(contentDisposition.Name).ToString();
+                using var valueReader = new StreamReader(section.Body);
+                string value = await valueReader.ReadToEndAsync(cancellationToken).ConfigureAwait(false);
+                try
+                {
+                    output[name] = section.ContentType?.StartsWith("application/json", StringComparison.OrdinalIgnoreCase) == true
+                        ? JsonNode.Parse(value)
+                        : value;
+                }
+                catch (JsonException)
+                {
+                    return null;
+                }
+            }
+        }
+
+        if (files.Count == 1)
+        {
+            output[SimpleWorkspace.FileNameField] = files[0][SimpleWorkspace.FileNameField]!.DeepClone();
+            output[SimpleWorkspace.FileContentField] = files[0][SimpleWorkspace.FileContentField]!.DeepClone();
+        }
+        else if (files.Count > 1)
+        {
+            output[SimpleWorkspace.FileArrayField] = new JsonArray(files.ToArray<JsonNode?>());
+        }
+
+        return output;
+    }
+
+    private static bool IsMultipart(MediaTypeHeaderValue? contentType)
+    {
+        return contentType?.MediaType?.StartsWith("multipart/", StringComparison.OrdinalIgnoreCase) == true;
+    }
+
+    private static bool IsFile(JsonObject data)
+    {
+        return data.ContainsKey(SimpleWorkspace.FileContentField) || data.ContainsKey(SimpleWorkspace.FileHandleField);
+    }
+
+    private static bool IsFileField(JsonObject input, string field)
+    {
+        return field == SimpleWorkspace.FileArrayField
+               || (IsFile(input) && field is SimpleWorkspace.FileNameField or SimpleWorkspace.FileContentField
+                   or SimpleWorkspace.FileHandleField or SimpleWorkspace.FileLengthField);
+    }
+
     private HttpClient? GetHttpClient(FunctionDetails functionDetails, string jobId)
     {
         this._log.LogDebug("Job {JobId}: Searching HTTP client for tool '{Tool}', function '{Function}'",
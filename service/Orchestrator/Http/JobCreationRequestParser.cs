@@ -1,9 +1,15 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
+using System.Buffers;
+using System.IO.Pipelines;
 using System.Text.Json;
 using System.Text.Json.Nodes;
+using System.Text.Json.Serialization;
+using Microsoft.AspNetCore.WebUtilities;
 using Microsoft.Extensions.Primitives;
+using Microsoft.Net.Http.Headers;
 using Orchestrator.Models;
+using Orchestrator.Orchestration;
 
 namespace Orchestrator.Http;
 
@@ -20,119 +26,243 @@ internal static class JobCreationRequestParser
         CommentHandling = JsonCommentHandling.Skip,
     };
 
+    // Same as the options above, used to deserialize requests directly from the body stream
+    private static readonly JsonSerializerOptions s_jsonSerializerOpts = new()
+    {
+        PropertyNameCaseInsensitive = true,
+        AllowTrailingCommas = true,
+        ReadCommentHandling = JsonCommentHandling.Skip,
+    };
+
+    /// <summary>
+    /// Body of a job request: the workflow, and all the other fields used as job input.
+    /// </summary>
+    private sealed class JobRequest
+    {
+        private Workflow? _workflow;
+
+        [JsonPropertyName(WorkflowField)]
+        public Workflow? Workflow
+        {
+            get => this._workflow;
+            set
+            {
+                this._workflow = value;
+                this.HasWorkflow = true;
+            }
+        }
+
+        [JsonIgnore]
+        public bool HasWorkflow { get; private set; }
+
+        // Populated by the deserializer, with the same node options used for other inputs
+        [JsonExtensionData]
+        public JsonObject? Input { get; set; } = new(s_jsonOpts);
+    }
+
+    /// <summary>
+    /// Body of a batch request: the workflow, and the input of each job. Other fields are ignored.
+    /// </summary>
+    private sealed class BatchRequest
+    {
+        private Workflow? _workflow;
+
+        [JsonPropertyName(WorkflowField)]
+        public Workflow? Workflow
+        {
+            get => this._workflow;
+            set
+            {
+                this._workflow = value;
+                this.HasWorkflow = true;
+            }
+        }
+
+        [JsonIgnore]
+        public bool HasWorkflow { get; private set; }
+
+        [JsonPropertyName(BatchInputsField)]
+        public List<JsonObject?>? Inputs { get; set; }
+    }
+
     private const string JsonPrefixHeader = "X-Content-Type-JSON-prefix";
     private const string JsonFieldHeaderPrefix = "X-Content-Type-";
     private const string JsonContentType = "application/json";
     private const string DefaultJsonMultipartFieldPrefix = "$";
     private const string WorkflowField = "_workflow";
-    private const string FileNameField = "fileName";
-    private const string FileContentField = "content";
+    private const string BatchInputsField = "inputs";
+    private const string FileNameField = SimpleWorkspace.FileNameField;
+    private const string FileContentField = SimpleWorkspace.FileContentField;
     private const string FileArrayMultipartField = "files";
-    private const string FileArrayParsedField = "files";
+    private const string FileArrayParsedField = SimpleWorkspace.FileArrayField;
 
     /// <summary>
     /// Parse JSON input from the request body.
     /// Take _workflow field and parse it into a Workflow.Steps property.
     /// Take the rest of the JSON and assign it to Workflow.Input property.
+    /// The body is deserialized directly from the request stream, without loading it into a string first.
     /// </summary>
     public static async Task<(Workflow? workflow, JsonObject? input, IResult? error)> ParseJsonInputAsync(
         HttpContext context,
         CancellationToken cancellationToken)
     {
-        using var reader = new StreamReader(context.Request.Body);
-        var body = await reader.ReadToEndAsync(cancellationToken).ConfigureAwait(false);
+        var (request, error) = await ReadJsonBodyAsync<JobRequest>(context, cancellationToken).ConfigureAwait(false);
+        if (request == null) { return (null, null, error); }
 
-        if (string.IsNullOrWhiteSpace(body))
+        if (!request.HasWorkflow)
         {
-            return (null, null, Results.BadRequest("Request body cannot be empty, and must be a valid JSON object"));
+            return (null, null, Results.BadRequest($"JSON must contain a '{WorkflowField}' field describing the operations to execute"));
         }
 
-        // Payload JSON deserialization and validation
-        JsonObject? input;
-        try
+        var (workflow, workflowError) = PrepareWorkflow(request.Workflow);
+        if (workflow == null) { return (null, null, workflowError); }
+
+        return (workflow, request.Input ?? new JsonObject(s_jsonOpts), null);
+    }
+
+    /// <summary>
+    /// Parse a batch of jobs from the request body.
+    /// Take _workflow field and parse it into a Workflow, shared by all the jobs.
+    /// Take the "inputs" array and use each item as the input of a separate job.
+    /// </summary>
+    public static async Task<(Workflow? workflow, List<JsonObject>? inputs, IResult? error)> ParseJsonBatchInputAsync(
+        HttpContext context,
+        int maxBatchSize,
+        CancellationToken cancellationToken)
+    {
+        var (request, error) = await ReadJsonBodyAsync<BatchRequest>(context, cancellationToken).ConfigureAwait(false);
+        if (request == null) { return (null, null, error); }
+
+        if (!request.HasWorkflow)
         {
-            input = JsonNode.Parse(body, s_jsonOpts, s_jsonDocOpts) as JsonObject;
-            if (input == null || !input.ContainsKey(WorkflowField))
-            {
-                return (null, null, Results.BadRequest($"JSON must contain a '{WorkflowField}' field describing the operations to execute"));
-            }
+            return (null, null, Results.BadRequest($"JSON must contain a '{WorkflowField}' field describing the operations to execute"));
         }
-        catch (JsonException)
+
+        if (request.Inputs == null)
         {
-            return (null, null, Results.BadRequest("Invalid JSON format"));
+            return (null, null, Results.BadRequest($"JSON must contain a '{BatchInputsField}' array, with the input of each job"));
         }
 
-        // Workflow JSON deserialization
-        Workflow workflow = new();
-        try
+        if (request.Inputs.Count > maxBatchSize)
         {
-            if (input.TryGetPropertyValue(WorkflowField, out var workflowNode))
-            {
-                workflow = workflowNode.Deserialize<Workflow>() ?? new Workflow();
-            }
+            return (null, null, Results.BadRequest($"Too many inputs, the max batch size is {maxBatchSize}"));
         }
-        catch (JsonException)
+
+        var inputs = new List<JsonObject>(request.Inputs.Count);
+        foreach (JsonObject? input in request.Inputs)
         {
-            return (null, null, Results.BadRequest($"Invalid JSON format in '{WorkflowField}' field"));
+            if (input == null)
+            {
+                return (null, null, Results.BadRequest($"Each item in '{BatchInputsField}' must be a JSON object"));
+            }
+
+            inputs.Add(input);
         }
 
-        AssignIdToJob(workflow);
+        var (workflow, workflowError) = PrepareWorkflow(request.Workflow);
+        if (workflow == null) { return (null, null, workflowError); }
 
-        input.Remove(WorkflowField);
+        return (workflow, inputs, null);
+    }
 
-        if (!AssignIdToSteps(workflow, out string errorMessage))
+    /// <summary>
+    /// Parse multipart input from the request body, reading one section at a time.
+    /// Files up to maxInMemoryFileSize bytes are included in the input, base64 encoded.
+    /// Larger files are stored in the job workspace, and the input contains a reference to the file.
+    /// </summary>
+    public static async Task<(Workflow? workflow, JsonObject? input, IResult? error)> ParseMultipartInputAsync(
+        HttpContext context,
+        SimpleWorkspace workspace,
+        int maxInMemoryFileSize,
+        CancellationToken cancellationToken)
+    {
+        // Large files are buffered in temp files until the job ID is known, which
+        // can happen only after reading the whole request, e.g. when files come before "_workflow"
+        var uploads = new List<(JsonObject file, FileBufferingReadStream content)>();
+        try
         {
-            return (null, null, Results.BadRequest(errorMessage));
-        }
+            var (workflow, input, error) = await ParseMultipartInputAsync(context, maxInMemoryFileSize, uploads, cancellationToken).ConfigureAwait(false);
+            if (workflow == null) { return (null, null, error); }
 
-        return (workflow, input, null);
+            AssignIdToJob(workflow);
+            foreach ((JsonObject file, FileBufferingReadStream content) in uploads)
+            {
+                content.Seek(0, SeekOrigin.Begin);
+                file[SimpleWorkspace.FileHandleField] = await workspace.StoreUploadAsync(workflow.JobId, content, cancellationToken).ConfigureAwait(false);
+            }
+
+            return (workflow, input, null);
+        }
+        finally
+        {
+            foreach ((JsonObject _, FileBufferingReadStream content) in uploads)
+            {
+                await content.DisposeAsync().ConfigureAwait(false);
+            }
+        }
     }
 
-    public static async Task<(Workflow? workflow, JsonObject? input, IResult? error)> ParseMultipartInputAsync(
+    private static async Task<(Workflow? workflow, JsonObject? input, IResult? error)> ParseMultipartInputAsync(
         HttpContext context,
+        int maxInMemoryFileSize,
+        List<(JsonObject file, FileBufferingReadStream content)> uploads,
         CancellationToken cancellationToken)
     {
-        IFormCollection form = await context.Request.ReadFormAsync(cancellationToken).ConfigureAwait(false);
+        string? boundary = GetMultipartBoundary(context.Request.ContentType);
+        if (boundary == null)
+        {
+            return (null, null, Results.BadRequest("Invalid multipart request, the boundary is missing"));
+        }
+
         JsonObject input = new();
         Workflow workflow = new();
+        var files = new List<JsonObject>();
+        var form = new Dictionary<string, StringValues>(StringComparer.Ordinal);
 
-        if (form.Files.Count == 1)
+        var reader = new MultipartReader(boundary, context.Request.Body);
+        MultipartSection? section;
+        while ((section = await reader.ReadNextSectionAsync(cancellationToken).ConfigureAwait(false)) != null)
         {
-            foreach (var file in form.Files)
+            if (!ContentDispositionHeaderValue.TryParse(section.ContentDisposition, out ContentDispositionHeaderValue? contentDisposition))
             {
-                using var ms = new MemoryStream();
-                await file.CopyToAsync(ms, cancellationToken).ConfigureAwait(false);
-                input[FileContentField] = Convert.ToBase64String(ms.ToArray());
-                input[FileNameField] = file.FileName;
+                continue;
             }
-        }
-        else if (form.Files.Count > 1)
-        {
-            var fileArray = new JsonArray();
 
-            foreach (var file in form.Files)
+            if (contentDisposition.IsFileDisposition())
             {
-                var fileData = new JsonObject
-                {
-                    [FileNameField] = file.FileName
-                };
-
-                using var ms = new MemoryStream();
-                await file.CopyToAsync(ms, cancellationToken).ConfigureAwait(false);
-                fileData[FileContentField] = Convert.ToBase64String(ms.ToArray());
-
-                fileArray.Add(fileData);
+                string fileName = HeaderUtilities.RemoveQuotes(contentDisposition.FileNameStar.HasValue
+                    ? contentDisposition.FileNameStar
+                    : contentDisposition.FileName).ToString();
+                files.Add(await ReadFileSectionAsync(section, fileName, maxInMemoryFileSize, uploads, cancellationToken).ConfigureAwait(false));
+            }
+            else if (contentDisposition.IsFormDisposition())
+            {
+                string name = HeaderUtilities.RemoveQuotes(contentDisposition.Name).ToString();
+                using var valueReader = new StreamReader(section.Body);
+                string value = await valueReader.ReadToEndAsync(cancellationToken).ConfigureAwait(false);
+                form[name] = form.TryGetValue(name, out StringValues values) ? StringValues.Concat(values, value) : new StringValues(value);
             }
+        }
 
-            input[FileArrayParsedField] = fileArray;
+        if (files.Count == 1)
+        {
+            foreach (KeyValuePair<string, JsonNode?> x in files[0].ToList())
+            {
+                files[0].Remove(x.Key);
+                input[x.Key] = x.Value;
+            }
+        }
+        else if (files.Count > 1)
+        {
+            input[FileArrayParsedField] = new JsonArray(files.ToArray<JsonNode?>());
         }
 
         /*
          * Multipart form data can contain multiple fields, of different types.
          *
-         * .NET IFormCollection doesn't provide a way to get the content type of each field,
-         * so we use a few conventions:
-         * 1. For files, only Base 64 encoded content is supported.
+         * Clients usually don't set the content type of each field, so we use a few conventions:
+         * 1. For files, only Base 64 encoded content is supported. Large files are stored in the workspace,
+         *    and the "content" field is replaced by a "contentHandle" field, see MaxInMemoryFileSizeKb.
          * 2. For text fields, only Plain Test and JSON encoded content is supported.
          * 3. The "_workflow" field is a special field, always JSON encoded.
          * 4. Unless specified otherwise (see option 1), all other text fields are retrieved as plain text.
@@ -234,6 +364,143 @@ internal static class JobCreationRequestParser
         return (workflow, input, null);
     }
 
+    private static async Task<(T? body, IResult? error)> ReadJsonBodyAsync<T>(
+        HttpContext context,
+        CancellationToken cancellationToken) where T : class
+    {
+        // Empty and whitespace only bodies, including chunked requests without a content length
+        PipeReader bodyReader = context.Request.BodyReader;
+        if (!await SkipWhitespaceAsync(bodyReader, cancellationToken).ConfigureAwait(false))
+        {
+            return (null, Results.BadRequest("Request body cannot be empty, and must be a valid JSON object"));
+        }
+
+        // Payload JSON deserialization and validation
+        try
+        {
+            Stream bodyStream = bodyReader.AsStream(leaveOpen: true);
+            await using (bodyStream.ConfigureAwait(false))
+            {
+                T? body = await JsonSerializer.DeserializeAsync<T>(bodyStream, s_jsonSerializerOpts, cancellationToken).ConfigureAwait(false);
+                return body == null
+                    ? (null, Results.BadRequest("Request body cannot be empty, and must be a valid JSON object"))
+                    : (body, null);
+            }
+        }
+        catch (JsonException e) when (e.Path != null && e.Path.StartsWith($"$.{WorkflowField}", StringComparison.OrdinalIgnoreCase))
+        {
+            return (null, Results.BadRequest($"Invalid JSON format in '{WorkflowField}' field"));
+        }
+        catch (JsonException e) when (e.Path != null && e.Path.StartsWith($"$.{BatchInputsField}[", StringComparison.OrdinalIgnoreCase))
+        {
+            return (null, Results.BadRequest($"Each item in '{BatchInputsField}' must be a JSON object"));
+        }
+        catch (JsonException e) when (e.Path != null && e.Path.Equals($"$.{BatchInputsField}", StringComparison.OrdinalIgnoreCase))
+        {
+            return (null, Results.BadRequest($"JSON must contain a '{BatchInputsField}' array, with the input of each job"));
+        }
+        catch (JsonException)
+        {
+            return (null, Results.BadRequest("Invalid JSON format"));
+        }
+    }
+
+    /// <summary>
+    /// Skip the whitespace at the start of the body, without buffering the rest of the body.
+    /// Returns false if the body contains only whitespace.
+    /// </summary>
+    private static async Task<bool> SkipWhitespaceAsync(PipeReader reader, CancellationToken cancellationToken)
+    {
+        while (true)
+        {
+            ReadResult result = await reader.ReadAsync(cancellationToken).ConfigureAwait(false);
+            SequencePosition? start = FindNonWhitespace(result.Buffer);
+            if (start != null)
+            {
+                reader.AdvanceTo(start.Value);
+                return true;
+            }
+
+            reader.AdvanceTo(result.Buffer.End);
+            if (result.IsCompleted) { return false; }
+        }
+    }
+
+    private static SequencePosition? FindNonWhitespace(in ReadOnlySequence<byte> buffer)
+    {
+        var sequence = new SequenceReader<byte>(buffer);
+        sequence.AdvancePastAny((byte)' ', (byte)'\t', (byte)'\r', (byte)'\n');
+        return sequence.End ? null : sequence.Position;
+    }
+
+    /// <summary>
+    /// Read a file, keeping it in memory if small, otherwise storing it in the workspace.
+    /// The file is buffered in memory up to the max size, and in a temp file after that.
+    /// </summary>
+    private static async Task<JsonObject> ReadFileSectionAsync(
+        MultipartSection section,
+        string fileName,
+        int maxInMemoryFileSize,
+        List<(JsonObject file, FileBufferingReadStream content)> uploads,
+        CancellationToken cancellationToken)
+    {
+        var fileData = new JsonObject { [FileNameField] = fileName };
+
+        var buffer = new FileBufferingReadStream(section.Body, maxInMemoryFileSize);
+        try
+        {
+            await buffer.DrainAsync(cancellationToken).ConfigureAwait(false);
+        }
+        catch
+        {
+            await buffer.DisposeAsync().ConfigureAwait(false);
+            throw;
+        }
+
+        if (!buffer.InMemory)
+        {
+            // Stored in the job workspace later, the buffer is disposed by the caller
+            fileData[SimpleWorkspace.FileLengthField] = buffer.Length;
+            uploads.Add((fileData, buffer));
+            return fileData;
+        }
+
+        await using (buffer.ConfigureAwait(false))
+        {
+            buffer.Seek(0, SeekOrigin.Begin);
+            using var ms = new MemoryStream((int)buffer.Length);
+            await buffer.CopyToAsync(ms, cancellationToken).ConfigureAwait(false);
+            fileData[FileContentField] = Convert.ToBase64String(ms.GetBuffer(), 0, (int)ms.Length);
+        }
+
+        return fileData;
+    }
+
+    private static string? GetMultipartBoundary(string? contentType)
+    {
+        if (!MediaTypeHeaderValue.TryParse(contentType, out MediaTypeHeaderValue? mediaType)) { return null; }
+
+        string boundary = HeaderUtilities.RemoveQuotes(mediaType.Boundary).ToString();
+        return string.IsNullOrWhiteSpace(boundary) ? null : boundary;
+    }
+
+    /// <summary>
+    /// Assign IDs to the job and its steps, and validate the steps.
+    /// </summary>
+    private static (Workflow? workflow, IResult? error) PrepareWorkflow(Workflow? workflow)
+    {
+        workflow ??= new Workflow();
+
+        AssignIdToJob(workflow);
+
+        if (!AssignIdToSteps(workflow, out string errorMessage))
+        {
+            return (null, Results.BadRequest(errorMessage));
+        }
+
+        return (workflow, null);
+    }
+
     private static void AssignIdToJob(Workflow workflow)
     {
         if (string.IsNullOrEmpty(workflow.JobId))
@@ -268,7 +535,36 @@ internal static class JobCreationRequestParser
             stepIdsUsed.Add(step.Id);
         }
 
-        return true;
+        // Check the call options, when set
+        foreach (var step in workflow.Steps)
+        {
+            if (step.Timeout is <= 0)
+            {
+                errorMessage = $"Step '{step.Id}' has an invalid timeout, the value must be greater than zero";
+                return false;
+            }
+
+            if (step.Retries is < 0)
+            {
+                errorMessage = $"Step '{step.Id}' has an invalid number of retries, the value cannot be negative";
+                return false;
+            }
+
+            if (step.Backoff is < 0)
+            {
+                errorMessage = $"Step '{step.Id}' has an invalid backoff, the value cannot be negative";
+                return false;
+            }
+
+            if (step.CacheTtl is <= 0)
+            {
+                errorMessage = $"Step '{step.Id}' has an invalid cache TTL, the value must be greater than zero";
+                return false;
+            }
+        }
+
+        // Steps can depend only on previous steps
+        return WorkflowGraph.ValidateDependencies(workflow, out errorMessage);
     }
 
     /// <summary>
@@ -0,0 +1,39 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace Orchestrator.Models;
+
+/// <summary>
+/// Result of one job in a batch, streamed back as a NDJSON line.
+/// </summary>
+internal sealed class BatchItemResult
+{
+    /// <summary>
+    /// Position of the input in the batch request.
+    /// </summary>
+    [JsonPropertyName("index")]
+    [JsonPropertyOrder(0)]
+    public int Index { get; set; }
+
+    [JsonPropertyName("jobId")]
+    [JsonPropertyOrder(1)]
+    public string JobId { get; set; } = string.Empty;
+
+    /// <summary>
+    /// HTTP status code the job would have returned if executed individually.
+    /// </summary>
+    [JsonPropertyName("status")]
+    [JsonPropertyOrder(2)]
+    public int Status { get; set; }
+
+    [JsonPropertyName("result")]
+    [JsonPropertyOrder(3)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public object? Result { get; set; }
+
+    [JsonPropertyName("error")]
+    [JsonPropertyOrder(4)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public object? Error { get; set; }
+}
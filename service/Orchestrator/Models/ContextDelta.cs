@@ -0,0 +1,28 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace Orchestrator.Models;
+
+/// <summary>
+/// Changes to the job context made by a step, stored in the step log.
+/// Replaying the log on top of the initial context rebuilds the full context.
+/// </summary>
+internal sealed class ContextDelta
+{
+    [JsonPropertyName("step")]
+    public string StepId { get; set; } = string.Empty;
+
+    [JsonPropertyName("in")]
+    public object? In { get; set; }
+
+    [JsonPropertyName("out")]
+    public object? Out { get; set; }
+
+    /// <summary>
+    /// State after the step, only when different from "out", e.g. when the step fails.
+    /// </summary>
+    [JsonPropertyName("state")]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public object? State { get; set; }
+}
@@ -0,0 +1,58 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace Orchestrator.Models;
+
+/// <summary>
+/// Status of a job submitted in async mode, stored in the job workspace.
+/// </summary>
+internal sealed class JobStatus
+{
+    [JsonConverter(typeof(JsonStringEnumConverter))]
+    public enum States
+    {
+        Queued,
+        Running,
+        Completed,
+        Failed,
+    }
+
+    [JsonPropertyName("jobId")]
+    [JsonPropertyOrder(0)]
+    public string JobId { get; set; } = string.Empty;
+
+    [JsonPropertyName("status")]
+    [JsonPropertyOrder(1)]
+    public States State { get; set; } = States.Queued;
+
+    [JsonPropertyName("createdAt")]
+    [JsonPropertyOrder(10)]
+    public DateTimeOffset CreatedAt { get; set; } = DateTimeOffset.UtcNow;
+
+    [JsonPropertyName("startedAt")]
+    [JsonPropertyOrder(11)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public DateTimeOffset? StartedAt { get; set; }
+
+    [JsonPropertyName("completedAt")]
+    [JsonPropertyOrder(12)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public DateTimeOffset? CompletedAt { get; set; }
+
+    /// <summary>
+    /// HTTP status code the job would have returned if executed synchronously.
+    /// </summary>
+    [JsonPropertyName("statusCode")]
+    [JsonPropertyOrder(20)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public int? StatusCode { get; set; }
+
+    [JsonPropertyName("error")]
+    [JsonPropertyOrder(21)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public object? Error { get; set; }
+
+    [JsonIgnore]
+    public bool IsFinal => this.State is States.Completed or States.Failed;
+}
@@ -41,4 +41,11 @@ internal sealed class ToolInfo
     [JsonPropertyName("swaggerUrl")]
     [JsonPropertyOrder(3)]
     public string SwaggerUrl { get; set; } = string.Empty;
+
+    /// <summary>
+    /// Whether the last probe failed, e.g. the tool is not reachable. Other details refer to the last successful probe.
+    /// </summary>
+    [JsonPropertyName("stale")]
+    [JsonPropertyOrder(4)]
+    public bool Stale { get; set; } = false;
 }
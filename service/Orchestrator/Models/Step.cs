@@ -13,6 +13,34 @@ internal sealed class Step
     [JsonPropertyOrder(0)]
     public string Id { get; set; } = string.Empty;
 
+    /// <summary>
+    /// Optional list of IDs of previous steps this step depends on.
+    /// When at least one step in the workflow declares its dependencies, steps run as a graph,
+    /// and independent steps run concurrently. See <see cref="Orchestration.WorkflowGraph"/>.
+    /// </summary>
+    [JsonPropertyName("dependsOn")]
+    [JsonPropertyOrder(1)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public List<string>? DependsOn { get; set; }
+
+    /// <summary>
+    /// Optional JMESPath expression selecting an array from the job context.
+    /// When set, the step is a "map" step: xin and the function are applied to each element
+    /// of the array, which is used as the state, concurrently, and the results are gathered
+    /// back into the state, in the same order.
+    /// </summary>
+    [JsonPropertyName("foreach")]
+    [JsonPropertyOrder(5)]
+    public string ForEach { get; set; } = string.Empty;
+
+    /// <summary>
+    /// Max number of elements processed at the same time by a map step.
+    /// Zero (default) to use the orchestrator settings.
+    /// </summary>
+    [JsonPropertyName("maxParallelism")]
+    [JsonPropertyOrder(6)]
+    public int MaxParallelism { get; set; } = 0;
+
     /// <summary>
     /// Optional JMESPath expression to transform the input to the function.
     /// </summary>
@@ -24,10 +52,59 @@ internal sealed class Step
     [JsonPropertyOrder(20)]
     public string Function { get; set; } = string.Empty;
 
+    /// <summary>
+    /// Max number of seconds to wait for the function to respond, for each attempt.
+    /// Null to use the orchestrator settings.
+    /// </summary>
+    [JsonPropertyName("timeout")]
+    [JsonPropertyOrder(21)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public double? Timeout { get; set; }
+
+    /// <summary>
+    /// Max number of times the function is called again after a transient error, e.g. a timeout or a 503.
+    /// Null to use the orchestrator settings, zero to disable retries.
+    /// </summary>
+    [JsonPropertyName("retries")]
+    [JsonPropertyOrder(22)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public int? Retries { get; set; }
+
+    /// <summary>
+    /// Number of seconds to wait before the first retry, doubled on each retry.
+    /// Ignored when the function responds with a Retry-After header.
+    /// Null to use the orchestrator settings.
+    /// </summary>
+    [JsonPropertyName("backoff")]
+    [JsonPropertyOrder(23)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public double? Backoff { get; set; }
+
+    /// <summary>
+    /// Whether to reuse the result of previous calls with the same function and input, without
+    /// calling the function. Use only with deterministic functions.
+    /// </summary>
+    [JsonPropertyName("cache")]
+    [JsonPropertyOrder(24)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public bool? Cache { get; set; }
+
+    /// <summary>
+    /// Number of seconds the function result is cached, when "cache" is enabled.
+    /// Null to use the orchestrator settings.
+    /// </summary>
+    [JsonPropertyName("cacheTtl")]
+    [JsonPropertyOrder(25)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public double? CacheTtl { get; set; }
+
     /// <summary>
     /// Optional JMESPath expression to transform the output of the function.
     /// </summary>
     [JsonPropertyName("xout")]
     [JsonPropertyOrder(30)]
     public string OutputTransformation { get; set; } = string.Empty;
+
+    [JsonIgnore]
+    public bool IsMap => !string.IsNullOrWhiteSpace(this.ForEach);
 }
@@ -0,0 +1,115 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Nodes;
+using System.Threading.Channels;
+using Microsoft.Extensions.Logging.Abstractions;
+using Orchestrator.Config;
+using Orchestrator.Models;
+
+namespace Orchestrator.Orchestration;
+
+/// <summary>
+/// Queue of jobs submitted in async mode. Jobs are executed in the background, and their
+/// status and output are stored in the job workspace, where clients can poll for them.
+/// </summary>
+internal sealed class AsyncJobQueue : BackgroundService
+{
+    private readonly SynchronousOrchestrator _orchestrator;
+    private readonly SimpleWorkspace _workspace;
+    private readonly OrchestrationConfig _config;
+    private readonly Channel<(JsonObject input, Workflow workflow)> _queue;
+    private readonly ILogger<AsyncJobQueue> _log;
+
+    public AsyncJobQueue(
+        SynchronousOrchestrator orchestrator,
+        SimpleWorkspace workspace,
+        AppConfig config,
+        ILoggerFactory? loggerFactory = null)
+    {
+        this._orchestrator = orchestrator;
+        this._workspace = workspace;
+        this._config = config.Orchestration;
+        this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<AsyncJobQueue>();
+        this._queue = Channel.CreateBounded<(JsonObject input, Workflow workflow)>(
+            new BoundedChannelOptions(this._config.MaxQueuedAsyncJobs) { FullMode = BoundedChannelFullMode.Wait });
+    }
+
+    /// <summary>
+    /// Add a job to the queue, storing its initial status in the workspace.
+    /// </summary>
+    /// <returns>The job status, or null if the queue is full</returns>
+    public async Task<JobStatus?> EnqueueAsync(JsonObject input, Workflow workflow, CancellationToken cancellationToken = default)
+    {
+        var status = new JobStatus { JobId = workflow.JobId, State = JobStatus.States.Queued };
+
+        await this._workspace.CreateJobDirectoryAsync(workflow.JobId, cancellationToken).ConfigureAwait(false);
+        await this._workspace.WriteStatusFileAsync(status, cancellationToken).ConfigureAwait(false);
+
+        if (!this._queue.Writer.TryWrite((input, workflow)))
+        {
+            this._log.LogWarning("Job {JobId}: Queue is full, job rejected", workflow.JobId);
+            status.State = JobStatus.States.Failed;
+            status.StatusCode = StatusCodes.Status503ServiceUnavailable;
+            status.Error = "Too many jobs in the queue";
+            await this._workspace.WriteStatusFileAsync(status, cancellationToken).ConfigureAwait(false);
+            return null;
+        }
+
+        this._log.LogDebug("Job {JobId}: Queued", workflow.JobId);
+        return status;
+    }
+
+    protected override Task ExecuteAsync(CancellationToken stoppingToken)
+    {
+        var options = new ParallelOptions { MaxDegreeOfParallelism = this._config.MaxAsyncJobs, CancellationToken = stoppingToken };
+        return Parallel.ForEachAsync(this._queue.Reader.ReadAllAsync(stoppingToken), options,
+            async (job, ct) => await this.RunJobAsync(job.input, job.workflow, ct).ConfigureAwait(false));
+    }
+
+    private async Task RunJobAsync(JsonObject input, Workflow workflow, CancellationToken cancellationToken)
+    {
+        var status = new JobStatus { JobId = workflow.JobId, State = JobStatus.States.Running, StartedAt = DateTimeOffset.UtcNow };
+
+#pragma warning disable CA1031 // job errors are stored in the job status
+        try
+        {
+            JobStatus? queued = await this._workspace.ReadStatusFileAsync(workflow.JobId, cancellationToken).ConfigureAwait(false);
+            status.CreatedAt = queued?.CreatedAt ?? status.StartedAt.Value;
+            await this._workspace.WriteStatusFileAsync(status, cancellationToken).ConfigureAwait(false);
+
+            (object? result, string _, IResult? error) = await this._orchestrator.RunWorkflowAsync(input, workflow, cancellationToken).ConfigureAwait(false);
+            if (error == null)
+            {
+                await this._workspace.WriteResultFileAsync(workflow.JobId, result, cancellationToken).ConfigureAwait(false);
+                status.State = JobStatus.States.Completed;
+                status.StatusCode = StatusCodes.Status200OK;
+            }
+            else
+            {
+                status.State = JobStatus.States.Failed;
+                status.StatusCode = (error as IStatusCodeHttpResult)?.StatusCode ?? StatusCodes.Status500InternalServerError;
+                status.Error = (error as IValueHttpResult)?.Value;
+            }
+        }
+        catch (OperationCanceledException) when (cancellationToken.IsCancellationRequested)
+        {
+            this._log.LogWarning("Job {JobId}: Cancelled, the service is stopping", workflow.JobId);
+            status.State = JobStatus.States.Failed;
+            status.StatusCode = StatusCodes.Status503ServiceUnavailable;
+            status.Error = "Job cancelled, the service is stopping";
+        }
+        catch (Exception e)
+        {
+            this._log.LogError(e, "Job {JobId}: Unexpected error", workflow.JobId);
+            status.State = JobStatus.States.Failed;
+            status.StatusCode = StatusCodes.Status500InternalServerError;
+            status.Error = new { Message = "Job failed", Description = e.Message };
+        }
+#pragma warning restore CA1031
+
+        status.CompletedAt = DateTimeOffset.UtcNow;
+        await this._workspace.WriteStatusFileAsync(status, CancellationToken.None).ConfigureAwait(false);
+        this._log.LogInformation("Job {JobId} {Status} in {Duration} msecs", workflow.JobId, status.State,
+            (status.CompletedAt - status.StartedAt)?.TotalMilliseconds);
+    }
+}
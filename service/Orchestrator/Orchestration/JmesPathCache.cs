@@ -0,0 +1,108 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Diagnostics.Metrics;
+using DevLab.JmesPath;
+using DevLab.JmesPath.Expressions;
+using Orchestrator.Config;
+
+namespace Orchestrator.Orchestration;
+
+/// <summary>
+/// LRU cache of parsed JMESPath expressions, keyed by expression text.
+/// Workflows reuse the same few expressions for every job, and for every item of
+/// batches and "foreach" steps, so parsing each expression once saves most of the
+/// cost of a transformation, apart from the evaluation itself.
+/// Parsed expressions are immutable and can be evaluated concurrently.
+/// </summary>
+internal sealed class JmesPathCache : IDisposable
+{
+    public const string MeterName = "Orchestrator.JmesPath";
+
+    private readonly int _capacity;
+    private readonly Dictionary<string, LinkedListNode<(string expression, JmesPathExpression parsed)>> _index;
+    private readonly LinkedList<(string expression, JmesPathExpression parsed)> _lru = new();
+    private readonly object _lock = new();
+    private readonly Meter _meter;
+    private readonly Counter<long> _hitCounter;
+    private readonly Counter<long> _missCounter;
+    private long _hits;
+    private long _misses;
+
+    public JmesPathCache(AppConfig config)
+    {
+        this._capacity = config.Orchestration.JmesPathCacheSize;
+        this._index = new Dictionary<string, LinkedListNode<(string, JmesPathExpression)>>(this._capacity, StringComparer.Ordinal);
+
+        this._meter = new Meter(MeterName);
+        this._hitCounter = this._meter.CreateCounter<long>("orchestrator.jmespath.cache.hits", description: "JMESPath expressions found in cache");
+        this._missCounter = this._meter.CreateCounter<long>("orchestrator.jmespath.cache.misses", description: "JMESPath expressions parsed and added to cache");
+        this._meter.CreateObservableGauge("orchestrator.jmespath.cache.hit_rate", () => this.HitRate, description: "Ratio of JMESPath expressions found in cache");
+        this._meter.CreateObservableGauge("orchestrator.jmespath.cache.size", () => this.Count, description: "Number of JMESPath expressions in cache");
+    }
+
+    public long Hits => Interlocked.Read(ref this._hits);
+
+    public long Misses => Interlocked.Read(ref this._misses);
+
+    public double HitRate
+    {
+        get
+        {
+            long hits = this.Hits;
+            long total = hits + this.Misses;
+            return total == 0 ? 0 : (double)hits / total;
+        }
+    }
+
+    public int Count
+    {
+        get
+        {
+            lock (this._lock) { return this._index.Count; }
+        }
+    }
+
+    /// <summary>
+    /// Get the parsed expression from the cache, parsing and caching it if not found.
+    /// </summary>
+    public JmesPathExpression GetOrParse(string expression)
+    {
+        lock (this._lock)
+        {
+            if (this._index.TryGetValue(expression, out var node))
+            {
+                this._lru.Remove(node);
+                this._lru.AddFirst(node);
+                Interlocked.Increment(ref this._hits);
+                this._hitCounter.Add(1);
+                return node.Value.parsed;
+            }
+        }
+
+        // Parse outside the lock, concurrent misses of the same expression are harmless
+        JmesPathExpression parsed = new JmesPath().Parse(expression);
+        Interlocked.Increment(ref this._misses);
+        this._missCounter.Add(1);
+
+        lock (this._lock)
+        {
+            if (this._index.ContainsKey(expression)) { return parsed; }
+
+            if (this._index.Count >= this._capacity)
+            {
+                LinkedListNode<(string expression, JmesPathExpression parsed)> last = this._lru.Last!;
+                this._lru.RemoveLast();
+                this._index.Remove(last.Value.expression);
+            }
+
+            this._index[expression] = this._lru.AddFirst((expression, parsed));
+        }
+
+        return parsed;
+    }
+
+    public void Dispose()
+    {
+        this._meter.Dispose();
+    }
+}
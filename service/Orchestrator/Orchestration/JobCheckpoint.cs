@@ -0,0 +1,94 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Diagnostics;
+using Orchestrator.Config;
+using Orchestrator.Models;
+
+namespace Orchestrator.Orchestration;
+
+/// <summary>
+/// Store the context of a running job, according to the configured checkpoint policy.
+/// The context grows with each step, so rather than rewriting the whole context after
+/// each step, the default policy appends only the changes made by each step to a log.
+/// Not thread safe, calls must be serialized by the caller.
+/// </summary>
+internal sealed class JobCheckpoint
+{
+    private readonly SimpleWorkspace _workspace;
+    private readonly string _jobId;
+    private readonly WorkspaceConfig.ContextCheckpointPolicies _policy;
+    private readonly TimeSpan _interval;
+    private long _lastWrite;
+    private bool _logCreated = false;
+    private bool _pendingChanges = false;
+
+    public JobCheckpoint(SimpleWorkspace workspace, string jobId, WorkspaceConfig.ContextCheckpointPolicies policy, TimeSpan interval)
+    {
+        this._workspace = workspace;
+        this._jobId = jobId;
+        this._policy = policy;
+        this._interval = interval;
+
+        // The initial context is stored when the workspace is created
+        this._lastWrite = Stopwatch.GetTimestamp();
+    }
+
+    /// <summary>
+    /// Store the changes made by a step, successful or not.
+    /// </summary>
+    /// <param name="jobContext">Job context, containing the step context</param>
+    /// <param name="stepId">ID of the step</param>
+    /// <param name="state">State after the step</param>
+    /// <param name="ct">Async task cancellation token</param>
+    public async Task StepCompletedAsync(JobContext jobContext, string stepId, object? state, CancellationToken ct)
+    {
+        switch (this._policy)
+        {
+            case WorkspaceConfig.ContextCheckpointPolicies.None:
+                return;
+
+            case WorkspaceConfig.ContextCheckpointPolicies.EndOfJob:
+                this._pendingChanges = true;
+                return;
+
+            case WorkspaceConfig.ContextCheckpointPolicies.PerStep:
+                var stepContext = jobContext.TryGetValue(stepId, out object? x) ? x as StepContext : null;
+                var delta = new ContextDelta
+                {
+                    StepId = stepId,
+                    In = stepContext?.In,
+                    Out = stepContext?.Out,
+                    State = ReferenceEquals(state, stepContext?.Out) ? null : state,
+                };
+                await this._workspace.AppendStepLogAsync(this._jobId, delta, !this._logCreated, ct).ConfigureAwait(false);
+                this._logCreated = true;
+                return;
+
+            case WorkspaceConfig.ContextCheckpointPolicies.Interval:
+                this._pendingChanges = true;
+                if (Stopwatch.GetElapsedTime(this._lastWrite) >= this._interval)
+                {
+                    await this.WriteContextAsync(jobContext, ct).ConfigureAwait(false);
+                }
+
+                return;
+        }
+    }
+
+    /// <summary>
+    /// Store the final context, if required by the policy and not stored yet.
+    /// </summary>
+    public async Task JobCompletedAsync(JobContext jobContext, CancellationToken ct)
+    {
+        if (!this._pendingChanges) { return; }
+
+        await this.WriteContextAsync(jobContext, ct).ConfigureAwait(false);
+    }
+
+    private async Task WriteContextAsync(JobContext jobContext, CancellationToken ct)
+    {
+        await this._workspace.UpdateContextFileAsync(this._jobId, jobContext, ct).ConfigureAwait(false);
+        this._lastWrite = Stopwatch.GetTimestamp();
+        this._pendingChanges = false;
+    }
+}
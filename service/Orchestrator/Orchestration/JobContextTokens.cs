@@ -0,0 +1,108 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using Newtonsoft.Json.Linq;
+using Orchestrator.Models;
+
+namespace Orchestrator.Orchestration;
+
+/// <summary>
+/// JSON tree of a job context, used to evaluate JMESPath expressions, kept alongside the context.
+/// Context values are replaced, not modified, when steps run, so the tree is updated incrementally,
+/// converting only the values changed since the last update, instead of the whole context.
+/// </summary>
+internal sealed class JobContextTokens
+{
+    private const string StateKey = "state";
+
+    private sealed class Entry
+    {
+        public object? Value { get; set; }
+        public object? In { get; set; }
+        public object? Out { get; set; }
+    }
+
+    private readonly JObject _root = new();
+
+    // Values converted for each key, compared by reference to detect changes
+    private readonly Dictionary<string, Entry> _entries = new(StringComparer.Ordinal);
+
+    /// <summary>
+    /// Update the tree with the values changed in the context, and return the tree.
+    /// The tree must not be modified by the caller.
+    /// </summary>
+    public JObject Update(JobContext context)
+    {
+        foreach (KeyValuePair<string, object?> x in context)
+        {
+            if (!this._entries.TryGetValue(x.Key, out Entry? entry))
+            {
+                entry = new Entry();
+                this._entries[x.Key] = entry;
+            }
+            else if (ReferenceEquals(entry.Value, x.Value) && x.Value is not StepContext)
+            {
+                continue;
+            }
+
+            if (x.Value is StepContext step)
+            {
+                // Steps are added before running, and their input and output are set while running
+                if (!ReferenceEquals(entry.Value, step) || this._root[x.Key] is not JObject stepToken)
+                {
+                    stepToken = new JObject { ["in"] = JsonTokenConverter.ToJToken(step.In), ["out"] = JsonTokenConverter.ToJToken(step.Out) };
+                    this._root[x.Key] = stepToken;
+                }
+                else
+                {
+                    if (!ReferenceEquals(entry.In, step.In)) { stepToken["in"] = JsonTokenConverter.ToJToken(step.In); }
+
+                    if (!ReferenceEquals(entry.Out, step.Out)) { stepToken["out"] = JsonTokenConverter.ToJToken(step.Out); }
+                }
+
+                entry.In = step.In;
+                entry.Out = step.Out;
+            }
+            else
+            {
+                this._root[x.Key] = JsonTokenConverter.ToJToken(x.Value);
+                entry.In = null;
+                entry.Out = null;
+            }
+
+            entry.Value = x.Value;
+        }
+
+        if (this._entries.Count > context.Count)
+        {
+            foreach (string key in this._entries.Keys.Where(key => !context.ContainsKey(key)).ToList())
+            {
+                this._entries.Remove(key);
+                this._root.Remove(key);
+            }
+        }
+
+        return this._root;
+    }
+
+    /// <summary>
+    /// Update the tree, and evaluate a function on it with the state temporarily replaced, e.g. with the current
+    /// item of a map step, so that items share the tree of the context instead of converting a copy each.
+    /// The state token must not belong to another tree, and the function result must not reference the tree.
+    /// </summary>
+    public T EvaluateWithState<T>(JobContext context, JToken state, Func<JObject, T> evaluate)
+    {
+        JObject root = this.Update(context);
+        JProperty? property = root.Property(StateKey, StringComparison.Ordinal);
+        if (property == null)
+        {
+            root[StateKey] = state;
+            try { return evaluate(root); }
+            finally { root.Remove(StateKey); }
+        }
+
+        JToken previous = property.Value;
+        property.Value = state;
+        try { return evaluate(root); }
+        finally { property.Value = previous; }
+    }
+}
@@ -0,0 +1,167 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections;
+using System.Text.Json;
+using System.Text.Json.Nodes;
+using Newtonsoft.Json.Linq;
+using Orchestrator.Models;
+
+namespace Orchestrator.Orchestration;
+
+/// <summary>
+/// Convert the in-memory job context to the JSON tree used by JMESPath.Net, and the results back,
+/// walking the trees directly, without writing and parsing JSON strings.
+/// </summary>
+internal static class JsonTokenConverter
+{
+    public static JToken ToJToken(object? value)
+    {
+        switch (value)
+        {
+            case null:
+                return JValue.CreateNull();
+
+            case JToken token:
+                return token;
+
+            case JsonElement element:
+                return FromJsonElement(element);
+
+            case JsonNode node:
+                return FromJsonNode(node);
+
+            case string s:
+                return new JValue(s);
+
+            case bool or int or long or double or float or decimal or short or byte or uint or ulong:
+                return new JValue(value);
+
+            case StepContext stepContext:
+                return new JObject
+                {
+                    ["in"] = ToJToken(stepContext.In),
+                    ["out"] = ToJToken(stepContext.Out),
+                };
+
+            case IDictionary<string, object?> dictionary:
+                var obj = new JObject();
+                foreach (KeyValuePair<string, object?> x in dictionary) { obj[x.Key] = ToJToken(x.Value); }
+
+                return obj;
+
+            case IEnumerable list:
+                var array = new JArray();
+                foreach (object? x in list) { array.Add(ToJToken(x)); }
+
+                return array;
+
+            default:
+                // Other types, e.g. anonymous objects, are rare and usually small
+                return FromJsonElement(JsonSerializer.SerializeToElement(value, value.GetType()));
+        }
+    }
+
+    public static JsonNode? ToJsonNode(JToken token)
+    {
+        switch (token.Type)
+        {
+            case JTokenType.Object:
+                var obj = new JsonObject();
+                foreach (JProperty x in ((JObject)token).Properties()) { obj[x.Name] = ToJsonNode(x.Value); }
+
+                return obj;
+
+            case JTokenType.Array:
+                var array = new JsonArray();
+                foreach (JToken x in (JArray)token) { array.Add(ToJsonNode(x)); }
+
+                return array;
+
+            case JTokenType.Null:
+            case JTokenType.Undefined:
+                return null;
+
+            case JTokenType.String:
+                return JsonValue.Create(token.Value<string>());
+
+            case JTokenType.Boolean:
+                return JsonValue.Create(token.Value<bool>());
+
+            case JTokenType.Integer when ((JValue)token).Value is long l:
+                return JsonValue.Create(l);
+
+            case JTokenType.Float when ((JValue)token).Value is double d:
+                return JsonValue.Create(d);
+
+            default:
+                // Big integers, decimals, dates, etc.
+                return JsonNode.Parse(token.ToString(Newtonsoft.Json.Formatting.None));
+        }
+    }
+
+    private static JToken FromJsonElement(JsonElement element)
+    {
+        switch (element.ValueKind)
+        {
+            case JsonValueKind.Object:
+                var obj = new JObject();
+                foreach (JsonProperty x in element.EnumerateObject()) { obj[x.Name] = FromJsonElement(x.Value); }
+
+                return obj;
+
+            case JsonValueKind.Array:
+                var array = new JArray();
+                foreach (JsonElement x in element.EnumerateArray()) { array.Add(FromJsonElement(x)); }
+
+                return array;
+
+            case JsonValueKind.String:
+                return new JValue(element.GetString());
+
+            case JsonValueKind.Number:
+                return element.TryGetInt64(out long l) ? new JValue(l) : new JValue(element.GetDouble());
+
+            case JsonValueKind.True:
+                return new JValue(true);
+
+            case JsonValueKind.False:
+                return new JValue(false);
+
+            default:
+                return JValue.CreateNull();
+        }
+    }
+
+    private static JToken FromJsonNode(JsonNode node)
+    {
+        switch (node)
+        {
+            case JsonObject obj:
+                var result = new JObject();
+                foreach (KeyValuePair<string, JsonNode?> x in obj) { result[x.Key] = x.Value == null ? JValue.CreateNull() : FromJsonNode(x.Value); }
+
+                return result;
+
+            case JsonArray array:
+                var list = new JArray();
+                foreach (JsonNode? x in array) { list.Add(x == null ? JValue.CreateNull() : FromJsonNode(x)); }
+
+                return list;
+
+            default:
+                JsonValue value = node.AsValue();
+                if (value.TryGetValue(out JsonElement element)) { return FromJsonElement(element); }
+
+                if (value.TryGetValue(out string? s)) { return new JValue(s); }
+
+                if (value.TryGetValue(out long l)) { return new JValue(l); }
+
+                if (value.TryGetValue(out double d)) { return new JValue(d); }
+
+                if (value.TryGetValue(out bool b)) { return new JValue(b); }
+
+                // Values created from .NET types, e.g. JsonValue.Create(123)
+                return FromJsonElement(JsonSerializer.SerializeToElement(value));
+        }
+    }
+}
@@ -1,9 +1,11 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
+using System.Runtime.CompilerServices;
 using System.Text.Json;
 using System.Text.Json.Nodes;
-using DevLab.JmesPath;
+using DevLab.JmesPath.Expressions;
 using Microsoft.Extensions.Logging.Abstractions;
+using Newtonsoft.Json.Linq;
 using Orchestrator.Config;
 using Orchestrator.Models;
 using Orchestrator.Storage;
@@ -21,25 +23,60 @@ internal sealed class SimpleWorkspace
     // Store the execution context tracking data and progress
     private const string ContextFile = "context.json";
 
+    // Store the changes made to the context by each step, see ContextCheckpointPolicies.PerStep
+    private const string StepLogFile = "steps.ndjson";
+
+    // Store the status of jobs running in async mode
+    private const string StatusFile = "status.json";
+
+    // Store the final output of jobs running in async mode
+    private const string ResultFile = "result.json";
+
+    // Store large files uploaded with job requests, see MaxInMemoryFileSizeKb.
+    // Uploads are stored in the job directory, sharing the job lifecycle.
+    private const string UploadsDir = "uploads";
+
+    // Fields describing files in the job input: name and content base64 encoded, or a reference
+    // to an uploaded file stored in the workspace, replaced with "content" when calling functions
+    public const string FileNameField = "fileName";
+    public const string FileContentField = "content";
+    public const string FileHandleField = "contentHandle";
+    public const string FileLengthField = "contentLength";
+    public const string FileArrayField = "files";
+
     private readonly string _dir;
+    private readonly WorkspaceConfig _config;
     private readonly ILogger<SimpleWorkspace> _log;
     private readonly IFileSystem _fileSystem;
+    private readonly JmesPathCache _jmesPathCache;
+
+    // JSON tree of each job context, updated incrementally before evaluating JMESPath expressions
+    private readonly ConditionalWeakTable<JobContext, JobContextTokens> _contextTokens = new();
     private static readonly JsonSerializerOptions s_jsonSerializerOptions = new() { WriteIndented = true };
+
+    // The context can be large and is written often, so it's stored without indentation
+    private static readonly JsonSerializerOptions s_compactJsonSerializerOptions = new() { WriteIndented = false };
     private bool _initialized = false;
 
     public SimpleWorkspace(
         WorkspaceConfig config,
         IFileSystem fileSystem,
+        JmesPathCache jmesPathCache,
         ILoggerFactory? loggerFactory = null)
     {
         config.Validate();
         this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<SimpleWorkspace>();
         this._fileSystem = fileSystem;
+        this._jmesPathCache = jmesPathCache;
         this._dir = config.WorkspaceDir;
+        this._config = config;
         this._log.LogDebug("Jobs workspace dir: {WorkspaceDir} (Type: {FileSystemType})", this._dir, this._fileSystem.GetType().FullName);
     }
 
-    public async Task CreateWorkspaceAsync(
+    /// <summary>
+    /// Create the job workspace, storing input, workflow and initial context. Returns the initial context.
+    /// </summary>
+    public async Task<JobContext> CreateWorkspaceAsync(
         Workflow workflow,
         JsonObject input,
         CancellationToken ct)
@@ -57,8 +94,22 @@ internal sealed class SimpleWorkspace
         await this.CreateWorkflowFileAsync(workflow, ct).ConfigureAwait(false);
         await this.CreateInputFileAsync(workflow.JobId, input, ct).ConfigureAwait(false);
         await this.CreateContextFileAsync(workflow.JobId, context, ct).ConfigureAwait(false);
+
+        return context;
     }
 
+    /// <summary>
+    /// Create the object storing the context of a job while it runs, according to the configured checkpoint policy.
+    /// </summary>
+    public JobCheckpoint CreateCheckpoint(string jobId)
+    {
+        return new JobCheckpoint(this, jobId, this._config.ContextCheckpoint, TimeSpan.FromSeconds(this._config.ContextCheckpointIntervalSecs));
+    }
+
+    /// <summary>
+    /// Read the context of a job, replaying the step log on top of the stored context, if available.
+    /// When the job is complete, the state is the job result.
+    /// </summary>
     public async Task<JobContext> GetContextAsync(string jobId, CancellationToken ct)
     {
         await this.EnsureDirectoryExistsAsync(ct).ConfigureAwait(false);
@@ -68,8 +119,26 @@ internal sealed class SimpleWorkspace
         this._log.LogDebug("Fetching context from workspace");
         string contextFile = this._fileSystem.CombinePath(workspaceDir, ContextFile);
         string contextAsString = await this._fileSystem.ReadAllTextAsync(contextFile, ct).ConfigureAwait(false);
-        return JsonSerializer.Deserialize<JobContext>(contextAsString)
-               ?? throw new ApplicationException("Failed to deserialize context");
+        JobContext context = JsonSerializer.Deserialize<JobContext>(contextAsString)
+                             ?? throw new ApplicationException("Failed to deserialize context");
+
+        string? log = await this.TryReadFileAsync(jobId, StepLogFile, ct).ConfigureAwait(false);
+        if (log == null) { return context; }
+
+        foreach (string line in log.Split('\n', StringSplitOptions.RemoveEmptyEntries | StringSplitOptions.TrimEntries))
+        {
+            ContextDelta delta = JsonSerializer.Deserialize<ContextDelta>(line)
+                                 ?? throw new ApplicationException("Failed to deserialize step log");
+            context[delta.StepId] = new StepContext { In = delta.In, Out = delta.Out };
+            context.State = delta.State ?? delta.Out;
+        }
+
+        // Steps running concurrently, see WorkflowGraph, are logged in order of completion, so the
+        // last step logged doesn't necessarily contain the final state, which is the job result
+        string? result = await this.TryReadFileAsync(jobId, ResultFile, ct).ConfigureAwait(false);
+        if (result != null) { context.State = JsonSerializer.Deserialize<object>(result); }
+
+        return context;
     }
 
     public async Task CreateInputFileAsync(string jobId, JsonObject input, CancellationToken ct)
@@ -101,7 +170,7 @@ internal sealed class SimpleWorkspace
         string workspaceDir = this.GetWorkspacePath(jobId);
 
         string contextFile = this._fileSystem.CombinePath(workspaceDir, ContextFile);
-        string contextAsString = JsonSerializer.Serialize(jobContext, s_jsonSerializerOptions);
+        string contextAsString = JsonSerializer.Serialize(jobContext, s_compactJsonSerializerOptions);
         await this._fileSystem.WriteAllTextAsync(contextFile, contextAsString, true, ct).ConfigureAwait(false);
     }
 
@@ -112,10 +181,135 @@ internal sealed class SimpleWorkspace
         string workspaceDir = this.GetWorkspacePath(jobId);
 
         string contextFile = this._fileSystem.CombinePath(workspaceDir, ContextFile);
-        string contextAsString = JsonSerializer.Serialize(jobContext, s_jsonSerializerOptions);
+        string contextAsString = JsonSerializer.Serialize(jobContext, s_compactJsonSerializerOptions);
         await this._fileSystem.WriteAllTextAsync(contextFile, contextAsString, false, ct).ConfigureAwait(false);
     }
 
+    /// <summary>
+    /// Append the changes made by a step to the step log, one JSON object per line.
+    /// </summary>
+    public async Task AppendStepLogAsync(string jobId, ContextDelta delta, bool firstWrite, CancellationToken ct)
+    {
+        await this.EnsureDirectoryExistsAsync(ct).ConfigureAwait(false);
+
+        string logFile = this._fileSystem.CombinePath(this.GetWorkspacePath(jobId), StepLogFile);
+        string line = JsonSerializer.Serialize(delta, s_compactJsonSerializerOptions) + "\n";
+        await this._fileSystem.AppendAllTextAsync(logFile, line, firstWrite, ct).ConfigureAwait(false);
+    }
+
+    public async Task CreateJobDirectoryAsync(string jobId, CancellationToken ct)
+    {
+        await this.EnsureDirectoryExistsAsync(ct).ConfigureAwait(false);
+        await this._fileSystem.CreateDirectoryAsync(this.GetWorkspacePath(jobId), ct).ConfigureAwait(false);
+    }
+
+    public async Task WriteStatusFileAsync(JobStatus status, CancellationToken ct)
+    {
+        await this.EnsureDirectoryExistsAsync(ct).ConfigureAwait(false);
+
+        string statusFile = this._fileSystem.CombinePath(this.GetWorkspacePath(status.JobId), StatusFile);
+        string statusAsString = JsonSerializer.Serialize(status, s_jsonSerializerOptions);
+        await this._fileSystem.WriteAllTextAsync(statusFile, statusAsString, status.State == JobStatus.States.Queued, ct).ConfigureAwait(false);
+    }
+
+    /// <summary>
+    /// Read the status of a job submitted in async mode. Returns null if the job doesn't exist.
+    /// </summary>
+    public async Task<JobStatus?> ReadStatusFileAsync(string jobId, CancellationToken ct)
+    {
+        string? statusAsString = await this.TryReadFileAsync(jobId, StatusFile, ct).ConfigureAwait(false);
+        return statusAsString == null ? null : JsonSerializer.Deserialize<JobStatus>(statusAsString);
+    }
+
+    public async Task WriteResultFileAsync(string jobId, object? result, CancellationToken ct)
+    {
+        await this.EnsureDirectoryExistsAsync(ct).ConfigureAwait(false);
+
+        string resultFile = this._fileSystem.CombinePath(this.GetWorkspacePath(jobId), ResultFile);
+        string resultAsString = JsonSerializer.Serialize(result, s_jsonSerializerOptions);
+        await this._fileSystem.WriteAllTextAsync(resultFile, resultAsString, true, ct).ConfigureAwait(false);
+    }
+
+    /// <summary>
+    /// Read the output of a job submitted in async mode, as a JSON string. Returns null if not available.
+    /// </summary>
+    public Task<string?> ReadResultFileAsync(string jobId, CancellationToken ct)
+    {
+        return this.TryReadFileAsync(jobId, ResultFile, ct);
+    }
+
+    /// <summary>
+    /// Store a file uploaded with a job request, returning a handle to reference the file in the job input.
+    /// </summary>
+    public async Task<string> StoreUploadAsync(string jobId, Stream content, CancellationToken ct)
+    {
+        await this.EnsureDirectoryExistsAsync(ct).ConfigureAwait(false);
+
+        string uploadsDir = this._fileSystem.CombinePath(this.GetWorkspacePath(jobId), UploadsDir);
+        await this._fileSystem.CreateDirectoryIfNotExistsAsync(uploadsDir, ct).ConfigureAwait(false);
+
+        string id = Guid.NewGuid().ToString("N");
+        await this._fileSystem.WriteStreamAsync(this._fileSystem.CombinePath(uploadsDir, id), content, ct).ConfigureAwait(false);
+        return $"{UploadsDir}/{id}";
+    }
+
+    /// <summary>
+    /// Open a file uploaded with a job request. Returns null if the handle is not valid.
+    /// </summary>
+    public async Task<Stream?> OpenUploadAsync(string jobId, string handle, CancellationToken ct)
+    {
+        // Handles come from user input, only handles created by StoreUploadAsync for the same job are allowed
+        if (!handle.StartsWith(UploadsDir + "/", StringComparison.Ordinal)
+            || !Guid.TryParseExact(handle.AsSpan(UploadsDir.Length + 1), "N", out Guid id))
+        {
+            return null;
+        }
+
+        await this.EnsureDirectoryExistsAsync(ct).ConfigureAwait(false);
+
+        string file = this._fileSystem.CombinePath(this._fileSystem.CombinePath(this.GetWorkspacePath(jobId), UploadsDir), id.ToString("N"));
+        return await this._fileSystem.OpenReadAsync(file, ct).ConfigureAwait(false);
+    }
+
+    /// <summary>
+    /// Replace the references to uploaded files with the files content, base64 encoded, as expected by functions.
+    /// The value is copied only when it contains references, the job context is not modified.
+    /// </summary>
+    public async Task<object?> ResolveFileHandlesAsync(string jobId, object? value, CancellationToken ct)
+    {
+        if (value is not JsonNode node) { return value; }
+
+        var files = new List<JsonObject>();
+        FindFileHandles(node, files);
+        if (files.Count == 0) { return value; }
+
+        node = node.DeepClone();
+        files.Clear();
+        FindFileHandles(node, files);
+        foreach (JsonObject file in files)
+        {
+            Stream? stream = await this.OpenUploadAsync(jobId, file[FileHandleField]!.GetValue<string>(), ct).ConfigureAwait(false);
+            if (stream == null) { continue; }
+
+            using var content = new MemoryStream();
+            await using (stream.ConfigureAwait(false))
+            {
+                await stream.CopyToAsync(content, ct).ConfigureAwait(false);
+            }
+
+            file.Remove(FileHandleField);
+            file.Remove(FileLengthField);
+            file[FileContentField] = Convert.ToBase64String(content.GetBuffer(), 0, (int)content.Length);
+        }
+
+        return node;
+    }
+
+    /// <summary>
+    /// Evaluate a JMESPath expression against the job context.
+    /// The expression is parsed once and cached, and evaluated on a JSON tree kept alongside the context,
+    /// converting only the context values changed since the previous transformation.
+    /// </summary>
     public async Task<object?> TransformContextAsync(JobContext jobContext, string jmesExpression, CancellationToken ct)
     {
         await this.EnsureDirectoryExistsAsync(ct).ConfigureAwait(false);
@@ -124,13 +318,57 @@ internal sealed class SimpleWorkspace
 
         this._log.LogDebug("Updating context with JMES expression: {Expression}", jmesExpression);
 
-        string contextAsString = JsonSerializer.Serialize(jobContext);
-        this._log.LogDebug("Context: {Context}", contextAsString);
+        JmesPathExpression expression = this._jmesPathCache.GetOrParse(jmesExpression);
+        JobContextTokens tokens = this._contextTokens.GetValue(jobContext, _ => new JobContextTokens());
+        lock (tokens)
+        {
+            // The result can contain parts of the tree, it's converted before the tree changes
+            JToken result = expression.Transform(tokens.Update(jobContext)).AsJToken();
+            return JsonTokenConverter.ToJsonNode(result);
+        }
+    }
+
+    /// <summary>
+    /// Evaluate a JMESPath expression against the job context, using the given item as state, e.g. for each
+    /// item of a map step. The expression is evaluated on the JSON tree of the job context, with only the
+    /// state replaced, so the context is not copied nor converted again for each item.
+    /// </summary>
+    public async Task<object?> TransformItemAsync(JobContext jobContext, object? item, string jmesExpression, CancellationToken ct)
+    {
+        await this.EnsureDirectoryExistsAsync(ct).ConfigureAwait(false);
+
+        if (string.IsNullOrWhiteSpace(jmesExpression)) { return item; }
 
-        var jmes = new JmesPath();
-        string? result = await jmes.TransformAsync(contextAsString, jmesExpression).ConfigureAwait(false);
-        this._log.LogDebug("JMES transformation result: {Result}", result);
-        return JsonSerializer.Deserialize<object>(result);
+        JmesPathExpression expression = this._jmesPathCache.GetOrParse(jmesExpression);
+        JToken state = JsonTokenConverter.ToJToken(item);
+        JobContextTokens tokens = this._contextTokens.GetValue(jobContext, _ => new JobContextTokens());
+        lock (tokens)
+        {
+            return tokens.EvaluateWithState(jobContext, state, root => JsonTokenConverter.ToJsonNode(expression.Transform(root).AsJToken()));
+        }
+    }
+
+    private static void FindFileHandles(JsonNode? node, List<JsonObject> files)
+    {
+        switch (node)
+        {
+            case JsonObject obj:
+                if (obj.TryGetPropertyValue(FileHandleField, out JsonNode? handle)
+                    && handle is JsonValue value && value.GetValueKind() == JsonValueKind.String)
+                {
+                    files.Add(obj);
+                    return;
+                }
+
+                foreach (KeyValuePair<string, JsonNode?> x in obj) { FindFileHandles(x.Value, files); }
+
+                return;
+
+            case JsonArray array:
+                foreach (JsonNode? x in array) { FindFileHandles(x, files); }
+
+                return;
+        }
     }
 
     private async Task EnsureDirectoryExistsAsync(CancellationToken ct)
@@ -142,6 +380,21 @@ internal sealed class SimpleWorkspace
         this._initialized = true;
     }
 
+    private async Task<string?> TryReadFileAsync(string jobId, string fileName, CancellationToken ct)
+    {
+        await this.EnsureDirectoryExistsAsync(ct).ConfigureAwait(false);
+
+        string file = this._fileSystem.CombinePath(this.GetWorkspacePath(jobId), fileName);
+        try
+        {
+            return await this._fileSystem.ReadAllTextAsync(file, ct).ConfigureAwait(false);
+        }
+        catch (Exception e) when (e is FileNotFoundException or DirectoryNotFoundException)
+        {
+            return null;
+        }
+    }
+
     private string GetWorkspacePath(string jobId)
     {
         return this._fileSystem.CombinePath(this._dir, jobId);
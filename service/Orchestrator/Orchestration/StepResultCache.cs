@@ -0,0 +1,179 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Diagnostics.Metrics;
+using System.Security.Cryptography;
+using System.Text;
+using System.Text.Json;
+using System.Text.Json.Nodes;
+using Microsoft.Extensions.Logging.Abstractions;
+using Orchestrator.Config;
+using Orchestrator.Models;
+using StackExchange.Redis;
+
+namespace Orchestrator.Orchestration;
+
+/// <summary>
+/// Cache of function results, for steps with "cache" enabled, keyed by tool, function and a hash of
+/// the function input. Deterministic steps, e.g. chunking or embedding unchanged documents, return
+/// the cached result without calling the function.
+/// Results are kept in memory, least recently used first out, and optionally in Redis, so they are
+/// shared by all orchestrator instances and survive restarts. Entries expire after the step TTL.
+/// </summary>
+internal sealed class StepResultCache : IDisposable
+{
+    public const string MeterName = "Orchestrator.StepResultCache";
+
+    // Prefix of the Redis keys containing cached results
+    private const string RedisKeyPrefix = "StepResult";
+
+    private readonly int _capacity;
+    private readonly int _maxEntrySize;
+    private readonly IDatabase? _redis;
+    private readonly TimeProvider _timeProvider;
+    private readonly Dictionary<string, LinkedListNode<(string key, string value, DateTimeOffset expiration)>> _index;
+    private readonly LinkedList<(string key, string value, DateTimeOffset expiration)> _lru = new();
+    private readonly object _lock = new();
+    private readonly ILogger<StepResultCache> _log;
+    private readonly Meter _meter;
+    private readonly Counter<long> _hitCounter;
+    private readonly Counter<long> _missCounter;
+
+    public StepResultCache(
+        AppConfig config,
+        IDatabase? redis = null,
+        TimeProvider? timeProvider = null,
+        ILoggerFactory? loggerFactory = null)
+    {
+        this._capacity = config.Orchestration.ResultCacheSize;
+        this._maxEntrySize = config.Orchestration.ResultCacheMaxEntrySizeKb * 1024;
+        this._redis = redis;
+        this._timeProvider = timeProvider ?? TimeProvider.System;
+        this._index = new Dictionary<string, LinkedListNode<(string, string, DateTimeOffset)>>(StringComparer.Ordinal);
+        this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<StepResultCache>();
+
+        this._meter = new Meter(MeterName);
+        this._hitCounter = this._meter.CreateCounter<long>("orchestrator.step_cache.hits", description: "Function results found in cache, by tier");
+        this._missCounter = this._meter.CreateCounter<long>("orchestrator.step_cache.misses", description: "Function results not found in cache");
+        this._meter.CreateObservableGauge("orchestrator.step_cache.size", () => this.Count, description: "Number of function results in memory");
+    }
+
+    public int Count
+    {
+        get
+        {
+            lock (this._lock) { return this._index.Count; }
+        }
+    }
+
+    /// <summary>
+    /// Calculate the cache key of a function call, hashing the function input.
+    /// </summary>
+    public static string GetKey(FunctionDetails functionDetails, object? input)
+    {
+        using var hash = IncrementalHash.CreateHash(HashAlgorithmName.SHA256);
+        hash.AppendData(Encoding.UTF8.GetBytes($"{functionDetails.Tool}\n{functionDetails.Function}\n"));
+        hash.AppendData(JsonSerializer.SerializeToUtf8Bytes(input));
+        return Convert.ToHexString(hash.GetHashAndReset());
+    }
+
+    /// <summary>
+    /// Get a function result from memory or Redis. The result is a new object on each call,
+    /// so it can be modified by the caller.
+    /// </summary>
+    public async Task<(bool found, object? result)> TryGetAsync(string key)
+    {
+        lock (this._lock)
+        {
+            if (this._index.TryGetValue(key, out var node))
+            {
+                if (node.Value.expiration > this._timeProvider.GetUtcNow())
+                {
+                    this._lru.Remove(node);
+                    this._lru.AddFirst(node);
+                    this._hitCounter.Add(1, new KeyValuePair<string, object?>("tier", "memory"));
+                    return (true, Parse(node.Value.value));
+                }
+
+                this._lru.Remove(node);
+                this._index.Remove(key);
+            }
+        }
+
+        if (this._redis != null)
+        {
+            try
+            {
+                RedisValueWithExpiry data = await this._redis.StringGetWithExpiryAsync($"{RedisKeyPrefix}:{key}").ConfigureAwait(false);
+                if (data.Value.HasValue)
+                {
+                    string value = data.Value.ToString();
+                    this.SetInMemory(key, value, data.Expiry ?? TimeSpan.Zero);
+                    this._hitCounter.Add(1, new KeyValuePair<string, object?>("tier", "redis"));
+                    return (true, Parse(value));
+                }
+            }
+            catch (RedisException e)
+            {
+                this._log.LogWarning(e, "Unable to read function result from Redis");
+            }
+        }
+
+        this._missCounter.Add(1);
+        return (false, null);
+    }
+
+    /// <summary>
+    /// Store a function result, unless too large.
+    /// </summary>
+    public async Task SetAsync(string key, object? result, TimeSpan ttl)
+    {
+        string value = JsonSerializer.Serialize(result);
+        if (value.Length > this._maxEntrySize)
+        {
+            this._log.LogDebug("Function result too large to be cached, {Size} chars", value.Length);
+            return;
+        }
+
+        this.SetInMemory(key, value, ttl);
+
+        if (this._redis == null) { return; }
+
+        try
+        {
+            await this._redis.StringSetAsync($"{RedisKeyPrefix}:{key}", value, ttl).ConfigureAwait(false);
+        }
+        catch (RedisException e)
+        {
+            this._log.LogWarning(e, "Unable to store function result in Redis");
+        }
+    }
+
+    public void Dispose()
+    {
+        this._meter.Dispose();
+    }
+
+    private void SetInMemory(string key, string value, TimeSpan ttl)
+    {
+        if (this._capacity == 0 || ttl <= TimeSpan.Zero) { return; }
+
+        lock (this._lock)
+        {
+            if (this._index.Remove(key, out var existing)) { this._lru.Remove(existing); }
+
+            if (this._index.Count >= this._capacity)
+            {
+                var last = this._lru.Last!;
+                this._lru.RemoveLast();
+                this._index.Remove(last.Value.key);
+            }
+
+            this._index[key] = this._lru.AddFirst((key, value, this._timeProvider.GetUtcNow() + ttl));
+        }
+    }
+
+    private static object? Parse(string value)
+    {
+        return JsonNode.Parse(value);
+    }
+}
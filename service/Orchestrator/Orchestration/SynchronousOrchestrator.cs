@@ -2,10 +2,14 @@
 
 using System.Diagnostics;
 using System.Dynamic;
+using System.Runtime.CompilerServices;
 using System.Text.Json.Nodes;
+using System.Threading.Channels;
 using Microsoft.Extensions.Logging.Abstractions;
+using Orchestrator.Config;
 using Orchestrator.FunctionAdapters;
 using Orchestrator.Models;
+using Orchestrator.ServiceDiscovery;
 
 namespace Orchestrator.Orchestration;
 
@@ -15,18 +19,25 @@ internal sealed class SynchronousOrchestrator : IDisposable
     private readonly ActivitySource _activitySource = new(ActivitySourceName);
 
     private readonly SimpleWorkspace _workspace;
+    private readonly OrchestrationConfig _config;
     private readonly ILogger<SynchronousOrchestrator> _log;
     private readonly HttpAdapter _httpFunctions;
+    private readonly StepResultCache? _resultCache;
 
     // CTOR
     public SynchronousOrchestrator(
         SimpleWorkspace workspace,
         IHttpClientFactory httpClientFactory,
+        AppConfig config,
+        ToolRegistry? toolRegistry = null,
+        StepResultCache? resultCache = null,
         ILoggerFactory? loggerFactory = null)
     {
         this._workspace = workspace;
+        this._config = config.Orchestration;
+        this._resultCache = resultCache;
         this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<SynchronousOrchestrator>();
-        this._httpFunctions = new HttpAdapter(httpClientFactory, loggerFactory);
+        this._httpFunctions = new HttpAdapter(httpClientFactory, workspace, this._config, toolRegistry, loggerFactory);
     }
 
     /// <summary>
@@ -40,100 +51,136 @@ internal sealed class SynchronousOrchestrator : IDisposable
         Workflow workflow,
         CancellationToken cancellationToken = default)
     {
-#pragma warning disable CA1031 // JMESPath throws generic exceptions
         using Activity? activity = this._activitySource.StartActivity(ActivityKind.Server);
         activity?.AddEvent(new ActivityEvent("Job start"));
 
         this._log.LogDebug("Job {JobId}: Starting job, Steps: {StepsCount}", workflow.JobId, workflow.Steps.Count);
-        await this._workspace.CreateWorkspaceAsync(workflow, input, cancellationToken).ConfigureAwait(false);
+        JobContext jobContext = await this._workspace.CreateWorkspaceAsync(workflow, input, cancellationToken).ConfigureAwait(false);
+        JobCheckpoint checkpoint = this._workspace.CreateCheckpoint(workflow.JobId);
 
-        dynamic errorDetails = new ExpandoObject();
-        errorDetails.JobId = workflow.JobId;
+        var graph = WorkflowGraph.Build(workflow);
+        if (!graph.IsLinear)
+        {
+            (object? graphResult, IResult? graphError) = await this.RunGraphAsync(workflow, graph, jobContext, checkpoint, activity, cancellationToken).ConfigureAwait(false);
+            activity?.AddEvent(new ActivityEvent("Job end"));
+            return (graphResult, workflow.JobId, graphError);
+        }
 
-        JobContext jobContext = await this._workspace.GetContextAsync(workflow.JobId, cancellationToken).ConfigureAwait(false);
         for (int stepNumber = 0; stepNumber < workflow.Steps.Count; stepNumber++)
         {
-            activity?.AddEvent(new ActivityEvent("Starting step",
-                tags: new ActivityTagsCollection { ["jobId"] = workflow.JobId, ["stepNumber"] = stepNumber, ["stepCount"] = workflow.Steps.Count }));
-            this._log.LogDebug("Job {JobId}: Processing step {StepNumber}/{StepCount}", workflow.JobId, stepNumber, workflow.Steps.Count);
-            Step step = workflow.Steps[stepNumber];
+            (bool stop, IResult? error) = await this.RunStepAsync(workflow, stepNumber, jobContext, activity, cancellationToken).ConfigureAwait(false);
+            await checkpoint.StepCompletedAsync(jobContext, workflow.Steps[stepNumber].Id, jobContext.State, cancellationToken).ConfigureAwait(false);
+
+            if (error != null)
+            {
+                await checkpoint.JobCompletedAsync(jobContext, cancellationToken).ConfigureAwait(false);
+                return (null, workflow.JobId, error);
+            }
+
+            if (stop) { break; }
+        }
+
+        await checkpoint.JobCompletedAsync(jobContext, cancellationToken).ConfigureAwait(false);
+        activity?.AddEvent(new ActivityEvent("Job end"));
+        return (jobContext.State, workflow.JobId, null);
+    }
 
-            FunctionDetails functionDetails = FunctionDetails.Parse(step.Function);
+    /// <summary>
+    /// Run a single step, updating the state and the step entry in the given job context.
+    /// Returns stop=true when the step ends the workflow (see the internal "stop" function).
+    /// </summary>
+    /// <param name="workflow">Workflow definition</param>
+    /// <param name="stepNumber">Position of the step in the workflow</param>
+    /// <param name="jobContext">Context of the job, or a snapshot of it when steps run concurrently</param>
+    /// <param name="activity">Current activity</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    private async Task<(bool stop, IResult? error)> RunStepAsync(
+        Workflow workflow,
+        int stepNumber,
+        JobContext jobContext,
+        Activity? activity,
+        CancellationToken cancellationToken)
+    {
+#pragma warning disable CA1031 // JMESPath throws generic exceptions
+        activity?.AddEvent(new ActivityEvent("Starting step",
+            tags: new ActivityTagsCollection { ["jobId"] = workflow.JobId, ["stepNumber"] = stepNumber, ["stepCount"] = workflow.Steps.Count }));
+        this._log.LogDebug("Job {JobId}: Processing step {StepNumber}/{StepCount}", workflow.JobId, stepNumber, workflow.Steps.Count);
+        Step step = workflow.Steps[stepNumber];
+
+        dynamic errorDetails = new ExpandoObject();
+        errorDetails.JobId = workflow.JobId;
+
+        FunctionDetails functionDetails = FunctionDetails.Parse(step.Function);
 
-            // Flow:
-            // State => step.InputTransformation => In => call func (In) => Out => step.OutputTransformation => State
+        // Flow:
+        // State => step.InputTransformation => In => call func (In) => Out => step.OutputTransformation => State
 
-            var stepContext = new StepContext();
-            stepContext.In = jobContext.State;
-            jobContext[step.Id] = stepContext;
+        var stepContext = new StepContext();
+        stepContext.In = jobContext.State;
+        jobContext[step.Id] = stepContext;
 
-            errorDetails.StepNumber = stepNumber;
-            errorDetails.StepId = step.Id;
-            errorDetails.Function = $"{functionDetails.Tool}{functionDetails.Function}";
+        errorDetails.StepNumber = stepNumber;
+        errorDetails.StepId = step.Id;
+        errorDetails.Function = $"{functionDetails.Tool}{functionDetails.Function}";
 
-            // ==========================
-            // ==== 1: Prepare input ====
-            // ==========================
+        // ==========================
+        // ==== 1: Prepare input ====
+        // ==========================
 
-            if (!string.IsNullOrWhiteSpace(step.InputTransformation))
+        if (step.IsMap)
+        {
+            this._log.LogDebug("Job {JobId}: Map step, the input transformation is applied to each item", workflow.JobId);
+        }
+        else if (!string.IsNullOrWhiteSpace(step.InputTransformation))
+        {
+            this._log.LogDebug("Job {JobId}: Transforming input with JMESPath expression '{Expression}'", workflow.JobId, step.InputTransformation);
+            try
             {
-                this._log.LogDebug("Job {JobId}: Transforming input with JMESPath expression '{Expression}'", workflow.JobId, step.InputTransformation);
-                try
-                {
-                    jobContext.State = await this._workspace.TransformContextAsync(jobContext, step.InputTransformation, cancellationToken).ConfigureAwait(false);
-                    this._log.LogDebug("Job {JobId}: Input transformation complete, {State} updated", workflow.JobId, nameof(jobContext.State));
-                }
-                catch (Exception e)
-                {
-                    this._log.LogError(e, "Job {JobId}: JMESPath transformation failed", workflow.JobId);
-                    activity?.SetStatus(ActivityStatusCode.Error, "Invalid input JMESPath expression");
-                    errorDetails.Message = "Invalid input JMESPath expression";
-                    errorDetails.Description = e.Message;
-                    errorDetails.Expression = step.InputTransformation;
-                    return (null, workflow.JobId, Results.BadRequest(errorDetails));
-                }
+                jobContext.State = await this._workspace.TransformContextAsync(jobContext, step.InputTransformation, cancellationToken).ConfigureAwait(false);
+                this._log.LogDebug("Job {JobId}: Input transformation complete, {State} updated", workflow.JobId, nameof(jobContext.State));
             }
-            else
+            catch (Exception e)
             {
-                this._log.LogDebug("Job {JobId}: No input JMESPath transformation to execute", workflow.JobId);
+                this._log.LogError(e, "Job {JobId}: JMESPath transformation failed", workflow.JobId);
+                activity?.SetStatus(ActivityStatusCode.Error, "Invalid input JMESPath expression");
+                errorDetails.Message = "Invalid input JMESPath expression";
+                errorDetails.Description = e.Message;
+                errorDetails.Expression = step.InputTransformation;
+                return (false, Results.BadRequest(errorDetails));
             }
+        }
+        else
+        {
+            this._log.LogDebug("Job {JobId}: No input JMESPath transformation to execute", workflow.JobId);
+        }
 
-            // Persist context after the transformation, before running the function
-            await this._workspace.UpdateContextFileAsync(workflow.JobId, jobContext, cancellationToken).ConfigureAwait(false);
-
-            // ============================
-            // ==== 2: Invoke function ====
-            // ============================
+        // ============================
+        // ==== 2: Invoke function ====
+        // ============================
 
+        if (step.IsMap)
+        {
+            (bool success, IResult? error) mapResult = await this.RunMapStepAsync(workflow, step, functionDetails, jobContext, errorDetails, activity, cancellationToken).ConfigureAwait(false);
+            if (!mapResult.success)
+            {
+                this._log.LogError("Job {JobId}: Map step '{StepId}' failed", workflow.JobId, step.Id);
+                return (false, mapResult.error);
+            }
+        }
+        else
+        {
             switch (functionDetails.Type)
             {
                 case FunctionDetails.FunctionTypes.None:
                     break;
 
                 case FunctionDetails.FunctionTypes.Http:
-                    // TODO: timeout options and handling
-                    (bool success, IResult? error) result = await this._httpFunctions.ExecuteAsync(workflow, step, functionDetails, jobContext, errorDetails, activity, cancellationToken).ConfigureAwait(false);
+                    (bool success, IResult? error) result = await this.ExecuteHttpFunctionAsync(workflow, step, functionDetails, jobContext, errorDetails, activity, cancellationToken).ConfigureAwait(false);
                     if (!result.success)
                     {
                         this._log.LogError("Job {JobId}: Function '{Function}' failed", workflow.JobId, step.Function);
-
-                        // Add error in a readable format (ie not JSON encoded)
-                        if (((IDictionary<string, object>)errorDetails).ContainsKey("Response"))
-                        {
-                            string[] rows = errorDetails.Response.ToString().Trim().Split('\n', StringSplitOptions.RemoveEmptyEntries);
-                            if (rows.Length > 0)
-                            {
-                                dynamic errorLines = new ExpandoObject();
-                                for (int index = 0; index < rows.Length; index++)
-                                {
-                                    ((IDictionary<string, object>)errorLines)[$"l{index}"] = rows[index];
-                                }
-
-                                errorDetails.ResponseLines = errorLines;
-                            }
-                        }
-
-                        return (null, workflow.JobId, result.error);
+                        AddResponseLines(errorDetails);
+                        return (false, result.error);
                     }
 
                     break;
@@ -142,13 +189,13 @@ internal sealed class SynchronousOrchestrator : IDisposable
                     switch (functionDetails.Function)
                     {
                         case "stop":
-                            return (jobContext.State, workflow.JobId, null);
+                            return (true, null);
 
                         default:
                             this._log.LogError("Job {JobId}: Unknown internal function {FunctionName}", workflow.JobId, functionDetails.Function);
                             activity?.SetStatus(ActivityStatusCode.Error, $"Unknown internal function {functionDetails.Function}");
                             errorDetails.Message = $"Unknown internal function {functionDetails.Function}";
-                            return (null, workflow.JobId, Results.NotFound(errorDetails));
+                            return (false, Results.NotFound(errorDetails));
                     }
 
                 default:
@@ -156,51 +203,438 @@ internal sealed class SynchronousOrchestrator : IDisposable
                         workflow.JobId, functionDetails.Type.ToString("G"), step.Function);
                     activity?.SetStatus(ActivityStatusCode.Error, "Unknown function type");
                     errorDetails.Message = $"Unknown function type {functionDetails.Type:G}";
-                    return (null, workflow.JobId, Results.InternalServerError(errorDetails));
+                    return (false, Results.InternalServerError(errorDetails));
             }
+        }
+
+        // ==================================
+        // ==== 3: Output transformation ====
+        // ==================================
 
-            // Persist context after the function, before xout transformation
-            if (functionDetails.Type != FunctionDetails.FunctionTypes.None)
+        // Run JMES expression on full context to calculate the final state
+        if (!string.IsNullOrWhiteSpace(step.OutputTransformation))
+        {
+            this._log.LogDebug("Job {JobId}: Transforming output with JMESPath expression '{Expression}'", workflow.JobId, step.OutputTransformation);
+            try
+            {
+                jobContext.State = await this._workspace.TransformContextAsync(jobContext, step.OutputTransformation, cancellationToken).ConfigureAwait(false);
+                this._log.LogDebug("Job {JobId}: Output transformation complete, {State} updated", workflow.JobId, nameof(jobContext.State));
+            }
+            catch (Exception e)
             {
-                await this._workspace.UpdateContextFileAsync(workflow.JobId, jobContext, cancellationToken).ConfigureAwait(false);
+                this._log.LogError(e, "Job {JobId}: JMESPath transformation failed", workflow.JobId);
+                activity?.SetStatus(ActivityStatusCode.Error, "Invalid output JMESPath expression");
+                errorDetails.Message = "Invalid output JMESPath expression";
+                errorDetails.Description = e.Message;
+                errorDetails.Expression = step.OutputTransformation;
+                return (false, Results.BadRequest(errorDetails));
             }
+        }
+        else
+        {
+            this._log.LogDebug("Job {JobId}: No output JMESPath transformation to execute", workflow.JobId);
+        }
 
-            // ==================================
-            // ==== 3: Output transformation ====
-            // ==================================
+        stepContext.Out = jobContext.State;
 
-            // Run JMES expression on full context to calculate the final state
-            if (!string.IsNullOrWhiteSpace(step.OutputTransformation))
+        return (false, null);
+#pragma warning restore CA1031
+    }
+
+    /// <summary>
+    /// Run the workflow as a graph: each step starts as soon as the steps it depends on are complete,
+    /// so independent branches run concurrently. Each step works on a snapshot of the job context,
+    /// containing "start" and the steps it depends on, and the step entries are merged back into
+    /// the job context when persisted. The result of the job is the state of the last step.
+    /// </summary>
+    private async Task<(object? result, IResult? error)> RunGraphAsync(
+        Workflow workflow,
+        WorkflowGraph graph,
+        JobContext jobContext,
+        JobCheckpoint checkpoint,
+        Activity? activity,
+        CancellationToken cancellationToken)
+    {
+        this._log.LogDebug("Job {JobId}: Running steps as a graph", workflow.JobId);
+
+        // Serialize changes to the shared context, and checkpoints
+        using var contextLock = new SemaphoreSlim(1, 1);
+
+        // Stop the steps still running as soon as one fails or stops the workflow
+        using var done = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+
+        var steps = new Task<(bool completed, bool stop, IResult? error, object? state)>[workflow.Steps.Count];
+        for (int stepNumber = 0; stepNumber < workflow.Steps.Count; stepNumber++)
+        {
+            steps[stepNumber] = this.RunGraphStepAsync(workflow, graph, stepNumber, steps, jobContext, checkpoint, contextLock, done, activity, cancellationToken);
+        }
+
+        (bool completed, bool stop, IResult? error, object? state)[] results = await Task.WhenAll(steps).ConfigureAwait(false);
+        cancellationToken.ThrowIfCancellationRequested();
+
+        (object? result, IResult? error) jobResult = (results[^1].state, null);
+        foreach (var result in results)
+        {
+            if (result.error != null) { jobResult = (null, result.error); break; }
+
+            if (result.stop) { jobResult = (result.state, null); break; }
+        }
+
+        jobContext.State = jobResult.result;
+        await checkpoint.JobCompletedAsync(jobContext, cancellationToken).ConfigureAwait(false);
+        return jobResult;
+    }
+
+    private async Task<(bool completed, bool stop, IResult? error, object? state)> RunGraphStepAsync(
+        Workflow workflow,
+        WorkflowGraph graph,
+        int stepNumber,
+        Task<(bool completed, bool stop, IResult? error, object? state)>[] steps,
+        JobContext jobContext,
+        JobCheckpoint checkpoint,
+        SemaphoreSlim contextLock,
+        CancellationTokenSource done,
+        Activity? activity,
+        CancellationToken cancellationToken)
+    {
+        IReadOnlyList<int> dependencies = graph.Dependencies[stepNumber];
+        var dependencyResults = await Task.WhenAll(dependencies.Select(x => steps[x])).ConfigureAwait(false);
+        if (done.IsCancellationRequested || dependencyResults.Any(x => !x.completed)) { return (false, false, null, null); }
+
+        Step step = workflow.Steps[stepNumber];
+
+        try
+        {
+            // The snapshot contains only the data the step can reference
+            var stepJobContext = new JobContext { Start = jobContext.Start };
+            await contextLock.WaitAsync(done.Token).ConfigureAwait(false);
+            try
             {
-                this._log.LogDebug("Job {JobId}: Transforming output with JMESPath expression '{Expression}'", workflow.JobId, step.OutputTransformation);
-                try
+                foreach (int x in dependencies)
                 {
-                    jobContext.State = await this._workspace.TransformContextAsync(jobContext, step.OutputTransformation, cancellationToken).ConfigureAwait(false);
-                    this._log.LogDebug("Job {JobId}: Output transformation complete, {State} updated", workflow.JobId, nameof(jobContext.State));
+                    string id = workflow.Steps[x].Id;
+                    stepJobContext[id] = jobContext[id];
                 }
-                catch (Exception e)
+            }
+            finally
+            {
+                contextLock.Release();
+            }
+
+            // The input state is the output of the last dependency, or the job input
+            stepJobContext.State = graph.InheritsState[stepNumber] ? dependencyResults[^1].state : stepJobContext.Start;
+
+            (bool stop, IResult? error) = await this.RunStepAsync(workflow, stepNumber, stepJobContext, activity, done.Token).ConfigureAwait(false);
+
+            // Merge the step into the job context, and store it
+            await contextLock.WaitAsync(cancellationToken).ConfigureAwait(false);
+            try
+            {
+                jobContext[step.Id] = stepJobContext[step.Id];
+                await checkpoint.StepCompletedAsync(jobContext, step.Id, stepJobContext.State, cancellationToken).ConfigureAwait(false);
+            }
+            finally
+            {
+                contextLock.Release();
+            }
+
+            if (error != null || stop)
+            {
+                this._log.LogDebug("Job {JobId}: Step '{StepId}' ended the workflow, cancelling the other steps", workflow.JobId, step.Id);
+                await done.CancelAsync().ConfigureAwait(false);
+            }
+
+            return (error == null && !stop, stop, error, stepJobContext.State);
+        }
+        catch (OperationCanceledException) when (done.IsCancellationRequested)
+        {
+            return (false, false, null, null);
+        }
+        catch
+        {
+            await done.CancelAsync().ConfigureAwait(false);
+            throw;
+        }
+    }
+
+    /// <summary>
+    /// Run a map step: select an array from the job context with the "foreach" expression, then
+    /// for each element transform the input with xin and invoke the function, concurrently.
+    /// The results are gathered into the job state, in the same order of the input array.
+    /// </summary>
+    private async Task<(bool success, IResult? error)> RunMapStepAsync(
+        Workflow workflow,
+        Step step,
+        FunctionDetails functionDetails,
+        JobContext jobContext,
+        dynamic errorDetails,
+        Activity? activity,
+        CancellationToken cancellationToken)
+    {
+#pragma warning disable CA1031 // JMESPath throws generic exceptions
+        object? items;
+        try
+        {
+            items = await this._workspace.TransformContextAsync(jobContext, step.ForEach, cancellationToken).ConfigureAwait(false);
+        }
+        catch (Exception e)
+        {
+            this._log.LogError(e, "Job {JobId}: JMESPath foreach expression failed", workflow.JobId);
+            activity?.SetStatus(ActivityStatusCode.Error, "Invalid foreach JMESPath expression");
+            errorDetails.Message = "Invalid foreach JMESPath expression";
+            errorDetails.Description = e.Message;
+            errorDetails.Expression = step.ForEach;
+            return (false, Results.BadRequest(errorDetails));
+        }
+#pragma warning restore CA1031
+
+        if (items is not JsonArray array)
+        {
+            this._log.LogError("Job {JobId}: JMESPath foreach expression didn't return an array", workflow.JobId);
+            activity?.SetStatus(ActivityStatusCode.Error, "Invalid foreach JMESPath expression");
+            errorDetails.Message = "Invalid foreach JMESPath expression";
+            errorDetails.Description = "The expression must return an array";
+            errorDetails.Expression = step.ForEach;
+            return (false, Results.BadRequest(errorDetails));
+        }
+
+        if (functionDetails.Type == FunctionDetails.FunctionTypes.Internal)
+        {
+            this._log.LogError("Job {JobId}: Internal function {FunctionName} cannot be used in a map step", workflow.JobId, functionDetails.Function);
+            activity?.SetStatus(ActivityStatusCode.Error, "Internal functions cannot be used in map steps");
+            errorDetails.Message = $"Internal function {functionDetails.Function} cannot be used in a map step";
+            return (false, Results.BadRequest(errorDetails));
+        }
+
+        JsonNode?[] inputs = array.ToArray();
+        var outputs = new object?[inputs.Length];
+        int maxParallelism = step.MaxParallelism > 0
+            ? Math.Min(step.MaxParallelism, this._config.MaxMapParallelism)
+            : this._config.MaxMapParallelism;
+
+        this._log.LogDebug("Job {JobId}: Map step, {ItemCount} items, max parallelism {MaxParallelism}", workflow.JobId, inputs.Length, maxParallelism);
+
+        // Stop processing items as soon as one fails
+        using var failure = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+        IResult? firstError = null;
+        var options = new ParallelOptions { MaxDegreeOfParallelism = maxParallelism, CancellationToken = failure.Token };
+
+        try
+        {
+            await Parallel.ForEachAsync(Enumerable.Range(0, inputs.Length), options, async (index, ct) =>
+            {
+                // Each item runs with its own state. The input transformation is evaluated on the job context,
+                // with the item as state, and functions use only the state.
+                var itemContext = new JobContext { State = inputs[index] };
+
+                dynamic itemErrorDetails = new ExpandoObject();
+                itemErrorDetails.JobId = workflow.JobId;
+                itemErrorDetails.StepId = step.Id;
+                itemErrorDetails.Function = errorDetails.Function;
+                itemErrorDetails.ItemIndex = index;
+
+                (bool success, IResult? error) result = await this.RunMapItemAsync(
+                    workflow, step, functionDetails, jobContext, itemContext, itemErrorDetails, activity, ct).ConfigureAwait(false);
+
+                if (!result.success)
                 {
-                    this._log.LogError(e, "Job {JobId}: JMESPath transformation failed", workflow.JobId);
-                    activity?.SetStatus(ActivityStatusCode.Error, "Invalid output JMESPath expression");
-                    errorDetails.Message = "Invalid output JMESPath expression";
-                    errorDetails.Description = e.Message;
-                    errorDetails.Expression = step.OutputTransformation;
-                    return (null, workflow.JobId, Results.BadRequest(errorDetails));
+                    Interlocked.CompareExchange(ref firstError, result.error, null);
+                    await failure.CancelAsync().ConfigureAwait(false);
+                    return;
                 }
+
+                outputs[index] = itemContext.State;
+            }).ConfigureAwait(false);
+        }
+        catch (OperationCanceledException) when (firstError != null && !cancellationToken.IsCancellationRequested)
+        {
+            // One item failed, the other items have been cancelled
+        }
+
+        if (firstError != null) { return (false, firstError); }
+
+        jobContext.State = outputs;
+        return (true, null);
+    }
+
+    private async Task<(bool success, IResult? error)> RunMapItemAsync(
+        Workflow workflow,
+        Step step,
+        FunctionDetails functionDetails,
+        JobContext jobContext,
+        JobContext itemContext,
+        dynamic errorDetails,
+        Activity? activity,
+        CancellationToken cancellationToken)
+    {
+        if (!string.IsNullOrWhiteSpace(step.InputTransformation))
+        {
+#pragma warning disable CA1031 // JMESPath throws generic exceptions
+            try
+            {
+                itemContext.State = await this._workspace.TransformItemAsync(jobContext, itemContext.State, step.InputTransformation, cancellationToken).ConfigureAwait(false);
             }
-            else
+            catch (Exception e)
+            {
+                this._log.LogError(e, "Job {JobId}: JMESPath transformation failed", workflow.JobId);
+                activity?.SetStatus(ActivityStatusCode.Error, "Invalid input JMESPath expression");
+                errorDetails.Message = "Invalid input JMESPath expression";
+                errorDetails.Description = e.Message;
+                errorDetails.Expression = step.InputTransformation;
+                return (false, Results.BadRequest(errorDetails));
+            }
+#pragma warning restore CA1031
+        }
+
+        if (functionDetails.Type != FunctionDetails.FunctionTypes.Http) { return (true, null); }
+
+        (bool success, IResult? error) result = await this.ExecuteHttpFunctionAsync(
+            workflow, step, functionDetails, itemContext, errorDetails, activity, cancellationToken).ConfigureAwait(false);
+
+        if (!result.success) { AddResponseLines(errorDetails); }
+
+        return result;
+    }
+
+    /// <summary>
+    /// Call an HTTP function, reusing the result of a previous call with the same input when the step has "cache" enabled.
+    /// </summary>
+    private async Task<(bool success, IResult? error)> ExecuteHttpFunctionAsync(
+        Workflow workflow,
+        Step step,
+        FunctionDetails functionDetails,
+        JobContext jobContext,
+        dynamic errorDetails,
+        Activity? activity,
+        CancellationToken cancellationToken)
+    {
+        string? cacheKey = null;
+        if (step.Cache == true && this._resultCache != null)
+        {
+            cacheKey = StepResultCache.GetKey(functionDetails, jobContext.State);
+            (bool found, object? cached) = await this._resultCache.TryGetAsync(cacheKey).ConfigureAwait(false);
+            if (found)
             {
-                this._log.LogDebug("Job {JobId}: No output JMESPath transformation to execute", workflow.JobId);
+                this._log.LogDebug("Job {JobId}: Function '{Function}' result found in cache", workflow.JobId, step.Function);
+                activity?.AddEvent(new ActivityEvent("Function result found in cache",
+                    tags: new ActivityTagsCollection { ["jobId"] = workflow.JobId, ["stepId"] = step.Id }));
+                jobContext.State = cached;
+                return (true, null);
             }
+        }
 
-            // Persist context
-            stepContext.Out = jobContext.State;
-            await this._workspace.UpdateContextFileAsync(workflow.JobId, jobContext, cancellationToken).ConfigureAwait(false);
+        (bool success, IResult? error) result = await this._httpFunctions.ExecuteAsync(
+            workflow, step, functionDetails, jobContext, errorDetails, activity, cancellationToken).ConfigureAwait(false);
+
+        if (result.success && cacheKey != null)
+        {
+            TimeSpan ttl = TimeSpan.FromSeconds(step.CacheTtl ?? this._config.ResultCacheTtlSecs);
+            await this._resultCache!.SetAsync(cacheKey, jobContext.State, ttl).ConfigureAwait(false);
         }
 
-        activity?.AddEvent(new ActivityEvent("Job end"));
-        return (jobContext.State, workflow.JobId, null);
+        return result;
+    }
+
+    // Add error in a readable format (ie not JSON encoded)
+    private static void AddResponseLines(dynamic errorDetails)
+    {
+        if (!((IDictionary<string, object>)errorDetails).ContainsKey("Response")) { return; }
+
+        string[] rows = errorDetails.Response.ToString().Trim().Split('\n', StringSplitOptions.RemoveEmptyEntries);
+        if (rows.Length == 0) { return; }
+
+        dynamic errorLines = new ExpandoObject();
+        for (int index = 0; index < rows.Length; index++)
+        {
+            ((IDictionary<string, object>)errorLines)[$"l{index}"] = rows[index];
+        }
+
+        errorDetails.ResponseLines = errorLines;
+    }
+
+    /// <summary>
+    /// Run the same workflow over multiple inputs, with up to <paramref name="maxParallelism"/> jobs
+    /// running at the same time. Each input is executed as a separate job, with its own workspace.
+    /// Results are returned as soon as each job completes, so the order can differ from the input order.
+    /// </summary>
+    /// <param name="inputs">List of inputs, one per job</param>
+    /// <param name="workflow">Workflow definition, shared by all jobs</param>
+    /// <param name="maxParallelism">Max number of jobs running at the same time</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    public async IAsyncEnumerable<BatchItemResult> RunBatchAsync(
+        IReadOnlyList<JsonObject> inputs,
+        Workflow workflow,
+        int maxParallelism,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        this._log.LogDebug("Batch {BatchId}: Starting {JobCount} jobs, max parallelism {MaxParallelism}", workflow.JobId, inputs.Count, maxParallelism);
+
+        var results = Channel.CreateUnbounded<BatchItemResult>(new UnboundedChannelOptions { SingleReader = true });
+        var options = new ParallelOptions { MaxDegreeOfParallelism = maxParallelism, CancellationToken = cancellationToken };
+
+        Task producer = Task.Run(async () =>
+        {
+            try
+            {
+                await Parallel.ForEachAsync(Enumerable.Range(0, inputs.Count), options, async (index, ct) =>
+                {
+                    BatchItemResult result = await this.RunBatchItemAsync(index, inputs[index], workflow, ct).ConfigureAwait(false);
+                    await results.Writer.WriteAsync(result, ct).ConfigureAwait(false);
+                }).ConfigureAwait(false);
+
+                results.Writer.Complete();
+            }
+#pragma warning disable CA1031 // the exception is forwarded to the reader
+            catch (Exception e)
+            {
+                results.Writer.Complete(e);
+            }
 #pragma warning restore CA1031
+        }, cancellationToken);
+
+        await foreach (BatchItemResult result in results.Reader.ReadAllAsync(cancellationToken).ConfigureAwait(false))
+        {
+            yield return result;
+        }
+
+        await producer.ConfigureAwait(false);
+        this._log.LogDebug("Batch {BatchId}: All jobs completed", workflow.JobId);
+    }
+
+    private async Task<BatchItemResult> RunBatchItemAsync(
+        int index,
+        JsonObject input,
+        Workflow batchWorkflow,
+        CancellationToken cancellationToken)
+    {
+        // Jobs share the steps, but each job has its own ID and workspace
+        var workflow = new Workflow { JobId = $"{batchWorkflow.JobId}-{index}", Steps = batchWorkflow.Steps };
+        var item = new BatchItemResult { Index = index, JobId = workflow.JobId };
+
+#pragma warning disable CA1031 // a failing job must not stop the rest of the batch
+        try
+        {
+            (object? result, string _, IResult? error) = await this.RunWorkflowAsync(input, workflow, cancellationToken).ConfigureAwait(false);
+            if (error == null)
+            {
+                item.Status = StatusCodes.Status200OK;
+                item.Result = result;
+            }
+            else
+            {
+                item.Status = (error as IStatusCodeHttpResult)?.StatusCode ?? StatusCodes.Status500InternalServerError;
+                item.Error = (error as IValueHttpResult)?.Value;
+            }
+        }
+        catch (Exception e) when (e is not OperationCanceledException)
+        {
+            this._log.LogError(e, "Job {JobId}: Unexpected error", workflow.JobId);
+            item.Status = StatusCodes.Status500InternalServerError;
+            item.Error = new { Message = "Job failed", Description = e.Message };
+        }
+#pragma warning restore CA1031
+
+        return item;
     }
 
     public void Dispose()
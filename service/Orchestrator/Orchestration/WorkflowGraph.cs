@@ -0,0 +1,169 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json;
+using System.Text.RegularExpressions;
+using Orchestrator.Models;
+
+namespace Orchestrator.Orchestration;
+
+/// <summary>
+/// Dependencies between the steps of a workflow.
+///
+/// By default steps run one after the other, each step receiving the state of the previous one.
+/// When at least one step declares "dependsOn", the workflow runs as a graph, and the
+/// dependencies of the steps without "dependsOn" are inferred from their JMESPath expressions:
+/// - a step referencing "state" (or without xin) depends on the previous step;
+/// - a step referencing the ID of a previous step depends on that step.
+/// A step referencing neither, e.g. a step using only "start", can run immediately.
+/// </summary>
+internal sealed class WorkflowGraph
+{
+    private const string StateField = "state";
+
+    // Identifiers, quoted identifiers, raw string literals and JSON literals
+    private static readonly Regex s_tokens = new(
+        @"""(?:[^""\\]|\\.)*""|'(?:[^'\\]|\\.)*'|`(?:[^`\\]|\\.)*`|[A-Za-z_][A-Za-z0-9_]*",
+        RegexOptions.Compiled | RegexOptions.CultureInvariant);
+
+    /// <summary>
+    /// Whether the steps run one after the other.
+    /// </summary>
+    public bool IsLinear { get; private init; } = true;
+
+    /// <summary>
+    /// For each step, the positions of the steps it depends on, sorted.
+    /// </summary>
+    public IReadOnlyList<IReadOnlyList<int>> Dependencies { get; private init; } = [];
+
+    /// <summary>
+    /// For each step, whether the input state is the output of the last dependency,
+    /// rather than the job input.
+    /// </summary>
+    public IReadOnlyList<bool> InheritsState { get; private init; } = [];
+
+    public static WorkflowGraph Build(Workflow workflow)
+    {
+        List<Step> steps = workflow.Steps;
+        var dependencies = new List<IReadOnlyList<int>>(steps.Count);
+        var inheritsState = new List<bool>(steps.Count);
+
+        if (steps.All(x => x.DependsOn == null))
+        {
+            for (int i = 0; i < steps.Count; i++)
+            {
+                dependencies.Add(i == 0 ? Array.Empty<int>() : new[] { i - 1 });
+                inheritsState.Add(i > 0);
+            }
+
+            return new WorkflowGraph { IsLinear = true, Dependencies = dependencies, InheritsState = inheritsState };
+        }
+
+        var positions = new Dictionary<string, int>(StringComparer.Ordinal);
+
+        for (int i = 0; i < steps.Count; i++)
+        {
+            Step step = steps[i];
+            HashSet<string> references = GetReferences(step);
+
+            // Steps referenced in the expressions, which must be available in the context
+            var deps = new SortedSet<int>(references.Where(positions.ContainsKey).Select(x => positions[x]));
+
+            // Step providing the input state
+            int? stateSource;
+            if (step.DependsOn != null)
+            {
+                stateSource = step.DependsOn.Count > 0 ? positions[step.DependsOn[^1]] : null;
+                foreach (string id in step.DependsOn) { deps.Add(positions[id]); }
+            }
+            else
+            {
+                bool usesState = string.IsNullOrWhiteSpace(step.IsMap ? step.ForEach : step.InputTransformation)
+                                 || GetReferences(step.IsMap ? step.ForEach : step.InputTransformation).Contains(StateField);
+                stateSource = usesState && i > 0 ? i - 1 : null;
+                if (stateSource.HasValue) { deps.Add(stateSource.Value); }
+            }
+
+            // The state source is always the last dependency
+            var list = deps.Where(x => x != stateSource).ToList();
+            if (stateSource.HasValue) { list.Add(stateSource.Value); }
+
+            dependencies.Add(list);
+            inheritsState.Add(stateSource.HasValue);
+            positions[step.Id] = i;
+        }
+
+        return new WorkflowGraph { IsLinear = false, Dependencies = dependencies, InheritsState = inheritsState };
+    }
+
+    /// <summary>
+    /// Check that "dependsOn" references only previous steps, which also guarantees there are no cycles.
+    /// </summary>
+    public static bool ValidateDependencies(Workflow workflow, out string errorMessage)
+    {
+        errorMessage = string.Empty;
+
+        var previousSteps = new HashSet<string>(StringComparer.Ordinal);
+        foreach (Step step in workflow.Steps)
+        {
+            foreach (string id in step.DependsOn ?? Enumerable.Empty<string>())
+            {
+                if (!previousSteps.Contains(id))
+                {
+                    errorMessage = $"Step '{step.Id}' depends on '{id}', which is not a previous step";
+                    return false;
+                }
+            }
+
+            previousSteps.Add(step.Id);
+        }
+
+        return true;
+    }
+
+    /// <summary>
+    /// Get the identifiers used in the JMESPath expressions of a step. The list can contain
+    /// nested field names too, which at most adds unnecessary dependencies.
+    /// </summary>
+    private static HashSet<string> GetReferences(Step step)
+    {
+        HashSet<string> result = GetReferences(step.ForEach);
+        result.UnionWith(GetReferences(step.InputTransformation));
+        result.UnionWith(GetReferences(step.OutputTransformation));
+        return result;
+    }
+
+    private static HashSet<string> GetReferences(string expression)
+    {
+        var result = new HashSet<string>(StringComparer.Ordinal);
+        if (string.IsNullOrWhiteSpace(expression)) { return result; }
+
+        foreach (Match token in s_tokens.Matches(expression))
+        {
+            switch (token.Value[0])
+            {
+                case '\'':
+                case '`':
+                    continue;
+
+                case '"':
+                    try
+                    {
+                        string? id = JsonSerializer.Deserialize<string>(token.Value);
+                        if (id != null) { result.Add(id); }
+                    }
+                    catch (JsonException)
+                    {
+                        // Invalid quoted identifier, the JMESPath parser reports the error later
+                    }
+
+                    continue;
+
+                default:
+                    result.Add(token.Value);
+                    continue;
+            }
+        }
+
+        return result;
+    }
+}
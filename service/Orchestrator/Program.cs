@@ -2,6 +2,7 @@
 
 using System.Diagnostics;
 using System.Text.Json;
+using Microsoft.AspNetCore.Mvc;
 using Microsoft.AspNetCore.StaticFiles;
 using Orchestrator.Config;
 using Orchestrator.Diagnostics;
@@ -9,7 +10,6 @@ using Orchestrator.Http;
 using Orchestrator.Models;
 using Orchestrator.Orchestration;
 using Orchestrator.ServiceDiscovery;
-using StackExchange.Redis;
 
 namespace Orchestrator;
 
@@ -18,6 +18,7 @@ internal static class Program
     private const string BlobStorageName = "blobstorage";
     private const string RedisStorageName = "redisstorage";
     private static readonly JsonSerializerOptions s_jsonSerializerOptions = new() { WriteIndented = true };
+    private static readonly byte[] s_newLine = "\n"u8.ToArray();
 
     public static void Main(string[] args)
     {
@@ -32,8 +33,15 @@ internal static class Program
             .ConfigureSerializationOptions()
             .AddOpenApi()
             .AddToolsHttpClients(builder.Configuration)
+            .AddToolRegistry(builder.Configuration, redisConnectionName: RedisStorageName)
+            .AddStepResultCache()
             .AddSingleton(builder.Configuration.GetSection("App").Get<AppConfig>()?.Validate() ?? throw new ApplicationException(nameof(AppConfig) + " not available"))
-            .AddSingleton<SynchronousOrchestrator>();
+            .AddSingleton<JmesPathCache>()
+            .AddSingleton<SynchronousOrchestrator>()
+            .AddSingleton<AsyncJobQueue>()
+            .AddHostedService(sp => sp.GetRequiredService<AsyncJobQueue>())
+            .AddSingleton<ToolProbeCache>()
+            .AddHostedService(sp => sp.GetRequiredService<ToolProbeCache>());
 
         // Abb build
         var app = builder.Build();
@@ -55,8 +63,9 @@ internal static class Program
         ILogger log = app.Logger;
         var appConfig = app.Services.GetService<AppConfig>()!;
         var orchestrator = app.Services.GetService<SynchronousOrchestrator>()!;
+        var asyncJobQueue = app.Services.GetService<AsyncJobQueue>()!;
+        var workspace = app.Services.GetService<SimpleWorkspace>()!;
         var workspaceConfig = app.Services.GetService<WorkspaceConfig>()!;
-        var tools = ToolDiscovery.GetTools(app.Configuration);
         var authFilter = new HttpAuthEndpointFilter(appConfig.Authorization);
 
         log.LogWorkspaceDetails(workspaceConfig, builder.Configuration, BlobStorageName);
@@ -66,13 +75,15 @@ internal static class Program
         // =====================================================================
         app.MapPost("/api/jobs", async Task<IResult> (
                 HttpContext httpContext,
+                [FromQuery(Name = "async")] bool? runAsync,
                 CancellationToken cancellationToken) =>
             {
                 var contentType = httpContext.Request.ContentType ?? string.Empty;
                 bool isMultipart = contentType.StartsWith("multipart/", StringComparison.OrdinalIgnoreCase);
 
                 var (workflow, input, error) = isMultipart
-                    ? await JobCreationRequestParser.ParseMultipartInputAsync(httpContext, cancellationToken).ConfigureAwait(false)
+                    ? await JobCreationRequestParser.ParseMultipartInputAsync(
+                        httpContext, workspace, appConfig.Orchestration.MaxInMemoryFileSizeKb * 1024, cancellationToken).ConfigureAwait(false)
                     : await JobCreationRequestParser.ParseJsonInputAsync(httpContext, cancellationToken).ConfigureAwait(false);
 
                 if (error != null)
@@ -95,6 +106,19 @@ internal static class Program
                     return Results.InternalServerError($"Unable to parse request: {nameof(input)} is null");
                 }
 
+                // Async mode: return immediately, the job runs in the background
+                if (runAsync == true)
+                {
+                    JobStatus? status = await asyncJobQueue.EnqueueAsync(input, workflow, cancellationToken).ConfigureAwait(false);
+                    if (status == null)
+                    {
+                        return Results.Problem(detail: "Too many jobs in the queue, try again later", statusCode: StatusCodes.Status503ServiceUnavailable);
+                    }
+
+                    log.LogInformation("Job {JobId} queued", workflow.JobId);
+                    return Results.Accepted($"/api/jobs/{workflow.JobId}", status);
+                }
+
                 // TODO: store duration into workflow metadata
                 var clock = new Stopwatch();
                 clock.Start();
@@ -109,44 +133,132 @@ internal static class Program
             })
             .AddEndpointFilter(authFilter)
             .Produces<OrchestratorStatus>(StatusCodes.Status200OK)
+            .Produces<JobStatus>(StatusCodes.Status202Accepted)
             .Produces<OrchestratorStatus>(StatusCodes.Status401Unauthorized)
             .Produces<OrchestratorStatus>(StatusCodes.Status403Forbidden)
             .WithName("process");
 
         // =========================================================================================
-        app.MapGet("/tools", async Task<IResult> (
-                HttpContext ctx,
-                IServiceProvider sp,
-                HttpClient httpClient,
+        app.MapGet("/api/jobs/{jobId}", async Task<IResult> (
+                string jobId,
+                CancellationToken cancellationToken) =>
+            {
+                if (!IsValidJobId(jobId)) { return Results.BadRequest("Invalid job ID"); }
+
+                JobStatus? status = await workspace.ReadStatusFileAsync(jobId, cancellationToken).ConfigureAwait(false);
+                return status == null ? Results.NotFound($"Job {jobId} not found") : Results.Ok(status);
+            })
+            .AddEndpointFilter(authFilter)
+            .Produces<JobStatus>(StatusCodes.Status200OK)
+            .Produces(StatusCodes.Status404NotFound)
+            .Produces<OrchestratorStatus>(StatusCodes.Status401Unauthorized)
+            .Produces<OrchestratorStatus>(StatusCodes.Status403Forbidden)
+            .WithName("status");
+
+        // =========================================================================================
+        app.MapGet("/api/jobs/{jobId}/result", async Task<IResult> (
+                string jobId,
                 CancellationToken cancellationToken) =>
             {
-                IConnectionMultiplexer? redisConnectionMultiplexer = null;
+                if (!IsValidJobId(jobId)) { return Results.BadRequest("Invalid job ID"); }
+
+                JobStatus? status = await workspace.ReadStatusFileAsync(jobId, cancellationToken).ConfigureAwait(false);
+                if (status == null) { return Results.NotFound($"Job {jobId} not found"); }
+
+                // Not ready yet, the client should keep polling
+                if (!status.IsFinal) { return Results.Accepted($"/api/jobs/{jobId}", status); }
 
-                try
+                if (status.State == JobStatus.States.Failed)
                 {
-                    redisConnectionMultiplexer = sp.GetRequiredService<IConnectionMultiplexer>();
+                    return Results.Json(status.Error, statusCode: status.StatusCode ?? StatusCodes.Status500InternalServerError);
                 }
-                catch (InvalidOperationException)
+
+                string? result = await workspace.ReadResultFileAsync(jobId, cancellationToken).ConfigureAwait(false);
+                return result == null
+                    ? Results.NotFound($"Result of job {jobId} not found")
+                    : Results.Content(result, "application/json; charset=utf-8");
+            })
+            .AddEndpointFilter(authFilter)
+            .Produces(StatusCodes.Status200OK)
+            .Produces<JobStatus>(StatusCodes.Status202Accepted)
+            .Produces(StatusCodes.Status404NotFound)
+            .Produces<OrchestratorStatus>(StatusCodes.Status401Unauthorized)
+            .Produces<OrchestratorStatus>(StatusCodes.Status403Forbidden)
+            .WithName("result");
+
+        // =========================================================================================
+        app.MapPost("/api/jobs/batch", async Task<IResult> (
+                HttpContext httpContext,
+                int? maxParallelism,
+                CancellationToken cancellationToken) =>
+            {
+                OrchestrationConfig config = appConfig.Orchestration;
+                var (workflow, inputs, error) = await JobCreationRequestParser.ParseJsonBatchInputAsync(
+                    httpContext, config.MaxBatchSize, cancellationToken).ConfigureAwait(false);
+
+                if (error != null)
                 {
-                    // Redis not available
+                    log.LogError("An error occurred while parsing the request: {Error}", error);
+                    return error;
+                }
+
+                if (workflow == null || inputs == null)
+                {
+                    log.LogCritical("The {ObjectName} object is null but no error was returned", workflow == null ? nameof(workflow) : nameof(inputs));
+                    return Results.InternalServerError("Unable to parse request");
+                }
+
+                int parallelism = Math.Clamp(maxParallelism ?? config.MaxBatchParallelism, 1, config.MaxBatchParallelism);
+
+                httpContext.Response.Headers["X-Batch-Id"] = workflow.JobId;
+                httpContext.Response.StatusCode = StatusCodes.Status200OK;
+                httpContext.Response.ContentType = "application/x-ndjson; charset=utf-8";
+
+                var clock = new Stopwatch();
+                clock.Start();
+
+                // Stream one JSON line per job, as soon as each job completes
+                Stream body = httpContext.Response.Body;
+                await foreach (BatchItemResult item in orchestrator.RunBatchAsync(inputs, workflow, parallelism, cancellationToken).ConfigureAwait(false))
+                {
+                    await JsonSerializer.SerializeAsync(body, item, cancellationToken: cancellationToken).ConfigureAwait(false);
+                    await body.WriteAsync(s_newLine, cancellationToken).ConfigureAwait(false);
+                    await body.FlushAsync(cancellationToken).ConfigureAwait(false);
                 }
 
+                clock.Stop();
+
+                log.LogInformation("Batch {BatchId} completed, {JobCount} jobs in {Duration} msecs", workflow.JobId, inputs.Count, clock.ElapsedMilliseconds);
+                return Results.Empty;
+            })
+            .AddEndpointFilter(authFilter)
+            .Produces<BatchItemResult>(StatusCodes.Status200OK, "application/x-ndjson")
+            .Produces<OrchestratorStatus>(StatusCodes.Status401Unauthorized)
+            .Produces<OrchestratorStatus>(StatusCodes.Status403Forbidden)
+            .WithName("batch");
+
+        // =========================================================================================
+        app.MapGet("/tools", async Task<IResult> (
+                HttpContext ctx,
+                IServiceProvider sp,
+                CancellationToken cancellationToken) =>
+            {
+                // Null if Redis is not configured, see AddToolRegistry
+                ToolRegistry? registry = sp.GetService<ToolRegistry>();
+
                 Dictionary<string, FunctionDescription> functionsInfo = new();
                 Dictionary<string, ToolInfo> toolsInfo = new();
-                if (redisConnectionMultiplexer != null)
+                if (registry != null)
                 {
-                    var registry = new ToolRegistry(redisConnectionMultiplexer.GetDatabase());
-
-                    // Fetch list of functions from Redis
+                    // Fetch list of functions from the registry, cached in memory
                     List<FunctionDescription> functions = await registry.GetFunctionsAsync(cancellationToken).ConfigureAwait(false);
 
                     functionsInfo = functions
                         .OrderBy(x => x.Tool)
                         .ToDictionary(f => f.Id, f => f);
 
-                    // Fetch list tool details from each tool
-                    toolsInfo = (await registry.FetchToolsAsync(tools, httpClient, cancellationToken).ConfigureAwait(false))
-                        .ToDictionary(x => x.Name, x => x);
+                    // Tool details are checked in the background, see ToolProbeCache
+                    toolsInfo = sp.GetRequiredService<ToolProbeCache>().GetTools().ToDictionary(x => x.Name, x => x);
                 }
 
                 var data = new OrchestratorStatus
@@ -204,4 +316,10 @@ internal static class Program
 
         app.Run();
     }
+
+    // Job IDs are used as directory names, allow only safe chars to prevent path traversal
+    private static bool IsValidJobId(string jobId)
+    {
+        return !string.IsNullOrWhiteSpace(jobId) && jobId.All(c => char.IsAsciiLetterOrDigit(c) || c is '-' or '_');
+    }
 }
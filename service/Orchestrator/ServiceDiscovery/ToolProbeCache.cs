@@ -0,0 +1,111 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Concurrent;
+using Microsoft.Extensions.Logging.Abstractions;
+using Orchestrator.Config;
+using Orchestrator.Models;
+
+namespace Orchestrator.ServiceDiscovery;
+
+/// <summary>
+/// Check in the background which tools are reachable and expose API docs (Swagger), so /tools
+/// can answer immediately from the last results, rather than probing all tools on each request.
+/// Each probe has a short timeout, so unreachable tools don't delay the results of the others.
+/// When a probe fails the tool is marked as stale, keeping the details of the last successful probe.
+/// </summary>
+internal sealed class ToolProbeCache : BackgroundService
+{
+    // Endpoints checked to find the tool API documentation
+    private static readonly string[] s_swaggerEndpoints = ["/docs", "/swagger/index.html"];
+
+    private readonly Dictionary<string, string> _tools;
+    private readonly IHttpClientFactory _httpClientFactory;
+    private readonly TimeSpan _interval;
+    private readonly TimeSpan _probeTimeout;
+    private readonly ConcurrentDictionary<string, ToolInfo> _results = new(StringComparer.Ordinal);
+    private readonly ILogger<ToolProbeCache> _log;
+
+    public ToolProbeCache(
+        IConfiguration configuration,
+        IHttpClientFactory httpClientFactory,
+        AppConfig config,
+        ILoggerFactory? loggerFactory = null)
+    {
+        this._tools = ToolDiscovery.GetTools(configuration);
+        this._httpClientFactory = httpClientFactory;
+        this._interval = TimeSpan.FromSeconds(config.Orchestration.ToolProbeIntervalSecs);
+        this._probeTimeout = TimeSpan.FromMilliseconds(config.Orchestration.ToolProbeTimeoutMs);
+        this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<ToolProbeCache>();
+
+        // Until the first probe completes, tools are listed as stale
+        foreach (KeyValuePair<string, string> t in this._tools)
+        {
+            this._results[t.Key] = new ToolInfo { Name = t.Key, Endpoint = t.Value, Stale = true };
+        }
+    }
+
+    /// <summary>
+    /// Get the result of the last probe of each tool, sorted by name.
+    /// </summary>
+    public ToolInfo[] GetTools()
+    {
+        return this._results.Values.OrderBy(x => x.Name, StringComparer.Ordinal).ToArray();
+    }
+
+    protected override async Task ExecuteAsync(CancellationToken stoppingToken)
+    {
+        if (this._tools.Count == 0) { return; }
+
+        using var timer = new PeriodicTimer(this._interval);
+        try
+        {
+            do
+            {
+                await Task.WhenAll(this._tools.Select(x => this.ProbeAsync(x.Key, x.Value, stoppingToken))).ConfigureAwait(false);
+            } while (await timer.WaitForNextTickAsync(stoppingToken).ConfigureAwait(false));
+        }
+        catch (OperationCanceledException) when (stoppingToken.IsCancellationRequested)
+        {
+            // Shutting down
+        }
+    }
+
+    private async Task ProbeAsync(string name, string baseUrl, CancellationToken cancellationToken)
+    {
+        HttpClient httpClient = this._httpClientFactory.CreateClient();
+        bool reachable = false;
+        string swaggerUrl = string.Empty;
+        foreach (string endpoint in s_swaggerEndpoints)
+        {
+            using var timeoutCts = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+            timeoutCts.CancelAfter(this._probeTimeout);
+            try
+            {
+                using var response = await httpClient.GetAsync(new Uri(baseUrl + endpoint), HttpCompletionOption.ResponseHeadersRead, timeoutCts.Token).ConfigureAwait(false);
+                reachable = true;
+                if (response.IsSuccessStatusCode)
+                {
+                    swaggerUrl = baseUrl + endpoint;
+                    break;
+                }
+            }
+            catch (Exception e) when (e is HttpRequestException || (e is OperationCanceledException && !cancellationToken.IsCancellationRequested))
+            {
+                // The tool is not reachable, no need to try the other endpoints
+                this._log.LogDebug(e, "Tool {Name} probe failed, endpoint {Endpoint}", name, baseUrl + endpoint);
+                break;
+            }
+        }
+
+        if (reachable)
+        {
+            this._results[name] = new ToolInfo { Name = name, Endpoint = baseUrl, SwaggerUrl = swaggerUrl };
+            return;
+        }
+
+        this._log.LogWarning("Tool {Name} not reachable at {Endpoint}", name, baseUrl);
+        this._results.AddOrUpdate(name,
+            _ => new ToolInfo { Name = name, Endpoint = baseUrl, Stale = true },
+            (_, last) => new ToolInfo { Name = name, Endpoint = baseUrl, SwaggerUrl = last.SwaggerUrl, Stale = true });
+    }
+}
@@ -1,81 +1,155 @@
 // Copyright (c) Microsoft. All rights reserved.
 
+using System.Diagnostics;
 using System.Text.Json;
-using Orchestrator.Models;
+using Microsoft.Extensions.Logging.Abstractions;
 using StackExchange.Redis;
 
 namespace Orchestrator.ServiceDiscovery;
 
+/// <summary>
+/// Read the functions registered by tools in Redis. The registry is loaded with a single MGET and kept
+/// in memory, so function lookups on each tool call don't require Redis round trips. Tools publish a
+/// message when registering functions, which invalidates the cache. The cache is also refreshed
+/// periodically, in case a notification is lost, e.g. while the Redis connection is down.
+/// </summary>
 internal sealed class ToolRegistry
 {
-    // private readonly IConnectionMultiplexer _redisConn;
-    private readonly IDatabase _db;
+    private sealed class Snapshot
+    {
+        public List<FunctionDescription> Functions { get; } = [];
+
+        // Functions by Redis key, see FunctionDetailsRedisKeyPrefix
+        public Dictionary<string, FunctionDescription> ByKey { get; } = new(StringComparer.Ordinal);
+
+        public long LoadedAt { get; } = Stopwatch.GetTimestamp();
+    }
 
     // Redis set containing the list of registered functions
     private const string FunctionsRedisSetName = "functions";
 
-    public ToolRegistry(IDatabase db)
+    // Prefix of the Redis keys containing the function details, see CommonDotNet.ServiceDiscovery.ToolRegistry
+    private const string FunctionDetailsRedisKeyPrefix = "FunctionDetails";
+
+    // Redis channel used by tools to notify changes, see CommonDotNet.ServiceDiscovery.ToolRegistry
+    private const string FunctionsChangedRedisChannel = "functions:changed";
+
+    // Max age of the cached registry, in case change notifications are lost
+    private static readonly TimeSpan s_maxCacheAge = TimeSpan.FromMinutes(5);
+
+    private readonly IDatabase _db;
+    private readonly ILogger<ToolRegistry> _log;
+    private readonly SemaphoreSlim _loadLock = new(1, 1);
+    private Snapshot? _snapshot;
+    private int _version = 0;
+    private bool _subscribed = false;
+
+    public ToolRegistry(IDatabase db, ILoggerFactory? loggerFactory = null)
     {
         this._db = db;
+        this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<ToolRegistry>();
     }
 
     public async Task<List<FunctionDescription>> GetFunctionsAsync(CancellationToken cancellationToken = default)
     {
-        RedisValue[] functions = await this._db.SetMembersAsync(FunctionsRedisSetName).ConfigureAwait(false);
-
-        var result = new List<FunctionDescription>();
-        foreach (var key in functions)
-        {
-            RedisValue redisData = await this._db.StringGetAsync(key.ToString()).ConfigureAwait(false);
-            FunctionDescription? info = JsonSerializer.Deserialize<FunctionDescription>(redisData.ToString());
-            if (info == null) { continue; }
+        Snapshot snapshot = await this.GetSnapshotAsync(cancellationToken).ConfigureAwait(false);
+        return [..snapshot.Functions];
+    }
 
-            result.Add(info);
-        }
+    /// <summary>
+    /// Get the details of a function, e.g. the input and output content type.
+    /// Returns null if the function is not registered.
+    /// </summary>
+    /// <param name="tool">Name of the tool</param>
+    /// <param name="url">Path of the function, e.g. "/extract"</param>
+    public async Task<FunctionDescription?> GetFunctionAsync(string tool, string url)
+    {
+        Snapshot snapshot = await this.GetSnapshotAsync(CancellationToken.None).ConfigureAwait(false);
+        return snapshot.ByKey.GetValueOrDefault($"{FunctionDetailsRedisKeyPrefix}:{tool}:{url}");
+    }
 
-        return result;
+    /// <summary>
+    /// Discard the cached registry, e.g. when a tool registers new functions.
+    /// </summary>
+    public void Invalidate()
+    {
+        Interlocked.Increment(ref this._version);
+        Volatile.Write(ref this._snapshot, null);
     }
 
-    public async Task<ToolInfo[]> FetchToolsAsync(
-        Dictionary<string, string> tools,
-        HttpClient httpClient,
-        CancellationToken cancellationToken)
+    private async Task<Snapshot> GetSnapshotAsync(CancellationToken cancellationToken)
     {
-        // For each tool check swagger availability in parallel
-        var toolTasks = tools.OrderBy(x => x.Key)
-            .Select(async x => new ToolInfo
-            {
-                Name = x.Key,
-                Endpoint = x.Value,
-                SwaggerUrl = await GetSwaggerUrlAsync(httpClient, x.Value, cancellationToken).ConfigureAwait(false)
-            });
+        Snapshot? snapshot = Volatile.Read(ref this._snapshot);
+        if (snapshot != null && Stopwatch.GetElapsedTime(snapshot.LoadedAt) < s_maxCacheAge) { return snapshot; }
 
-        return await Task.WhenAll(toolTasks).ConfigureAwait(false);
+        await this._loadLock.WaitAsync(cancellationToken).ConfigureAwait(false);
+        try
+        {
+            // Loaded by another request while waiting
+            snapshot = Volatile.Read(ref this._snapshot);
+            if (snapshot != null && Stopwatch.GetElapsedTime(snapshot.LoadedAt) < s_maxCacheAge) { return snapshot; }
+
+            await this.SubscribeAsync().ConfigureAwait(false);
+
+            int version = Volatile.Read(ref this._version);
+            snapshot = await this.LoadAsync().ConfigureAwait(false);
+
+            // Don't cache the registry if it changed while loading, the next call loads it again
+            if (version == Volatile.Read(ref this._version)) { Volatile.Write(ref this._snapshot, snapshot); }
+
+            return snapshot;
+        }
+        finally
+        {
+            this._loadLock.Release();
+        }
     }
 
-    // Check if Swagger is available for each tool
-    private static async Task<string> GetSwaggerUrlAsync(
-        HttpClient httpClient, string baseUrl, CancellationToken cancellationToken)
+    private async Task<Snapshot> LoadAsync()
     {
-#pragma warning disable CA1031
-        string[] endpoints = ["/docs", "/swagger/index.html"];
-        foreach (var endpoint in endpoints)
+        var snapshot = new Snapshot();
+        RedisValue[] members = await this._db.SetMembersAsync(FunctionsRedisSetName).ConfigureAwait(false);
+        if (members.Length == 0) { return snapshot; }
+
+        // Fetch all the function details with a single MGET
+        RedisKey[] keys = members.Select(x => (RedisKey)x.ToString()).ToArray();
+        RedisValue[] values = await this._db.StringGetAsync(keys).ConfigureAwait(false);
+        for (int i = 0; i < keys.Length; i++)
         {
+            if (values[i].IsNullOrEmpty) { continue; }
+
             try
             {
-                using var response = await httpClient.GetAsync(new Uri(baseUrl + endpoint), cancellationToken).ConfigureAwait(false);
-                if (response.IsSuccessStatusCode)
-                {
-                    return baseUrl + endpoint;
-                }
+                FunctionDescription? info = JsonSerializer.Deserialize<FunctionDescription>(values[i].ToString());
+                if (info == null) { continue; }
+
+                snapshot.Functions.Add(info);
+                snapshot.ByKey[keys[i].ToString()] = info;
             }
-            catch
+            catch (JsonException e)
             {
-                // Ignore failures and try next endpoint
+                this._log.LogWarning(e, "Invalid function details in {Key}, function ignored", keys[i].ToString());
             }
         }
 
-        return string.Empty;
-#pragma warning restore CA1031
+        this._log.LogDebug("Tool registry loaded, {Count} functions", snapshot.Functions.Count);
+        return snapshot;
+    }
+
+    private async Task SubscribeAsync()
+    {
+        if (this._subscribed) { return; }
+
+        try
+        {
+            ISubscriber subscriber = this._db.Multiplexer.GetSubscriber();
+            await subscriber.SubscribeAsync(RedisChannel.Literal(FunctionsChangedRedisChannel), (_, _) => this.Invalidate()).ConfigureAwait(false);
+            this._subscribed = true;
+        }
+        catch (RedisException e)
+        {
+            this._log.LogWarning(e, "Unable to subscribe to tool registry changes, the registry is refreshed every {Minutes} minutes",
+                s_maxCacheAge.TotalMinutes);
+        }
     }
 }
@@ -1,5 +1,6 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
+using System.Text;
 using Azure;
 using Azure.Storage.Blobs;
 using Azure.Storage.Blobs.Models;
@@ -87,6 +88,30 @@ internal sealed class AzureBlobFileSystem : IFileSystem
         this._log.LogTrace("Blob {BlobName} ready", filename);
     }
 
+    public async Task AppendAllTextAsync(string filename, string content, bool firstWrite, CancellationToken ct = default)
+    {
+        this._log.LogTrace("Appending to blob {BlobName}, size {BlobSize} ...", filename, content.Length);
+
+        AppendBlobClient blobClient = this._containerClient.GetAppendBlobClient(filename);
+        if (firstWrite)
+        {
+            var options = new AppendBlobCreateOptions { HttpHeaders = new BlobHttpHeaders { ContentType = "text/plain" } };
+            await blobClient.CreateIfNotExistsAsync(options, ct).ConfigureAwait(false);
+        }
+
+        // Blocks have a max size, large content is appended in multiple blocks
+        ReadOnlyMemory<byte> data = Encoding.UTF8.GetBytes(content);
+        int maxBlockSize = blobClient.AppendBlobMaxAppendBlockBytes;
+        for (int offset = 0; offset < data.Length; offset += maxBlockSize)
+        {
+            ReadOnlyMemory<byte> block = data.Slice(offset, Math.Min(maxBlockSize, data.Length - offset));
+            using var stream = new MemoryStream(block.ToArray(), writable: false);
+            await blobClient.AppendBlockAsync(stream, cancellationToken: ct).ConfigureAwait(false);
+        }
+
+        this._log.LogTrace("Blob {BlobName} updated", filename);
+    }
+
     public async Task<string> ReadAllTextAsync(string filename, CancellationToken ct = default)
     {
         BlobClient blobClient = this._containerClient.GetBlobClient(filename);
@@ -104,6 +129,32 @@ internal sealed class AzureBlobFileSystem : IFileSystem
         }
     }
 
+    public async Task WriteStreamAsync(string filename, Stream content, CancellationToken ct = default)
+    {
+        this._log.LogTrace("Uploading blob {BlobName} ...", filename);
+
+        // Note: binary files are written once, e.g. uploads, so there's no need to lease them
+        BlobClient blobClient = this._containerClient.GetBlobClient(filename);
+        BlobUploadOptions options = new() { HttpHeaders = new BlobHttpHeaders { ContentType = "application/octet-stream" } };
+        await blobClient.UploadAsync(content, options, ct).ConfigureAwait(false);
+
+        this._log.LogTrace("Blob {BlobName} ready", filename);
+    }
+
+    public async Task<Stream> OpenReadAsync(string filename, CancellationToken ct = default)
+    {
+        BlobClient blobClient = this._containerClient.GetBlobClient(filename);
+
+        try
+        {
+            return await blobClient.OpenReadAsync(cancellationToken: ct).ConfigureAwait(false);
+        }
+        catch (RequestFailedException e) when (e.Status == 404)
+        {
+            throw new FileNotFoundException("Blob not found", filename);
+        }
+    }
+
     private async Task<(string? leaseId, BlobLeaseClient? leaseClient)> LockAsync(
         BlobClient blobClient, string filename, bool firstWrite, CancellationToken ct)
     {
@@ -28,8 +28,28 @@ internal sealed class FileSystem : IFileSystem
         return File.WriteAllTextAsync(filename, content, ct);
     }
 
+    public Task AppendAllTextAsync(string filename, string content, bool firstWrite, CancellationToken ct = default)
+    {
+        return File.AppendAllTextAsync(filename, content, ct);
+    }
+
     public Task<string> ReadAllTextAsync(string filename, CancellationToken ct = default)
     {
         return File.ReadAllTextAsync(filename, ct);
     }
+
+    public async Task WriteStreamAsync(string filename, Stream content, CancellationToken ct = default)
+    {
+        var file = new FileStream(filename, FileMode.Create, FileAccess.Write, FileShare.None, bufferSize: 81920, useAsync: true);
+        await using (file.ConfigureAwait(false))
+        {
+            await content.CopyToAsync(file, ct).ConfigureAwait(false);
+        }
+    }
+
+    public Task<Stream> OpenReadAsync(string filename, CancellationToken ct = default)
+    {
+        Stream file = new FileStream(filename, FileMode.Open, FileAccess.Read, FileShare.Read, bufferSize: 81920, useAsync: true);
+        return Task.FromResult(file);
+    }
 }
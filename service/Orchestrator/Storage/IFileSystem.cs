@@ -8,5 +8,8 @@ internal interface IFileSystem
     public Task CreateDirectoryIfNotExistsAsync(string path, CancellationToken ct = default);
     public Task CreateDirectoryAsync(string path, CancellationToken ct = default);
     public Task WriteAllTextAsync(string filename, string content, bool firstWrite, CancellationToken ct = default);
+    public Task AppendAllTextAsync(string filename, string content, bool firstWrite, CancellationToken ct = default);
     public Task<string> ReadAllTextAsync(string filename, CancellationToken ct = default);
+    public Task WriteStreamAsync(string filename, Stream content, CancellationToken ct = default);
+    public Task<Stream> OpenReadAsync(string filename, CancellationToken ct = default);
 }
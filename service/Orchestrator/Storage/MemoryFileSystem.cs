@@ -0,0 +1,277 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text;
+using Microsoft.Extensions.Logging.Abstractions;
+using Orchestrator.Config;
+using Orchestrator.Diagnostics;
+
+namespace Orchestrator.Storage;
+
+/// <summary>
+/// Volatile file system keeping files in memory, for short jobs where the workspace is not
+/// needed after the job completes. The total size is bounded: files expire after a TTL,
+/// and when the max size is reached the least recently written files are removed.
+/// </summary>
+internal sealed class MemoryFileSystem : IFileSystem
+{
+    private sealed class MemoryFile
+    {
+        public string Content { get; set; } = string.Empty;
+
+        // Text appended after Content, without copying the existing text, see AppendAllTextAsync
+        public StringBuilder? Appended { get; set; }
+
+        // Binary content, e.g. uploads, see WriteStreamAsync
+        public byte[]? Data { get; set; }
+
+        public long LastWrite { get; set; }
+
+        public long Size => this.Data?.LongLength ?? ((long)this.Content.Length + (this.Appended?.Length ?? 0)) * sizeof(char);
+    }
+
+    // How often to look for expired files, when writing
+    private static readonly TimeSpan s_expirationScanInterval = TimeSpan.FromSeconds(30);
+
+    private readonly Dictionary<string, MemoryFile> _files = new(StringComparer.Ordinal);
+    private readonly object _lock = new();
+    private readonly long _maxSize;
+    private readonly TimeSpan _ttl;
+    private readonly TimeProvider _timeProvider;
+    private readonly ILogger<MemoryFileSystem> _log;
+    private long _size = 0;
+    private long _lastExpirationScan;
+
+    public MemoryFileSystem(
+        WorkspaceConfig config,
+        TimeProvider? timeProvider = null,
+        ILoggerFactory? loggerFactory = null)
+    {
+        this._maxSize = config.MemoryMaxSizeMb * 1024L * 1024L;
+        this._ttl = TimeSpan.FromSeconds(config.MemoryTtlSecs);
+        this._timeProvider = timeProvider ?? TimeProvider.System;
+        this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<MemoryFileSystem>();
+        this._lastExpirationScan = this._timeProvider.GetTimestamp();
+    }
+
+    /// <summary>
+    /// Approximate size of the files in memory, in bytes.
+    /// </summary>
+    public long Size
+    {
+        get
+        {
+            lock (this._lock) { return this._size; }
+        }
+    }
+
+    public string CombinePath(string path1, string path2)
+    {
+        return $"{path1}/{path2}";
+    }
+
+    public Task CreateDirectoryIfNotExistsAsync(string path, CancellationToken ct = default)
+    {
+        // Directories are just a detail in the file names
+        return Task.CompletedTask;
+    }
+
+    public Task CreateDirectoryAsync(string path, CancellationToken ct = default)
+    {
+        return Task.CompletedTask;
+    }
+
+    public Task WriteAllTextAsync(string filename, string content, bool firstWrite, CancellationToken ct = default)
+    {
+        lock (this._lock)
+        {
+            this.SetContent(filename, content);
+        }
+
+        return Task.CompletedTask;
+    }
+
+    public Task AppendAllTextAsync(string filename, string content, bool firstWrite, CancellationToken ct = default)
+    {
+        this.Append(filename, content, create: true);
+        return Task.CompletedTask;
+    }
+
+    public Task<string> ReadAllTextAsync(string filename, CancellationToken ct = default)
+    {
+        lock (this._lock)
+        {
+            if (this._files.TryGetValue(filename, out MemoryFile? file))
+            {
+                if (!this.IsExpired(file)) { return Task.FromResult(GetText(file)); }
+
+                this.Remove(filename, file);
+            }
+        }
+
+        throw new FileNotFoundException("File not found", filename);
+    }
+
+    public async Task WriteStreamAsync(string filename, Stream content, CancellationToken ct = default)
+    {
+        using var data = new MemoryStream();
+        await content.CopyToAsync(data, ct).ConfigureAwait(false);
+
+        lock (this._lock)
+        {
+            this.SetContent(filename, new MemoryFile { Data = data.ToArray() });
+        }
+    }
+
+    public Task<Stream> OpenReadAsync(string filename, CancellationToken ct = default)
+    {
+        lock (this._lock)
+        {
+            if (this._files.TryGetValue(filename, out MemoryFile? file) && !this.IsExpired(file))
+            {
+                // Binary files are never modified, they can be read without copying
+                Stream stream = file.Data != null
+                    ? new MemoryStream(file.Data, writable: false)
+                    : new MemoryStream(Encoding.UTF8.GetBytes(GetText(file)), writable: false);
+                return Task.FromResult(stream);
+            }
+        }
+
+        throw new FileNotFoundException("File not found", filename);
+    }
+
+    /// <summary>
+    /// Read a file, returning null if the file doesn't exist, expired or was evicted.
+    /// </summary>
+    public string? TryReadAllText(string filename)
+    {
+        lock (this._lock)
+        {
+            return this._files.TryGetValue(filename, out MemoryFile? file) && !this.IsExpired(file) ? GetText(file) : null;
+        }
+    }
+
+    /// <summary>
+    /// Append text to a file, returning false if the file doesn't exist, expired or was evicted.
+    /// </summary>
+    public bool TryAppendAllText(string filename, string content)
+    {
+        return this.Append(filename, content, create: false);
+    }
+
+    private bool Append(string filename, string content, bool create)
+    {
+        lock (this._lock)
+        {
+            if (!this._files.TryGetValue(filename, out MemoryFile? file) || this.IsExpired(file))
+            {
+                if (!create) { return false; }
+
+                this.SetContent(filename, content);
+            }
+            else if (file.Data != null)
+            {
+                this.SetContent(filename, GetText(file) + content);
+            }
+            else
+            {
+                long size = (long)content.Length * sizeof(char);
+                this.CheckSize(filename, file.Size + size);
+
+                file.Appended ??= new StringBuilder();
+                file.Appended.Append(content);
+                file.LastWrite = this._timeProvider.GetTimestamp();
+                this._size += size;
+                this.EnforceLimits(filename);
+            }
+
+            return true;
+        }
+    }
+
+    private void SetContent(string filename, string content)
+    {
+        this.SetContent(filename, new MemoryFile { Content = content });
+    }
+
+    private void SetContent(string filename, MemoryFile file)
+    {
+        long size = file.Size;
+        this.CheckSize(filename, size);
+
+        if (this._files.TryGetValue(filename, out MemoryFile? existing))
+        {
+            this._size -= existing.Size;
+        }
+
+        file.LastWrite = this._timeProvider.GetTimestamp();
+        this._files[filename] = file;
+        this._size += size;
+        this.EnforceLimits(filename);
+    }
+
+    private void CheckSize(string filename, long size)
+    {
+        if (size > this._maxSize)
+        {
+            throw new StorageException($"File {filename} is too large to be stored in memory, size {size} bytes");
+        }
+    }
+
+    private void EnforceLimits(string filenameToKeep)
+    {
+        if (this._size > this._maxSize || this._timeProvider.GetElapsedTime(this._lastExpirationScan) > s_expirationScanInterval)
+        {
+            this.RemoveExpired();
+        }
+
+        if (this._size > this._maxSize) { this.Evict(filenameToKeep); }
+    }
+
+    private void RemoveExpired()
+    {
+        foreach (KeyValuePair<string, MemoryFile> x in this._files.Where(x => this.IsExpired(x.Value)).ToList())
+        {
+            this.Remove(x.Key, x.Value);
+        }
+
+        this._lastExpirationScan = this._timeProvider.GetTimestamp();
+    }
+
+    private void Evict(string filenameToKeep)
+    {
+        foreach (KeyValuePair<string, MemoryFile> x in this._files.OrderBy(x => x.Value.LastWrite).ToList())
+        {
+            if (x.Key == filenameToKeep) { continue; }
+
+            this.Remove(x.Key, x.Value);
+            if (this._size <= this._maxSize) { break; }
+        }
+
+        this._log.LogWarning("Memory workspace is full, removed least recently written files, size {Size} bytes", this._size);
+    }
+
+    private void Remove(string filename, MemoryFile file)
+    {
+        this._files.Remove(filename);
+        this._size -= file.Size;
+    }
+
+    private static string GetText(MemoryFile file)
+    {
+        if (file.Data != null) { return Encoding.UTF8.GetString(file.Data); }
+
+        // Merge the appended text, so the next reads don't copy it again
+        if (file.Appended != null)
+        {
+            file.Content += file.Appended.ToString();
+            file.Appended = null;
+        }
+
+        return file.Content;
+    }
+
+    private bool IsExpired(MemoryFile file)
+    {
+        return this._timeProvider.GetElapsedTime(file.LastWrite) > this._ttl;
+    }
+}
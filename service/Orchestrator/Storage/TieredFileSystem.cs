@@ -0,0 +1,298 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text;
+using System.Threading.Channels;
+using Microsoft.Extensions.Logging.Abstractions;
+
+namespace Orchestrator.Storage;
+
+/// <summary>
+/// File system keeping hot files in memory, and copying them to a persistent file system
+/// (e.g. Azure blobs) in the background. Jobs don't wait for the persistent storage, while
+/// the workspace is still available after the job completes, e.g. for async jobs and debugging.
+///
+/// Multiple writes to the same file before a flush are merged: the last content is written once,
+/// and appended text is appended in a single operation. Files not flushed yet are not lost when
+/// evicted from memory, the pending content is kept until the persistent write completes.
+/// </summary>
+internal sealed class TieredFileSystem : BackgroundService, IFileSystem
+{
+    private sealed class PendingFile
+    {
+        // Content to write, replacing the file
+        public string? Content { get; set; }
+
+        // Content to append, when the file is only appended to
+        public StringBuilder? Appended { get; set; }
+
+        // Whether the file exists in the persistent storage, see the firstWrite parameter
+        public bool Created { get; set; }
+
+        // Set while the content is being written to the persistent storage
+        public TaskCompletionSource? Flushed { get; set; }
+    }
+
+    // Delay before retrying a failed flush
+    private static readonly TimeSpan s_retryDelay = TimeSpan.FromSeconds(1);
+
+    private readonly MemoryFileSystem _memory;
+    private readonly IFileSystem _persistent;
+    private readonly Dictionary<string, PendingFile> _pending = new(StringComparer.Ordinal);
+
+    // Files taken from the pending list, until the persistent write completes
+    private readonly Dictionary<string, PendingFile> _flushing = new(StringComparer.Ordinal);
+    private readonly Channel<string> _flushQueue = Channel.CreateUnbounded<string>(new UnboundedChannelOptions { SingleReader = true });
+    private readonly object _lock = new();
+    private readonly ILogger<TieredFileSystem> _log;
+
+    public TieredFileSystem(
+        MemoryFileSystem memory,
+        IFileSystem persistent,
+        ILoggerFactory? loggerFactory = null)
+    {
+        this._memory = memory;
+        this._persistent = persistent;
+        this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<TieredFileSystem>();
+    }
+
+    /// <summary>
+    /// Number of files waiting to be copied to the persistent storage.
+    /// </summary>
+    public int PendingCount
+    {
+        get
+        {
+            lock (this._lock) { return this._pending.Count; }
+        }
+    }
+
+    public string CombinePath(string path1, string path2)
+    {
+        return this._persistent.CombinePath(path1, path2);
+    }
+
+    // Note: creating directories is cheap on both file systems (a local directory, or a container check cached
+    //       after the first call), and ensures files can be flushed later, so it's not deferred.
+    public Task CreateDirectoryIfNotExistsAsync(string path, CancellationToken ct = default)
+    {
+        return this._persistent.CreateDirectoryIfNotExistsAsync(path, ct);
+    }
+
+    public Task CreateDirectoryAsync(string path, CancellationToken ct = default)
+    {
+        return this._persistent.CreateDirectoryAsync(path, ct);
+    }
+
+    public async Task WriteAllTextAsync(string filename, string content, bool firstWrite, CancellationToken ct = default)
+    {
+        await this._memory.WriteAllTextAsync(filename, content, firstWrite, ct).ConfigureAwait(false);
+
+        lock (this._lock)
+        {
+            PendingFile file = this.GetPendingFile(filename, firstWrite, out bool enqueue);
+            file.Content = content;
+            file.Appended = null;
+            if (enqueue) { this._flushQueue.Writer.TryWrite(filename); }
+        }
+    }
+
+    public async Task AppendAllTextAsync(string filename, string content, bool firstWrite, CancellationToken ct = default)
+    {
+        // Files evicted from memory are not recreated with a partial content, reads merge the
+        // persistent content with the pending content instead
+        if (firstWrite)
+        {
+            await this._memory.AppendAllTextAsync(filename, content, firstWrite, ct).ConfigureAwait(false);
+        }
+        else
+        {
+            this._memory.TryAppendAllText(filename, content);
+        }
+
+        lock (this._lock)
+        {
+            PendingFile file = this.GetPendingFile(filename, firstWrite, out bool enqueue);
+            if (file.Content != null)
+            {
+                file.Content += content;
+            }
+            else
+            {
+                file.Appended ??= new StringBuilder();
+                file.Appended.Append(content);
+            }
+
+            if (enqueue) { this._flushQueue.Writer.TryWrite(filename); }
+        }
+    }
+
+    public async Task<string> ReadAllTextAsync(string filename, CancellationToken ct = default)
+    {
+        string? content = this._memory.TryReadAllText(filename);
+        if (content != null) { return content; }
+
+        // Evicted from memory, merge the persistent content with the content not flushed yet
+        while (true)
+        {
+            Task? flushing;
+            PendingFile? pending;
+            lock (this._lock)
+            {
+                this._pending.TryGetValue(filename, out pending);
+                if (pending?.Content != null) { return pending.Content; }
+
+                if (pending is { Created: false }) { return pending.Appended?.ToString() ?? string.Empty; }
+
+                // The persistent storage is being updated, wait and check again
+                flushing = this._flushing.TryGetValue(filename, out PendingFile? file) ? file.Flushed!.Task : null;
+            }
+
+            if (flushing != null)
+            {
+                await flushing.WaitAsync(ct).ConfigureAwait(false);
+                continue;
+            }
+
+            content = await this._persistent.ReadAllTextAsync(filename, ct).ConfigureAwait(false);
+
+            lock (this._lock)
+            {
+                // Retry if pending changes were flushed while reading, otherwise they are not included yet
+                this._pending.TryGetValue(filename, out PendingFile? current);
+                if (!ReferenceEquals(current, pending) || this._flushing.ContainsKey(filename)) { continue; }
+
+                if (current?.Content != null) { return current.Content; }
+
+                return current?.Appended == null ? content : content + current.Appended.ToString();
+            }
+        }
+    }
+
+    // Note: binary files, e.g. uploads, are usually large and written once, so they are not kept in memory
+    public Task WriteStreamAsync(string filename, Stream content, CancellationToken ct = default)
+    {
+        return this._persistent.WriteStreamAsync(filename, content, ct);
+    }
+
+    public Task<Stream> OpenReadAsync(string filename, CancellationToken ct = default)
+    {
+        return this._persistent.OpenReadAsync(filename, ct);
+    }
+
+    protected override async Task ExecuteAsync(CancellationToken stoppingToken)
+    {
+        try
+        {
+            await foreach (string filename in this._flushQueue.Reader.ReadAllAsync(stoppingToken).ConfigureAwait(false))
+            {
+                await this.FlushAsync(filename, stoppingToken).ConfigureAwait(false);
+            }
+        }
+        catch (OperationCanceledException) when (stoppingToken.IsCancellationRequested)
+        {
+            // Shutting down, see StopAsync
+        }
+    }
+
+    public override async Task StopAsync(CancellationToken cancellationToken)
+    {
+        await base.StopAsync(cancellationToken).ConfigureAwait(false);
+
+        // Copy the files still in the queue before shutting down
+        this._log.LogInformation("Flushing {Count} files before shutting down", this.PendingCount);
+        while (this._flushQueue.Reader.TryRead(out string? filename))
+        {
+            await this.FlushAsync(filename, cancellationToken).ConfigureAwait(false);
+        }
+    }
+
+    private PendingFile GetPendingFile(string filename, bool firstWrite, out bool enqueue)
+    {
+        enqueue = !this._pending.TryGetValue(filename, out PendingFile? file);
+        if (file == null)
+        {
+            // Files are not tracked after the flush, callers know whether a file is new
+            file = new PendingFile { Created = !firstWrite };
+            this._pending[filename] = file;
+        }
+
+        return file;
+    }
+
+    private async Task FlushAsync(string filename, CancellationToken cancellationToken)
+    {
+        PendingFile? file;
+        lock (this._lock)
+        {
+            // Take the pending changes, new writes from now on are queued again.
+            // Readers find the content in the flushing list until the write completes.
+            if (!this._pending.Remove(filename, out file)) { return; }
+
+            file.Flushed = new TaskCompletionSource(TaskCreationOptions.RunContinuationsAsynchronously);
+            this._flushing[filename] = file;
+        }
+
+#pragma warning disable CA1031 // flush errors are retried
+        try
+        {
+            if (file.Content != null)
+            {
+                await this._persistent.WriteAllTextAsync(filename, file.Content, !file.Created, cancellationToken).ConfigureAwait(false);
+            }
+            else if (file.Appended != null)
+            {
+                await this._persistent.AppendAllTextAsync(filename, file.Appended.ToString(), !file.Created, cancellationToken).ConfigureAwait(false);
+            }
+
+            this.CompleteFlush(filename, file);
+        }
+        catch (Exception e) when (e is not OperationCanceledException)
+        {
+            this._log.LogError(e, "Unable to copy {FileName} to persistent storage, retrying", filename);
+            this.Requeue(filename, file);
+            this.CompleteFlush(filename, file);
+            await Task.Delay(s_retryDelay, cancellationToken).ConfigureAwait(false);
+        }
+        catch (OperationCanceledException)
+        {
+            // Keep the content available to readers, and to StopAsync
+            this.Requeue(filename, file);
+            this.CompleteFlush(filename, file);
+            throw;
+        }
+#pragma warning restore CA1031
+    }
+
+    private void CompleteFlush(string filename, PendingFile file)
+    {
+        lock (this._lock) { this._flushing.Remove(filename); }
+
+        file.Flushed?.TrySetResult();
+    }
+
+    private void Requeue(string filename, PendingFile failed)
+    {
+        lock (this._lock)
+        {
+            if (this._pending.TryGetValue(filename, out PendingFile? newer))
+            {
+                // Newer content replaces the failed write, newer appends follow the failed ones
+                newer.Created = failed.Created;
+                if (newer.Content == null && failed.Content != null)
+                {
+                    newer.Content = failed.Content + newer.Appended;
+                    newer.Appended = null;
+                }
+                else if (newer.Content == null && failed.Appended != null)
+                {
+                    newer.Appended = failed.Appended.Append(newer.Appended);
+                }
+
+                return;
+            }
+
+            this._pending[filename] = failed;
+            this._flushQueue.Writer.TryWrite(filename);
+        }
+    }
+}
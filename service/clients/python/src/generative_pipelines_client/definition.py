@@ -19,11 +19,29 @@ class PipelineStep:
         function (str): Function to execute in this step. Optional. When empty, only xin/xout transformations are done.
         xin (str): Input transformation in JMESPath format. Optional. If not provided, the input is the output of the previous step.
         xout (str): Output transformation in JMESPath format. Optional.
+        foreach (str): JMESPath expression selecting an array. Optional. When provided, xin and the function
+            are applied to each element of the array, concurrently, and the results are collected in an array.
+        max_parallelism (int): Max number of elements processed at the same time by a foreach step. Optional.
+        depends_on (List[str]): IDs of previous steps this step depends on. Optional. When any step declares its
+            dependencies, independent steps run concurrently.
+        timeout (float): Max time in seconds to wait for the function response, for each attempt. Optional.
+        retries (int): Number of retries after transient errors, e.g. timeouts and throttling. Optional.
+        backoff (float): Initial delay in seconds between retries, doubled after each retry. Optional.
+        cache (bool): Whether to reuse the result of previous calls with the same function and input. Optional.
+        cache_ttl (float): Number of seconds the function result is cached. Optional.
     """
     id: Optional[str] = None
     function: Optional[str] = None
     xin: Optional[str] = None
     xout: Optional[str] = None
+    foreach: Optional[str] = None
+    max_parallelism: Optional[int] = None
+    depends_on: Optional[List[str]] = None
+    timeout: Optional[float] = None
+    retries: Optional[int] = None
+    backoff: Optional[float] = None
+    cache: Optional[bool] = None
+    cache_ttl: Optional[float] = None
 
 
 @dataclass
@@ -43,7 +61,15 @@ class PipelineDefinition:
         id: str = None,
         function: str = None,
         xin: str = None,
-        xout: str = None
+        xout: str = None,
+        foreach: str = None,
+        max_parallelism: int = None,
+        depends_on: List[str] = None,
+        timeout: float = None,
+        retries: int = None,
+        backoff: float = None,
+        cache: bool = None,
+        cache_ttl: float = None
     ) -> "PipelineDefinition":
         """
         Adds a step to the pipeline with optional fields.
@@ -53,6 +79,16 @@ class PipelineDefinition:
             function (str): Step function (optional).
             xin (str): JMESPath input expression (optional, multiline allowed).
             xout (str): JMESPath output expression (optional).
+            foreach (str): JMESPath expression selecting an array, to run xin and the function
+                on each element (optional).
+            max_parallelism (int): Max number of elements processed concurrently by a foreach step (optional).
+            depends_on (List[str]): IDs of previous steps this step depends on (optional). Use an empty
+                list for steps depending only on the pipeline input.
+            timeout (float): Max seconds to wait for the function response, for each attempt (optional).
+            retries (int): Number of retries after transient errors (optional), e.g. 0 to disable retries.
+            backoff (float): Initial delay in seconds between retries, doubled after each retry (optional).
+            cache (bool): Reuse the result of previous calls with the same input, for deterministic functions (optional).
+            cache_ttl (float): Number of seconds the function result is cached (optional).
 
         Returns:
             self (PipelineDefinition): Enables chaining.
@@ -64,10 +100,78 @@ class PipelineDefinition:
         if isinstance(xout, str):
             xout = textwrap.dedent(xout).strip()
 
-        step = PipelineStep(id=id, function=function, xin=xin, xout=xout)
+        if isinstance(foreach, str):
+            foreach = textwrap.dedent(foreach).strip()
+
+        step = PipelineStep(
+            id=id,
+            function=function,
+            xin=xin,
+            xout=xout,
+            foreach=foreach,
+            max_parallelism=max_parallelism,
+            depends_on=list(depends_on) if depends_on is not None else None,
+            timeout=timeout,
+            retries=retries,
+            backoff=backoff,
+            cache=cache,
+            cache_ttl=cache_ttl,
+        )
         self.steps.append(step)
         return self
-    
+
+    def add_map_step(
+        self,
+        function: str,
+        foreach: str,
+        max_parallelism: int = None,
+        id: str = None,
+        xin: str = None,
+        xout: str = None,
+        depends_on: List[str] = None,
+        timeout: float = None,
+        retries: int = None,
+        backoff: float = None,
+        cache: bool = None,
+        cache_ttl: float = None
+    ) -> "PipelineDefinition":
+        """
+        Adds a step calling the function on each element of an array, e.g. to vectorize a list of chunks.
+        The results are collected into the state, in the same order as the array.
+
+        Args:
+            function (str): Step function, called once per element.
+            foreach (str): JMESPath expression selecting the array. Inside xin, "@" is the current element.
+            max_parallelism (int): Max number of elements processed concurrently (optional).
+            id (str): Step ID (optional).
+            xin (str): JMESPath input expression, evaluated for each element (optional).
+            xout (str): JMESPath output expression, evaluated on the array of results (optional).
+            depends_on (List[str]): IDs of previous steps this step depends on (optional).
+            timeout (float): Max seconds to wait for each function response, for each attempt (optional).
+            retries (int): Number of retries after transient errors (optional).
+            backoff (float): Initial delay in seconds between retries, doubled after each retry (optional).
+            cache (bool): Reuse the result of previous calls with the same input (optional).
+            cache_ttl (float): Number of seconds the function results are cached (optional).
+
+        Returns:
+            self (PipelineDefinition): Enables chaining.
+        """
+
+        return self.add_step(
+            id=id,
+            function=function,
+            xin=xin,
+            xout=xout,
+            foreach=foreach,
+            max_parallelism=max_parallelism,
+            depends_on=depends_on,
+            timeout=timeout,
+            retries=retries,
+            backoff=backoff,
+            cache=cache,
+            cache_ttl=cache_ttl,
+        )
+
     def to_json(self) -> str:
         """
         Serialize the pipeline definition to a JSON string.
@@ -83,6 +187,7 @@ class PipelineDefinition:
         - Keys are never quoted
         - None values are omitted
         - Steps are serialized as a nested structure under "_workflow"
+        - Step fields use the names expected by the Orchestrator service, e.g. "maxParallelism"
         """
         import dataclasses
         import yaml
@@ -102,10 +207,12 @@ class PipelineDefinition:
                         key_node.style = None  # never quote keys
                 return node
 
+        step_field_names = {"max_parallelism": "maxParallelism", "depends_on": "dependsOn", "cache_ttl": "cacheTtl"}
+
         def clean(obj):
             if dataclasses.is_dataclass(obj):
                 data = {
-                    k: clean(v)
+                    step_field_names.get(k, k): clean(v)
                     for k, v in dataclasses.asdict(obj).items()
                     if v is not None and k != "steps"
                 }
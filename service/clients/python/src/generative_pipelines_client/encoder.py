@@ -24,12 +24,28 @@ class PipelineEncoder(json.JSONEncoder):
             step = {}
             if obj.id:
                 step["id"] = obj.id
+            if obj.depends_on is not None:
+                step["dependsOn"] = obj.depends_on
+            if obj.foreach:
+                step["foreach"] = obj.foreach
+            if obj.max_parallelism:
+                step["maxParallelism"] = obj.max_parallelism
             if obj.function:
                 step["function"] = obj.function
             if obj.xin:
                 step["xin"] = obj.xin
             if obj.xout:
                 step["xout"] = obj.xout
+            if obj.timeout is not None:
+                step["timeout"] = obj.timeout
+            if obj.retries is not None:
+                step["retries"] = obj.retries
+            if obj.backoff is not None:
+                step["backoff"] = obj.backoff
+            if obj.cache is not None:
+                step["cache"] = obj.cache
+            if obj.cache_ttl is not None:
+                step["cacheTtl"] = obj.cache_ttl
             return step
 
         if isinstance(obj, SimpleNamespace):
@@ -1,7 +1,9 @@
 # Copyright (c) Microsoft. All rights reserved.
 
+import asyncio
 import aiohttp
 import json
+from typing import Any, AsyncIterator, Iterable, Optional, Tuple
 from generative_pipelines_client.definition import PipelineDefinition
 from generative_pipelines_client.encoder import PipelineEncoder
 
@@ -10,9 +12,18 @@ class GPClient:
     """
     HTTP client for interacting with a generative pipeline backend.
 
+    The client owns a pooled HTTP session, created on first use and reused by all
+    requests, so jobs don't pay for a new TCP/TLS handshake each time. Use the client
+    as an async context manager, or call close(), to release the connections.
+
     Args:
         base_url (str): Full base URL (must start with http:// or https://).
         api_key (str, optional): API key for Authorization header.
+        max_connections (int, optional): Max number of open connections, 0 for no limit.
+        max_connections_per_host (int, optional): Max number of open connections per host, 0 for no limit.
+        keepalive_timeout (float, optional): Seconds to keep idle connections open.
+        dns_cache_ttl (int, optional): Seconds to cache DNS lookups, None to cache forever.
+        timeout (float, optional): Total timeout in seconds for each request, None for no timeout.
 
     Methods:
         new_pipeline() -> PipelineDefinition:
@@ -20,20 +31,74 @@ class GPClient:
 
         run_pipeline(pipeline: PipelineDefinition) -> dict:
             Sends a pipeline definition to the server for execution.
+
+        run_many(pipelines: Iterable[PipelineDefinition], max_in_flight: int) -> AsyncIterator[Tuple[int, dict]]:
+            Runs multiple pipelines concurrently, yielding results as each job finishes.
+
+        run_batch(pipeline: PipelineDefinition, inputs: Iterable[Any]) -> AsyncIterator[dict]:
+            Runs the same pipeline over many inputs with a single batch request, streaming results back.
+
+        submit(pipeline: PipelineDefinition) -> str:
+            Submits a pipeline to run in the background, returning the job ID.
+
+        get_status(job_id: str) -> dict:
+            Returns the status of a job submitted with submit().
+
+        wait(job_id: str, timeout: float) -> dict:
+            Polls a job submitted with submit() until it completes, returning its result.
+
+        close():
+            Closes the HTTP session and all pooled connections.
     """
 
-    def __init__(self, base_url: str, api_key: str = None):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = None,
+        max_connections: int = 100,
+        max_connections_per_host: int = 0,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: Optional[int] = 300,
+        timeout: Optional[float] = None,
+    ):
         """
-        Initializes the client with the given base URL.
+        Initializes the client with the given base URL and connection pool settings.
 
         Args:
             base_url (str): Full base URL (must start with http:// or https://).
             api_key (str, optional): API key for Authorization header.
+            max_connections (int, optional): Max number of open connections, 0 for no limit.
+            max_connections_per_host (int, optional): Max number of open connections per host, 0 for no limit.
+            keepalive_timeout (float, optional): Seconds to keep idle connections open.
+            dns_cache_ttl (int, optional): Seconds to cache DNS lookups, None to cache forever.
+            timeout (float, optional): Total timeout in seconds for each request, None for no timeout.
         """
         if not base_url.startswith("http://") and not base_url.startswith("https://"):
             raise ValueError("base_url must start with http:// or https://")
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "GPClient":
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Closes the HTTP session and all pooled connections.
+        The client can still be used afterwards, a new session is created on demand.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     @staticmethod
     def new_pipeline() -> PipelineDefinition:
@@ -54,6 +119,183 @@ class GPClient:
         """
         return await self._post("/api/jobs", pipeline, encoder=PipelineEncoder)
 
+    async def run_many(
+        self,
+        pipelines: Iterable[PipelineDefinition],
+        max_in_flight: int = 10,
+        return_exceptions: bool = False,
+    ) -> AsyncIterator[Tuple[int, dict]]:
+        """
+        Executes multiple pipelines concurrently, keeping at most `max_in_flight` jobs running.
+        Pipelines are consumed lazily, so `pipelines` can be a generator.
+
+        Args:
+            pipelines (Iterable[PipelineDefinition]): The pipelines to execute.
+            max_in_flight (int): Max number of jobs running at the same time.
+            return_exceptions (bool): When True, a failed job yields its exception instead
+                of raising it and cancelling the jobs still running.
+
+        Yields:
+            Tuple[int, dict]: The index of the pipeline in the input sequence, and the parsed
+            JSON response, in completion order (not input order).
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be greater than zero")
+
+        source = iter(enumerate(pipelines))
+        pending = {}
+
+        def schedule() -> None:
+            while len(pending) < max_in_flight:
+                item = next(source, None)
+                if item is None:
+                    return
+                index, pipeline = item
+                pending[asyncio.ensure_future(self.run_pipeline(pipeline))] = index
+
+        try:
+            schedule()
+            while pending:
+                done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = pending.pop(task)
+                    if task.exception() is None:
+                        yield index, task.result()
+                    elif return_exceptions:
+                        yield index, task.exception()
+                    else:
+                        raise task.exception()
+                schedule()
+        finally:
+            # Wait for the cancelled jobs, so their requests are closed before returning
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def run_batch(
+        self,
+        pipeline: PipelineDefinition,
+        inputs: Iterable[Any],
+        max_parallelism: Optional[int] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Executes the steps of the given pipeline once for each input, with a single batch request.
+        Each input is used as `pipeline.input` of a separate job, so the same JMESPath expressions work
+        for single jobs and batches. The server streams results back as NDJSON, and results are
+        yielded as soon as each line is received, without buffering the whole response.
+
+        Args:
+            pipeline (PipelineDefinition): The pipeline providing the steps, its input is ignored.
+            inputs (Iterable[Any]): The input of each job.
+            max_parallelism (int, optional): Max number of jobs running at the same time on the server,
+                capped by the server configuration.
+
+        Yields:
+            dict: One result per job, in completion order, with these fields:
+                - index (int): Position of the input in `inputs`.
+                - jobId (str): ID of the job.
+                - status (int): HTTP status code of the job.
+                - result (Any): Job output, when the job succeeds.
+                - error (Any): Error details, when the job fails.
+        """
+        workflow = json.loads(json.dumps(pipeline, cls=PipelineEncoder))["_workflow"]
+        data = {"_workflow": workflow, "inputs": [{"input": item} for item in inputs]}
+
+        path = "/api/jobs/batch"
+        if max_parallelism is not None:
+            path += f"?maxParallelism={max_parallelism}"
+
+        async for item in self._post_ndjson(path, data, encoder=PipelineEncoder):
+            yield item
+
+    async def submit(self, pipeline: PipelineDefinition) -> str:
+        """
+        Submits the given pipeline to run in the background (async mode).
+        The request returns as soon as the job is queued, use wait() to get the result.
+
+        Args:
+            pipeline (PipelineDefinition): The pipeline to execute.
+
+        Returns:
+            str: The job ID.
+        """
+        status = await self._post("/api/jobs?async=true", pipeline, encoder=PipelineEncoder)
+        return status["jobId"]
+
+    async def get_status(self, job_id: str) -> dict:
+        """
+        Returns the status of a job submitted with submit().
+
+        Args:
+            job_id (str): The job ID.
+
+        Returns:
+            dict: The job status, where the "status" field is one of "Queued", "Running", "Completed", "Failed".
+        """
+        return await self._get(f"/api/jobs/{job_id}")
+
+    async def wait(
+        self,
+        job_id: str,
+        timeout: Optional[float] = None,
+        poll_interval: float = 0.5,
+        max_poll_interval: float = 10,
+        backoff_factor: float = 1.5,
+    ) -> dict:
+        """
+        Waits for a job submitted with submit() to complete, polling its status with exponential backoff.
+
+        Args:
+            job_id (str): The job ID.
+            timeout (float, optional): Max number of seconds to wait, None to wait forever.
+            poll_interval (float): Seconds to wait before the first poll.
+            max_poll_interval (float): Max number of seconds between polls.
+            backoff_factor (float): Multiplier applied to the polling interval after each poll.
+
+        Returns:
+            dict: The parsed JSON result of the job.
+
+        Raises:
+            aiohttp.ClientResponseError: If the job failed, with the status code the job would have
+                returned if executed synchronously.
+            TimeoutError: If the job doesn't complete within the given timeout.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        delay = poll_interval
+
+        while True:
+            status = await self.get_status(job_id)
+            if status["status"] in ("Completed", "Failed"):
+                return await self._get(f"/api/jobs/{job_id}/result")
+
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"Job {job_id} not completed after {timeout} seconds, status: {status['status']}")
+                delay = min(delay, remaining)
+
+            await asyncio.sleep(delay)
+            delay = min(delay * backoff_factor, max_poll_interval)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the pooled HTTP session, creating it on first use.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
     async def _post(self, path: str, data: object, encoder=None) -> dict:
         """
         Internal helper to send a POST request with optional JSON encoder.
@@ -69,11 +311,66 @@ class GPClient:
         url = f"{self.base_url}{path}"
         body = json.dumps(data, cls=encoder or json.JSONEncoder).encode("utf-8")
 
+        async with self._get_session().post(url, data=body, headers=self._headers()) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def _get(self, path: str) -> dict:
+        """
+        Internal helper to send a GET request.
+
+        Args:
+            path (str): Endpoint path.
+
+        Returns:
+            dict: Parsed JSON response.
+        """
+        url = f"{self.base_url}{path}"
+
+        async with self._get_session().get(url, headers=self._headers()) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def _post_ndjson(self, path: str, data: object, encoder=None) -> AsyncIterator[dict]:
+        """
+        Internal helper to send a POST request and parse the NDJSON response incrementally.
+        Lines are split manually, so there's no limit to the size of each line.
+
+        Args:
+            path (str): Endpoint path.
+            data (object): Data to serialize and send.
+            encoder (json.JSONEncoder, optional): Custom encoder.
+
+        Yields:
+            dict: One parsed JSON object per line.
+        """
+        url = f"{self.base_url}{path}"
+        body = json.dumps(data, cls=encoder or json.JSONEncoder).encode("utf-8")
+        headers = self._headers()
+        headers["Accept"] = "application/x-ndjson"
+
+        async with self._get_session().post(url, data=body, headers=headers) as resp:
+            resp.raise_for_status()
+            buffer = bytearray()
+            async for chunk in resp.content.iter_any():
+                start = len(buffer)
+                buffer += chunk
+                # Search only the new bytes, so a long line received in many chunks is scanned once
+                end = buffer.rfind(b"\n", start)
+                if end < 0:
+                    continue
+                for line in buffer[:end].split(b"\n"):
+                    if line.strip():
+                        yield json.loads(line)
+                del buffer[: end + 1]
+            if buffer.strip():
+                yield json.loads(buffer)
+
+    def _headers(self) -> dict:
+        """
+        Internal helper to build the request headers.
+        """
         headers = {"Content-Type": "application/json"}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, data=body, headers=headers) as resp:
-                resp.raise_for_status()
-                return await resp.json()
+        return headers
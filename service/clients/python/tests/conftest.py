@@ -0,0 +1,27 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+from aiohttp import web
+import pytest
+
+
+@pytest.fixture
+async def stub_server():
+    """
+    Starts a local aiohttp application standing in for the Orchestrator.
+    Usage: base_url = await stub_server(app)
+    """
+    runners = []
+
+    async def start(app: web.Application) -> str:
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        runners.append(runner)
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    yield start
+
+    for runner in runners:
+        await runner.cleanup()
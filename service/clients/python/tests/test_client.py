@@ -93,6 +93,95 @@ def test_pipeline_with_dynamic_input():
     print(pipeline.to_yaml())
 
 
+def test_pipeline_foreach_serialization():
+    pipeline = GPClient.new_pipeline()
+    pipeline.add_step(
+        function="embedding-generator/vectorize",
+        foreach="state.chunks",
+        xin="{ text: state }",
+        max_parallelism=4,
+    )
+
+    step = json.loads(pipeline.to_json())["_workflow"]["steps"][0]
+    assert step == {
+        "foreach": "state.chunks",
+        "maxParallelism": 4,
+        "function": "embedding-generator/vectorize",
+        "xin": "{ text: state }",
+    }
+
+    yaml = pipeline.to_yaml()
+    assert 'foreach: "state.chunks"' in yaml
+    assert "maxParallelism: 4" in yaml
+
+
+def test_pipeline_map_step_serialization():
+    pipeline = GPClient.new_pipeline()
+    pipeline.add_step(function="chunker/chunk")
+    pipeline.add_map_step(
+        "embedding-generator/vectorize",
+        foreach="""
+            state.chunks
+        """,
+        max_parallelism=8,
+        xin="{ input: @ }",
+    )
+    pipeline.add_map_step("embedding-generator/vectorize", "state")
+
+    steps = json.loads(pipeline.to_json())["_workflow"]["steps"]
+    assert steps[1] == {
+        "foreach": "state.chunks",
+        "maxParallelism": 8,
+        "function": "embedding-generator/vectorize",
+        "xin": "{ input: @ }",
+    }
+    assert steps[2] == {"foreach": "state", "function": "embedding-generator/vectorize"}
+
+    yaml = pipeline.to_yaml()
+    assert 'foreach: "state.chunks"' in yaml
+    assert "maxParallelism: 8" in yaml
+
+
+def test_pipeline_depends_on_serialization():
+    pipeline = GPClient.new_pipeline()
+    pipeline.add_step(id="en", function="wikipedia/en", xin="{ title: start.title }", depends_on=[])
+    pipeline.add_step(id="it", function="wikipedia/it", xin="{ title: start.title }", depends_on=[])
+    pipeline.add_step(xin="{ en: en.out.content, it: it.out.content }", depends_on=["en", "it"])
+
+    steps = json.loads(pipeline.to_json())["_workflow"]["steps"]
+    assert steps[0]["dependsOn"] == []
+    assert steps[2]["dependsOn"] == ["en", "it"]
+
+    yaml = pipeline.to_yaml()
+    assert "dependsOn:" in yaml
+
+
+def test_pipeline_call_options_serialization():
+    pipeline = GPClient.new_pipeline()
+    pipeline.add_step(function="wikipedia/en", timeout=30, retries=0)
+    pipeline.add_step(function="chunker/chunk", backoff=0.5)
+
+    steps = json.loads(pipeline.to_json())["_workflow"]["steps"]
+    assert steps[0] == {"function": "wikipedia/en", "timeout": 30, "retries": 0}
+    assert steps[1] == {"function": "chunker/chunk", "backoff": 0.5}
+
+    yaml = pipeline.to_yaml()
+    assert "retries: 0" in yaml
+    assert "backoff: 0.5" in yaml
+
+
+def test_pipeline_cache_serialization():
+    pipeline = GPClient.new_pipeline()
+    pipeline.add_step(function="chunker/chunk", cache=True, cache_ttl=600)
+
+    step = json.loads(pipeline.to_json())["_workflow"]["steps"][0]
+    assert step == {"function": "chunker/chunk", "cache": True, "cacheTtl": 600}
+
+    yaml = pipeline.to_yaml()
+    assert "cache: true" in yaml
+    assert "cacheTtl: 600" in yaml
+
+
 @pytest.mark.asyncio
 async def test_pipeline_execution_async():
     client = GPClient("http://localhost:60000")
@@ -135,5 +224,210 @@ async def test_pipeline_execution_async():
         """,
     )
 
-    result = await client.run_pipeline(pipeline)
+    async with client:
+        result = await client.run_pipeline(pipeline)
     print(json.dumps(result, indent=2))
+
+
+@pytest.mark.asyncio
+async def test_run_many_bounded_concurrency(stub_server):
+    import asyncio
+    from aiohttp import web
+
+    in_flight = 0
+    max_seen = 0
+
+    async def jobs(request):
+        nonlocal in_flight, max_seen
+        in_flight += 1
+        max_seen = max(max_seen, in_flight)
+        payload = await request.json()
+        await asyncio.sleep(0.01 * (10 - payload["input"]["n"]))
+        in_flight -= 1
+        return web.json_response({"n": payload["input"]["n"]})
+
+    app = web.Application()
+    app.router.add_post("/api/jobs", jobs)
+    base_url = await stub_server(app)
+
+    def pipelines():
+        for n in range(10):
+            pipeline = GPClient.new_pipeline()
+            pipeline.input = {"n": n}
+            yield pipeline
+
+    async with GPClient(base_url, max_connections_per_host=4) as client:
+        results = [(index, result) async for index, result in client.run_many(pipelines(), max_in_flight=3)]
+        session = client._session
+
+    assert session.closed
+    assert max_seen <= 3
+    assert sorted(index for index, _ in results) == list(range(10))
+    assert all(result["n"] == index for index, result in results)
+
+
+@pytest.mark.asyncio
+async def test_run_many_return_exceptions(stub_server):
+    from aiohttp import web
+
+    async def jobs(request):
+        payload = await request.json()
+        if payload["input"]["n"] == 1:
+            return web.json_response({"error": "boom"}, status=500)
+        return web.json_response({"n": payload["input"]["n"]})
+
+    app = web.Application()
+    app.router.add_post("/api/jobs", jobs)
+    base_url = await stub_server(app)
+
+    pipelines = [GPClient.new_pipeline() for _ in range(3)]
+    for n, pipeline in enumerate(pipelines):
+        pipeline.input = {"n": n}
+
+    async with GPClient(base_url) as client:
+        results = dict([item async for item in client.run_many(pipelines, max_in_flight=2, return_exceptions=True)])
+
+    assert results[0] == {"n": 0}
+    assert isinstance(results[1], Exception)
+    assert results[2] == {"n": 2}
+
+
+@pytest.mark.asyncio
+async def test_run_many_waits_for_cancelled_jobs(stub_server):
+    import asyncio
+    from aiohttp import ClientResponseError, web
+
+    async def jobs(request):
+        payload = await request.json()
+        if payload["input"]["n"] == 0:
+            return web.json_response({"error": "boom"}, status=500)
+        await asyncio.sleep(1)
+        return web.json_response({"n": payload["input"]["n"]})
+
+    app = web.Application()
+    app.router.add_post("/api/jobs", jobs)
+    base_url = await stub_server(app)
+
+    pipelines = [GPClient.new_pipeline() for _ in range(3)]
+    for n, pipeline in enumerate(pipelines):
+        pipeline.input = {"n": n}
+
+    async with GPClient(base_url) as client:
+        jobs_running = client.run_many(pipelines, max_in_flight=3)
+        with pytest.raises(ClientResponseError):
+            async for _ in jobs_running:
+                pass
+        running = [task for task in asyncio.all_tasks() if "run_pipeline" in repr(task)]
+
+    # The jobs still running have been cancelled and awaited, closing their connections
+    assert running == []
+
+
+@pytest.mark.asyncio
+async def test_run_batch_streams_ndjson(stub_server):
+    from aiohttp import web
+
+    received = {}
+
+    async def batch(request):
+        received.update(await request.json())
+        received["maxParallelism"] = request.query.get("maxParallelism")
+        resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await resp.prepare(request)
+        # Results in completion order, the last line split across writes and without a trailing newline
+        await resp.write(b'{"index": 1, "jobId": "b-1", "status": 200, "result": {"n": 1}}\n{"index": 0, "jobId"')
+        await resp.write(b': "b-0", "status": 400, "error": {"message": "bad"}}')
+        await resp.write_eof()
+        return resp
+
+    app = web.Application()
+    app.router.add_post("/api/jobs/batch", batch)
+    base_url = await stub_server(app)
+
+    pipeline = GPClient.new_pipeline()
+    pipeline.add_step(function="wikipedia/en", xin="{ title: start.input.title }")
+
+    async with GPClient(base_url) as client:
+        results = [item async for item in client.run_batch(pipeline, [{"title": "A"}, {"title": "B"}], max_parallelism=2)]
+
+    assert received["_workflow"] == {"steps": [{"function": "wikipedia/en", "xin": "{ title: start.input.title }"}]}
+    assert received["inputs"] == [{"input": {"title": "A"}}, {"input": {"title": "B"}}]
+    assert received["maxParallelism"] == "2"
+    assert [item["index"] for item in results] == [1, 0]
+    assert results[0]["result"] == {"n": 1}
+    assert results[1]["status"] == 400
+
+
+@pytest.mark.asyncio
+async def test_run_batch_reads_long_lines(stub_server):
+    from aiohttp import web
+
+    text = "x" * 1_000_000
+
+    async def batch(request):
+        resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await resp.prepare(request)
+        data = json.dumps({"index": 0, "result": text}).encode() + b"\n\n" + json.dumps({"index": 1}).encode() + b"\n"
+        for i in range(0, len(data), 1000):
+            await resp.write(data[i : i + 1000])
+        await resp.write_eof()
+        return resp
+
+    app = web.Application()
+    app.router.add_post("/api/jobs/batch", batch)
+    base_url = await stub_server(app)
+
+    async with GPClient(base_url) as client:
+        results = [item async for item in client.run_batch(GPClient.new_pipeline(), [{}, {}])]
+
+    assert results == [{"index": 0, "result": text}, {"index": 1}]
+
+
+@pytest.mark.asyncio
+async def test_submit_and_wait(stub_server):
+    from aiohttp import web
+
+    polls = 0
+
+    async def submit(request):
+        assert request.query.get("async") == "true"
+        return web.json_response({"jobId": "job-1", "status": "Queued"}, status=202)
+
+    async def status(request):
+        nonlocal polls
+        polls += 1
+        state = "Completed" if polls >= 3 else "Running"
+        return web.json_response({"jobId": request.match_info["job_id"], "status": state})
+
+    async def result(request):
+        return web.json_response({"answer": 42})
+
+    app = web.Application()
+    app.router.add_post("/api/jobs", submit)
+    app.router.add_get("/api/jobs/{job_id}", status)
+    app.router.add_get("/api/jobs/{job_id}/result", result)
+    base_url = await stub_server(app)
+
+    async with GPClient(base_url) as client:
+        job_id = await client.submit(GPClient.new_pipeline())
+        result = await client.wait(job_id, timeout=5, poll_interval=0.01)
+
+    assert job_id == "job-1"
+    assert polls == 3
+    assert result == {"answer": 42}
+
+
+@pytest.mark.asyncio
+async def test_wait_timeout(stub_server):
+    from aiohttp import web
+
+    async def status(request):
+        return web.json_response({"jobId": "job-1", "status": "Running"})
+
+    app = web.Application()
+    app.router.add_get("/api/jobs/{job_id}", status)
+    base_url = await stub_server(app)
+
+    async with GPClient(base_url) as client:
+        with pytest.raises(TimeoutError):
+            await client.wait("job-1", timeout=0.1, poll_interval=0.02)
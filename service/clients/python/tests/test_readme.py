@@ -147,5 +147,6 @@ async def test_readme_async():
     # Run pipeline
     # print("\n== YAML ==")
     # print(pipeline.to_yaml())
-    result = await client.run_pipeline(pipeline)
+    async with client:
+        result = await client.run_pipeline(pipeline)
     print(json.dumps(result, indent=2))
@@ -0,0 +1,138 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Globalization;
+using System.Text;
+using System.Text.Json;
+using System.Text.RegularExpressions;
+using Microsoft.AspNetCore.Http;
+using Microsoft.AspNetCore.Http.HttpResults;
+
+namespace Chunker.Tests;
+
+public sealed class ChunkFunctionTest
+{
+    private const int SectionSize = ChunkFunction.StreamSectionSize;
+
+    private readonly ChunkFunction _function = new();
+    private readonly Random _random = new(123);
+
+    [Fact]
+    public void ItReturnsBatchResultsInTheOrderOfTheTexts()
+    {
+        // Arrange: texts of different length, so they complete out of order
+        List<string> texts = Enumerable.Range(0, 50).Select(i => this.GenerateText($"t{i}", paragraphs: 1 + (i * 7 % 20))).ToList();
+        var req = new ChunkBatchRequest { Texts = texts, MaxTokensPerChunk = 100, Tokenizer = "char" };
+
+        // Act
+        IResult result = this._function.InvokeBatch(req);
+
+        // Assert: each text is chunked as if sent on its own
+        ChunkBatchResponse response = Assert.IsType<Ok<ChunkBatchResponse>>(result).Value!;
+        Assert.Equal(texts.Count, response.Results.Count);
+        for (int i = 0; i < texts.Count; i++)
+        {
+            IResult single = this._function.Invoke(new ChunkRequest { Text = texts[i], MaxTokensPerChunk = 100, Tokenizer = "char" });
+            Assert.Equal(Assert.IsType<Ok<ChunkResponse>>(single).Value!.Chunks, response.Results[i].Chunks);
+            Assert.StartsWith($"[t{i}-", response.Results[i].Chunks[0], StringComparison.Ordinal);
+        }
+    }
+
+    [Fact]
+    public void ItSplitsSectionsAtParagraphBoundaries()
+    {
+        // Arrange
+        string text = this.GenerateText("p", paragraphs: 1000);
+
+        // Act
+        var sections = ChunkFunction.SplitSections(text, SectionSize).ToList();
+
+        // Assert: no text lost or repeated, sections end with a paragraph
+        Assert.Equal(text, string.Concat(sections.Select(x => x.section)));
+        Assert.True(sections.Count > 2);
+        int offset = 0;
+        foreach ((string section, int sectionOffset) in sections)
+        {
+            Assert.Equal(offset, sectionOffset);
+            Assert.True(section.Length <= SectionSize);
+            offset += section.Length;
+        }
+
+        Assert.All(sections.SkipLast(1), x => Assert.EndsWith("\n\n", x.section, StringComparison.Ordinal));
+    }
+
+    [Fact]
+    public void ItSplitsSectionsWithoutSeparators()
+    {
+        // Arrange
+        string text = string.Concat(Enumerable.Repeat("0123456789", SectionSize / 4));
+
+        // Act
+        var sections = ChunkFunction.SplitSections(text, SectionSize).ToList();
+
+        // Assert
+        Assert.Equal<int>([SectionSize, SectionSize, text.Length - (2 * SectionSize)], sections.Select(x => x.section.Length));
+        Assert.Equal(text, string.Concat(sections.Select(x => x.section)));
+    }
+
+    [Fact]
+    public async Task ItStreamsChunksWithoutBreakingOrRepeatingContentAtSectionEdges()
+    {
+        // Arrange: about 3.5 sections
+        string text = this.GenerateText("p", paragraphs: 1000);
+        var httpContext = new DefaultHttpContext();
+        var body = new MemoryStream();
+        httpContext.Response.Body = body;
+        var req = new ChunkRequest { Text = text, MaxTokensPerChunk = 1000, IncludeMetadata = true, Tokenizer = "char" };
+
+        // Act
+        await this._function.InvokeStreamAsync(httpContext, req, CancellationToken.None);
+
+        // Assert
+        Assert.Equal("application/x-ndjson; charset=utf-8", httpContext.Response.ContentType);
+        List<ChunkStreamItem> items = Encoding.UTF8.GetString(body.ToArray())
+            .Split('\n', StringSplitOptions.RemoveEmptyEntries)
+            .Select(line => JsonSerializer.Deserialize<ChunkStreamItem>(line)!)
+            .ToList();
+
+        Assert.Equal(Enumerable.Range(0, items.Count), items.Select(x => x.Index));
+        Assert.All(items, x => Assert.True(x.Chunk.Length <= 1000));
+
+        // Each paragraph is in one chunk only, in the original order
+        List<int> paragraphs = items
+            .SelectMany(x => Regex.Matches(x.Chunk, @"\[p-(\d+)\]").Select(m => int.Parse(m.Groups[1].Value, CultureInfo.InvariantCulture)))
+            .ToList();
+        Assert.Equal(Enumerable.Range(0, 1000), paragraphs);
+
+        // Positions refer to the whole text, not to the section
+        int[] edges = ChunkFunction.SplitSections(text, SectionSize).Select(x => x.offset).Skip(1).ToArray();
+        Assert.True(edges.Length >= 3);
+        foreach (ChunkStreamItem item in items.Where(x => x.Metadata!.Start != null))
+        {
+            int start = item.Metadata!.Start!.Value;
+            int end = item.Metadata.End!.Value;
+            Assert.Equal(item.Chunk.Trim(), text[start..end]);
+            Assert.DoesNotContain(edges, edge => edge > start && edge < end);
+        }
+    }
+
+    // Paragraphs of random length, between 100 and 400 chars, each starting with a unique marker, e.g. "[p-12]"
+    private string GenerateText(string prefix, int paragraphs)
+    {
+        var text = new StringBuilder();
+        for (int i = 0; i < paragraphs; i++)
+        {
+            if (i > 0) { text.Append("\n\n"); }
+
+            text.Append(CultureInfo.InvariantCulture, $"[{prefix}-{i}]");
+            int length = this._random.Next(100, 400);
+            while (length > 0)
+            {
+                string word = new('x', Math.Min(length, this._random.Next(2, 10)));
+                text.Append(' ').Append(word);
+                length -= word.Length + 1;
+            }
+        }
+
+        return text.ToString();
+    }
+}
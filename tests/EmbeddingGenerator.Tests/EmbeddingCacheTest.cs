@@ -0,0 +1,229 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Reflection;
+using EmbeddingGenerator.Cache;
+using EmbeddingGenerator.Config;
+using StackExchange.Redis;
+
+namespace EmbeddingGenerator.Tests;
+
+public sealed class EmbeddingCacheTest : IDisposable
+{
+    private readonly string _directory = Path.Combine(Path.GetTempPath(), "EmbeddingCacheTest", Guid.NewGuid().ToString("N"));
+    private readonly EmbeddingCacheConfig _config = new() { MemoryCacheSize = 10 };
+
+    [Fact]
+    public async Task ItRemovesTheLeastRecentlyUsedEmbeddings()
+    {
+        // Arrange
+        using var cache = new EmbeddingCache(new EmbeddingCacheConfig { MemoryCacheSize = 2 });
+        await cache.SetAsync([("a", [1]), ("b", [2])]);
+        await cache.GetAsync(["a"]);
+
+        // Act
+        await cache.SetAsync([("c", [3])]);
+        float[]?[] found = await cache.GetAsync(["a", "b", "c"]);
+
+        // Assert
+        Assert.Equal(2, cache.Count);
+        Assert.Equal<float>([1], found[0]!);
+        Assert.Null(found[1]);
+        Assert.Equal<float>([3], found[2]!);
+    }
+
+    [Fact]
+    public async Task ItChecksTheTierOnlyForEmbeddingsNotInMemory()
+    {
+        // Arrange
+        var tier = new StubTier();
+        using var cache = new EmbeddingCache(this._config, tier);
+        await cache.SetAsync([("a", [1])]);
+        tier.Values["b"] = [2];
+
+        // Act
+        float[]?[] found = await cache.GetAsync(["a", "b", "c"]);
+
+        // Assert
+        Assert.Equal<string>(["b", "c"], tier.Requests.Single());
+        Assert.Equal<float>([1], found[0]!);
+        Assert.Equal<float>([2], found[1]!);
+        Assert.Null(found[2]);
+    }
+
+    [Fact]
+    public async Task ItCopiesTierHitsInMemory()
+    {
+        // Arrange
+        var tier = new StubTier();
+        tier.Values["a"] = [1];
+        using var cache = new EmbeddingCache(this._config, tier);
+        await cache.GetAsync(["a"]);
+
+        // Act
+        float[]?[] found = await cache.GetAsync(["a"]);
+
+        // Assert
+        Assert.Equal(1, cache.Count);
+        Assert.Single(tier.Requests);
+        Assert.Equal<float>([1], found[0]!);
+    }
+
+    [Fact]
+    public async Task ItStoresEmbeddingsInTheTier()
+    {
+        // Arrange
+        var tier = new StubTier();
+        using var cache = new EmbeddingCache(new EmbeddingCacheConfig { MemoryCacheSize = 0 }, tier);
+
+        // Act
+        await cache.SetAsync([("a", [1, 2])]);
+
+        // Assert
+        Assert.Equal(0, cache.Count);
+        Assert.Equal<float>([1, 2], tier.Values["a"]);
+        Assert.Equal<float>([1, 2], (await cache.GetAsync(["a"]))[0]!);
+    }
+
+    [Fact]
+    public async Task ItReadsEmbeddingsStoredOnDiskAfterARestart()
+    {
+        // Arrange
+        string key = EmbeddingCache.GetKey("model", 0, "text");
+        using (var cache = new EmbeddingCache(this._config, new DiskEmbeddingCacheTier(this._directory)))
+        {
+            await cache.SetAsync([(key, [1, 2, 3])]);
+        }
+
+        // Act
+        float[]?[] found;
+        using (var cache = new EmbeddingCache(this._config, new DiskEmbeddingCacheTier(this._directory)))
+        {
+            found = await cache.GetAsync([key, EmbeddingCache.GetKey("model", 0, "other")]);
+        }
+
+        // Assert
+        Assert.Equal<float>([1, 2, 3], found[0]!);
+        Assert.Null(found[1]);
+    }
+
+    [Fact]
+    public async Task ItIgnoresCorruptedFilesOnDisk()
+    {
+        // Arrange: 3 bytes, not a list of float32
+        string key = EmbeddingCache.GetKey("model", 0, "text");
+        Directory.CreateDirectory(Path.Combine(this._directory, key[..2]));
+        await File.WriteAllBytesAsync(Path.Combine(this._directory, key[..2], key), [1, 2, 3]);
+
+        // Act
+        float[]?[] found = await new DiskEmbeddingCacheTier(this._directory).GetAsync([key], CancellationToken.None);
+
+        // Assert
+        Assert.Null(found[0]);
+    }
+
+    [Fact]
+    public async Task ItStoresEmbeddingsInRedisWithTheTtl()
+    {
+        // Arrange
+        var redis = RedisStub.Create();
+        var tier = new RedisEmbeddingCacheTier(redis, TimeSpan.FromDays(1));
+
+        // Act
+        await tier.SetAsync([("a", [1, 2])], CancellationToken.None);
+        float[]?[] found = await tier.GetAsync(["a", "b"], CancellationToken.None);
+
+        // Assert
+        Assert.Equal(TimeSpan.FromDays(1), ((RedisStub)redis).Ttl["Embedding:a"]);
+        Assert.Equal<float>([1, 2], found[0]!);
+        Assert.Null(found[1]);
+    }
+
+    [Fact]
+    public async Task ItTreatsRedisErrorsAsMisses()
+    {
+        // Arrange
+        var redis = RedisStub.Create();
+        ((RedisStub)redis).Fail = true;
+        var tier = new RedisEmbeddingCacheTier(redis, TimeSpan.FromDays(1));
+
+        // Act
+        await tier.SetAsync([("a", [1, 2])], CancellationToken.None);
+        float[]?[] found = await tier.GetAsync(["a"], CancellationToken.None);
+
+        // Assert
+        Assert.Null(found[0]);
+    }
+
+    public void Dispose()
+    {
+        if (Directory.Exists(this._directory)) { Directory.Delete(this._directory, recursive: true); }
+    }
+
+    private sealed class StubTier : IEmbeddingCacheTier
+    {
+        public string Name => "stub";
+
+        public Dictionary<string, float[]> Values { get; } = [];
+
+        public List<List<string>> Requests { get; } = [];
+
+        public Task<float[]?[]> GetAsync(IReadOnlyList<string> keys, CancellationToken cancellationToken)
+        {
+            this.Requests.Add(keys.ToList());
+            return Task.FromResult(keys.Select(x => this.Values.GetValueOrDefault(x)).ToArray());
+        }
+
+        public Task SetAsync(IReadOnlyList<(string key, float[] vector)> entries, CancellationToken cancellationToken)
+        {
+            foreach ((string key, float[] vector) in entries) { this.Values[key] = vector; }
+
+            return Task.CompletedTask;
+        }
+    }
+
+    /// <summary>
+    /// In memory Redis database and batch, supporting only the commands used by RedisEmbeddingCacheTier.
+    /// </summary>
+    internal class RedisStub : DispatchProxy
+    {
+        public Dictionary<string, byte[]> Values { get; private set; } = [];
+
+        public Dictionary<string, TimeSpan?> Ttl { get; private set; } = [];
+
+        public bool Fail { get; set; }
+
+        public static IDatabase Create()
+        {
+            return DispatchProxy.Create<IDatabase, RedisStub>();
+        }
+
+        protected override object? Invoke(MethodInfo? targetMethod, object?[]? args)
+        {
+            if (this.Fail) { throw new RedisConnectionException(ConnectionFailureType.UnableToConnect, "Redis not available"); }
+
+            switch (targetMethod!.Name)
+            {
+                case nameof(IDatabase.StringGetAsync) when args![0] is RedisKey[] keys:
+                    return Task.FromResult(keys.Select(x => this.Values.TryGetValue(x.ToString(), out byte[]? value) ? (RedisValue)value : RedisValue.Null).ToArray());
+
+                case nameof(IDatabase.StringSetAsync):
+                    string key = ((RedisKey)args![0]!).ToString();
+                    this.Values[key] = (byte[])(RedisValue)args[1]!;
+                    this.Ttl[key] = (TimeSpan?)args[2];
+                    return Task.FromResult(true);
+
+                case nameof(IDatabase.CreateBatch):
+                    var batch = DispatchProxy.Create<IBatch, RedisStub>();
+                    ((RedisStub)(object)batch).Values = this.Values;
+                    ((RedisStub)(object)batch).Ttl = this.Ttl;
+                    return batch;
+
+                case nameof(IBatch.Execute):
+                    return null;
+
+                default:
+                    throw new NotSupportedException(targetMethod.Name);
+            }
+        }
+    }
+}
@@ -0,0 +1,198 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.ClientModel;
+using System.ClientModel.Primitives;
+using System.Globalization;
+using System.Net;
+using System.Runtime.InteropServices;
+using System.Text;
+using System.Text.Json.Nodes;
+using CommonDotNet.Embeddings;
+using EmbeddingGenerator.Cache;
+using EmbeddingGenerator.Config;
+using Microsoft.AspNetCore.Http;
+using Microsoft.AspNetCore.Http.HttpResults;
+using OpenAI;
+using OpenAI.Embeddings;
+
+namespace EmbeddingGenerator.Tests;
+
+public sealed class EmbeddingFunctionBaseTest : IDisposable
+{
+    private readonly StubEmbeddingHandler _handler = new();
+    private readonly EmbeddingClient _client;
+    private readonly EmbeddingCache _cache = new(new EmbeddingCacheConfig { MemoryCacheSize = 0 });
+
+    public EmbeddingFunctionBaseTest()
+    {
+        var options = new OpenAIClientOptions { Transport = new HttpClientPipelineTransport(new HttpClient(this._handler)) };
+        this._client = new EmbeddingClient("stub-model", new ApiKeyCredential("key"), options);
+    }
+
+    [Fact]
+    public void ItSplitsBatchesByNumberOfStrings()
+    {
+        // Arrange
+        List<string> strings = Enumerable.Range(0, 10).Select(i => $"{i}").ToList();
+
+        // Act
+        var batches = EmbeddingFunctionBase.GetBatches(strings, maxBatchSize: 4, maxBatchTokens: 1000);
+
+        // Assert
+        Assert.Equal<(int, int)>([(0, 4), (4, 4), (8, 2)], batches);
+    }
+
+    [Fact]
+    public void ItSplitsBatchesByNumberOfTokens()
+    {
+        // Arrange: 30 chars each, estimated 10 tokens
+        List<string> strings = Enumerable.Range(0, 5).Select(_ => new string('x', 30)).ToList();
+
+        // Act
+        var batches = EmbeddingFunctionBase.GetBatches(strings, maxBatchSize: 100, maxBatchTokens: 25);
+
+        // Assert
+        Assert.Equal<(int, int)>([(0, 2), (2, 2), (4, 1)], batches);
+    }
+
+    [Fact]
+    public void ItSendsOversizeStringsInABatchOnTheirOwn()
+    {
+        // Arrange: the second string exceeds the token limit
+        List<string> strings = ["a", new string('x', 300), "b", "c"];
+
+        // Act
+        var batches = EmbeddingFunctionBase.GetBatches(strings, maxBatchSize: 100, maxBatchTokens: 10);
+
+        // Assert
+        Assert.Equal<(int, int)>([(0, 1), (1, 1), (2, 2)], batches);
+    }
+
+    [Fact]
+    public void ItReturnsNoBatchesForAnEmptyList()
+    {
+        Assert.Empty(EmbeddingFunctionBase.GetBatches([], maxBatchSize: 10, maxBatchTokens: 10));
+    }
+
+    [Fact]
+    public async Task ItReturnsEmbeddingsInOrderAndSumsTheUsage()
+    {
+        // Arrange
+        List<string> inputs = Enumerable.Range(0, 50).Select(i => $"item-{i}").ToList();
+
+        // Act
+        IResult result = await this.InvokeAsync(inputs, maxBatchSize: 7);
+
+        // Assert
+        EmbeddingResponse response = Assert.IsType<Ok<EmbeddingResponse>>(result).Value!;
+        Assert.Equal(8, this._handler.Batches.Count);
+        Assert.All(this._handler.Batches, batch => Assert.True(batch.Count <= 7));
+        Assert.Equal(Enumerable.Range(0, 50).Select(i => (float)i), response.Embeddings!.Select(x => x[0]));
+        Assert.Equal(50, response.InputTokenCount);
+        Assert.Equal(100, response.TotalTokenCount);
+    }
+
+    [Fact]
+    public async Task ItSendsDuplicatesOnce()
+    {
+        // Arrange
+        List<string> inputs = ["item-1", "item-2", "item-1", "item-3", "item-2"];
+
+        // Act
+        IResult result = await this.InvokeAsync(inputs, maxBatchSize: 2);
+
+        // Assert
+        EmbeddingResponse response = Assert.IsType<Ok<EmbeddingResponse>>(result).Value!;
+        Assert.Equal(3, this._handler.Batches.Sum(x => x.Count));
+        Assert.Equal<float>([1, 2, 1, 3, 2], response.Embeddings!.Select(x => x[0]));
+        Assert.Equal(2, response.Duplicates);
+        Assert.Equal(3, response.InputTokenCount);
+    }
+
+    [Fact]
+    public async Task ItServesRepeatedInputsFromCache()
+    {
+        // Arrange
+        using var cache = new EmbeddingCache(new EmbeddingCacheConfig { MemoryCacheSize = 100 });
+        await this.InvokeAsync(["item-1", "item-2"], maxBatchSize: 10, cache);
+
+        // Act
+        IResult result = await this.InvokeAsync(["item-2", "item-3", "item-1"], maxBatchSize: 10, cache);
+
+        // Assert: only the new string is sent to the model
+        EmbeddingResponse response = Assert.IsType<Ok<EmbeddingResponse>>(result).Value!;
+        Assert.Equal(2, this._handler.Batches.Count);
+        Assert.Equal<string>(["item-3"], this._handler.Batches[1]);
+        Assert.Equal<float>([2, 3, 1], response.Embeddings!.Select(x => x[0]));
+        Assert.Equal(2, response.CacheHits);
+        Assert.Equal(1, response.InputTokenCount);
+    }
+
+    public void Dispose()
+    {
+        this._cache.Dispose();
+        this._handler.Dispose();
+    }
+
+    private Task<IResult> InvokeAsync(List<string> inputs, int maxBatchSize, EmbeddingCache? cache = null)
+    {
+        return EmbeddingFunctionBase.InvokeAsync(
+            client: this._client,
+            cache: cache ?? this._cache,
+            cacheModel: "stub-model",
+            input: null,
+            inputs: inputs,
+            supportsCustomDimensions: false,
+            dimensions: null,
+            encoding: EmbeddingEncodings.Float,
+            maxBatchSize: maxBatchSize,
+            maxBatchTokens: 1000,
+            maxConcurrentBatches: 4,
+            cancellationToken: CancellationToken.None);
+    }
+
+    /// <summary>
+    /// Embedding endpoint returning, for each "item-N" input, a vector with the value N. Embeddings are returned
+    /// in reverse order, and responses are delayed randomly, so that batches complete out of order.
+    /// Usage is one input token per string, two total tokens per string.
+    /// </summary>
+    private sealed class StubEmbeddingHandler : HttpMessageHandler
+    {
+        private readonly object _lock = new();
+
+        public List<List<string>> Batches { get; } = [];
+
+        protected override async Task<HttpResponseMessage> SendAsync(HttpRequestMessage request, CancellationToken cancellationToken)
+        {
+            JsonNode body = JsonNode.Parse(await request.Content!.ReadAsStringAsync(cancellationToken))!;
+            List<string> inputs = body["input"]!.AsArray().Select(x => x!.GetValue<string>()).ToList();
+            bool base64 = body["encoding_format"]?.GetValue<string>() == "base64";
+            lock (this._lock) { this.Batches.Add(inputs); }
+
+            await Task.Delay(Random.Shared.Next(1, 20), cancellationToken);
+
+            var data = new JsonArray();
+            for (int i = inputs.Count - 1; i >= 0; i--)
+            {
+                float[] vector = [float.Parse(inputs[i].Split('-')[1], CultureInfo.InvariantCulture), 0.5f];
+                JsonNode embedding = base64
+                    ? JsonValue.Create(Convert.ToBase64String(MemoryMarshal.AsBytes(vector.AsSpan())))!
+                    : new JsonArray(vector.Select(x => (JsonNode)JsonValue.Create(x)).ToArray());
+                data.Add(new JsonObject { ["object"] = "embedding", ["index"] = i, ["embedding"] = embedding });
+            }
+
+            var response = new JsonObject
+            {
+                ["object"] = "list",
+                ["model"] = "stub-model",
+                ["data"] = data,
+                ["usage"] = new JsonObject { ["prompt_tokens"] = inputs.Count, ["total_tokens"] = inputs.Count * 2 },
+            };
+
+            return new HttpResponseMessage(HttpStatusCode.OK)
+            {
+                Content = new StringContent(response.ToJsonString(), Encoding.UTF8, "application/json")
+            };
+        }
+    }
+}
@@ -0,0 +1,114 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text;
+using System.Text.Json;
+using Extractor.Functions;
+using Microsoft.AspNetCore.Http;
+using Microsoft.KernelMemory.Pipeline;
+using UglyToad.PdfPig.Content;
+using UglyToad.PdfPig.Core;
+using UglyToad.PdfPig.Fonts.Standard14Fonts;
+using UglyToad.PdfPig.Writer;
+
+namespace Extractor.Tests;
+
+public sealed class ExtractorTest
+{
+    private readonly Extractor _extractor = new();
+
+    [Theory]
+    [InlineData(3)] // extracted sequentially
+    [InlineData(100)] // extracted in parallel
+    public async Task ItReturnsPdfPagesInOrder(int pageCount)
+    {
+        // Arrange
+        FileToProcess file = NewPdf("doc.pdf", pageCount);
+
+        // Act
+        var sections = new List<ExtractedSection>();
+        await foreach (ExtractedSection section in this._extractor.ExtractSectionsAsync(file, maxParallelism: 4))
+        {
+            sections.Add(section);
+        }
+
+        // Assert
+        Assert.Equal(pageCount, sections.Count);
+        for (int i = 0; i < pageCount; i++)
+        {
+            Assert.Equal($"Page {i + 1}", sections[i].Content.Trim());
+            Assert.Equal(i + 1, sections[i].Metadata["PageNumber"]);
+        }
+    }
+
+    [Fact]
+    public async Task ItExtractsTheWholeTextOfAPdf()
+    {
+        // Act
+        ExtractResponse response = await this._extractor.ExtractAsync(NewPdf("doc.pdf", 20));
+
+        // Assert
+        Assert.Equal(Enumerable.Range(1, 20).Select(i => $"Page {i}"), response.Sections.Select(x => x.Content.Trim()));
+        Assert.StartsWith("Page 1", response.FullText, StringComparison.Ordinal);
+    }
+
+    [Fact]
+    public async Task ItStreamsAnErrorLineForFailedFilesWithoutStoppingTheStream()
+    {
+        // Arrange: a corrupted PDF and a file with an unknown type between valid files
+        var function = new ExtractFunction(new MimeTypesDetection(), this._extractor);
+        var req = new ExtractStreamRequest
+        {
+            Files =
+            [
+                NewRequest("a.txt", Encoding.UTF8.GetBytes("text a")),
+                NewRequest("broken.pdf", Encoding.UTF8.GetBytes("not a pdf")),
+                NewRequest("c.pdf", NewPdf("c.pdf", 30).Content.ToArray()),
+                NewRequest("d.unknown", Encoding.UTF8.GetBytes("text d")),
+                NewRequest("e.txt", Encoding.UTF8.GetBytes("text e")),
+            ]
+        };
+        var httpContext = new DefaultHttpContext();
+        var body = new MemoryStream();
+        httpContext.Response.Body = body;
+
+        // Act
+        await function.InvokeStreamAsync(httpContext, req);
+
+        // Assert
+        List<ExtractStreamItem> items = Encoding.UTF8.GetString(body.ToArray())
+            .Split('\n', StringSplitOptions.RemoveEmptyEntries)
+            .Select(line => JsonSerializer.Deserialize<ExtractStreamItem>(line)!)
+            .ToList();
+        var files = items.GroupBy(x => x.File).OrderBy(x => x.Key).ToDictionary(x => x.Key, x => x.ToList());
+
+        Assert.Equal<int>([0, 1, 2, 3, 4], files.Keys);
+        Assert.Equal("text a", files[0].Single().Content);
+        Assert.Equal("broken.pdf", files[1].Single().FileName);
+        Assert.NotNull(files[1].Single().Error);
+        Assert.Equal(Enumerable.Range(0, 30), files[2].Select(x => x.Section));
+        Assert.Equal(Enumerable.Range(1, 30).Select(i => $"Page {i}"), files[2].Select(x => x.Content.Trim()));
+        Assert.All(files[2], x => Assert.Null(x.Error));
+        Assert.Equal("File type not supported: d.unknown", files[3].Single().Error);
+        Assert.Equal("text e", files[4].Single().Content);
+    }
+
+    private static ExtractRequest NewRequest(string fileName, byte[] content)
+    {
+        return new ExtractRequest { FileName = fileName, Content = Convert.ToBase64String(content) };
+    }
+
+    // PDF with the text "Page N" in each page
+    private static FileToProcess NewPdf(string fileName, int pageCount)
+    {
+        var builder = new PdfDocumentBuilder();
+        PdfDocumentBuilder.AddedFont font = builder.AddStandard14Font(Standard14Font.Helvetica);
+        for (int i = 1; i <= pageCount; i++)
+        {
+            PdfPageBuilder page = builder.AddPage(PageSize.A4);
+            page.AddText($"Page {i}", 12, new PdfPoint(25, 700), font);
+        }
+
+        var content = new BinaryData(builder.Build());
+        return new FileToProcess { FileName = fileName, Content = content, MimeType = MimeTypes.Pdf, Size = content.Length };
+    }
+}
@@ -79,6 +79,71 @@ public sealed class EmbeddingGeneratorTests : BaseTestCase
             .Which.Should().BeOfKind(JsonValueKind.Array);
     }
 
+    [Fact]
+    public async Task OpenAIBase64VectorizationTest()
+    {
+        // Arrange
+        var payload = new
+        {
+            modelId = "text-embedding-3-small",
+            inputs = new[] { "some text", "some other text" },
+            encoding = "base64",
+        };
+
+        // Act
+        var response = await this.EmbeddingGeneratorClient.PostAsJsonAsync("/vectorize", payload).ConfigureAwait(false);
+        string jsonResponse = await this.LogResponseAsync(response).ConfigureAwait(false);
+
+        // Assert
+        response.StatusCode.Should().Be(HttpStatusCode.OK);
+
+        jsonResponse.Should().BeCorrectJson();
+        var json = jsonResponse.AsJson();
+        json.Should().HaveProperty("embeddings")
+            .Which.Should().BeOfKind(JsonValueKind.Array);
+        var embeddings = json.GetProperty("embeddings").EnumerateArray().ToList();
+        embeddings.Should().HaveCount(2);
+        foreach (var embedding in embeddings)
+        {
+            // 1536 float32 values
+            embedding.ValueKind.Should().Be(JsonValueKind.String);
+            Convert.FromBase64String(embedding.GetString()!).Should().HaveCount(1536 * 4);
+        }
+    }
+
+    [Fact]
+    public async Task OpenAICachedVectorizationTest()
+    {
+        // Arrange
+        string text = $"some text {Guid.NewGuid():N}";
+        var payload = new
+        {
+            modelId = "text-embedding-3-small",
+            inputs = new[] { text, "some other text", text },
+        };
+
+        // Act
+        var response1 = await this.EmbeddingGeneratorClient.PostAsJsonAsync("/vectorize", payload).ConfigureAwait(false);
+        string jsonResponse1 = await this.LogResponseAsync(response1).ConfigureAwait(false);
+        var response2 = await this.EmbeddingGeneratorClient.PostAsJsonAsync("/vectorize", payload).ConfigureAwait(false);
+        string jsonResponse2 = await this.LogResponseAsync(response2).ConfigureAwait(false);
+
+        // Assert
+        response1.StatusCode.Should().Be(HttpStatusCode.OK);
+        response2.StatusCode.Should().Be(HttpStatusCode.OK);
+
+        var json1 = jsonResponse1.AsJson();
+        json1.GetProperty("duplicates").GetInt32().Should().Be(1);
+        json1.GetProperty("embeddings").EnumerateArray().Should().HaveCount(3);
+
+        // The second request is served from cache, without calling the model
+        var json2 = jsonResponse2.AsJson();
+        json2.GetProperty("cacheHits").GetInt32().Should().Be(2);
+        json2.GetProperty("duplicates").GetInt32().Should().Be(1);
+        json2.GetProperty("promptTokens").GetInt32().Should().Be(0);
+        json2.GetProperty("embeddings").EnumerateArray().Should().HaveCount(3);
+    }
+
     [Fact]
     public async Task AzureAIVectorizationTest()
     {
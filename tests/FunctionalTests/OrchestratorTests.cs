@@ -27,6 +27,31 @@ public sealed class OrchestratorTests : BaseTestCase
             .And.Be("bar");
     }
 
+    [Fact]
+    public async Task PostEmptyBatch()
+    {
+        // Arrange
+        var payload = new { _workflow = new { }, inputs = new[] { new { foo = "bar" }, new { foo = "baz" } } };
+
+        // Act
+        var response = await this.Client.PostAsJsonAsync("/api/jobs/batch", payload).ConfigureAwait(false);
+        string ndjsonResponse = await this.LogResponseAsync(response).ConfigureAwait(false);
+
+        // Assert
+        response.StatusCode.Should().Be(HttpStatusCode.OK);
+        string[] lines = ndjsonResponse.Split('\n', StringSplitOptions.RemoveEmptyEntries);
+        lines.Should().HaveCount(2);
+        foreach (string line in lines)
+        {
+            line.Should().BeCorrectJson();
+            var json = line.AsJson();
+            json.Should().HaveProperty("status")
+                .Which.Should().BeOfKind(JsonValueKind.Number)
+                .And.BeIntegerMatching(x => x == 200);
+            json.Should().HaveProperty("result");
+        }
+    }
+
     [Fact]
     public async Task GetEnv()
     {
@@ -0,0 +1,94 @@
+﻿// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Nodes;
+using BenchmarkDotNet.Attributes;
+using Orchestrator.Config;
+using Orchestrator.Models;
+using Orchestrator.Orchestration;
+using Orchestrator.Storage;
+
+namespace Orchestrator.Benchmarks;
+
+/// <summary>
+/// Workspace overhead of a job, per storage backend: creating the workspace, storing
+/// the context after each step, and writing and reading the result.
+/// Azure blobs are not included, requiring Azurite or a storage account.
+/// </summary>
+[MemoryDiagnoser]
+public class WorkspaceBenchmarks
+{
+    public enum Backends
+    {
+        FileSystem,
+        Memory,
+        Tiered,
+    }
+
+    [Params(Backends.FileSystem, Backends.Memory, Backends.Tiered)]
+    public Backends Backend { get; set; }
+
+    [Params(5, 20)]
+    public int Steps { get; set; }
+
+    private readonly JsonObject _input = new() { ["text"] = new string('x', 2000), ["count"] = 3 };
+    private string _dir = string.Empty;
+    private TieredFileSystem? _tiered;
+    private SimpleWorkspace _workspace = null!;
+
+    [GlobalSetup]
+    public void Setup()
+    {
+        this._dir = Path.Combine(Path.GetTempPath(), "gp-bench-" + Guid.NewGuid().ToString("N"));
+        var config = new WorkspaceConfig { WorkspaceDir = this._dir, UseFileSystem = true }.Validate();
+
+        IFileSystem fileSystem;
+        switch (this.Backend)
+        {
+            case Backends.Memory:
+                fileSystem = new MemoryFileSystem(config);
+                break;
+
+            case Backends.Tiered:
+                this._tiered = new TieredFileSystem(new MemoryFileSystem(config), new FileSystem());
+                this._tiered.StartAsync(CancellationToken.None).GetAwaiter().GetResult();
+                fileSystem = this._tiered;
+                break;
+
+            default:
+                fileSystem = new FileSystem();
+                break;
+        }
+
+        this._workspace = new SimpleWorkspace(config, fileSystem, new JmesPathCache(new AppConfig()));
+    }
+
+    [GlobalCleanup]
+    public void Cleanup()
+    {
+        this._tiered?.StopAsync(CancellationToken.None).GetAwaiter().GetResult();
+        this._tiered?.Dispose();
+        if (Directory.Exists(this._dir)) { Directory.Delete(this._dir, recursive: true); }
+    }
+
+    [Benchmark]
+    public async Task<string?> RunJobAsync()
+    {
+        var workflow = new Workflow { JobId = Guid.NewGuid().ToString("N") };
+        for (int i = 0; i < this.Steps; i++) { workflow.Steps.Add(new Step { Id = $"step{i}" }); }
+
+        JobContext jobContext = await this._workspace.CreateWorkspaceAsync(workflow, this._input, CancellationToken.None).ConfigureAwait(false);
+        JobCheckpoint checkpoint = this._workspace.CreateCheckpoint(workflow.JobId);
+
+        foreach (Step step in workflow.Steps)
+        {
+            var stepContext = new StepContext { In = jobContext.State, Out = this._input.DeepClone() };
+            jobContext[step.Id] = stepContext;
+            jobContext.State = stepContext.Out;
+            await checkpoint.StepCompletedAsync(jobContext, step.Id, jobContext.State, CancellationToken.None).ConfigureAwait(false);
+        }
+
+        await checkpoint.JobCompletedAsync(jobContext, CancellationToken.None).ConfigureAwait(false);
+        await this._workspace.WriteResultFileAsync(workflow.JobId, jobContext.State, CancellationToken.None).ConfigureAwait(false);
+        return await this._workspace.ReadResultFileAsync(workflow.JobId, CancellationToken.None).ConfigureAwait(false);
+    }
+}
@@ -0,0 +1,137 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using Orchestrator.FunctionAdapters;
+using Orchestrator.Tests.Helpers;
+
+namespace Orchestrator.Tests.FunctionAdapters;
+
+public sealed class CircuitBreakerTest
+{
+    private static readonly TimeSpan s_breakDuration = TimeSpan.FromSeconds(30);
+
+    private readonly ManualTimeProvider _time = new();
+    private readonly CircuitBreaker _breaker;
+
+    public CircuitBreakerTest()
+    {
+        this._breaker = new CircuitBreaker(failureThreshold: 3, s_breakDuration, this._time);
+    }
+
+    [Fact]
+    public void ItOpensAfterConsecutiveFailures()
+    {
+        // Act
+        bool[] opened = [this._breaker.RecordFailure(), this._breaker.RecordFailure(), this._breaker.RecordFailure()];
+
+        // Assert
+        Assert.Equal<bool>([false, false, true], opened);
+        Assert.True(this._breaker.IsOpen);
+        Assert.False(this._breaker.TryAcquire());
+    }
+
+    [Fact]
+    public void ItCountsOnlyConsecutiveFailures()
+    {
+        // Act
+        this._breaker.RecordFailure();
+        this._breaker.RecordFailure();
+        this._breaker.RecordSuccess();
+        this._breaker.RecordFailure();
+        this._breaker.RecordFailure();
+
+        // Assert
+        Assert.False(this._breaker.IsOpen);
+        Assert.True(this._breaker.TryAcquire());
+    }
+
+    [Fact]
+    public void ItAllowsOneTrialCallAfterTheBreak()
+    {
+        // Arrange
+        this.Open();
+        this._time.Advance(s_breakDuration - TimeSpan.FromSeconds(1));
+        Assert.False(this._breaker.TryAcquire());
+
+        // Act
+        this._time.Advance(TimeSpan.FromSeconds(1));
+
+        // Assert: half open, one call at a time
+        Assert.True(this._breaker.TryAcquire());
+        Assert.False(this._breaker.TryAcquire());
+        Assert.True(this._breaker.IsOpen);
+    }
+
+    [Fact]
+    public void ItClosesWhenTheTrialCallSucceeds()
+    {
+        // Arrange
+        this.Open();
+        this._time.Advance(s_breakDuration);
+        Assert.True(this._breaker.TryAcquire());
+
+        // Act
+        this._breaker.RecordSuccess();
+
+        // Assert
+        Assert.False(this._breaker.IsOpen);
+        Assert.True(this._breaker.TryAcquire());
+        Assert.True(this._breaker.TryAcquire());
+    }
+
+    [Fact]
+    public void ItStartsANewBreakWhenTheTrialCallFails()
+    {
+        // Arrange
+        this.Open();
+        this._time.Advance(s_breakDuration);
+        Assert.True(this._breaker.TryAcquire());
+
+        // Act
+        bool opened = this._breaker.RecordFailure();
+
+        // Assert
+        Assert.True(opened);
+        Assert.False(this._breaker.TryAcquire());
+        this._time.Advance(s_breakDuration);
+        Assert.True(this._breaker.TryAcquire());
+    }
+
+    [Fact]
+    public void ItAllowsAnotherTrialCallWhenTheTrialCallIsReleased()
+    {
+        // Arrange
+        this.Open();
+        this._time.Advance(s_breakDuration);
+        Assert.True(this._breaker.TryAcquire());
+
+        // Act
+        this._breaker.Release();
+
+        // Assert
+        Assert.True(this._breaker.IsOpen);
+        Assert.True(this._breaker.TryAcquire());
+        Assert.False(this._breaker.TryAcquire());
+    }
+
+    [Fact]
+    public void ItIgnoresFailuresOfCallsStartedBeforeOpening()
+    {
+        // Arrange
+        this.Open();
+
+        // Act: calls in flight when the circuit opened fail too
+        bool opened = this._breaker.RecordFailure();
+
+        // Assert: the break is not extended
+        Assert.False(opened);
+        this._time.Advance(s_breakDuration);
+        Assert.True(this._breaker.TryAcquire());
+    }
+
+    private void Open()
+    {
+        for (int i = 0; i < 3; i++) { this._breaker.RecordFailure(); }
+
+        Assert.True(this._breaker.IsOpen);
+    }
+}
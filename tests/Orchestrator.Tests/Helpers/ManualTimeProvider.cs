@@ -0,0 +1,28 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+namespace Orchestrator.Tests.Helpers;
+
+/// <summary>
+/// Clock moving only when the test advances it, for tests depending on durations and expirations.
+/// </summary>
+public sealed class ManualTimeProvider : TimeProvider
+{
+    private DateTimeOffset _now = new(2025, 1, 1, 0, 0, 0, TimeSpan.Zero);
+
+    public override long TimestampFrequency => TimeSpan.TicksPerSecond;
+
+    public override DateTimeOffset GetUtcNow()
+    {
+        return this._now;
+    }
+
+    public override long GetTimestamp()
+    {
+        return this._now.UtcTicks;
+    }
+
+    public void Advance(TimeSpan delta)
+    {
+        this._now += delta;
+    }
+}
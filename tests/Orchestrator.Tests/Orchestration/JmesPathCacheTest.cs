@@ -0,0 +1,62 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using DevLab.JmesPath.Expressions;
+using Newtonsoft.Json.Linq;
+using Orchestrator.Orchestration;
+
+namespace Orchestrator.Tests.Orchestration;
+
+public sealed class JmesPathCacheTest : IDisposable
+{
+    private readonly JmesPathCache _cache = new(new AppConfig { Orchestration = { JmesPathCacheSize = 2 } });
+
+    [Fact]
+    public void ItParsesEachExpressionOnce()
+    {
+        // Act
+        JmesPathExpression first = this._cache.GetOrParse("state.items[0]");
+        JmesPathExpression second = this._cache.GetOrParse("state.items[0]");
+
+        // Assert
+        Assert.Same(first, second);
+        Assert.Equal(1, this._cache.Hits);
+        Assert.Equal(1, this._cache.Misses);
+        Assert.Equal(0.5, this._cache.HitRate);
+    }
+
+    [Fact]
+    public void ItReturnsExpressionsThatCanBeEvaluated()
+    {
+        // Arrange
+        JmesPathExpression expression = this._cache.GetOrParse("state.items[1]");
+
+        // Act
+        JToken result = expression.Transform(JObject.Parse("""{ "state": { "items": [ "a", "b" ] } }""")).AsJToken();
+
+        // Assert
+        Assert.Equal("b", result.Value<string>());
+    }
+
+    [Fact]
+    public void ItRemovesTheLeastRecentlyUsedExpressions()
+    {
+        // Arrange
+        JmesPathExpression a = this._cache.GetOrParse("a");
+        JmesPathExpression b = this._cache.GetOrParse("b");
+        this._cache.GetOrParse("a");
+
+        // Act
+        this._cache.GetOrParse("c");
+
+        // Assert
+        Assert.Equal(2, this._cache.Count);
+        Assert.Same(a, this._cache.GetOrParse("a"));
+        Assert.NotSame(b, this._cache.GetOrParse("b"));
+        Assert.Equal(4, this._cache.Misses);
+    }
+
+    public void Dispose()
+    {
+        this._cache.Dispose();
+    }
+}
@@ -0,0 +1,91 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Nodes;
+using Newtonsoft.Json.Linq;
+using Orchestrator.Orchestration;
+
+namespace Orchestrator.Tests.Orchestration;
+
+public sealed class JobContextTokensTest
+{
+    private readonly JobContextTokens _tokens = new();
+
+    [Fact]
+    public void ItConvertsTheContext()
+    {
+        // Arrange
+        var context = new JobContext { Start = JsonNode.Parse("""{ "text": "a" }""") };
+        context["chunk"] = new StepContext { In = JsonNode.Parse("""{ "text": "a" }"""), Out = JsonNode.Parse("""[ "a" ]""") };
+
+        // Act
+        JObject tree = this._tokens.Update(context);
+
+        // Assert
+        Assert.Equal("a", tree.SelectToken("start.text")!.Value<string>());
+        Assert.Equal("a", tree.SelectToken("chunk.in.text")!.Value<string>());
+        Assert.Equal("a", tree.SelectToken("chunk.out[0]")!.Value<string>());
+    }
+
+    [Fact]
+    public void ItConvertsOnlyTheChangedValues()
+    {
+        // Arrange
+        var step = new StepContext { In = JsonNode.Parse("""{ "text": "a" }""") };
+        var context = new JobContext { Start = JsonNode.Parse("""{ "text": "a" }""") };
+        context["chunk"] = step;
+        JObject tree = this._tokens.Update(context);
+        JToken start = tree["start"]!;
+        JToken stepIn = tree["chunk"]!["in"]!;
+
+        // Act
+        step.Out = JsonNode.Parse("""[ "a" ]""");
+        context.State = step.Out;
+        tree = this._tokens.Update(context);
+
+        // Assert: unchanged values are not converted again
+        Assert.Same(start, tree["start"]);
+        Assert.Same(stepIn, tree["chunk"]!["in"]);
+        Assert.Equal("a", tree.SelectToken("chunk.out[0]")!.Value<string>());
+        Assert.Equal("a", tree.SelectToken("state[0]")!.Value<string>());
+    }
+
+    [Fact]
+    public void ItRemovesDeletedKeys()
+    {
+        // Arrange
+        var context = new JobContext();
+        context["chunk"] = new StepContext();
+        this._tokens.Update(context);
+
+        // Act
+        context.Remove("chunk");
+        JObject tree = this._tokens.Update(context);
+
+        // Assert
+        Assert.Null(tree["chunk"]);
+        Assert.NotNull(tree["start"]);
+    }
+
+    [Fact]
+    public void ItEvaluatesWithADifferentStateWithoutCopyingTheTree()
+    {
+        // Arrange
+        var context = new JobContext { Start = JsonNode.Parse("""{ "text": "a" }"""), State = JsonNode.Parse("""[ "x", "y" ]""") };
+        JObject tree = this._tokens.Update(context);
+        JToken start = tree["start"]!;
+        JToken state = tree["state"]!;
+
+        // Act
+        string result = this._tokens.EvaluateWithState(context, new JValue("z"), root =>
+        {
+            Assert.Same(tree, root);
+            Assert.Same(start, root["start"]);
+            return $"{root["start"]!["text"]}-{root["state"]}";
+        });
+
+        // Assert: the state of the context is restored
+        Assert.Equal("a-z", result);
+        Assert.Same(state, this._tokens.Update(context)["state"]);
+        Assert.Equal("y", tree.SelectToken("state[1]")!.Value<string>());
+    }
+}
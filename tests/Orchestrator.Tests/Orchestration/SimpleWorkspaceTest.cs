@@ -0,0 +1,74 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json;
+using System.Text.Json.Nodes;
+using Orchestrator.Orchestration;
+using Orchestrator.Storage;
+
+namespace Orchestrator.Tests.Orchestration;
+
+public sealed class SimpleWorkspaceTest
+{
+    private readonly SimpleWorkspace _workspace;
+    private readonly Workflow _workflow = new() { JobId = "job1", Steps = [new Step { Id = "a" }, new Step { Id = "b" }] };
+
+    public SimpleWorkspaceTest()
+    {
+        var config = new WorkspaceConfig
+        {
+            WorkspaceDir = "jobs",
+            StorageType = WorkspaceConfig.StorageTypes.Memory,
+            ContextCheckpoint = WorkspaceConfig.ContextCheckpointPolicies.PerStep,
+        }.Validate();
+        this._workspace = new SimpleWorkspace(config, new MemoryFileSystem(config), new JmesPathCache(new AppConfig()));
+    }
+
+    [Fact]
+    public async Task ItReplaysTheStepLog()
+    {
+        // Arrange
+        JobContext jobContext = await this._workspace.CreateWorkspaceAsync(this._workflow, new JsonObject { ["text"] = "x" }, CancellationToken.None);
+        JobCheckpoint checkpoint = this._workspace.CreateCheckpoint(this._workflow.JobId);
+        await CompleteStepAsync(checkpoint, jobContext, "a", output: "a-out");
+        await CompleteStepAsync(checkpoint, jobContext, "b", output: "b-out");
+
+        // Act
+        JobContext context = await this._workspace.GetContextAsync(this._workflow.JobId, CancellationToken.None);
+
+        // Assert
+        Assert.Equal("x", GetString(context.Start, "text"));
+        Assert.Equal("a-out", GetString(((StepContext)context["a"]!).Out));
+        Assert.Equal("b-out", GetString(context.State));
+    }
+
+    [Fact]
+    public async Task ItUsesTheJobResultAsTheFinalState()
+    {
+        // Arrange: steps running concurrently, "b" is the last step of the workflow but completes first
+        JobContext jobContext = await this._workspace.CreateWorkspaceAsync(this._workflow, new JsonObject { ["text"] = "x" }, CancellationToken.None);
+        JobCheckpoint checkpoint = this._workspace.CreateCheckpoint(this._workflow.JobId);
+        await CompleteStepAsync(checkpoint, jobContext, "b", output: "b-out");
+        await CompleteStepAsync(checkpoint, jobContext, "a", output: "a-out");
+        await this._workspace.WriteResultFileAsync(this._workflow.JobId, "b-out", CancellationToken.None);
+
+        // Act
+        JobContext context = await this._workspace.GetContextAsync(this._workflow.JobId, CancellationToken.None);
+
+        // Assert
+        Assert.Equal("a-out", GetString(((StepContext)context["a"]!).Out));
+        Assert.Equal("b-out", GetString(context.State));
+    }
+
+    private static Task CompleteStepAsync(JobCheckpoint checkpoint, JobContext jobContext, string stepId, string output)
+    {
+        var step = new StepContext { In = jobContext.Start, Out = output };
+        jobContext[stepId] = step;
+        return checkpoint.StepCompletedAsync(jobContext, stepId, step.Out, CancellationToken.None);
+    }
+
+    private static string? GetString(object? value, string? property = null)
+    {
+        JsonElement element = Assert.IsType<JsonElement>(value);
+        return (property == null ? element : element.GetProperty(property)).GetString();
+    }
+}
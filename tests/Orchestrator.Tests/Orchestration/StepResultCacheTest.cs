@@ -0,0 +1,115 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Nodes;
+using Orchestrator.Orchestration;
+using Orchestrator.Tests.Helpers;
+
+namespace Orchestrator.Tests.Orchestration;
+
+public sealed class StepResultCacheTest : IDisposable
+{
+    private static readonly TimeSpan s_ttl = TimeSpan.FromMinutes(10);
+
+    private readonly ManualTimeProvider _time = new();
+    private readonly AppConfig _config = new() { Orchestration = { ResultCacheSize = 2, ResultCacheMaxEntrySizeKb = 1 } };
+    private readonly StepResultCache _cache;
+
+    public StepResultCacheTest()
+    {
+        this._cache = new StepResultCache(this._config, redis: null, this._time);
+    }
+
+    [Fact]
+    public void ItCalculatesKeysFromFunctionAndInput()
+    {
+        // Arrange
+        FunctionDetails chunk = FunctionDetails.Parse("chunker/chunk");
+        FunctionDetails embed = FunctionDetails.Parse("embedding-generator/vectorize");
+
+        // Act
+        string key = StepResultCache.GetKey(chunk, JsonNode.Parse("""{ "text": "a", "size": 10 }"""));
+
+        // Assert
+        Assert.Equal(key, StepResultCache.GetKey(chunk, JsonNode.Parse("""{"text":"a","size":10}""")));
+        Assert.NotEqual(key, StepResultCache.GetKey(chunk, JsonNode.Parse("""{ "text": "b", "size": 10 }""")));
+        Assert.NotEqual(key, StepResultCache.GetKey(embed, JsonNode.Parse("""{ "text": "a", "size": 10 }""")));
+    }
+
+    [Fact]
+    public async Task ItReturnsACopyOfTheResult()
+    {
+        // Arrange
+        await this._cache.SetAsync("key", JsonNode.Parse("""{ "chunks": [ "a", "b" ] }"""), s_ttl);
+
+        // Act
+        (bool found, object? result) = await this._cache.TryGetAsync("key");
+        ((JsonObject)result!)["chunks"] = "modified";
+
+        // Assert
+        Assert.True(found);
+        (_, object? again) = await this._cache.TryGetAsync("key");
+        Assert.Equal("""{"chunks":["a","b"]}""", ((JsonNode)again!).ToJsonString());
+    }
+
+    [Fact]
+    public async Task ItReportsMissingResults()
+    {
+        // Act
+        (bool found, object? result) = await this._cache.TryGetAsync("missing");
+
+        // Assert
+        Assert.False(found);
+        Assert.Null(result);
+    }
+
+    [Fact]
+    public async Task ItExpiresResultsAfterTheTtl()
+    {
+        // Arrange
+        await this._cache.SetAsync("key", JsonValue.Create(1), s_ttl);
+
+        // Act
+        this._time.Advance(s_ttl - TimeSpan.FromSeconds(1));
+        (bool foundBefore, _) = await this._cache.TryGetAsync("key");
+        this._time.Advance(TimeSpan.FromSeconds(2));
+        (bool foundAfter, _) = await this._cache.TryGetAsync("key");
+
+        // Assert
+        Assert.True(foundBefore);
+        Assert.False(foundAfter);
+        Assert.Equal(0, this._cache.Count);
+    }
+
+    [Fact]
+    public async Task ItRemovesTheLeastRecentlyUsedResults()
+    {
+        // Arrange
+        await this._cache.SetAsync("a", JsonValue.Create(1), s_ttl);
+        await this._cache.SetAsync("b", JsonValue.Create(2), s_ttl);
+        await this._cache.TryGetAsync("a");
+
+        // Act
+        await this._cache.SetAsync("c", JsonValue.Create(3), s_ttl);
+
+        // Assert
+        Assert.Equal(2, this._cache.Count);
+        Assert.True((await this._cache.TryGetAsync("a")).found);
+        Assert.False((await this._cache.TryGetAsync("b")).found);
+        Assert.True((await this._cache.TryGetAsync("c")).found);
+    }
+
+    [Fact]
+    public async Task ItDoesNotCacheLargeResults()
+    {
+        // Act
+        await this._cache.SetAsync("key", JsonValue.Create(new string('x', 2000)), s_ttl);
+
+        // Assert
+        Assert.False((await this._cache.TryGetAsync("key")).found);
+    }
+
+    public void Dispose()
+    {
+        this._cache.Dispose();
+    }
+}
@@ -0,0 +1,144 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using Orchestrator.Orchestration;
+
+namespace Orchestrator.Tests.Orchestration;
+
+public sealed class WorkflowGraphTest
+{
+    [Fact]
+    public void ItRunsStepsInSequenceWithoutDependsOn()
+    {
+        // Arrange
+        Workflow workflow = NewWorkflow(
+            new Step { Id = "a", InputTransformation = "start.input" },
+            new Step { Id = "b", InputTransformation = "start.input" },
+            new Step { Id = "c" });
+
+        // Act
+        var graph = WorkflowGraph.Build(workflow);
+
+        // Assert: expressions are ignored, each step depends on the previous one
+        Assert.True(graph.IsLinear);
+        Assert.Equal<int[]>([[], [0], [1]], graph.Dependencies.Select(x => x.ToArray()));
+        Assert.Equal<bool>([false, true, true], graph.InheritsState);
+    }
+
+    [Fact]
+    public void ItInfersDependenciesFromExpressions()
+    {
+        // Arrange
+        Workflow workflow = NewWorkflow(
+            new Step { Id = "a", DependsOn = [] },
+            new Step { Id = "b", InputTransformation = "{ text: start.input.text }" },
+            new Step { Id = "c", InputTransformation = "{ chunks: a.out, text: state }" },
+            new Step { Id = "d", ForEach = "c.out.chunks", InputTransformation = "{ chunk: @ }" },
+            new Step { Id = "e", InputTransformation = "\"b\".out", OutputTransformation = "{ x: d.out }" },
+            new Step { Id = "f", InputTransformation = "{ x: 'state', y: `\"c\"`, z: start.input }" },
+            new Step { Id = "g" });
+
+        // Act
+        var graph = WorkflowGraph.Build(workflow);
+
+        // Assert
+        Assert.False(graph.IsLinear);
+        Assert.Equal<int[]>(
+        [
+            [], // a: no dependencies
+            [], // b: uses only the job input
+            [0, 1], // c: references a, and the state of b, which is the last dependency
+            [2], // d: the foreach expression references c, the item transformation doesn't use the state
+            [1, 3], // e: quoted identifier, and reference in the output transformation
+            [], // f: 'state' and `"c"` are literals
+            [5], // g: no xin, uses the state of the previous step
+        ], graph.Dependencies.Select(x => x.ToArray()));
+        Assert.Equal<bool>([false, false, true, false, false, false, true], graph.InheritsState);
+    }
+
+    [Fact]
+    public void ItRunsIndependentBranchesConcurrently()
+    {
+        // Arrange: a and b are independent, c joins them, d depends only on a
+        Workflow workflow = NewWorkflow(
+            new Step { Id = "a", DependsOn = [] },
+            new Step { Id = "b", DependsOn = [] },
+            new Step { Id = "c", DependsOn = ["a", "b"] },
+            new Step { Id = "d", DependsOn = ["a"] });
+
+        // Act
+        var graph = WorkflowGraph.Build(workflow);
+
+        // Assert: the state comes from the last step listed in dependsOn
+        Assert.False(graph.IsLinear);
+        Assert.Equal<int[]>([[], [], [0, 1], [0]], graph.Dependencies.Select(x => x.ToArray()));
+        Assert.Equal<bool>([false, false, true, true], graph.InheritsState);
+    }
+
+    [Fact]
+    public void ItAcceptsDependenciesOnPreviousSteps()
+    {
+        // Arrange
+        Workflow workflow = NewWorkflow(
+            new Step { Id = "a" },
+            new Step { Id = "b", DependsOn = [] },
+            new Step { Id = "c", DependsOn = ["a", "b"] });
+
+        // Act
+        bool valid = WorkflowGraph.ValidateDependencies(workflow, out string errorMessage);
+
+        // Assert
+        Assert.True(valid);
+        Assert.Empty(errorMessage);
+    }
+
+    [Fact]
+    public void ItRejectsUnknownSteps()
+    {
+        // Arrange
+        Workflow workflow = NewWorkflow(
+            new Step { Id = "a" },
+            new Step { Id = "b", DependsOn = ["x"] });
+
+        // Act
+        bool valid = WorkflowGraph.ValidateDependencies(workflow, out string errorMessage);
+
+        // Assert
+        Assert.False(valid);
+        Assert.Contains("'x'", errorMessage, StringComparison.Ordinal);
+    }
+
+    [Fact]
+    public void ItRejectsCycles()
+    {
+        // Arrange
+        Workflow workflow = NewWorkflow(
+            new Step { Id = "a", DependsOn = ["b"] },
+            new Step { Id = "b", DependsOn = ["a"] });
+
+        // Act
+        bool valid = WorkflowGraph.ValidateDependencies(workflow, out string errorMessage);
+
+        // Assert
+        Assert.False(valid);
+        Assert.Contains("Step 'a' depends on 'b'", errorMessage, StringComparison.Ordinal);
+    }
+
+    [Fact]
+    public void ItRejectsStepsDependingOnThemselves()
+    {
+        // Arrange
+        Workflow workflow = NewWorkflow(new Step { Id = "a", DependsOn = ["a"] });
+
+        // Act
+        bool valid = WorkflowGraph.ValidateDependencies(workflow, out string errorMessage);
+
+        // Assert
+        Assert.False(valid);
+        Assert.Contains("Step 'a' depends on 'a'", errorMessage, StringComparison.Ordinal);
+    }
+
+    private static Workflow NewWorkflow(params Step[] steps)
+    {
+        return new Workflow { Steps = steps.ToList() };
+    }
+}
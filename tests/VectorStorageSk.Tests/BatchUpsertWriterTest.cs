@@ -0,0 +1,89 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using Microsoft.Extensions.Logging.Abstractions;
+using VectorStorageSk.Models;
+using VectorStorageSk.Storage;
+using VectorStorageSk.Tests.Helpers;
+
+namespace VectorStorageSk.Tests;
+
+public sealed class BatchUpsertWriterTest
+{
+    // 25 records, positions 6, 12, 18, 24 and 30 are invalid records skipped by the caller
+    private static readonly List<int> s_positions = Enumerable.Range(1, 30).Where(x => x % 6 != 0).ToList();
+
+    [Fact]
+    public async Task ItSplitsRecordsInBatches()
+    {
+        // Arrange
+        var collection = new StubRecordCollection();
+        var writer = new BatchUpsertWriter<string>(collection, batchSize: 10, maxConcurrentBatches: 4, NullLogger.Instance);
+
+        // Act
+        List<UpsertBatchResult> results = await AddRecordsAsync(writer);
+
+        // Assert
+        Assert.Equal<int>([10, 10, 5], collection.Batches.Select(x => x.Count));
+        Assert.Equal<int>([0, 1, 2], results.Select(x => x.Index));
+        Assert.Equal<int>([10, 10, 5], results.Select(x => x.Count));
+        Assert.All(results, x => Assert.True(x.Success));
+        Assert.All(results, x => Assert.Null(x.Records));
+    }
+
+    [Fact]
+    public async Task ItReportsThePositionOfTheRecordsInTheRequest()
+    {
+        // Arrange
+        var collection = new StubRecordCollection();
+        var writer = new BatchUpsertWriter<string>(collection, batchSize: 10, maxConcurrentBatches: 4, NullLogger.Instance);
+
+        // Act
+        List<UpsertBatchResult> results = await AddRecordsAsync(writer);
+
+        // Assert: invalid records are counted, and are not part of the batches
+        Assert.Equal<(int, int)>([(1, 11), (13, 23), (25, 29)], results.Select(x => (x.FirstRecord, x.LastRecord)));
+    }
+
+    [Fact]
+    public async Task ItReportsFailedBatchesWithoutStoppingTheOthers()
+    {
+        // Arrange: the record at position 14 is in the second batch
+        var collection = new StubRecordCollection { FailingKey = "k14" };
+        var writer = new BatchUpsertWriter<string>(collection, batchSize: 10, maxConcurrentBatches: 4, NullLogger.Instance);
+
+        // Act
+        List<UpsertBatchResult> results = await AddRecordsAsync(writer);
+
+        // Assert
+        Assert.Equal<bool>([true, false, true], results.Select(x => x.Success));
+        Assert.Contains("k14", results[1].Error, StringComparison.Ordinal);
+        Assert.Equal<int>([13, 14, 15, 16, 17, 19, 20, 21, 22, 23], results[1].Records!);
+        Assert.Null(results[0].Error);
+        Assert.Null(results[2].Records);
+    }
+
+    [Fact]
+    public async Task ItLimitsTheNumberOfConcurrentBatches()
+    {
+        // Arrange
+        var collection = new StubRecordCollection();
+        var writer = new BatchUpsertWriter<string>(collection, batchSize: 2, maxConcurrentBatches: 3, NullLogger.Instance);
+
+        // Act
+        List<UpsertBatchResult> results = await AddRecordsAsync(writer);
+
+        // Assert
+        Assert.Equal(13, results.Count);
+        Assert.Equal(3, collection.MaxRunningBatches);
+    }
+
+    private static async Task<List<UpsertBatchResult>> AddRecordsAsync(BatchUpsertWriter<string> writer)
+    {
+        foreach (int position in s_positions)
+        {
+            await writer.AddAsync(new VectorStoreGenericDataModel<string>($"k{position}"), position);
+        }
+
+        return await writer.CompleteAsync();
+    }
+}
@@ -0,0 +1,93 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using CommonDotNet.Embeddings;
+
+namespace VectorStorageSk.Tests;
+
+public sealed class EmbeddingEncodingTest
+{
+    private static readonly float[] s_vector = GenerateVector(new Random(123), 1536);
+
+    [Fact]
+    public void ItRoundTripsFloat32Exactly()
+    {
+        // Act
+        string encoded = EmbeddingEncoding.Encode(s_vector, EmbeddingEncodings.Base64);
+
+        // Assert: same format used by OpenAI, without prefix
+        Assert.Equal(Convert.ToBase64String(s_vector.SelectMany(BitConverter.GetBytes).ToArray()), encoded);
+        Assert.Equal(s_vector, EmbeddingEncoding.Decode(encoded));
+    }
+
+    [Fact]
+    public void ItRoundTripsFloat16WithinItsPrecision()
+    {
+        // Act
+        string encoded = EmbeddingEncoding.Encode(s_vector, EmbeddingEncodings.Base64Float16);
+        float[] decoded = EmbeddingEncoding.Decode(encoded);
+
+        // Assert: 10 bits mantissa, relative error up to 2^-11
+        Assert.StartsWith("f16:", encoded, StringComparison.Ordinal);
+        Assert.Equal(s_vector.Length, decoded.Length);
+        for (int i = 0; i < s_vector.Length; i++)
+        {
+            Assert.True(Math.Abs(decoded[i] - s_vector[i]) <= Math.Abs(s_vector[i]) / 2048 + 1e-7, $"Value {i}: {s_vector[i]} => {decoded[i]}");
+        }
+    }
+
+    [Fact]
+    public void ItRoundTripsInt8WithinHalfAStep()
+    {
+        // Act
+        string encoded = EmbeddingEncoding.Encode(s_vector, EmbeddingEncodings.Base64Int8);
+        float[] decoded = EmbeddingEncoding.Decode(encoded);
+
+        // Assert: the largest absolute value is mapped to 127
+        float step = s_vector.Max(Math.Abs) / 127;
+        Assert.StartsWith("i8:", encoded, StringComparison.Ordinal);
+        Assert.Equal(s_vector.Length, decoded.Length);
+        for (int i = 0; i < s_vector.Length; i++)
+        {
+            Assert.True(Math.Abs(decoded[i] - s_vector[i]) <= step / 2 + 1e-6, $"Value {i}: {s_vector[i]} => {decoded[i]}");
+        }
+    }
+
+    [Fact]
+    public void ItEncodesZeroVectorsAsInt8()
+    {
+        // Act
+        float[] decoded = EmbeddingEncoding.Decode(EmbeddingEncoding.Encode(new float[4], EmbeddingEncodings.Base64Int8));
+
+        // Assert
+        Assert.Equal(new float[4], decoded);
+    }
+
+    [Theory]
+    [InlineData("not base64!")]
+    [InlineData("AAA")] // truncated base64
+    [InlineData("AAAAAAAA")] // 6 bytes, not a list of float32
+    [InlineData("f16:AAAA")] // 3 bytes, not a list of float16
+    [InlineData("f16:AA=A")]
+    [InlineData("i8:AA==")] // shorter than the scale
+    [InlineData("i8:AAAAAA")]
+    public void ItRejectsMalformedStrings(string value)
+    {
+        Assert.False(EmbeddingEncoding.TryDecode(value, out _));
+        Assert.Throws<FormatException>(() => EmbeddingEncoding.Decode(value));
+    }
+
+    [Fact]
+    public void ItDoesNotEncodeFloatsAsStrings()
+    {
+        Assert.Throws<ArgumentOutOfRangeException>(() => EmbeddingEncoding.Encode(s_vector, EmbeddingEncodings.Float));
+    }
+
+    // Values similar to normalized embeddings, including tiny and negative values
+    private static float[] GenerateVector(Random random, int dimensions)
+    {
+        float[] vector = Enumerable.Range(0, dimensions).Select(_ => (float)(random.NextDouble() * 2 - 1) / 20).ToArray();
+        vector[0] = 1e-6f;
+        vector[1] = -0.2f;
+        return vector;
+    }
+}
@@ -0,0 +1,101 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json;
+using CommonDotNet.Embeddings;
+using VectorStorageSk.Models;
+
+namespace VectorStorageSk.Tests;
+
+public sealed class EmbeddingJsonConverterTest
+{
+    // Values exactly representable with all the encodings
+    private static readonly float[] s_vector = [127, -64, 1];
+
+    [Fact]
+    public void ItReadsListsOfNumbers()
+    {
+        // Act
+        var request = JsonSerializer.Deserialize<SearchRequest>("""{ "vector": [ 127, -64, 1 ] }""")!;
+
+        // Assert
+        Assert.Equal(s_vector, request.Vector);
+    }
+
+    [Theory]
+    [InlineData(EmbeddingEncodings.Base64)]
+    [InlineData(EmbeddingEncodings.Base64Float16)]
+    [InlineData(EmbeddingEncodings.Base64Int8)]
+    public void ItReadsEncodedStrings(EmbeddingEncodings encoding)
+    {
+        // Arrange
+        string json = JsonSerializer.Serialize(new { vector = EmbeddingEncoding.Encode(s_vector, encoding) });
+
+        // Act
+        var request = JsonSerializer.Deserialize<SearchRequest>(json)!;
+
+        // Assert
+        Assert.Equal(s_vector, request.Vector);
+    }
+
+    [Fact]
+    public void ItReadsNullVectors()
+    {
+        Assert.Null(JsonSerializer.Deserialize<SearchRequest>("""{ "vector": null }""")!.Vector);
+    }
+
+    [Theory]
+    [InlineData("""{ "vector": "f16:AAAA" }""")]
+    [InlineData("""{ "vector": "not base64!" }""")]
+    [InlineData("""{ "vector": { "x": 1 } }""")]
+    [InlineData("""{ "vector": [ "a" ] }""")]
+    public void ItRejectsInvalidVectors(string json)
+    {
+        Assert.ThrowsAny<JsonException>(() => JsonSerializer.Deserialize<SearchRequest>(json));
+    }
+
+    [Fact]
+    public void ItReadsListsMixingFormats()
+    {
+        // Arrange
+        string json = JsonSerializer.Serialize(new
+        {
+            vectors = new object[]
+            {
+                s_vector,
+                EmbeddingEncoding.Encode(s_vector, EmbeddingEncodings.Base64),
+                EmbeddingEncoding.Encode(s_vector, EmbeddingEncodings.Base64Float16),
+            }
+        });
+
+        // Act
+        var request = JsonSerializer.Deserialize<SearchBatchRequest>(json)!;
+
+        // Assert
+        Assert.Equal(3, request.Vectors.Count);
+        Assert.All(request.Vectors, x => Assert.Equal(s_vector, x));
+    }
+
+    [Theory]
+    [InlineData("""{ "vectors": [ [ 1 ], null ] }""")]
+    [InlineData("""{ "vectors": [ [ 1 ], "AAA" ] }""")]
+    [InlineData("""{ "vectors": "AAAA" }""")]
+    public void ItRejectsInvalidLists(string json)
+    {
+        Assert.ThrowsAny<JsonException>(() => JsonSerializer.Deserialize<SearchBatchRequest>(json));
+    }
+
+    [Fact]
+    public void ItWritesListsOfNumbers()
+    {
+        // Arrange
+        var options = new JsonSerializerOptions { Converters = { new EmbeddingJsonConverter(), new EmbeddingListJsonConverter() } };
+
+        // Act
+        string vector = JsonSerializer.Serialize(s_vector, options);
+        string vectors = JsonSerializer.Serialize(new List<float[]> { s_vector }, options);
+
+        // Assert
+        Assert.Equal("[127,-64,1]", vector);
+        Assert.Equal("[[127,-64,1]]", vectors);
+    }
+}
@@ -0,0 +1,77 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Runtime.CompilerServices;
+
+namespace VectorStorageSk.Tests.Helpers;
+
+/// <summary>
+/// Collection recording the batches written, and the max number of batches written at the same time.
+/// Batches containing the record with key <see cref="FailingKey"/> fail. Other operations are not supported.
+/// </summary>
+internal sealed class StubRecordCollection : IVectorStoreRecordCollection<string, VectorStoreGenericDataModel<string>>
+{
+    private readonly object _lock = new();
+    private int _running = 0;
+
+    public string CollectionName => "stub";
+
+    public List<List<VectorStoreGenericDataModel<string>>> Batches { get; } = [];
+
+    public int MaxRunningBatches { get; private set; }
+
+    public string? FailingKey { get; init; }
+
+    public TimeSpan Delay { get; init; } = TimeSpan.FromMilliseconds(20);
+
+    public async IAsyncEnumerable<string> UpsertBatchAsync(
+        IEnumerable<VectorStoreGenericDataModel<string>> records, [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        List<VectorStoreGenericDataModel<string>> batch = records.ToList();
+        int running = Interlocked.Increment(ref this._running);
+        lock (this._lock)
+        {
+            this.Batches.Add(batch);
+            this.MaxRunningBatches = Math.Max(this.MaxRunningBatches, running);
+        }
+
+        try
+        {
+            await Task.Delay(this.Delay, cancellationToken).ConfigureAwait(false);
+            if (batch.Any(x => x.Key == this.FailingKey)) { throw new VectorStoreOperationException($"Record '{this.FailingKey}' is not valid"); }
+        }
+        finally
+        {
+            Interlocked.Decrement(ref this._running);
+        }
+
+        foreach (VectorStoreGenericDataModel<string> record in batch) { yield return record.Key; }
+    }
+
+    public Task<bool> CollectionExistsAsync(CancellationToken cancellationToken = default) => throw new NotSupportedException();
+
+    public Task CreateCollectionAsync(CancellationToken cancellationToken = default) => throw new NotSupportedException();
+
+    public Task CreateCollectionIfNotExistsAsync(CancellationToken cancellationToken = default) => throw new NotSupportedException();
+
+    public Task DeleteCollectionAsync(CancellationToken cancellationToken = default) => throw new NotSupportedException();
+
+    public Task<VectorStoreGenericDataModel<string>?> GetAsync(string key, GetRecordOptions? options = default, CancellationToken cancellationToken = default)
+        => throw new NotSupportedException();
+
+    public IAsyncEnumerable<VectorStoreGenericDataModel<string>> GetBatchAsync(
+        IEnumerable<string> keys, GetRecordOptions? options = default, CancellationToken cancellationToken = default)
+        => throw new NotSupportedException();
+
+    public Task DeleteAsync(string key, CancellationToken cancellationToken = default) => throw new NotSupportedException();
+
+    public Task DeleteBatchAsync(IEnumerable<string> keys, CancellationToken cancellationToken = default) => throw new NotSupportedException();
+
+    public Task<string> UpsertAsync(VectorStoreGenericDataModel<string> record, CancellationToken cancellationToken = default)
+        => throw new NotSupportedException();
+
+    public Task<VectorSearchResults<VectorStoreGenericDataModel<string>>> VectorizedSearchAsync<TVector>(
+        TVector vector, VectorSearchOptions<VectorStoreGenericDataModel<string>>? options = default, CancellationToken cancellationToken = default)
+        => throw new NotSupportedException();
+
+    public object? GetService(Type serviceType, object? serviceKey = null) => null;
+}
@@ -0,0 +1,129 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json;
+using Microsoft.Extensions.Logging.Abstractions;
+using VectorStorageSk.Storage;
+using VectorStorageSk.Tests.Helpers;
+
+namespace VectorStorageSk.Tests;
+
+public sealed class LocalVectorIndexTest : BaseTestCase
+{
+    private const int Dimensions = 16;
+
+    private readonly string _directory = Path.Combine(Path.GetTempPath(), "LocalVectorIndexTest", Guid.NewGuid().ToString("N"));
+    private readonly LocalVectorStoreConfig _config = new() { SnapshotEveryChanges = 100000 };
+    private readonly Dictionary<string, float[]> _vectors = new();
+    private readonly Random _random = new(123);
+
+    public LocalVectorIndexTest(ITestOutputHelper console) : base(console)
+    {
+    }
+
+    [Fact]
+    public void ItCompactsUnusedSlotsOnSnapshot()
+    {
+        // Arrange: update half of the records and delete a quarter
+        using (var index = LocalVectorIndex.Create(this._directory, Dimensions, null, this._config, NullLogger.Instance))
+        {
+            index.Upsert(this.GenerateRecords(0, 2000));
+            index.Upsert(this.GenerateRecords(0, 1000));
+            index.Delete(Enumerable.Range(1500, 500).Select(i => $"k{i}"));
+            foreach (int i in Enumerable.Range(1500, 500)) { this._vectors.Remove($"k{i}"); }
+
+            long sizeBefore = this.GetVectorsFileSize();
+
+            // Act
+            index.Snapshot();
+
+            // Assert
+            this.Log($"Vectors file size: {sizeBefore} => {this.GetVectorsFileSize()} bytes");
+            Assert.Equal(1500L * Dimensions * sizeof(float), this.GetVectorsFileSize());
+            this.AssertRecords(index);
+
+            // Records written after the compaction use the new slots
+            index.Upsert(this.GenerateRecords(0, 10));
+            this.AssertRecords(index);
+        }
+
+        using (var index = LocalVectorIndex.Open(this._directory, this._config, NullLogger.Instance))
+        {
+            this.AssertRecords(index);
+        }
+    }
+
+    [Fact]
+    public void ItCompletesAnInterruptedCompaction()
+    {
+        // Arrange: new files written, marker created, files not replaced yet
+        using (var index = LocalVectorIndex.Create(this._directory, Dimensions, null, this._config, NullLogger.Instance))
+        {
+            index.Upsert(this.GenerateRecords(0, 100));
+        }
+
+        foreach (string file in new[] { "vectors.f32", "records.jsonl", "graph.bin" })
+        {
+            File.Move(Path.Combine(this._directory, file), Path.Combine(this._directory, file + ".tmp"));
+        }
+
+        File.WriteAllText(Path.Combine(this._directory, "compaction.tmp"), string.Empty);
+
+        // Act
+        using (var index = LocalVectorIndex.Open(this._directory, this._config, NullLogger.Instance))
+        {
+            // Assert
+            this.AssertRecords(index);
+            Assert.False(File.Exists(Path.Combine(this._directory, "compaction.tmp")));
+        }
+    }
+
+    protected override void Dispose(bool disposing)
+    {
+        if (disposing) { this.DeleteDirectory(); }
+
+        base.Dispose(disposing);
+    }
+
+    public override async ValueTask DisposeAsync()
+    {
+        this.DeleteDirectory();
+        await base.DisposeAsync().ConfigureAwait(false);
+    }
+
+    private List<(string key, JsonElement data, ReadOnlyMemory<float> vector)> GenerateRecords(int start, int count)
+    {
+        var records = new List<(string key, JsonElement data, ReadOnlyMemory<float> vector)>(count);
+        for (int i = start; i < start + count; i++)
+        {
+            float[] vector = Enumerable.Range(0, Dimensions).Select(_ => (float)this._random.NextDouble()).ToArray();
+            this._vectors[$"k{i}"] = vector;
+            records.Add(($"k{i}", JsonSerializer.SerializeToElement(new { id = i }), vector));
+        }
+
+        return records;
+    }
+
+    // Each record is stored with its latest vector, and is the nearest neighbour of its own vector
+    private void AssertRecords(LocalVectorIndex index)
+    {
+        foreach ((string key, float[] vector) in this._vectors)
+        {
+            LocalVectorIndex.Hit? hit = index.Get(key, includeVector: true);
+            Assert.NotNull(hit);
+            Assert.Equal(vector, hit.Vector);
+            Assert.Equal(key, index.Search(vector, 1, null, includeVectors: false).Single().Key);
+        }
+
+        Assert.Null(index.Get("k1999", includeVector: false));
+    }
+
+    private void DeleteDirectory()
+    {
+        if (Directory.Exists(this._directory)) { Directory.Delete(this._directory, recursive: true); }
+    }
+
+    private long GetVectorsFileSize()
+    {
+        return new FileInfo(Path.Combine(this._directory, "vectors.f32")).Length;
+    }
+}
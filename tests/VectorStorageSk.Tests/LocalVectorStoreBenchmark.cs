@@ -0,0 +1,213 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Diagnostics;
+using Microsoft.Extensions.Logging.Abstractions;
+using Microsoft.SemanticKernel.Connectors.InMemory;
+using VectorStorageSk.Storage;
+using VectorStorageSk.Tests.Helpers;
+
+namespace VectorStorageSk.Tests;
+
+/// <summary>
+/// Compare the local HNSW store with the in-memory store, which compares the query with all the records:
+/// recall = fraction of the exact top results found by the local store.
+/// </summary>
+public sealed class LocalVectorStoreBenchmark : BaseTestCase
+{
+    private const int RecordCount = 5000;
+    private const int QueryCount = 100;
+    private const int Dimensions = 64;
+    private const int Top = 10;
+    private const int Groups = 20;
+
+    private readonly string _directory = Path.Combine(Path.GetTempPath(), "LocalVectorStoreBenchmark", Guid.NewGuid().ToString("N"));
+
+    public LocalVectorStoreBenchmark(ITestOutputHelper console) : base(console)
+    {
+    }
+
+    [Fact]
+    public async Task ItFindsTheNearestNeighbours()
+    {
+        // Arrange
+        var random = new Random(123);
+        List<BenchmarkRecord> records = GenerateRecords(random);
+        List<ReadOnlyMemory<float>> queries = Enumerable.Range(0, QueryCount).Select(_ => GenerateVector(random, records)).ToList();
+
+        var inMemory = new InMemoryVectorStore().GetCollection<string, BenchmarkRecord>("benchmark");
+        await inMemory.CreateCollectionAsync();
+        await foreach (string _ in inMemory.UpsertBatchAsync(records)) { }
+
+        using var localStore = new LocalVectorStore(new LocalVectorStoreConfig { Directory = this._directory });
+        var local = localStore.GetCollection<string, BenchmarkRecord>("benchmark");
+        await local.CreateCollectionAsync();
+        var clock = Stopwatch.StartNew();
+        await foreach (string _ in local.UpsertBatchAsync(records)) { }
+
+        this.Log($"Local store: {RecordCount} records, {Dimensions} dimensions, indexed in {clock.ElapsedMilliseconds} ms");
+
+        // Act
+        (List<List<string>> expected, List<double> inMemoryLatency) = await SearchAsync(inMemory, queries, null);
+        (List<List<string>> actual, List<double> localLatency) = await SearchAsync(local, queries, null);
+
+        // Assert
+        double recall = GetRecall(expected, actual);
+        this.Log($"Recall@{Top}: {recall:P1}");
+        this.Log($"In memory latency: avg {inMemoryLatency.Average():F3} ms, p95 {Percentile(inMemoryLatency, 0.95):F3} ms");
+        this.Log($"Local latency:     avg {localLatency.Average():F3} ms, p95 {Percentile(localLatency, 0.95):F3} ms");
+        Assert.True(recall >= 0.9, $"Recall {recall:P1} too low");
+    }
+
+    [Fact]
+    public async Task ItAppliesODataFilters()
+    {
+        // Arrange
+        var random = new Random(456);
+        List<BenchmarkRecord> records = GenerateRecords(random);
+        List<ReadOnlyMemory<float>> queries = Enumerable.Range(0, 20).Select(_ => GenerateVector(random, records)).ToList();
+
+        var inMemory = new InMemoryVectorStore().GetCollection<string, BenchmarkRecord>("benchmark");
+        await inMemory.CreateCollectionAsync();
+        await foreach (string _ in inMemory.UpsertBatchAsync(records)) { }
+
+        using var localStore = new LocalVectorStore(new LocalVectorStoreConfig { Directory = this._directory });
+        var local = localStore.GetCollection<string, BenchmarkRecord>("benchmark");
+        await local.CreateCollectionAsync();
+        await foreach (string _ in local.UpsertBatchAsync(records)) { }
+
+        var filter = ODataFilterTranslator.BuildFilterExpression<BenchmarkRecord>("Group eq 3", NullLogger.Instance);
+
+        // Act
+        (List<List<string>> expected, List<double> _) = await SearchAsync(inMemory, queries, filter);
+        (List<List<string>> actual, List<double> _) = await SearchAsync(local, queries, filter);
+
+        // Assert
+        double recall = GetRecall(expected, actual);
+        this.Log($"Filtered recall@{Top}: {recall:P1}");
+        Assert.True(recall >= 0.9, $"Recall {recall:P1} too low");
+        Assert.All(actual.SelectMany(x => x), id => Assert.Equal(3, records.First(r => r.Id == id).Group));
+    }
+
+    [Fact]
+    public async Task ItReloadsCollectionsFromDisk()
+    {
+        // Arrange
+        var random = new Random(789);
+        List<BenchmarkRecord> records = GenerateRecords(random);
+        List<ReadOnlyMemory<float>> queries = Enumerable.Range(0, 20).Select(_ => GenerateVector(random, records)).ToList();
+
+        List<List<string>> before;
+        using (var localStore = new LocalVectorStore(new LocalVectorStoreConfig { Directory = this._directory, SnapshotEveryChanges = 1000 }))
+        {
+            var local = localStore.GetCollection<string, BenchmarkRecord>("benchmark");
+            await local.CreateCollectionAsync();
+            await foreach (string _ in local.UpsertBatchAsync(records)) { }
+
+            await local.DeleteAsync(records[0].Id);
+            (before, _) = await SearchAsync(local, queries, null);
+        }
+
+        // Act
+        using var reloadedStore = new LocalVectorStore(new LocalVectorStoreConfig { Directory = this._directory });
+        var reloaded = reloadedStore.GetCollection<string, BenchmarkRecord>("benchmark");
+        (List<List<string>> after, List<double> _) = await SearchAsync(reloaded, queries, null);
+
+        // Assert
+        var names = new List<string>();
+        await foreach (string name in reloadedStore.ListCollectionNamesAsync()) { names.Add(name); }
+
+        Assert.Equal(["benchmark"], names);
+        Assert.Null(await reloaded.GetAsync(records[0].Id));
+        BenchmarkRecord? record = await reloaded.GetAsync(records[1].Id, new GetRecordOptions { IncludeVectors = true });
+        Assert.NotNull(record);
+        Assert.Equal(records[1].Vector.ToArray(), record.Vector.ToArray());
+        Assert.Equal(before, after);
+    }
+
+    protected override void Dispose(bool disposing)
+    {
+        if (disposing) { this.DeleteDirectory(); }
+
+        base.Dispose(disposing);
+    }
+
+    public override async ValueTask DisposeAsync()
+    {
+        this.DeleteDirectory();
+        await base.DisposeAsync().ConfigureAwait(false);
+    }
+
+    private void DeleteDirectory()
+    {
+        if (Directory.Exists(this._directory)) { Directory.Delete(this._directory, recursive: true); }
+    }
+
+    private static async Task<(List<List<string>> results, List<double> latency)> SearchAsync(
+        IVectorStoreRecordCollection<string, BenchmarkRecord> collection,
+        List<ReadOnlyMemory<float>> queries,
+        System.Linq.Expressions.Expression<Func<BenchmarkRecord, bool>>? filter)
+    {
+        var results = new List<List<string>>();
+        var latency = new List<double>();
+        foreach (ReadOnlyMemory<float> query in queries)
+        {
+            var clock = Stopwatch.StartNew();
+            VectorSearchResults<BenchmarkRecord> found = await collection.VectorizedSearchAsync(
+                query, new VectorSearchOptions<BenchmarkRecord> { Top = Top, Filter = filter });
+            var ids = new List<string>();
+            await foreach (VectorSearchResult<BenchmarkRecord> x in found.Results) { ids.Add(x.Record.Id); }
+
+            latency.Add(clock.Elapsed.TotalMilliseconds);
+            results.Add(ids);
+        }
+
+        return (results, latency);
+    }
+
+    private static double GetRecall(List<List<string>> expected, List<List<string>> actual)
+    {
+        int found = expected.Select((ids, i) => ids.Intersect(actual[i]).Count()).Sum();
+        return (double)found / expected.Sum(ids => ids.Count);
+    }
+
+    private static double Percentile(List<double> values, double percentile)
+    {
+        List<double> sorted = values.Order().ToList();
+        return sorted[(int)Math.Min(sorted.Count - 1, Math.Ceiling(percentile * sorted.Count) - 1)];
+    }
+
+    // Records grouped in clusters, closer to real embeddings than uniformly random vectors
+    private static List<BenchmarkRecord> GenerateRecords(Random random)
+    {
+        var centroids = Enumerable.Range(0, Groups).Select(_ => RandomVector(random, 1)).ToList();
+        return Enumerable.Range(0, RecordCount).Select(i => new BenchmarkRecord
+        {
+            Id = $"r{i}",
+            Group = i % Groups,
+            Vector = centroids[i % Groups].Zip(RandomVector(random, 0.5f), (a, b) => a + b).ToArray(),
+        }).ToList();
+    }
+
+    private static ReadOnlyMemory<float> GenerateVector(Random random, List<BenchmarkRecord> records)
+    {
+        float[] source = records[random.Next(records.Count)].Vector.ToArray();
+        return source.Zip(RandomVector(random, 0.3f), (a, b) => a + b).ToArray();
+    }
+
+    private static float[] RandomVector(Random random, float scale)
+    {
+        return Enumerable.Range(0, Dimensions).Select(_ => (float)(random.NextDouble() * 2 - 1) * scale).ToArray();
+    }
+
+    public sealed class BenchmarkRecord
+    {
+        [VectorStoreRecordKey]
+        public string Id { get; set; } = string.Empty;
+
+        [VectorStoreRecordData(IsFilterable = true)]
+        public int Group { get; set; }
+
+        [VectorStoreRecordVector(Dimensions)]
+        public ReadOnlyMemory<float> Vector { get; set; }
+    }
+}
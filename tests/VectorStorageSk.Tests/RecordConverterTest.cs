@@ -0,0 +1,74 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json;
+using CommonDotNet.Embeddings;
+using VectorStorageSk.Models;
+using VectorStorageSk.Storage;
+
+namespace VectorStorageSk.Tests;
+
+public sealed class RecordConverterTest
+{
+    private readonly RecordConverter _converter = new(
+    [
+        new FieldDefinition { Name = "id", Type = FieldTypes.PrimaryKey },
+        new FieldDefinition { Name = "content", Type = FieldTypes.Text },
+        new FieldDefinition { Name = "count", Type = FieldTypes.Int },
+        new FieldDefinition { Name = "tags", Type = FieldTypes.ListOfText },
+        new FieldDefinition { Name = "vector", Type = FieldTypes.Vector, VectorSize = 3 },
+    ]);
+
+    [Fact]
+    public void ItSplitsDataAndVectors()
+    {
+        // Arrange
+        JsonElement value = JsonDocument.Parse("""{ "content": "a", "count": 2, "tags": [ "x" ], "vector": [ 1, 2, 3 ] }""").RootElement;
+
+        // Act
+        (Dictionary<string, object?> data, Dictionary<string, object?> vectors) = this._converter.Convert(value);
+
+        // Assert: the primary key is set by the caller
+        Assert.Equal("id", this._converter.IdFieldName);
+        Assert.Equal<string>(["content", "count", "tags"], data.Keys);
+        Assert.Equal("a", data["content"]);
+        Assert.Equal(2, data["count"]);
+        Assert.Equal<string>(["x"], (List<string>)data["tags"]!);
+        Assert.Equal<float>([1, 2, 3], ((ReadOnlyMemory<float>)vectors["vector"]!).ToArray());
+    }
+
+    [Fact]
+    public void ItDecodesEncodedVectors()
+    {
+        // Arrange
+        string encoded = EmbeddingEncoding.Encode([1, 2, 3], EmbeddingEncodings.Base64);
+        JsonElement value = JsonSerializer.SerializeToElement(new { vector = encoded });
+
+        // Act
+        (_, Dictionary<string, object?> vectors) = this._converter.Convert(value);
+
+        // Assert
+        Assert.Equal<float>([1, 2, 3], ((ReadOnlyMemory<float>)vectors["vector"]!).ToArray());
+    }
+
+    [Fact]
+    public void ItSetsDefaultValuesForMissingFields()
+    {
+        // Act
+        (Dictionary<string, object?> data, Dictionary<string, object?> vectors) = this._converter.Convert(JsonDocument.Parse("{}").RootElement);
+
+        // Assert
+        Assert.Equal(string.Empty, data["content"]);
+        Assert.Equal(0, data["count"]);
+        Assert.Empty((List<string>)data["tags"]!);
+        Assert.Equal(3, ((ReadOnlyMemory<float>)vectors["vector"]!).Length);
+    }
+
+    [Fact]
+    public void ItRejectsInvalidRecords()
+    {
+        Assert.Throws<JsonException>(() => this._converter.Convert(default));
+        Assert.Throws<JsonException>(() => this._converter.Convert(JsonDocument.Parse("[ 1 ]").RootElement));
+        Assert.Throws<JsonException>(() => this._converter.Convert(JsonDocument.Parse("""{ "count": "x" }""").RootElement));
+        Assert.Throws<FormatException>(() => this._converter.Convert(JsonDocument.Parse("""{ "vector": "not base64!" }""").RootElement));
+    }
+}
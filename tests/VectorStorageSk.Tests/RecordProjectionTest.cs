@@ -0,0 +1,73 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json;
+using System.Text.Json.Serialization;
+using VectorStorageSk.Storage;
+
+namespace VectorStorageSk.Tests;
+
+public sealed class RecordProjectionTest
+{
+    private static readonly TestRecord s_record = new() { Id = "1", Content = "a", Vector = new float[] { 1, 2 }, Secret = "x" };
+
+    [Fact]
+    public void ItCopiesOnlyWhenNeeded()
+    {
+        Assert.False(RecordProjection<TestRecord>.IsNeeded(select: null, includeVectors: true));
+        Assert.True(RecordProjection<TestRecord>.IsNeeded(select: null, includeVectors: false));
+        Assert.True(RecordProjection<TestRecord>.IsNeeded(select: ["id"], includeVectors: true));
+    }
+
+    [Fact]
+    public void ItSkipsVectorsUnlessRequested()
+    {
+        // Act
+        Dictionary<string, object?> withoutVectors = RecordProjection<TestRecord>.Project(s_record, null, includeVectors: false, JsonNamingPolicy.CamelCase);
+        Dictionary<string, object?> withVectors = RecordProjection<TestRecord>.Project(s_record, null, includeVectors: true, JsonNamingPolicy.CamelCase);
+
+        // Assert: JSON names are used, ignored properties are skipped
+        Assert.Equal<string>(["id", "text", "timeStamp"], withoutVectors.Keys);
+        Assert.Equal<string>(["id", "text", "vector", "timeStamp"], withVectors.Keys);
+        Assert.Equal("a", withVectors["text"]);
+    }
+
+    [Fact]
+    public void ItSelectsFieldsByCSharpOrJsonName()
+    {
+        // Act
+        Dictionary<string, object?> byJsonName = RecordProjection<TestRecord>.Project(s_record, ["TEXT", "vector"], includeVectors: false, JsonNamingPolicy.CamelCase);
+        Dictionary<string, object?> byName = RecordProjection<TestRecord>.Project(s_record, ["content", "Vector"], includeVectors: true, null);
+
+        // Assert: vectors are returned only if requested, even when selected
+        Assert.Equal<string>(["text"], byJsonName.Keys);
+        Assert.Equal<string>(["text", "Vector"], byName.Keys);
+    }
+
+    [Fact]
+    public void ItUsesTheNamingPolicyOfEachCall()
+    {
+        // Act
+        Dictionary<string, object?> camelCase = RecordProjection<TestRecord>.Project(s_record, null, includeVectors: true, JsonNamingPolicy.CamelCase);
+        Dictionary<string, object?> snakeCase = RecordProjection<TestRecord>.Project(s_record, null, includeVectors: true, JsonNamingPolicy.SnakeCaseLower);
+
+        // Assert
+        Assert.Equal<string>(["id", "text", "vector", "timeStamp"], camelCase.Keys);
+        Assert.Equal<string>(["id", "text", "vector", "time_stamp"], snakeCase.Keys);
+        Assert.Equal<string>(["Id", "text", "Vector", "TimeStamp"], RecordProjection<TestRecord>.Project(s_record, null, includeVectors: true, null).Keys);
+    }
+
+    internal sealed class TestRecord
+    {
+        public string Id { get; set; } = string.Empty;
+
+        [JsonPropertyName("text")]
+        public string Content { get; set; } = string.Empty;
+
+        public ReadOnlyMemory<float> Vector { get; set; }
+
+        public long TimeStamp { get; set; }
+
+        [JsonIgnore]
+        public string Secret { get; set; } = string.Empty;
+    }
+}
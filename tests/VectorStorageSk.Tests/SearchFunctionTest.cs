@@ -0,0 +1,161 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using Microsoft.AspNetCore.Http;
+using Microsoft.AspNetCore.Http.HttpResults;
+using Microsoft.Extensions.DependencyInjection;
+using VectorStorageSk.Functions;
+using VectorStorageSk.Models;
+using VectorStorageSk.Storage;
+using VectorStorageSk.Tests.Helpers;
+
+namespace VectorStorageSk.Tests;
+
+public sealed class SearchFunctionTest : BaseTestCase
+{
+    private readonly string _directory = Path.Combine(Path.GetTempPath(), "SearchFunctionTest", Guid.NewGuid().ToString("N"));
+    private readonly LocalVectorStore _store;
+    private readonly ServiceProvider _sp;
+
+    public SearchFunctionTest(ITestOutputHelper console) : base(console)
+    {
+        this._store = new LocalVectorStore(new LocalVectorStoreConfig { Directory = this._directory });
+        this._sp = new ServiceCollection().AddSingleton(this._store).BuildServiceProvider();
+    }
+
+    [Fact]
+    public async Task ItReturnsTheResultsOfEachQueryInOrder()
+    {
+        // Arrange
+        await this.AddRecordsAsync();
+        SearchBatchRequest req = NewRequest([[0, 0, 1, 0], [1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0]]);
+
+        // Act
+        SearchBatchResponse response = await this.SearchAsync(req);
+
+        // Assert
+        Assert.Equal<string>(["r2", "r0", "r1", "r2"], response.Queries.Select(x => GetRecord(x.Results.Single())["id"]!.ToString()!));
+        Assert.All(response.Queries, x => Assert.Null(x.Error));
+    }
+
+    [Fact]
+    public async Task ItReportsFailedQueriesWithoutStoppingTheOthers()
+    {
+        // Arrange: the record nearest to the second query can't be read as MemoryRecord
+        await this.AddRecordsAsync();
+        var generic = this._store.GetCollection<string, VectorStoreGenericDataModel<string>>("test");
+        await generic.UpsertAsync(new VectorStoreGenericDataModel<string>("bad")
+        {
+            Data = new Dictionary<string, object?> { ["content"] = "bad", ["timeStamp"] = "not a number" },
+            Vectors = new Dictionary<string, object?> { ["contentEmbedding"] = new ReadOnlyMemory<float>([0, 0, 0, 1]) },
+        });
+
+        SearchBatchRequest req = NewRequest([[1, 0, 0, 0], [0, 0, 0, 1], [0, 1, 0, 0]]);
+
+        // Act
+        SearchBatchResponse response = await this.SearchAsync(req);
+
+        // Assert
+        Assert.Null(response.Queries[0].Error);
+        Assert.Contains("'bad'", response.Queries[1].Error, StringComparison.Ordinal);
+        Assert.Empty(response.Queries[1].Results);
+        Assert.Equal("r1", GetRecord(response.Queries[2].Results.Single())["id"]!.ToString());
+    }
+
+    [Fact]
+    public async Task ItReturnsVectorsOnlyWhenRequested()
+    {
+        // Arrange
+        await this.AddRecordsAsync();
+        SearchBatchRequest req = NewRequest([[1, 0, 0, 0]]);
+        SearchBatchRequest reqWithVectors = NewRequest([[1, 0, 0, 0]]);
+        reqWithVectors.IncludeVectors = true;
+
+        // Act
+        SearchBatchResponse response = await this.SearchAsync(req);
+        SearchBatchResponse responseWithVectors = await this.SearchAsync(reqWithVectors);
+
+        // Assert: field names are the same used to serialize the records
+        Dictionary<string, object?> record = GetRecord(response.Queries[0].Results[0]);
+        Assert.Equal("content 0", record["content"]);
+        Assert.False(record.ContainsKey("contentEmbedding"));
+
+        var recordWithVectors = (MemoryRecord<string>)responseWithVectors.Queries[0].Results[0].Record;
+        Assert.Equal<float>([1, 0, 0, 0], recordWithVectors.ContentEmbedding.ToArray());
+    }
+
+    [Fact]
+    public async Task ItReturnsOnlyTheSelectedFields()
+    {
+        // Arrange
+        await this.AddRecordsAsync();
+        SearchBatchRequest req = NewRequest([[1, 0, 0, 0], [0, 1, 0, 0]]);
+        req.Select = ["Id", "content", "contentEmbedding"];
+
+        // Act
+        SearchBatchResponse response = await this.SearchAsync(req);
+
+        // Assert
+        Assert.All(response.Queries, x => Assert.Equal<string>(["id", "content"], GetRecord(x.Results[0]).Keys));
+        Assert.Equal("content 1", GetRecord(response.Queries[1].Results[0])["content"]);
+    }
+
+    protected override void Dispose(bool disposing)
+    {
+        if (disposing) { this.Cleanup(); }
+
+        base.Dispose(disposing);
+    }
+
+    public override async ValueTask DisposeAsync()
+    {
+        this.Cleanup();
+        await base.DisposeAsync().ConfigureAwait(false);
+    }
+
+    private static SearchBatchRequest NewRequest(List<float[]> vectors)
+    {
+        return new SearchBatchRequest
+        {
+            StorageType = StorageTypes.Local,
+            CollectionName = "test",
+            DataType = "MemoryRecord",
+            Fields = [new FieldDefinition { Name = "contentEmbedding", Type = FieldTypes.Embedding, VectorSize = 4 }],
+            Top = 1,
+            Vectors = vectors,
+            MaxConcurrentQueries = 2,
+        };
+    }
+
+    private static Dictionary<string, object?> GetRecord(SearchResponse.SearchResult result)
+    {
+        return Assert.IsType<Dictionary<string, object?>>(result.Record);
+    }
+
+    // Records r0, r1, r2 with vectors along the first 3 axes
+    private async Task AddRecordsAsync()
+    {
+        var collection = this._store.GetCollection<string, MemoryRecord<string>>("test");
+        await collection.CreateCollectionAsync();
+        await foreach (string _ in collection.UpsertBatchAsync(Enumerable.Range(0, 3).Select(i => new MemoryRecord<string>
+                       {
+                           Id = $"r{i}",
+                           Content = $"content {i}",
+                           ContentEmbedding = Enumerable.Range(0, 4).Select(x => x == i ? 1f : 0f).ToArray(),
+                       }))) { }
+    }
+
+    private async Task<SearchBatchResponse> SearchAsync(SearchBatchRequest req)
+    {
+        IResult result = await new SearchFunction<string, MemoryRecord<string>>(this._sp).InvokeBatchAsync(req);
+        SearchBatchResponse response = Assert.IsType<Ok<SearchBatchResponse>>(result).Value!;
+        Assert.Equal(req.Vectors.Count, response.Queries.Count);
+        return response;
+    }
+
+    private void Cleanup()
+    {
+        this._sp.Dispose();
+        this._store.Dispose();
+        if (Directory.Exists(this._directory)) { Directory.Delete(this._directory, recursive: true); }
+    }
+}
@@ -0,0 +1,106 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text;
+using CommonDotNet.Embeddings;
+using Microsoft.AspNetCore.Http.HttpResults;
+using Microsoft.Extensions.DependencyInjection;
+using VectorStorageSk.Functions;
+using VectorStorageSk.Models;
+using VectorStorageSk.Storage;
+using VectorStorageSk.Tests.Helpers;
+
+namespace VectorStorageSk.Tests;
+
+public sealed class UpsertRecordFunctionTest : BaseTestCase
+{
+    private const string Header = """
+        {"storageType":"Local","collection":"test","batchSize":2,"fields":[{"name":"id","type":"PrimaryKey"},{"name":"content","type":"Text"},{"name":"vector","type":"Vector","vectorSize":2}]}
+        """;
+
+    private readonly string _directory = Path.Combine(Path.GetTempPath(), "UpsertRecordFunctionTest", Guid.NewGuid().ToString("N"));
+    private readonly LocalVectorStore _store;
+    private readonly ServiceProvider _sp;
+
+    public UpsertRecordFunctionTest(ITestOutputHelper console) : base(console)
+    {
+        this._store = new LocalVectorStore(new LocalVectorStoreConfig { Directory = this._directory });
+        this._sp = new ServiceCollection().AddSingleton(this._store).BuildServiceProvider();
+    }
+
+    [Fact]
+    public async Task ItWritesBulkRecordsReportingTheirPosition()
+    {
+        // Arrange
+        await this.CreateCollectionAsync();
+        string body = string.Join('\n',
+            Header,
+            """{"content":"a","vector":[1,0]}""",
+            """not json""",
+            """{"content":"b","vector":[0,1]}""",
+            """{"content":"c","vector":[1,1,1]}""",
+            """{"content":"d","vector":[1,1]}""",
+            """{"content":7,"vector":[1,1]}""",
+            $$"""{"content":"e","vector":"{{EmbeddingEncoding.Encode([0.5f, 0.5f], EmbeddingEncodings.Base64)}}"}""");
+
+        // Act
+        IResult result = await new UpsertRecordFunction(this._sp).InvokeBulkAsync(new MemoryStream(Encoding.UTF8.GetBytes(body)));
+
+        // Assert: records 2 and 6 are invalid, record 4 has the wrong vector size and fails its batch
+        UpsertRecordResponse response = Assert.IsType<Ok<UpsertRecordResponse>>(result).Value!;
+        Assert.Equal(3, response.Written);
+        Assert.Equal(4, response.Failed);
+        Assert.Equal(2, response.Errors!.Count);
+        Assert.StartsWith("Record 2:", response.Errors[0], StringComparison.Ordinal);
+        Assert.StartsWith("Record 6:", response.Errors[1], StringComparison.Ordinal);
+
+        Assert.Equal<(int, int, bool)>([(1, 3, true), (4, 5, false), (7, 7, true)],
+            response.Batches.Select(x => (x.FirstRecord, x.LastRecord, x.Success)));
+        Assert.Equal<int>([4, 5], response.Batches[1].Records!);
+    }
+
+    [Fact]
+    public async Task ItRejectsBulkRequestsWithValuesInTheFirstLine()
+    {
+        // Arrange
+        string body = Header.Replace("\"fields\"", "\"values\":[{}],\"fields\"", StringComparison.Ordinal);
+
+        // Act
+        IResult result = await new UpsertRecordFunction(this._sp).InvokeBulkAsync(new MemoryStream(Encoding.UTF8.GetBytes(body)));
+
+        // Assert
+        Assert.IsType<BadRequest<string>>(result);
+    }
+
+    protected override void Dispose(bool disposing)
+    {
+        if (disposing) { this.Cleanup(); }
+
+        base.Dispose(disposing);
+    }
+
+    public override async ValueTask DisposeAsync()
+    {
+        this.Cleanup();
+        await base.DisposeAsync().ConfigureAwait(false);
+    }
+
+    private async Task CreateCollectionAsync()
+    {
+        var fields = new List<FieldDefinition>
+        {
+            new() { Name = "id", Type = FieldTypes.PrimaryKey },
+            new() { Name = "content", Type = FieldTypes.Text },
+            new() { Name = "vector", Type = FieldTypes.Vector, VectorSize = 2 },
+        };
+
+        await this._store.GetCollection<string, VectorStoreGenericDataModel<string>>("test", StorageLib.PrepareRecordDefinition(fields, this._store))
+            .CreateCollectionAsync();
+    }
+
+    private void Cleanup()
+    {
+        this._sp.Dispose();
+        this._store.Dispose();
+        if (Directory.Exists(this._directory)) { Directory.Delete(this._directory, recursive: true); }
+    }
+}
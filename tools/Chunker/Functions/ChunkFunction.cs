@@ -1,5 +1,8 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
+using System.Security.Cryptography;
+using System.Text;
+using System.Text.Json;
 using Chunker.Models;
 using Microsoft.Extensions.Logging.Abstractions;
 using Microsoft.KernelMemory.AI;
@@ -9,6 +12,14 @@ namespace Chunker.Functions;
 
 internal sealed class ChunkFunction
 {
+    // Size of the text sections chunked and streamed one at a time, in chars, see InvokeStreamAsync.
+    internal const int StreamSectionSize = 64 * 1024;
+
+    // Where to split sections, in order of preference
+    private static readonly string[] s_sectionSeparators = ["\n\n", "\n", " "];
+
+    private static readonly byte[] s_newLine = "\n"u8.ToArray();
+
     private readonly ILogger<ChunkFunction> _log;
 
     public ChunkFunction(ILoggerFactory? lf = null)
@@ -18,37 +29,156 @@ internal sealed class ChunkFunction
 
     public IResult Invoke(ChunkRequest req)
     {
-        ITextTokenizer tokenizer;
-        switch (req.Tokenizer.ToLowerInvariant())
-        {
-            case "gpt4" or "cl100k" or "cl100k_base":
-                tokenizer = new CL100KTokenizer();
-                break;
-            case "gpt4o" or "o200k" or "o200k_base":
-                tokenizer = new O200KTokenizer();
-                break;
-            case "gpt3" or "p50k" or "p50k_base":
-                tokenizer = new P50KTokenizer();
-                break;
-            case "":
-            case "char":
-                tokenizer = new OneCharTokenizer();
-                break;
-            default:
-                return Results.BadRequest("Unsupported tokenizer, try 'cl100k_base' or 'char'");
+        if (!Tokenizers.TryGet(req.Tokenizer, out ITextTokenizer tokenizer))
+        {
+            return Results.BadRequest("Unsupported tokenizer, try 'cl100k_base' or 'char'");
         }
 
         this._log.LogDebug("Using tokenizer {Tokenizer} ({TokenizerType}), chunk size: {MaxTokensPerChunk}, overlap: {Overlap}",
             req.Tokenizer, tokenizer.GetType().Name, req.MaxTokensPerChunk, req.Overlap);
 
+        List<string> chunks = Split(tokenizer, req.Text, req.MaxTokensPerChunk, req.Overlap, req.ChunkHeader);
+
+        return Results.Ok(new ChunkResponse
+        {
+            Chunks = chunks,
+            Metadata = req.IncludeMetadata ? GetMetadata(tokenizer, req.Text, chunks, req.ChunkHeader) : null,
+        });
+    }
+
+    /// <summary>
+    /// Chunk multiple texts, in parallel, returning the chunks of each text in the same order of the request.
+    /// </summary>
+    public IResult InvokeBatch(ChunkBatchRequest req)
+    {
+        if (!Tokenizers.TryGet(req.Tokenizer, out ITextTokenizer tokenizer))
+        {
+            return Results.BadRequest("Unsupported tokenizer, try 'cl100k_base' or 'char'");
+        }
+
+        this._log.LogDebug("Chunking {Count} texts, tokenizer {Tokenizer} ({TokenizerType}), chunk size: {MaxTokensPerChunk}, overlap: {Overlap}",
+            req.Texts.Count, req.Tokenizer, tokenizer.GetType().Name, req.MaxTokensPerChunk, req.Overlap);
+
+        // Chunking is CPU bound, use all the cores
+        var results = new ChunkResponse[req.Texts.Count];
+        Parallel.For(0, req.Texts.Count, new ParallelOptions { MaxDegreeOfParallelism = Environment.ProcessorCount }, i =>
+        {
+            List<string> chunks = Split(tokenizer, req.Texts[i], req.MaxTokensPerChunk, req.Overlap, req.ChunkHeader);
+            results[i] = new ChunkResponse
+            {
+                Chunks = chunks,
+                Metadata = req.IncludeMetadata ? GetMetadata(tokenizer, req.Texts[i], chunks, req.ChunkHeader) : null,
+            };
+        });
+
+        return Results.Ok(new ChunkBatchResponse { Results = [..results] });
+    }
+
+    /// <summary>
+    /// Chunk a large text, streaming chunks as NDJSON lines while the text is processed, so the client
+    /// can start processing the first chunks before the whole text is split. The text is processed
+    /// in sections of about 64K chars, split at paragraph boundaries when possible, and chunks don't
+    /// span sections.
+    /// </summary>
+    public async Task<IResult> InvokeStreamAsync(HttpContext httpContext, ChunkRequest req, CancellationToken cancellationToken)
+    {
+        if (!Tokenizers.TryGet(req.Tokenizer, out ITextTokenizer tokenizer))
+        {
+            return Results.BadRequest("Unsupported tokenizer, try 'cl100k_base' or 'char'");
+        }
+
+        this._log.LogDebug("Streaming chunks, tokenizer {Tokenizer} ({TokenizerType}), chunk size: {MaxTokensPerChunk}, overlap: {Overlap}",
+            req.Tokenizer, tokenizer.GetType().Name, req.MaxTokensPerChunk, req.Overlap);
+
+        httpContext.Response.StatusCode = StatusCodes.Status200OK;
+        httpContext.Response.ContentType = "application/x-ndjson; charset=utf-8";
+
+        Stream body = httpContext.Response.Body;
+        int index = 0;
+        foreach ((string section, int offset) in SplitSections(req.Text, StreamSectionSize))
+        {
+            List<string> chunks = Split(tokenizer, section, req.MaxTokensPerChunk, req.Overlap, req.ChunkHeader);
+            List<ChunkMetadata>? metadata = req.IncludeMetadata ? GetMetadata(tokenizer, section, chunks, req.ChunkHeader, offset) : null;
+            for (int i = 0; i < chunks.Count; i++)
+            {
+                var item = new ChunkStreamItem { Index = index++, Chunk = chunks[i], Metadata = metadata?[i] };
+                await JsonSerializer.SerializeAsync(body, item, cancellationToken: cancellationToken).ConfigureAwait(false);
+                await body.WriteAsync(s_newLine, cancellationToken).ConfigureAwait(false);
+            }
+
+            await body.FlushAsync(cancellationToken).ConfigureAwait(false);
+        }
+
+        return Results.Empty;
+    }
+
+    private static List<string> Split(ITextTokenizer tokenizer, string text, int maxTokensPerChunk, int overlap, string chunkHeader)
+    {
         var chunker = new PlainTextChunker(tokenizer);
-        List<string> chunks = chunker.Split(req.Text, new PlainTextChunkerOptions
+        return chunker.Split(text, new PlainTextChunkerOptions
         {
-            MaxTokensPerChunk = req.MaxTokensPerChunk,
-            Overlap = req.Overlap,
-            ChunkHeader = req.ChunkHeader,
+            MaxTokensPerChunk = maxTokensPerChunk,
+            Overlap = overlap,
+            ChunkHeader = chunkHeader,
         });
+    }
+
+    /// <summary>
+    /// Calculate token count, position and hash of each chunk. The position is found searching the chunk
+    /// content (without header) in the source text, after the previous chunk start, to support overlaps.
+    /// </summary>
+    private static List<ChunkMetadata> GetMetadata(ITextTokenizer tokenizer, string text, List<string> chunks, string chunkHeader, int offset = 0)
+    {
+        var result = new List<ChunkMetadata>(chunks.Count);
+        int searchFrom = 0;
+        foreach (string chunk in chunks)
+        {
+            var metadata = new ChunkMetadata
+            {
+                TokenCount = tokenizer.CountTokens(chunk),
+                Hash = Convert.ToHexStringLower(SHA256.HashData(Encoding.UTF8.GetBytes(chunk))),
+            };
+
+            string content = (!string.IsNullOrEmpty(chunkHeader) && chunk.StartsWith(chunkHeader, StringComparison.Ordinal)
+                ? chunk[chunkHeader.Length..]
+                : chunk).Trim();
+            int pos = content.Length == 0 ? -1 : text.IndexOf(content, searchFrom, StringComparison.Ordinal);
+            if (pos >= 0)
+            {
+                metadata.Start = offset + pos;
+                metadata.End = offset + pos + content.Length;
+                searchFrom = pos + 1;
+            }
+
+            result.Add(metadata);
+        }
+
+        return result;
+    }
+
+    /// <summary>
+    /// Split a text in sections of max size chars, preferably at paragraph boundaries, returning each section with its position.
+    /// </summary>
+    internal static IEnumerable<(string section, int offset)> SplitSections(string text, int size)
+    {
+        int start = 0;
+        while (text.Length - start > size)
+        {
+            int end = start + size;
+            foreach (string separator in s_sectionSeparators)
+            {
+                int pos = text.LastIndexOf(separator, start + size - 1, size, StringComparison.Ordinal);
+                if (pos > start)
+                {
+                    end = pos + separator.Length;
+                    break;
+                }
+            }
+
+            yield return (text[start..end], start);
+            start = end;
+        }
 
-        return Results.Ok(new ChunkResponse { Chunks = chunks });
+        if (start < text.Length) { yield return (text[start..], start); }
     }
 }
@@ -0,0 +1,35 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace Chunker.Models;
+
+internal sealed class ChunkBatchRequest
+{
+    [JsonPropertyName("texts")]
+    [JsonPropertyOrder(0)]
+    public List<string> Texts { get; set; } = [];
+
+    [JsonPropertyName("maxTokensPerChunk")]
+    [JsonPropertyOrder(1)]
+    public int MaxTokensPerChunk { get; set; } = 1000;
+
+    [JsonPropertyName("overlap")]
+    [JsonPropertyOrder(2)]
+    public int Overlap { get; set; } = 0;
+
+    [JsonPropertyName("chunkHeader")]
+    [JsonPropertyOrder(3)]
+    public string ChunkHeader { get; set; } = string.Empty;
+
+    /// <summary>
+    /// Whether to return token count, offsets and hash of each chunk, see <see cref="ChunkMetadata"/>.
+    /// </summary>
+    [JsonPropertyName("includeMetadata")]
+    [JsonPropertyOrder(4)]
+    public bool IncludeMetadata { get; set; } = false;
+
+    [JsonPropertyName("tokenizer")]
+    [JsonPropertyOrder(10)]
+    public string Tokenizer { get; set; } = "cl100k_base";
+}
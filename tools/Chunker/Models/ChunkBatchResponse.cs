@@ -0,0 +1,15 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace Chunker.Models;
+
+internal sealed class ChunkBatchResponse
+{
+    /// <summary>
+    /// Chunks of each text, in the same order of the request.
+    /// </summary>
+    [JsonPropertyName("results")]
+    [JsonPropertyOrder(0)]
+    public List<ChunkResponse> Results { get; set; } = [];
+}
@@ -0,0 +1,41 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace Chunker.Models;
+
+/// <summary>
+/// Details of a chunk, so downstream steps can pack batches by token count and
+/// deduplicate chunks without tokenizing them again.
+/// </summary>
+internal sealed class ChunkMetadata
+{
+    /// <summary>
+    /// Number of tokens in the chunk, including the chunk header, using the request tokenizer.
+    /// </summary>
+    [JsonPropertyName("tokenCount")]
+    [JsonPropertyOrder(0)]
+    public int TokenCount { get; set; }
+
+    /// <summary>
+    /// Position of the chunk content in the source text, in chars. Null if the chunker
+    /// modified the content, e.g. normalizing whitespace, and the position is unknown.
+    /// </summary>
+    [JsonPropertyName("start")]
+    [JsonPropertyOrder(1)]
+    public int? Start { get; set; }
+
+    /// <summary>
+    /// Position of the end of the chunk content in the source text, in chars (exclusive).
+    /// </summary>
+    [JsonPropertyName("end")]
+    [JsonPropertyOrder(2)]
+    public int? End { get; set; }
+
+    /// <summary>
+    /// SHA256 of the chunk, UTF-8 encoded, as lowercase hex.
+    /// </summary>
+    [JsonPropertyName("hash")]
+    [JsonPropertyOrder(3)]
+    public string Hash { get; set; } = string.Empty;
+}
@@ -22,6 +22,13 @@ internal sealed class ChunkRequest
     [JsonPropertyOrder(3)]
     public string ChunkHeader { get; set; } = string.Empty;
 
+    /// <summary>
+    /// Whether to return token count, offsets and hash of each chunk, see <see cref="ChunkMetadata"/>.
+    /// </summary>
+    [JsonPropertyName("includeMetadata")]
+    [JsonPropertyOrder(4)]
+    public bool IncludeMetadata { get; set; } = false;
+
     [JsonPropertyName("tokenizer")]
     [JsonPropertyOrder(10)]
     public string Tokenizer { get; set; } = "cl100k_base";
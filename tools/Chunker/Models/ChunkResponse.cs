@@ -13,4 +13,12 @@ internal sealed class ChunkResponse
     [JsonPropertyName("chunks")]
     [JsonPropertyOrder(1)]
     public List<string> Chunks { get; set; } = [];
+
+    /// <summary>
+    /// Details of each chunk, in the same order of <see cref="Chunks"/>, when requested.
+    /// </summary>
+    [JsonPropertyName("metadata")]
+    [JsonPropertyOrder(2)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public List<ChunkMetadata>? Metadata { get; set; }
 }
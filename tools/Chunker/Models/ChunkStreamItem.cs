@@ -0,0 +1,24 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace Chunker.Models;
+
+/// <summary>
+/// A chunk streamed as a NDJSON line, see ChunkFunction.InvokeStreamAsync.
+/// </summary>
+internal sealed class ChunkStreamItem
+{
+    [JsonPropertyName("index")]
+    [JsonPropertyOrder(0)]
+    public int Index { get; set; }
+
+    [JsonPropertyName("chunk")]
+    [JsonPropertyOrder(1)]
+    public string Chunk { get; set; } = string.Empty;
+
+    [JsonPropertyName("metadata")]
+    [JsonPropertyOrder(2)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public ChunkMetadata? Metadata { get; set; }
+}
@@ -1,5 +1,6 @@
 // Copyright (c) Microsoft. All rights reserved.
 
+using System.Collections;
 using Microsoft.KernelMemory.AI;
 
 namespace Chunker;
@@ -13,8 +14,40 @@ internal sealed class OneCharTokenizer : ITextTokenizer
 
     public IReadOnlyList<string> GetTokens(string text)
     {
-        var tokens = new List<string>(text.Length);
-        tokens.AddRange(text.Select(t => t.ToString()));
-        return tokens;
+        // Tokens are created only when accessed, and ASCII/Latin-1 tokens are shared
+        return new CharTokenList(text);
+    }
+
+    private sealed class CharTokenList : IReadOnlyList<string>
+    {
+        private static readonly string[] s_latin1 = Enumerable.Range(0, 256).Select(c => ((char)c).ToString()).ToArray();
+
+        private readonly string _text;
+
+        public CharTokenList(string text)
+        {
+            this._text = text;
+        }
+
+        public int Count => this._text.Length;
+
+        public string this[int index]
+        {
+            get
+            {
+                char c = this._text[index];
+                return c < s_latin1.Length ? s_latin1[c] : c.ToString();
+            }
+        }
+
+        public IEnumerator<string> GetEnumerator()
+        {
+            for (int i = 0; i < this._text.Length; i++) { yield return this[i]; }
+        }
+
+        IEnumerator IEnumerable.GetEnumerator()
+        {
+            return this.GetEnumerator();
+        }
     }
 }
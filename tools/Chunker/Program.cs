@@ -40,6 +40,26 @@ internal static class Program
             .WithDescription("Chunk a given text into smaller parts")
             .WithSummary("Chunk a given text into smaller parts");
 
+        const string ChunkBatchFunctionName = "chunk/batch";
+        registry?.RegisterPostFunction($"/{ChunkBatchFunctionName}", "Chunk multiple texts into smaller parts");
+        app.MapPost($"/{ChunkBatchFunctionName}", IResult (ChunkFunction function, ChunkBatchRequest req) => function.InvokeBatch(req))
+            .Produces<ChunkBatchResponse>(StatusCodes.Status200OK)
+            .WithName("chunkBatch")
+            .WithDisplayName("Content chunker (batch)")
+            .WithDescription("Chunk multiple texts into smaller parts, processing texts in parallel")
+            .WithSummary("Chunk multiple texts into smaller parts");
+
+        const string ChunkStreamFunctionName = "chunk/stream";
+        // Note: NDJSON endpoints are not registered in the tool registry, because the orchestrator
+        //       sends JSON requests and expects a single JSON response. Clients call them directly.
+        app.MapPost($"/{ChunkStreamFunctionName}", Task<IResult> (HttpContext httpContext, ChunkFunction function, ChunkRequest req, CancellationToken cancellationToken) =>
+                function.InvokeStreamAsync(httpContext, req, cancellationToken))
+            .Produces<ChunkStreamItem>(StatusCodes.Status200OK, "application/x-ndjson")
+            .WithName("chunkStream")
+            .WithDisplayName("Content chunker (streaming)")
+            .WithDescription("Chunk a large text, streaming one chunk per NDJSON line while the text is processed")
+            .WithSummary("Chunk a large text, streaming chunks as NDJSON");
+
         app.Run();
     }
 }
@@ -0,0 +1,43 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using Microsoft.KernelMemory.AI;
+
+namespace Chunker;
+
+/// <summary>
+/// Process-wide tokenizer instances. Loading the BPE tables is expensive, so each tokenizer
+/// is created once, on first use, and shared by all requests. Tokenizers are thread safe.
+/// </summary>
+internal static class Tokenizers
+{
+    private static readonly Lazy<ITextTokenizer> s_cl100k = new(() => new CL100KTokenizer());
+    private static readonly Lazy<ITextTokenizer> s_o200k = new(() => new O200KTokenizer());
+    private static readonly Lazy<ITextTokenizer> s_p50k = new(() => new P50KTokenizer());
+    private static readonly ITextTokenizer s_char = new OneCharTokenizer();
+
+    /// <summary>
+    /// Get the tokenizer with the given name, e.g. "cl100k_base". Returns false if not supported.
+    /// </summary>
+    public static bool TryGet(string name, out ITextTokenizer tokenizer)
+    {
+        switch (name.ToLowerInvariant())
+        {
+            case "gpt4" or "cl100k" or "cl100k_base":
+                tokenizer = s_cl100k.Value;
+                return true;
+            case "gpt4o" or "o200k" or "o200k_base":
+                tokenizer = s_o200k.Value;
+                return true;
+            case "gpt3" or "p50k" or "p50k_base":
+                tokenizer = s_p50k.Value;
+                return true;
+            case "":
+            case "char":
+                tokenizer = s_char;
+                return true;
+            default:
+                tokenizer = s_char;
+                return false;
+        }
+    }
+}
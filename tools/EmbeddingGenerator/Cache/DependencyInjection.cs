@@ -0,0 +1,54 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using CommonDotNet.Diagnostics;
+using EmbeddingGenerator.Config;
+using StackExchange.Redis;
+
+namespace EmbeddingGenerator.Cache;
+
+internal static class DependencyInjection
+{
+    private const string RedisConnectionName = "redisstorage";
+
+    public static IHostApplicationBuilder AddEmbeddingCache(this IHostApplicationBuilder builder, EmbeddingCacheConfig config)
+    {
+        // The Redis client is registered also by the tools registry, when enabled
+        if (config.Tier == EmbeddingCacheConfig.CacheTiers.Redis
+            && builder.Services.All(x => x.ServiceType != typeof(IConnectionMultiplexer)))
+        {
+            builder.AddRedisClient(
+                connectionName: RedisConnectionName,
+                configureOptions: x => { x.LibraryName = Telemetry.HttpUserAgent; });
+        }
+
+        builder.Services.AddSingleton<EmbeddingCache>(sp =>
+        {
+            var loggerFactory = sp.GetService<ILoggerFactory>();
+            IEmbeddingCacheTier? tier = null;
+            switch (config.Tier)
+            {
+                case EmbeddingCacheConfig.CacheTiers.Disk:
+                    tier = new DiskEmbeddingCacheTier(config.DiskDirectory, loggerFactory);
+                    break;
+
+                case EmbeddingCacheConfig.CacheTiers.Redis:
+                    // Redis is optional: without Redis, embeddings are cached only in memory
+                    try
+                    {
+                        IDatabase redis = sp.GetRequiredService<IConnectionMultiplexer>().GetDatabase();
+                        tier = new RedisEmbeddingCacheTier(redis, TimeSpan.FromSeconds(config.RedisTtlSecs), loggerFactory);
+                    }
+                    catch (Exception e) when (e is InvalidOperationException or RedisException)
+                    {
+                        loggerFactory?.CreateLogger<EmbeddingCache>().LogWarning(e, "Redis not available, embeddings are cached only in memory");
+                    }
+
+                    break;
+            }
+
+            return new EmbeddingCache(config, tier, loggerFactory);
+        });
+
+        return builder;
+    }
+}
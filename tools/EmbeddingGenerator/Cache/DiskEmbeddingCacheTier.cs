@@ -0,0 +1,72 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using Microsoft.Extensions.Logging.Abstractions;
+
+namespace EmbeddingGenerator.Cache;
+
+/// <summary>
+/// Embeddings stored on the local file system, one file per embedding with little-endian float32 values,
+/// in subdirectories named after the first two chars of the key, to avoid huge directories.
+/// Files are never deleted: delete the directory to clear the cache.
+/// </summary>
+internal sealed class DiskEmbeddingCacheTier : IEmbeddingCacheTier
+{
+    private readonly string _directory;
+    private readonly ILogger<DiskEmbeddingCacheTier> _log;
+
+    public DiskEmbeddingCacheTier(string directory, ILoggerFactory? loggerFactory = null)
+    {
+        this._directory = directory;
+        this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<DiskEmbeddingCacheTier>();
+    }
+
+    public string Name => "disk";
+
+    public async Task<float[]?[]> GetAsync(IReadOnlyList<string> keys, CancellationToken cancellationToken)
+    {
+        var result = new float[]?[keys.Count];
+        for (int i = 0; i < keys.Count; i++)
+        {
+            string path = this.GetPath(keys[i]);
+            if (!File.Exists(path)) { continue; }
+
+            try
+            {
+                result[i] = EmbeddingCache.FromBytes(await File.ReadAllBytesAsync(path, cancellationToken).ConfigureAwait(false));
+            }
+            catch (Exception e) when (e is IOException or UnauthorizedAccessException)
+            {
+                this._log.LogWarning(e, "Unable to read embedding from {Path}", path);
+            }
+        }
+
+        return result;
+    }
+
+    public async Task SetAsync(IReadOnlyList<(string key, float[] vector)> entries, CancellationToken cancellationToken)
+    {
+        foreach ((string key, float[] vector) in entries)
+        {
+            string path = this.GetPath(key);
+            string tmpPath = $"{path}.{Guid.NewGuid():N}.tmp";
+            try
+            {
+                Directory.CreateDirectory(Path.GetDirectoryName(path)!);
+
+                // Write and rename, so that concurrent readers never see partial files
+                await File.WriteAllBytesAsync(tmpPath, EmbeddingCache.ToBytes(vector), cancellationToken).ConfigureAwait(false);
+                File.Move(tmpPath, path, overwrite: true);
+            }
+            catch (Exception e) when (e is IOException or UnauthorizedAccessException)
+            {
+                this._log.LogWarning(e, "Unable to store embedding in {Path}", path);
+                if (File.Exists(tmpPath)) { File.Delete(tmpPath); }
+            }
+        }
+    }
+
+    private string GetPath(string key)
+    {
+        return Path.Combine(this._directory, key[..2], key);
+    }
+}
@@ -0,0 +1,180 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Diagnostics.Metrics;
+using System.Runtime.InteropServices;
+using System.Security.Cryptography;
+using System.Text;
+using EmbeddingGenerator.Config;
+using Microsoft.Extensions.Logging.Abstractions;
+
+namespace EmbeddingGenerator.Cache;
+
+/// <summary>
+/// Cache of embeddings, keyed by model, number of dimensions and a hash of the text, so that
+/// text already embedded, e.g. boilerplate and re-ingested documents, is not sent to the model again.
+/// Embeddings are kept in memory, least recently used first out, and optionally in a second tier
+/// (disk or Redis), surviving restarts. Embeddings don't change, so entries don't expire in memory.
+/// Vectors are shared by all the callers and must not be modified.
+/// </summary>
+internal sealed class EmbeddingCache : IDisposable
+{
+    public const string MeterName = "EmbeddingGenerator.EmbeddingCache";
+
+    private readonly int _capacity;
+    private readonly IEmbeddingCacheTier? _tier;
+    private readonly Dictionary<string, LinkedListNode<(string key, float[] vector)>> _index;
+    private readonly LinkedList<(string key, float[] vector)> _lru = new();
+    private readonly object _lock = new();
+    private readonly ILogger<EmbeddingCache> _log;
+    private readonly Meter _meter;
+    private readonly Counter<long> _hitCounter;
+    private readonly Counter<long> _missCounter;
+
+    public EmbeddingCache(
+        EmbeddingCacheConfig config,
+        IEmbeddingCacheTier? tier = null,
+        ILoggerFactory? loggerFactory = null)
+    {
+        this._capacity = config.MemoryCacheSize;
+        this._tier = tier;
+        this._index = new Dictionary<string, LinkedListNode<(string, float[])>>(StringComparer.Ordinal);
+        this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<EmbeddingCache>();
+
+        this._meter = new Meter(MeterName);
+        this._hitCounter = this._meter.CreateCounter<long>("embedding_generator.cache.hits", description: "Embeddings found in cache, by tier");
+        this._missCounter = this._meter.CreateCounter<long>("embedding_generator.cache.misses", description: "Embeddings not found in cache");
+        this._meter.CreateObservableGauge("embedding_generator.cache.size", () => this.Count, description: "Number of embeddings in memory");
+    }
+
+    public int Count
+    {
+        get
+        {
+            lock (this._lock) { return this._index.Count; }
+        }
+    }
+
+    /// <summary>
+    /// Calculate the cache key of an embedding.
+    /// </summary>
+    /// <param name="model">Model identity, e.g. provider, endpoint and model or deployment name</param>
+    /// <param name="dimensions">Number of dimensions requested, zero for the model default</param>
+    /// <param name="text">Text to embed</param>
+    public static string GetKey(string model, int dimensions, string text)
+    {
+        using var hash = IncrementalHash.CreateHash(HashAlgorithmName.SHA256);
+        hash.AppendData(Encoding.UTF8.GetBytes($"{model}\n{dimensions}\n"));
+        hash.AppendData(Encoding.UTF8.GetBytes(text));
+        return Convert.ToHexString(hash.GetHashAndReset());
+    }
+
+    /// <summary>
+    /// Get the embeddings of the given keys from memory or from the second tier,
+    /// returning null for the keys not found.
+    /// </summary>
+    public async Task<float[]?[]> GetAsync(IReadOnlyList<string> keys, CancellationToken cancellationToken = default)
+    {
+        var result = new float[]?[keys.Count];
+        var missing = new List<int>();
+        lock (this._lock)
+        {
+            for (int i = 0; i < keys.Count; i++)
+            {
+                if (this._index.TryGetValue(keys[i], out var node))
+                {
+                    this._lru.Remove(node);
+                    this._lru.AddFirst(node);
+                    result[i] = node.Value.vector;
+                }
+                else
+                {
+                    missing.Add(i);
+                }
+            }
+        }
+
+        if (keys.Count > missing.Count)
+        {
+            this._hitCounter.Add(keys.Count - missing.Count, new KeyValuePair<string, object?>("tier", "memory"));
+        }
+
+        if (this._tier != null && missing.Count > 0)
+        {
+            float[]?[] found = await this._tier.GetAsync(missing.Select(i => keys[i]).ToList(), cancellationToken).ConfigureAwait(false);
+            int hits = 0;
+            for (int j = 0; j < found.Length; j++)
+            {
+                if (found[j] == null) { continue; }
+
+                result[missing[j]] = found[j];
+                this.SetInMemory(keys[missing[j]], found[j]!);
+                hits++;
+            }
+
+            if (hits > 0)
+            {
+                this._hitCounter.Add(hits, new KeyValuePair<string, object?>("tier", this._tier.Name));
+                missing.RemoveAll(i => result[i] != null);
+            }
+        }
+
+        if (missing.Count > 0) { this._missCounter.Add(missing.Count); }
+
+        return result;
+    }
+
+    /// <summary>
+    /// Store embeddings in memory and in the second tier.
+    /// </summary>
+    public async Task SetAsync(IReadOnlyList<(string key, float[] vector)> entries, CancellationToken cancellationToken = default)
+    {
+        foreach ((string key, float[] vector) in entries) { this.SetInMemory(key, vector); }
+
+        if (this._tier == null || entries.Count == 0) { return; }
+
+        this._log.LogDebug("Storing {Count} embeddings in the {Tier} cache", entries.Count, this._tier.Name);
+        await this._tier.SetAsync(entries, cancellationToken).ConfigureAwait(false);
+    }
+
+    public void Dispose()
+    {
+        this._meter.Dispose();
+    }
+
+    /// <summary>
+    /// Serialize a vector as little-endian float32 values, used by the second tier.
+    /// </summary>
+    internal static byte[] ToBytes(float[] vector)
+    {
+        return MemoryMarshal.AsBytes(vector.AsSpan()).ToArray();
+    }
+
+    /// <summary>
+    /// Deserialize a vector stored with ToBytes. Returns null if the data is corrupted.
+    /// </summary>
+    internal static float[]? FromBytes(byte[] data)
+    {
+        if (data.Length == 0 || data.Length % sizeof(float) != 0) { return null; }
+
+        return MemoryMarshal.Cast<byte, float>(data).ToArray();
+    }
+
+    private void SetInMemory(string key, float[] vector)
+    {
+        if (this._capacity == 0) { return; }
+
+        lock (this._lock)
+        {
+            if (this._index.Remove(key, out var existing)) { this._lru.Remove(existing); }
+
+            if (this._index.Count >= this._capacity)
+            {
+                var last = this._lru.Last!;
+                this._lru.RemoveLast();
+                this._index.Remove(last.Value.key);
+            }
+
+            this._index[key] = this._lru.AddFirst((key, vector));
+        }
+    }
+}
@@ -0,0 +1,23 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+namespace EmbeddingGenerator.Cache;
+
+/// <summary>
+/// Second tier of the embedding cache, checked when embeddings are not found in memory.
+/// Implementations log and ignore storage errors, so that a failing tier results in cache misses
+/// rather than failed requests.
+/// </summary>
+internal interface IEmbeddingCacheTier
+{
+    /// <summary>
+    /// Name used to tag cache hits in metrics.
+    /// </summary>
+    string Name { get; }
+
+    /// <summary>
+    /// Get the embeddings of the given keys, returning null for the keys not found.
+    /// </summary>
+    Task<float[]?[]> GetAsync(IReadOnlyList<string> keys, CancellationToken cancellationToken);
+
+    Task SetAsync(IReadOnlyList<(string key, float[] vector)> entries, CancellationToken cancellationToken);
+}
@@ -0,0 +1,69 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using Microsoft.Extensions.Logging.Abstractions;
+using StackExchange.Redis;
+
+namespace EmbeddingGenerator.Cache;
+
+/// <summary>
+/// Embeddings stored in Redis as little-endian float32 values, shared by all instances.
+/// Keys are read with a single MGET and written in a single batch.
+/// </summary>
+internal sealed class RedisEmbeddingCacheTier : IEmbeddingCacheTier
+{
+    // Prefix of the Redis keys containing cached embeddings
+    private const string RedisKeyPrefix = "Embedding";
+
+    private readonly IDatabase _redis;
+    private readonly TimeSpan _ttl;
+    private readonly ILogger<RedisEmbeddingCacheTier> _log;
+
+    public RedisEmbeddingCacheTier(IDatabase redis, TimeSpan ttl, ILoggerFactory? loggerFactory = null)
+    {
+        this._redis = redis;
+        this._ttl = ttl;
+        this._log = (loggerFactory ?? NullLoggerFactory.Instance).CreateLogger<RedisEmbeddingCacheTier>();
+    }
+
+    public string Name => "redis";
+
+    public async Task<float[]?[]> GetAsync(IReadOnlyList<string> keys, CancellationToken cancellationToken)
+    {
+        var result = new float[]?[keys.Count];
+        if (keys.Count == 0) { return result; }
+
+        try
+        {
+            RedisValue[] values = await this._redis.StringGetAsync(keys.Select(x => (RedisKey)$"{RedisKeyPrefix}:{x}").ToArray()).ConfigureAwait(false);
+            for (int i = 0; i < values.Length; i++)
+            {
+                if (values[i].HasValue) { result[i] = EmbeddingCache.FromBytes((byte[])values[i]!); }
+            }
+        }
+        catch (RedisException e)
+        {
+            this._log.LogWarning(e, "Unable to read embeddings from Redis");
+        }
+
+        return result;
+    }
+
+    public async Task SetAsync(IReadOnlyList<(string key, float[] vector)> entries, CancellationToken cancellationToken)
+    {
+        if (entries.Count == 0) { return; }
+
+        try
+        {
+            IBatch batch = this._redis.CreateBatch();
+            List<Task<bool>> tasks = entries
+                .Select(x => batch.StringSetAsync($"{RedisKeyPrefix}:{x.key}", EmbeddingCache.ToBytes(x.vector), this._ttl))
+                .ToList();
+            batch.Execute();
+            await Task.WhenAll(tasks).ConfigureAwait(false);
+        }
+        catch (RedisException e)
+        {
+            this._log.LogWarning(e, "Unable to store embeddings in Redis");
+        }
+    }
+}
@@ -7,6 +7,8 @@ internal abstract class AIModelConfig
     public int MaxDimensions { get; set; } = 1536;
     public bool SupportsCustomDimensions { get; set; } = false;
     public int MaxBatchSize { get; set; } = 1;
+    public int MaxBatchTokens { get; set; } = 100000;
+    public int MaxConcurrentBatches { get; set; } = 4;
     public string Tokenizer { get; set; } = string.Empty; // Not used yet
     public int MaxInputTokens { get; set; } = 8191; // Not used yet
 }
@@ -10,6 +10,7 @@ internal sealed class AppConfig : IValidatableObject
 {
     public OpenAIModelProviderConfig OpenAI { get; set; } = new();
     public AzureAIModelProviderConfig AzureAI { get; set; } = new();
+    public EmbeddingCacheConfig Cache { get; set; } = new();
 
     public Dictionary<string, ModelInfo> GetModelsInfo()
     {
@@ -64,7 +65,7 @@ internal sealed class AppConfig : IValidatableObject
 
     public IEnumerable<ValidationResult> Validate(ValidationContext validationContext)
     {
-        foreach (var x in this.OpenAI.Validate(null!).Concat(this.AzureAI.Validate(null!)))
+        foreach (var x in this.OpenAI.Validate(null!).Concat(this.AzureAI.Validate(null!)).Concat(this.Cache.Validate(null!)))
         {
             yield return x;
         }
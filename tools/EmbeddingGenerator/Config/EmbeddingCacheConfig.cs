@@ -0,0 +1,60 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.ComponentModel.DataAnnotations;
+
+namespace EmbeddingGenerator.Config;
+
+internal sealed class EmbeddingCacheConfig : IValidatableObject
+{
+    public enum CacheTiers
+    {
+        // Embeddings cached only in memory
+        None,
+
+        // Embeddings cached also on the local file system, surviving restarts
+        Disk,
+
+        // Embeddings cached also in Redis ("redisstorage"), shared by all instances
+        Redis,
+    }
+
+    /// <summary>
+    /// Max number of embeddings kept in memory, least recently used first out.
+    /// Zero to use only the second tier, if any.
+    /// </summary>
+    public int MemoryCacheSize { get; set; } = 10000;
+
+    /// <summary>
+    /// Optional second cache tier, checked when an embedding is not found in memory.
+    /// </summary>
+    public CacheTiers Tier { get; set; } = CacheTiers.None;
+
+    /// <summary>
+    /// Directory where embeddings are stored when using the Disk tier, one file per embedding.
+    /// Relative paths are relative to the current directory.
+    /// </summary>
+    public string DiskDirectory { get; set; } = "data/embeddings";
+
+    /// <summary>
+    /// Number of seconds embeddings are kept in Redis when using the Redis tier.
+    /// </summary>
+    public double RedisTtlSecs { get; set; } = 30 * 24 * 3600;
+
+    public IEnumerable<ValidationResult> Validate(ValidationContext validationContext)
+    {
+        if (this.MemoryCacheSize < 0)
+        {
+            yield return new ValidationResult("The embedding cache MemoryCacheSize cannot be negative", [nameof(this.MemoryCacheSize)]);
+        }
+
+        if (this.Tier == CacheTiers.Disk && string.IsNullOrWhiteSpace(this.DiskDirectory))
+        {
+            yield return new ValidationResult("The embedding cache DiskDirectory is required when using the Disk tier", [nameof(this.DiskDirectory)]);
+        }
+
+        if (this.Tier == CacheTiers.Redis && this.RedisTtlSecs <= 0)
+        {
+            yield return new ValidationResult("The embedding cache RedisTtlSecs must be greater than zero", [nameof(this.RedisTtlSecs)]);
+        }
+    }
+}
@@ -16,6 +16,11 @@ internal sealed class OpenAIModelConfig : AIModelConfig, IValidatableObject
         {
             this.MaxBatchSize = 1;
         }
+
+        if (this.MaxConcurrentBatches < 1)
+        {
+            this.MaxConcurrentBatches = 1;
+        }
     }
 
     public IEnumerable<ValidationResult> Validate(ValidationContext validationContext)
@@ -31,5 +36,10 @@ internal sealed class OpenAIModelConfig : AIModelConfig, IValidatableObject
         {
             yield return new ValidationResult("The embedding max dimensions cannot be less than 1", [nameof(this.MaxDimensions)]);
         }
+
+        if (this.MaxBatchTokens < 1)
+        {
+            yield return new ValidationResult("The max tokens per batch cannot be less than 1", [nameof(this.MaxBatchTokens)]);
+        }
     }
 }
@@ -1,6 +1,7 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
 using CommonDotNet.Models;
+using EmbeddingGenerator.Cache;
 using EmbeddingGenerator.Client;
 using EmbeddingGenerator.Config;
 using Microsoft.Extensions.Logging.Abstractions;
@@ -9,11 +10,13 @@ namespace EmbeddingGenerator.Functions;
 
 internal sealed class CustomEmbeddingFunction
 {
+    private readonly EmbeddingCache _cache;
     private readonly ILogger<CustomEmbeddingFunction> _log;
     private readonly ILoggerFactory _loggerFactory;
 
-    public CustomEmbeddingFunction(AppConfig appConfig, ILoggerFactory? loggerFactory = null)
+    public CustomEmbeddingFunction(AppConfig appConfig, EmbeddingCache cache, ILoggerFactory? loggerFactory = null)
     {
+        this._cache = cache;
         this._loggerFactory = loggerFactory ?? NullLoggerFactory.Instance;
         this._log = this._loggerFactory.CreateLogger<CustomEmbeddingFunction>();
     }
@@ -25,13 +28,20 @@ internal sealed class CustomEmbeddingFunction
         if (!req.FixState().IsValid(out var errMsg)) { return Results.BadRequest(errMsg); }
 
         var client = ClientFactory.GetEmbeddingClient(req, this._loggerFactory);
+        string cacheModel = $"{req.Provider:G}\n{req.Endpoint}\n{req.Model ?? req.Deployment}";
 
         return await EmbeddingFunctionBase.InvokeAsync(
             client,
+            this._cache,
+            cacheModel,
             req.Input,
             req.Inputs,
             req.SupportsCustomDimensions,
             req.Dimensions,
+            req.Encoding,
+            req.MaxBatchSize,
+            req.MaxBatchTokens,
+            req.MaxConcurrentBatches,
             cancellationToken).ConfigureAwait(false);
     }
 }
@@ -2,6 +2,7 @@
 
 using System.ComponentModel.DataAnnotations;
 using System.Text.Json.Serialization;
+using CommonDotNet.Embeddings;
 using EmbeddingGenerator.Models;
 
 namespace EmbeddingGenerator.Functions;
@@ -56,12 +57,26 @@ internal sealed class CustomEmbeddingRequest : IValidatableObject
     [JsonPropertyOrder(13)]
     public int? Dimensions { get; set; }
 
+    // Format of the embeddings in the response: "float" (list of numbers), "base64", "base64-float16", "base64-int8"
+    [JsonPropertyName("encoding")]
+    [JsonPropertyOrder(14)]
+    public EmbeddingEncodings Encoding { get; set; } = EmbeddingEncodings.Float;
+
     [JsonPropertyName("maxDimensions")]
     public int MaxDimensions { get; set; } = 1536;
 
     [JsonPropertyName("supportsCustomDimensions")]
     public bool SupportsCustomDimensions { get; set; } = false;
 
+    [JsonPropertyName("maxBatchSize")]
+    public int MaxBatchSize { get; set; } = 2048;
+
+    [JsonPropertyName("maxBatchTokens")]
+    public int MaxBatchTokens { get; set; } = 100000;
+
+    [JsonPropertyName("maxConcurrentBatches")]
+    public int MaxConcurrentBatches { get; set; } = 4;
+
     public CustomEmbeddingRequest FixState()
     {
         if (string.IsNullOrWhiteSpace(this.ApiKey)) { this.ApiKey = string.Empty; }
@@ -72,6 +87,12 @@ internal sealed class CustomEmbeddingRequest : IValidatableObject
 
         this.Endpoint = this.Endpoint.Trim();
 
+        if (this.MaxBatchSize < 1) { this.MaxBatchSize = 1; }
+
+        if (this.MaxBatchTokens < 1) { this.MaxBatchTokens = 1; }
+
+        if (this.MaxConcurrentBatches < 1) { this.MaxConcurrentBatches = 1; }
+
         return this;
     }
 
@@ -90,6 +111,11 @@ internal sealed class CustomEmbeddingRequest : IValidatableObject
             yield return new ValidationResult($"Both {nameof(this.Input)} and {nameof(this.Inputs)} are provided, only one is allowed, specifying either a single value or a list of values", [nameof(this.Input), nameof(this.Inputs)]);
         }
 
+        if (!Enum.IsDefined(this.Encoding))
+        {
+            yield return new ValidationResult($"The encoding '{this.Encoding}' is not valid", [nameof(this.Encoding)]);
+        }
+
         if (!Enum.IsDefined(typeof(AuthTypes), this.Auth))
         {
             yield return new ValidationResult($"The auth type '{this.Auth}' is not valid", [nameof(this.Auth)]);
@@ -1,6 +1,7 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
 using CommonDotNet.Models;
+using EmbeddingGenerator.Cache;
 using EmbeddingGenerator.Client;
 using EmbeddingGenerator.Config;
 using Microsoft.Extensions.Logging.Abstractions;
@@ -11,12 +12,14 @@ namespace EmbeddingGenerator.Functions;
 internal sealed class EmbeddingFunction
 {
     private readonly AppConfig _appConfig;
+    private readonly EmbeddingCache _cache;
     private readonly ILogger<EmbeddingFunction> _log;
     private readonly ILoggerFactory _loggerFactory;
 
-    public EmbeddingFunction(AppConfig appConfig, ILoggerFactory? loggerFactory = null)
+    public EmbeddingFunction(AppConfig appConfig, EmbeddingCache cache, ILoggerFactory? loggerFactory = null)
     {
         this._appConfig = appConfig;
+        this._cache = cache;
         this._loggerFactory = loggerFactory ?? NullLoggerFactory.Instance;
         this._log = this._loggerFactory.CreateLogger<EmbeddingFunction>();
     }
@@ -37,16 +40,21 @@ internal sealed class EmbeddingFunction
 
         EmbeddingClient client;
         AIModelConfig modelSettings;
+        string cacheModel;
         switch (model.Provider)
         {
             case ModelInfo.ModelProviders.OpenAI:
-                modelSettings = this._appConfig.OpenAI.GetModelById(req.ModelId);
-                client = ClientFactory.GetEmbeddingClient((OpenAIModelConfig)modelSettings, this._loggerFactory);
+                var openAIModel = this._appConfig.OpenAI.GetModelById(req.ModelId);
+                modelSettings = openAIModel;
+                cacheModel = $"{model.Provider:G}\n{openAIModel.Endpoint}\n{openAIModel.Model}";
+                client = ClientFactory.GetEmbeddingClient(openAIModel, this._loggerFactory);
                 break;
 
             case ModelInfo.ModelProviders.AzureAI:
-                modelSettings = this._appConfig.AzureAI.GetModelById(req.ModelId);
-                client = ClientFactory.GetEmbeddingClient((AzureAIDeploymentConfig)modelSettings, this._loggerFactory);
+                var azureAIDeployment = this._appConfig.AzureAI.GetModelById(req.ModelId);
+                modelSettings = azureAIDeployment;
+                cacheModel = $"{model.Provider:G}\n{azureAIDeployment.Endpoint}\n{azureAIDeployment.Deployment}";
+                client = ClientFactory.GetEmbeddingClient(azureAIDeployment, this._loggerFactory);
                 break;
 
             default:
@@ -55,10 +63,16 @@ internal sealed class EmbeddingFunction
 
         return await EmbeddingFunctionBase.InvokeAsync(
             client,
+            this._cache,
+            cacheModel,
             req.Input,
             req.Inputs,
             modelSettings.SupportsCustomDimensions,
             req.Dimensions,
+            req.Encoding,
+            modelSettings.MaxBatchSize,
+            modelSettings.MaxBatchTokens,
+            modelSettings.MaxConcurrentBatches,
             cancellationToken).ConfigureAwait(false);
     }
 }
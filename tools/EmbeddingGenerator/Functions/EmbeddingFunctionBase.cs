@@ -1,58 +1,176 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
 using System.ClientModel;
+using CommonDotNet.Embeddings;
+using EmbeddingGenerator.Cache;
 using OpenAI.Embeddings;
 
 namespace EmbeddingGenerator.Functions;
 
 internal static class EmbeddingFunctionBase
 {
+    // Rough number of chars per token, used to estimate the size of batches without a tokenizer.
+    // The value is lower than the average of English text (~4), so the estimate errs on the large side.
+    private const int CharsPerToken = 3;
+
+    /// <summary>
+    /// Generate the embeddings of the input strings, splitting the list in batches, by number of strings
+    /// and by estimated number of tokens, and sending multiple batches concurrently. Embeddings are
+    /// returned in the same order of the input strings, and token usage is the sum of all batches.
+    /// Embeddings are returned as lists of numbers, or as strings when using a compact encoding.
+    /// Identical strings are sent only once, and strings found in cache are not sent at all. The cache
+    /// is keyed by cacheModel (e.g. provider, endpoint and model name), dimensions and text.
+    /// </summary>
     public static async Task<IResult> InvokeAsync(
         EmbeddingClient client,
+        EmbeddingCache cache,
+        string cacheModel,
         string? input,
         List<string>? inputs,
         bool supportsCustomDimensions,
         int? dimensions,
+        EmbeddingEncodings encoding,
+        int maxBatchSize,
+        int maxBatchTokens,
+        int maxConcurrentBatches,
         CancellationToken cancellationToken)
     {
-        var result = new EmbeddingResponse();
         EmbeddingGenerationOptions options = new();
         if (supportsCustomDimensions && dimensions is > 0)
         {
             options.Dimensions = dimensions;
         }
 
-        var strings = (input != null) ? [input] : inputs;
+        List<string> inputStrings = (input != null) ? [input] : inputs!;
+
+        // Map each input to a distinct string, so that duplicates are embedded once
+        var distinctIndex = new Dictionary<string, int>(StringComparer.Ordinal);
+        var distinctStrings = new List<string>();
+        var positions = new int[inputStrings.Count];
+        for (int i = 0; i < inputStrings.Count; i++)
+        {
+            if (!distinctIndex.TryGetValue(inputStrings[i], out int position))
+            {
+                position = distinctStrings.Count;
+                distinctIndex[inputStrings[i]] = position;
+                distinctStrings.Add(inputStrings[i]);
+            }
+
+            positions[i] = position;
+        }
+
+        // Look up the distinct strings in cache, only the misses are sent to the model
+        List<string> keys = distinctStrings.Select(x => EmbeddingCache.GetKey(cacheModel, options.Dimensions ?? 0, x)).ToList();
+        float[]?[] vectors = await cache.GetAsync(keys, cancellationToken).ConfigureAwait(false);
+        List<int> misses = Enumerable.Range(0, vectors.Length).Where(i => vectors[i] == null).ToList();
+        List<string> strings = misses.Select(i => distinctStrings[i]).ToList();
+
+        int inputTokenCount = 0;
+        int totalTokenCount = 0;
+        int failedStatus = 0;
+
+        // When a batch fails, the other batches are cancelled
+        using var failureCts = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+        var parallelOptions = new ParallelOptions { MaxDegreeOfParallelism = maxConcurrentBatches, CancellationToken = failureCts.Token };
+        try
+        {
+            await Parallel.ForEachAsync(GetBatches(strings, maxBatchSize, maxBatchTokens), parallelOptions, async (batch, ct) =>
+            {
+                ClientResult<OpenAIEmbeddingCollection>? embeddings = await client
+                    .GenerateEmbeddingsAsync(strings.GetRange(batch.start, batch.count), options, ct).ConfigureAwait(false);
+
+                int status = embeddings?.GetRawResponse().Status ?? 0;
+                if (embeddings == null || status is < 200 or > 299)
+                {
+                    Interlocked.CompareExchange(ref failedStatus, status == 0 ? -1 : status, 0);
+                    await failureCts.CancelAsync().ConfigureAwait(false);
+                    return;
+                }
+
+                foreach (OpenAIEmbedding e in embeddings.Value)
+                {
+                    vectors[misses[batch.start + e.Index]] = e.ToFloats().ToArray();
+                }
+
+                Interlocked.Add(ref inputTokenCount, embeddings.Value.Usage.InputTokenCount);
+                Interlocked.Add(ref totalTokenCount, embeddings.Value.Usage.TotalTokenCount);
+            }).ConfigureAwait(false);
+        }
+        catch (OperationCanceledException) when (failedStatus != 0 && !cancellationToken.IsCancellationRequested)
+        {
+            // A batch failed, handled below
+        }
 
-        ClientResult<OpenAIEmbeddingCollection>? embeddings = await client
-            .GenerateEmbeddingsAsync(strings, options, cancellationToken).ConfigureAwait(false);
-        if (embeddings == null)
+        if (failedStatus == -1)
         {
             return Results.BadRequest("The embedding generation failed");
         }
 
-        var status = embeddings.GetRawResponse().Status;
-        if (status is < 200 or > 299)
+        if (failedStatus != 0)
         {
-            return Results.BadRequest($"The embedding generation failed with status code {status}");
+            return Results.BadRequest($"The embedding generation failed with status code {failedStatus}");
         }
 
-        if (input != null)
+        await cache.SetAsync(misses.Select(i => (keys[i], vectors[i]!)).ToList(), cancellationToken).ConfigureAwait(false);
+
+        int cacheHits = distinctStrings.Count - misses.Count;
+        int duplicates = inputStrings.Count - distinctStrings.Count;
+
+        if (encoding != EmbeddingEncodings.Float)
         {
-            result.Embedding = embeddings.Value[0].ToFloats().ToArray();
+            // Duplicates are encoded once
+            string[] encodedVectors = vectors.Select(x => EmbeddingEncoding.Encode(x!, encoding)).ToArray();
+            return Results.Ok(new EncodedEmbeddingResponse
+            {
+                InputTokenCount = inputTokenCount,
+                TotalTokenCount = totalTokenCount,
+                CacheHits = cacheHits,
+                Duplicates = duplicates,
+                Embedding = input != null ? encodedVectors[0] : null,
+                Embeddings = input != null ? null : positions.Select(x => encodedVectors[x]).ToList(),
+            });
         }
-        else
+
+        return Results.Ok(new EmbeddingResponse
         {
-            result.Embeddings = [];
-            foreach (var e in embeddings.Value)
+            InputTokenCount = inputTokenCount,
+            TotalTokenCount = totalTokenCount,
+            CacheHits = cacheHits,
+            Duplicates = duplicates,
+            Embedding = input != null ? vectors[0] : null,
+            Embeddings = input != null ? null : positions.Select(x => vectors[x]!).ToList(),
+        });
+    }
+
+    /// <summary>
+    /// Split the list of strings in consecutive batches, each one with at most maxBatchSize strings and
+    /// maxBatchTokens estimated tokens. A string larger than maxBatchTokens is sent in a batch on its own.
+    /// </summary>
+    internal static List<(int start, int count)> GetBatches(List<string> strings, int maxBatchSize, int maxBatchTokens)
+    {
+        var batches = new List<(int start, int count)>();
+        int start = 0;
+        int tokens = 0;
+        for (int i = 0; i < strings.Count; i++)
+        {
+            int count = EstimateTokenCount(strings[i]);
+            if (i > start && (i - start >= maxBatchSize || tokens + count > maxBatchTokens))
             {
-                result.Embeddings.Add(e.ToFloats().ToArray());
+                batches.Add((start, i - start));
+                start = i;
+                tokens = 0;
             }
+
+            tokens += count;
         }
 
-        result.InputTokenCount = embeddings.Value.Usage.InputTokenCount;
-        result.TotalTokenCount = embeddings.Value.Usage.TotalTokenCount;
+        if (strings.Count > start) { batches.Add((start, strings.Count - start)); }
 
-        return Results.Ok(result);
+        return batches;
+    }
+
+    private static int EstimateTokenCount(string text)
+    {
+        return (text.Length + CharsPerToken - 1) / CharsPerToken;
     }
 }
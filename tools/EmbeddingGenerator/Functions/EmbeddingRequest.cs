@@ -2,6 +2,7 @@
 
 using System.ComponentModel.DataAnnotations;
 using System.Text.Json.Serialization;
+using CommonDotNet.Embeddings;
 
 namespace EmbeddingGenerator.Functions;
 
@@ -25,6 +26,11 @@ internal sealed class EmbeddingRequest : IValidatableObject
     [JsonPropertyOrder(13)]
     public int? Dimensions { get; set; }
 
+    // Format of the embeddings in the response: "float" (list of numbers), "base64", "base64-float16", "base64-int8"
+    [JsonPropertyName("encoding")]
+    [JsonPropertyOrder(14)]
+    public EmbeddingEncodings Encoding { get; set; } = EmbeddingEncodings.Float;
+
     // [JsonPropertyName("cache")]
     // [JsonPropertyOrder(30)]
     // public bool Cache { get; set; } = true;
@@ -63,5 +69,10 @@ internal sealed class EmbeddingRequest : IValidatableObject
         {
             yield return new ValidationResult($"Both {nameof(this.Input)} and {nameof(this.Inputs)} are provided, only one is allowed, specifying either a single value or a list of values", [nameof(this.Input), nameof(this.Inputs)]);
         }
+
+        if (!Enum.IsDefined(this.Encoding))
+        {
+            yield return new ValidationResult($"The encoding '{this.Encoding}' is not valid", [nameof(this.Encoding)]);
+        }
     }
 }
@@ -14,6 +14,16 @@ public class EmbeddingResponse
     [JsonPropertyOrder(2)]
     public int TotalTokenCount { get; set; } = 0;
 
+    // Number of distinct inputs found in cache, not sent to the model
+    [JsonPropertyName("cacheHits")]
+    [JsonPropertyOrder(3)]
+    public int CacheHits { get; set; } = 0;
+
+    // Number of inputs identical to a previous input in the same request, not sent to the model
+    [JsonPropertyName("duplicates")]
+    [JsonPropertyOrder(4)]
+    public int Duplicates { get; set; } = 0;
+
     [JsonPropertyName("embedding")]
     [JsonPropertyOrder(10)]
     [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
@@ -0,0 +1,39 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace EmbeddingGenerator.Functions;
+
+/// <summary>
+/// Response returned when embeddings are requested with a compact encoding, see CommonDotNet.Embeddings.EmbeddingEncoding
+/// </summary>
+public class EncodedEmbeddingResponse
+{
+    [JsonPropertyName("promptTokens")]
+    [JsonPropertyOrder(1)]
+    public int InputTokenCount { get; set; } = 0;
+
+    [JsonPropertyName("totalTokens")]
+    [JsonPropertyOrder(2)]
+    public int TotalTokenCount { get; set; } = 0;
+
+    // Number of distinct inputs found in cache, not sent to the model
+    [JsonPropertyName("cacheHits")]
+    [JsonPropertyOrder(3)]
+    public int CacheHits { get; set; } = 0;
+
+    // Number of inputs identical to a previous input in the same request, not sent to the model
+    [JsonPropertyName("duplicates")]
+    [JsonPropertyOrder(4)]
+    public int Duplicates { get; set; } = 0;
+
+    [JsonPropertyName("embedding")]
+    [JsonPropertyOrder(10)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public string? Embedding { get; set; }
+
+    [JsonPropertyName("embeddings")]
+    [JsonPropertyOrder(11)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public List<string>? Embeddings { get; set; }
+}
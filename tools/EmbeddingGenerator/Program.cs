@@ -5,6 +5,7 @@ using CommonDotNet.Http;
 using CommonDotNet.Models;
 using CommonDotNet.OpenApi;
 using CommonDotNet.ServiceDiscovery;
+using EmbeddingGenerator.Cache;
 using EmbeddingGenerator.Config;
 using EmbeddingGenerator.Functions;
 
@@ -20,7 +21,9 @@ internal static class Program
         builder.AddRedisToolsRegistry();
         builder.Services.AddOpenApi();
         builder.Services.ConfigureSerializationOptions();
-        builder.Services.AddSingleton(builder.Configuration.GetSection("App").Get<AppConfig>().EnsureValid());
+        var appConfig = builder.Configuration.GetSection("App").Get<AppConfig>().EnsureValid();
+        builder.Services.AddSingleton(appConfig);
+        builder.AddEmbeddingCache(appConfig.Cache);
         builder.Services.AddScoped<EmbeddingFunction>();
         builder.Services.AddScoped<CustomEmbeddingFunction>();
 
@@ -28,9 +31,6 @@ internal static class Program
         var app = builder.Build();
         app.AddOpenApiDevTools();
 
-        // Dependencies
-        var appConfig = app.Services.GetService<AppConfig>()!;
-
         // Register endpoints
         var registry = app.Services.GetService<ToolRegistry>();
         if (registry == null) { app.Logger.LogWarning("Tool registry not available, skipping functions registration"); }
@@ -1,6 +1,8 @@
 // Copyright (c) Microsoft. All rights reserved.
 
+using System.Runtime.CompilerServices;
 using System.Text;
+using System.Threading.Channels;
 using Extractor.Models;
 using Microsoft.KernelMemory.DataFormats;
 using Microsoft.KernelMemory.DataFormats.Office;
@@ -8,11 +10,22 @@ using Microsoft.KernelMemory.DataFormats.Pdf;
 using Microsoft.KernelMemory.DataFormats.Text;
 using Microsoft.KernelMemory.DataFormats.WebPages;
 using Microsoft.KernelMemory.Pipeline;
+using UglyToad.PdfPig;
+using UglyToad.PdfPig.Content;
+using UglyToad.PdfPig.DocumentLayoutAnalysis.TextExtractor;
 
 namespace Extractor;
 
 internal sealed class Extractor
 {
+    // Min number of pages per thread when extracting PDF pages in parallel, so small files
+    // are not opened multiple times for no benefit.
+    private const int MinPagesPerWorker = 8;
+
+    // Dedicated threads extracting PDF pages, shared by all the requests, so that concurrent requests
+    // don't start more CPU bound threads than the available cores. See ExtractPdfPagesAsync.
+    private static readonly SemaphoreSlim s_pdfThreads = new(Environment.ProcessorCount, Environment.ProcessorCount);
+
     private readonly List<IContentDecoder> _decoders;
 
     public Extractor()
@@ -39,15 +52,123 @@ internal sealed class Extractor
             Size = file.Size
         };
 
-        if (string.IsNullOrWhiteSpace(file.MimeType)) { return result; }
+        var fullText = new StringBuilder();
+        await foreach (ExtractedSection section in this.ExtractSectionsAsync(file, Environment.ProcessorCount, cancellationToken).ConfigureAwait(false))
+        {
+            fullText.Append(section.Content);
+            result.Sections.Add(section);
+        }
+
+        result.FullText = fullText.ToString();
+        return result;
+    }
+
+    /// <summary>
+    /// Extract the sections of multiple files, processing files in parallel. Sections are returned
+    /// as soon as they are ready, so sections of different files are interleaved, while the sections
+    /// of each file are in order. A file that can't be processed, including files with an error set
+    /// when preparing the request, returns an error, without stopping the other files.
+    /// </summary>
+    public async IAsyncEnumerable<ExtractStreamItem> ExtractManyAsync(
+        IReadOnlyList<FileToProcess> files,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        // Share the cores between the files processed at the same time
+        int maxParallelism = Environment.ProcessorCount;
+        int pageParallelism = Math.Max(1, maxParallelism / Math.Clamp(files.Count, 1, maxParallelism));
+
+        // Bounded, so that files are not decoded much faster than the client reads the response
+        var results = Channel.CreateBounded<ExtractStreamItem>(new BoundedChannelOptions(1000) { SingleReader = true });
+        var options = new ParallelOptions { MaxDegreeOfParallelism = maxParallelism, CancellationToken = cancellationToken };
+
+        Task producer = Task.Run(async () =>
+        {
+            try
+            {
+                await Parallel.ForEachAsync(Enumerable.Range(0, files.Count), options, async (index, ct) =>
+                {
+                    FileToProcess file = files[index];
+                    int sectionIndex = 0;
+                    string? error = file.Error;
+                    try
+                    {
+                        if (error == null)
+                        {
+                            await foreach (ExtractedSection section in this.ExtractSectionsAsync(file, pageParallelism, ct).ConfigureAwait(false))
+                            {
+                                var item = new ExtractStreamItem
+                                {
+                                    File = index, FileName = file.FileName, Section = sectionIndex++, Content = section.Content, Metadata = section.Metadata
+                                };
+                                await results.Writer.WriteAsync(item, ct).ConfigureAwait(false);
+                            }
+                        }
+                    }
+#pragma warning disable CA1031 // a failing file must not stop the rest of the batch
+                    catch (Exception e) when (e is not OperationCanceledException)
+                    {
+                        error = e.Message;
+                    }
+#pragma warning restore CA1031
+
+                    if (error != null)
+                    {
+                        var item = new ExtractStreamItem { File = index, FileName = file.FileName, Section = sectionIndex, Error = error };
+                        await results.Writer.WriteAsync(item, ct).ConfigureAwait(false);
+                    }
+                }).ConfigureAwait(false);
+
+                results.Writer.TryComplete();
+            }
+#pragma warning disable CA1031 // the exception is forwarded to the reader
+            catch (Exception e)
+            {
+                results.Writer.TryComplete(e);
+            }
+#pragma warning restore CA1031
+        }, cancellationToken);
+
+        try
+        {
+            await foreach (ExtractStreamItem item in results.Reader.ReadAllAsync(cancellationToken).ConfigureAwait(false))
+            {
+                yield return item;
+            }
+        }
+        finally
+        {
+            // If the caller stops reading, unblock and stop the producer
+            results.Writer.TryComplete();
+            await producer.ConfigureAwait(false);
+        }
+    }
+
+    /// <summary>
+    /// Extract the sections of a file, in order. PDF pages are extracted in parallel, using up to
+    /// maxParallelism threads, and each page is returned as soon as it's ready and all the previous
+    /// pages have been returned. Other formats are decoded in one step.
+    /// </summary>
+    public async IAsyncEnumerable<ExtractedSection> ExtractSectionsAsync(
+        FileToProcess file,
+        int maxParallelism,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        if (string.IsNullOrWhiteSpace(file.MimeType)) { yield break; }
 
         switch (file.MimeType)
         {
             case MimeTypes.PlainText:
             case MimeTypes.Json:
-                result.Sections = [new ExtractedSection { Content = file.Content.ToString() }];
-                result.FullText = file.Content.ToString();
-                return result;
+                yield return new ExtractedSection { Content = file.Content.ToString() };
+                break;
+
+            case MimeTypes.Pdf:
+                await foreach (Chunk chunk in ExtractPdfPagesAsync(file.Content.ToArray(), maxParallelism, cancellationToken).ConfigureAwait(false))
+                {
+                    yield return ToSection(chunk);
+                }
+
+                break;
 
             default:
                 var decoder = this._decoders.LastOrDefault(d => d.SupportsMimeType(file.MimeType));
@@ -56,27 +177,121 @@ internal sealed class Extractor
                     throw new ArgumentException("Mime type not supported", nameof(file.MimeType));
                 }
 
-                var fullText = new StringBuilder();
-                FileContent fileContent = await decoder.DecodeAsync(file.Content, cancellationToken).ConfigureAwait(false);
-
+                // Decoders are CPU bound, don't block the caller thread
+                FileContent fileContent = await Task.Run(() => decoder.DecodeAsync(file.Content, cancellationToken), cancellationToken).ConfigureAwait(false);
                 foreach (Chunk chunk in fileContent.Sections)
                 {
-                    var section = new ExtractedSection
-                    {
-                        Content = chunk.Content,
-                        Metadata = { ["PageNumber"] = chunk.PageNumber }
-                    };
-                    foreach (var meta in chunk.Metadata)
-                    {
-                        section.Metadata[meta.Key] = meta.Value;
-                    }
+                    yield return ToSection(chunk);
+                }
+
+                break;
+        }
+    }
+
+    /// <summary>
+    /// Extract the text of each PDF page, like PdfDecoder, with multiple threads. PdfPig documents
+    /// are not thread safe, so each thread opens its own copy of the document, and threads take
+    /// the next page to process from a shared counter, so pages complete roughly in order.
+    /// Small files, and files processed when all the PDF threads are busy, are extracted sequentially.
+    /// </summary>
+    private static async IAsyncEnumerable<Chunk> ExtractPdfPagesAsync(
+        byte[] data,
+        int maxParallelism,
+        [EnumeratorCancellation] CancellationToken cancellationToken)
+    {
+        int pageCount;
+        using (PdfDocument document = PdfDocument.Open(data)) { pageCount = document.NumberOfPages; }
+
+        // Take the threads available, without waiting for the other requests
+        int workerCount = Math.Clamp(pageCount / MinPagesPerWorker, 1, Math.Max(1, maxParallelism));
+        int threadCount = 0;
+        while (workerCount > 1 && threadCount < workerCount && s_pdfThreads.Wait(0)) { threadCount++; }
+
+        if (threadCount == 0)
+        {
+            using PdfDocument document = PdfDocument.Open(data);
+            for (int index = 0; index < pageCount; index++)
+            {
+                cancellationToken.ThrowIfCancellationRequested();
+                yield return ExtractPage(document, index);
+            }
+
+            yield break;
+        }
+
+        var pages = new TaskCompletionSource<Chunk>[pageCount];
+        for (int i = 0; i < pageCount; i++) { pages[i] = new TaskCompletionSource<Chunk>(TaskCreationOptions.RunContinuationsAsynchronously); }
+
+        // Stop the workers if the caller stops reading
+        using var stop = CancellationTokenSource.CreateLinkedTokenSource(cancellationToken);
+        int nextPage = -1;
+
+        void ExtractPages()
+        {
+            using PdfDocument document = PdfDocument.Open(data);
+            int index;
+            while (!stop.IsCancellationRequested && (index = Interlocked.Increment(ref nextPage)) < pageCount)
+            {
+                try
+                {
+                    pages[index].TrySetResult(ExtractPage(document, index));
+                }
+#pragma warning disable CA1031 // the exception is forwarded to the reader
+                catch (Exception e)
+                {
+                    pages[index].TrySetException(e);
+                }
+#pragma warning restore CA1031
+            }
+        }
 
-                    fullText.Append(chunk.Content);
-                    result.Sections.Add(section);
+        // Dedicated threads, so that CPU bound workers don't starve the thread pool, delaying the reader
+        Task workers = Task.WhenAll(Enumerable.Range(0, threadCount).Select(_ => Task.Factory.StartNew(
+                ExtractPages, CancellationToken.None, TaskCreationOptions.LongRunning, TaskScheduler.Default)))
+            .ContinueWith(t =>
+            {
+                // Pages not processed, because of cancellation or a worker failing to open the document
+                foreach (TaskCompletionSource<Chunk> page in pages)
+                {
+                    if (t.Exception != null) { page.TrySetException(t.Exception.InnerExceptions); }
+                    else { page.TrySetCanceled(cancellationToken); }
                 }
+            }, CancellationToken.None, TaskContinuationOptions.ExecuteSynchronously, TaskScheduler.Default);
+
+        try
+        {
+            foreach (TaskCompletionSource<Chunk> page in pages)
+            {
+                yield return await page.Task.ConfigureAwait(false);
+            }
+        }
+        finally
+        {
+            await stop.CancelAsync().ConfigureAwait(false);
+            await workers.ConfigureAwait(false);
+            s_pdfThreads.Release(threadCount);
+        }
+    }
 
-                result.FullText = fullText.ToString();
-                return result;
+    private static Chunk ExtractPage(PdfDocument document, int index)
+    {
+        Page page = document.GetPage(index + 1);
+        string content = ContentOrderTextExtractor.GetText(page) ?? string.Empty;
+        return new Chunk(content, page.Number, Chunk.Meta(sentencesAreComplete: true));
+    }
+
+    private static ExtractedSection ToSection(Chunk chunk)
+    {
+        var section = new ExtractedSection
+        {
+            Content = chunk.Content,
+            Metadata = { ["PageNumber"] = chunk.PageNumber }
+        };
+        foreach (var meta in chunk.Metadata)
+        {
+            section.Metadata[meta.Key] = meta.Value;
         }
+
+        return section;
     }
 }
@@ -1,5 +1,6 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
+using System.Text.Json;
 using Extractor.Models;
 using Microsoft.Extensions.Logging.Abstractions;
 using Microsoft.KernelMemory.Pipeline;
@@ -8,6 +9,8 @@ namespace Extractor.Functions;
 
 internal sealed class ExtractFunction
 {
+    private static readonly byte[] s_newLine = "\n"u8.ToArray();
+
     private readonly MimeTypesDetection _mimeTypeDetection;
     private readonly Extractor _extractor;
     private readonly ILogger<ExtractFunction> _log;
@@ -26,6 +29,61 @@ internal sealed class ExtractFunction
             return Results.BadRequest("The request is empty");
         }
 
+        FileToProcess file = this.ToFileToProcess(req);
+
+        return Results.Ok(await this._extractor.ExtractAsync(file, cancellationToken).ConfigureAwait(false));
+    }
+
+    /// <summary>
+    /// Extract text from multiple files, in parallel, streaming one section per NDJSON line as soon as
+    /// each section is ready, see Extractor.ExtractManyAsync.
+    /// </summary>
+    public async Task<IResult> InvokeStreamAsync(HttpContext httpContext, ExtractStreamRequest req, CancellationToken cancellationToken = default)
+    {
+        if (req == null || req.Files.Count == 0)
+        {
+            return Results.BadRequest("The request is empty");
+        }
+
+        List<FileToProcess> files;
+        try
+        {
+            files = req.Files.Select(this.ToStreamFileToProcess).ToList();
+        }
+        catch (FormatException)
+        {
+            return Results.BadRequest("The file content is not a valid base64 string");
+        }
+
+        this._log.LogDebug("Streaming sections of {Count} files", files.Count);
+
+        httpContext.Response.StatusCode = StatusCodes.Status200OK;
+        httpContext.Response.ContentType = "application/x-ndjson; charset=utf-8";
+
+        Stream body = httpContext.Response.Body;
+        await foreach (ExtractStreamItem item in this._extractor.ExtractManyAsync(files, cancellationToken).ConfigureAwait(false))
+        {
+            await JsonSerializer.SerializeAsync(body, item, cancellationToken: cancellationToken).ConfigureAwait(false);
+            await body.WriteAsync(s_newLine, cancellationToken).ConfigureAwait(false);
+            await body.FlushAsync(cancellationToken).ConfigureAwait(false);
+        }
+
+        return Results.Empty;
+    }
+
+    // A file with an unknown type is reported in the stream, without failing the other files
+    private FileToProcess ToStreamFileToProcess(ExtractRequest req)
+    {
+        if (string.IsNullOrWhiteSpace(req.MimeType) && !this._mimeTypeDetection.TryGetFileType(req.FileName, out _))
+        {
+            return new FileToProcess { FileName = req.FileName, Error = $"File type not supported: {req.FileName}" };
+        }
+
+        return this.ToFileToProcess(req);
+    }
+
+    private FileToProcess ToFileToProcess(ExtractRequest req)
+    {
         if (string.IsNullOrWhiteSpace(req.MimeType))
         {
             req.MimeType = this._mimeTypeDetection.GetFileType(req.FileName);
@@ -35,13 +93,12 @@ internal sealed class ExtractFunction
         BinaryData data = new(Convert.FromBase64String(req.Content));
 
         // Prepare file to process
-        var file = new FileToProcess
+        return new FileToProcess
         {
+            FileName = req.FileName,
             Content = data,
             MimeType = req.MimeType,
             Size = data.Length
         };
-
-        return Results.Ok(await this._extractor.ExtractAsync(file, cancellationToken).ConfigureAwait(false));
     }
 }
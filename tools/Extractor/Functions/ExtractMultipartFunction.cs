@@ -1,5 +1,6 @@
 ﻿// Copyright (c) Microsoft. All rights reserved.
 
+using System.Text.Json;
 using Extractor.Models;
 using Microsoft.Extensions.Logging.Abstractions;
 using Microsoft.KernelMemory.Pipeline;
@@ -8,6 +9,8 @@ namespace Extractor.Functions;
 
 internal sealed class ExtractMultipartFunction
 {
+    private static readonly byte[] s_newLine = "\n"u8.ToArray();
+
     private readonly MimeTypesDetection _mimeTypeDetection;
     private readonly Extractor _extractor;
     private readonly ILogger<ExtractMultipartFunction> _log;
@@ -38,8 +41,60 @@ internal sealed class ExtractMultipartFunction
                 : "Only one file can be uploaded");
         }
 
+        FileToProcess file = await this.ToFileToProcessAsync(form.Files[0]).ConfigureAwait(false);
+
+        return Results.Ok(await this._extractor.ExtractAsync(file, cancellationToken).ConfigureAwait(false));
+    }
+
+    /// <summary>
+    /// Extract text from one or more uploaded files, in parallel, streaming one section per NDJSON line
+    /// as soon as each section is ready, see Extractor.ExtractManyAsync.
+    /// </summary>
+    public async Task<IResult> InvokeStreamAsync(HttpContext httpContext, CancellationToken cancellationToken = default)
+    {
+        HttpRequest request = httpContext.Request;
+
+        if (!request.HasFormContentType)
+        {
+            throw new ArgumentException("Invalid content, multipart form data not found");
+        }
+
+        IFormCollection form = await request.ReadFormAsync(cancellationToken).ConfigureAwait(false);
+
+        if (form.Files.Count == 0)
+        {
+            return Results.BadRequest("No file was uploaded");
+        }
+
+        var files = new List<FileToProcess>(form.Files.Count);
+        foreach (IFormFile formFile in form.Files)
+        {
+            // A file with an unknown type is reported in the stream, without failing the other files
+            files.Add(this._mimeTypeDetection.TryGetFileType(formFile.FileName, out _)
+                ? await this.ToFileToProcessAsync(formFile).ConfigureAwait(false)
+                : new FileToProcess { FileName = formFile.FileName, Error = $"File type not supported: {formFile.FileName}" });
+        }
+
+        this._log.LogDebug("Streaming sections of {Count} files", files.Count);
+
+        httpContext.Response.StatusCode = StatusCodes.Status200OK;
+        httpContext.Response.ContentType = "application/x-ndjson; charset=utf-8";
+
+        Stream body = httpContext.Response.Body;
+        await foreach (ExtractStreamItem item in this._extractor.ExtractManyAsync(files, cancellationToken).ConfigureAwait(false))
+        {
+            await JsonSerializer.SerializeAsync(body, item, cancellationToken: cancellationToken).ConfigureAwait(false);
+            await body.WriteAsync(s_newLine, cancellationToken).ConfigureAwait(false);
+            await body.FlushAsync(cancellationToken).ConfigureAwait(false);
+        }
+
+        return Results.Empty;
+    }
+
+    private async Task<FileToProcess> ToFileToProcessAsync(IFormFile formFile)
+    {
         // Read file content
-        Stream s = form.Files[0].OpenReadStream();
+        Stream s = formFile.OpenReadStream();
         BinaryData data;
         await using (s.ConfigureAwait(false))
         {
@@ -47,14 +102,13 @@ internal sealed class ExtractMultipartFunction
         }
 
         // Prepare file to process
-        var file = new FileToProcess
+        return new FileToProcess
         {
+            FileName = formFile.FileName,
             Content = data,
-            MimeType = this._mimeTypeDetection.GetFileType(form.Files[0].FileName),
-            Size = form.Files[0].Length
+            MimeType = this._mimeTypeDetection.GetFileType(formFile.FileName),
+            Size = formFile.Length
         };
-
-        return Results.Ok(await this._extractor.ExtractAsync(file, cancellationToken).ConfigureAwait(false));
     }
 
     private static byte[] ReadAllBytes(Stream stream)
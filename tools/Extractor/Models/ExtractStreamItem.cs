@@ -0,0 +1,46 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace Extractor.Models;
+
+/// <summary>
+/// A section extracted from a file, streamed as a NDJSON line, see Extractor.ExtractManyAsync.
+/// </summary>
+internal sealed class ExtractStreamItem
+{
+    /// <summary>
+    /// Position of the file in the request.
+    /// </summary>
+    [JsonPropertyName("file")]
+    [JsonPropertyOrder(0)]
+    public int File { get; set; }
+
+    [JsonPropertyName("fileName")]
+    [JsonPropertyOrder(1)]
+    public string FileName { get; set; } = string.Empty;
+
+    /// <summary>
+    /// Position of the section in the file, starting from zero, e.g. one section per page for PDF files.
+    /// </summary>
+    [JsonPropertyName("section")]
+    [JsonPropertyOrder(2)]
+    public int Section { get; set; }
+
+    [JsonPropertyName("content")]
+    [JsonPropertyOrder(3)]
+    public string Content { get; set; } = string.Empty;
+
+    [JsonPropertyName("metadata")]
+    [JsonPropertyOrder(4)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public Dictionary<string, object>? Metadata { get; set; }
+
+    /// <summary>
+    /// Set when the file can't be processed, in the last line of the file.
+    /// </summary>
+    [JsonPropertyName("error")]
+    [JsonPropertyOrder(5)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public string? Error { get; set; }
+}
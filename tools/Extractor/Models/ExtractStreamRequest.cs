@@ -0,0 +1,12 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace Extractor.Models;
+
+internal sealed class ExtractStreamRequest
+{
+    [JsonPropertyName("files")]
+    [JsonPropertyOrder(0)]
+    public List<ExtractRequest> Files { get; set; } = [];
+}
@@ -4,7 +4,11 @@ namespace Extractor.Models;
 
 internal sealed class FileToProcess
 {
+    public string FileName { get; set; } = string.Empty;
     public BinaryData Content { get; set; } = new([]);
     public string MimeType { get; set; } = string.Empty;
     public long Size { get; set; } = 0;
+
+    // Set when the file can't be processed, e.g. the file type is unknown, see Extractor.ExtractManyAsync
+    public string? Error { get; set; }
 }
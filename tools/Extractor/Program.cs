@@ -59,6 +59,31 @@ internal static class Program
             .WithDescription("Extracts text from a given file, using multipart-form payload")
             .WithSummary("Extracts text from a given file, using multipart-form payload");
 
+        // Note: NDJSON endpoints are not registered in the tool registry, because the orchestrator
+        //       expects a single JSON response. Clients call them directly.
+        const string ExtractStreamFunctionName = "extract/stream";
+        app.MapPost($"/{ExtractStreamFunctionName}", Task<IResult> (
+                ExtractFunction function,
+                HttpContext httpContext,
+                ExtractStreamRequest req,
+                CancellationToken cancellationToken) => function.InvokeStreamAsync(httpContext, req, cancellationToken))
+            .Produces<ExtractStreamItem>(StatusCodes.Status200OK, "application/x-ndjson")
+            .WithName("extractStream")
+            .WithDisplayName("File content extractor (streaming)")
+            .WithDescription("Extract text from multiple files in parallel, using JSON payload, streaming one section per NDJSON line as soon as it's ready")
+            .WithSummary("Extract text from multiple files, streaming sections as NDJSON");
+
+        const string ExtractMultipartStreamFunctionName = "extract-multipart/stream";
+        app.MapPost($"/{ExtractMultipartStreamFunctionName}", Task<IResult> (
+                ExtractMultipartFunction function,
+                HttpContext httpContext,
+                CancellationToken cancellationToken) => function.InvokeStreamAsync(httpContext, cancellationToken))
+            .Produces<ExtractStreamItem>(StatusCodes.Status200OK, "application/x-ndjson")
+            .WithName("extractMultipartStream")
+            .WithDisplayName("File content extractor (streaming)")
+            .WithDescription("Extract text from multiple files in parallel, using multipart-form payload, streaming one section per NDJSON line as soon as it's ready")
+            .WithSummary("Extract text from multiple files, streaming sections as NDJSON");
+
         app.Run();
     }
 }
@@ -72,6 +72,7 @@ internal sealed class CreateCollectionFunction
                 }
                 case PostgresVectorStore:
                 case AzureAISearchVectorStore:
+                case LocalVectorStore:
                 {
                     var collection = vectorStore.GetCollection<string, MemoryRecord<string>>(req.CollectionName, recordDefinition);
                     if (failOnConflict)
@@ -77,6 +77,7 @@ internal sealed class DeleteCollectionFunction
                     break;
                 }
                 case InMemoryVectorStore:
+                case LocalVectorStore:
                 {
                     this._log.LogDebug("Preparing collection definition (for deletion)");
                     VectorStoreRecordDefinition fakeRecordDefinition = new()
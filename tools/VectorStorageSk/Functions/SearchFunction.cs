@@ -1,7 +1,9 @@
-// Copyright (c) Microsoft. All rights reserved.
+﻿// Copyright (c) Microsoft. All rights reserved.
 
+using System.Text.Json;
 using System.Text.RegularExpressions;
 using Microsoft.Extensions.Logging.Abstractions;
+using Microsoft.Extensions.Options;
 using Microsoft.Extensions.VectorData;
 using VectorStorageSk.Models;
 using VectorStorageSk.SemanticKernel;
@@ -74,27 +76,100 @@ internal sealed class SearchFunction<TKey, TRecord> where TKey : notnull
 
         try
         {
-            VectorSearchResults<TRecord> results = await this.SearchAsync(vectorStore, req, vector, null!, cancellationToken).ConfigureAwait(false);
-            if (results == null) { return Results.InternalServerError("Storage type not supported"); }
+            SearchResponse? response = await this.RunQueryAsync(vectorStore, req, vector, cancellationToken).ConfigureAwait(false);
+            if (response == null) { return Results.InternalServerError("Storage type not supported"); }
 
-            var response = new SearchResponse();
-            await foreach (VectorSearchResult<TRecord> x in results.Results.WithCancellation(cancellationToken))
-            {
-                if (x.Record == null) { continue; }
+            return Results.Ok(response);
+        }
+        catch (VectorStoreOperationException e) when (IsCollectionNotFound(e))
+        {
+            return Results.BadRequest($"Collection {req.CollectionName} not found");
+        }
+    }
 
-                response.Results.Add(new SearchResponse.SearchResult
-                {
-                    Record = x.Record,
-                    Score = x.Score is > -100000 ? x.Score.Value : 0 // workaround for JSON serialization issue
-                });
-            }
+    /// <summary>
+    /// Run multiple queries on the same collection, with the same options, returning
+    /// the results of each query in the same order of the query vectors.
+    /// A failed query doesn't stop the others, and its error is reported in the results.
+    /// </summary>
+    public async Task<IResult> InvokeBatchAsync(SearchBatchRequest req, CancellationToken cancellationToken = default)
+    {
+        this._log.LogTrace("Starting {FunctionName} batch", this.GetType().Name);
+        this._log.LogDebug("Batch search request on collection: {Collection}; storage type {StorageType}; DataType: {DataType}; PK: {PKType}; filter: {Filter}; queries: {Count}",
+            req.CollectionName, req.StorageType, req.DataType, req.PrimaryKeyType, req.Filter, req.Vectors.Count);
 
-            return Results.Ok(response);
+        if (req.Validate() is { } error) { return Results.BadRequest(error); }
+
+        (IVectorStore? vectorStore, IResult? err) = StorageLib.GetVectorStore(req.StorageType, this._sp, this._log);
+        if (err != null) { return err; }
+
+        if (vectorStore == null)
+        {
+            this._log.LogError("Unable to instantiate client for storage type {StorageType}", req.StorageType.ToString("G"));
+            return Results.InternalServerError("Unable to instantiate vector store");
+        }
+
+        var queries = new SearchResponse[req.Vectors.Count];
+        var options = new ParallelOptions { MaxDegreeOfParallelism = req.MaxConcurrentQueries, CancellationToken = cancellationToken };
+        try
+        {
+            await Parallel.ForEachAsync(Enumerable.Range(0, req.Vectors.Count), options, async (index, ct) =>
+            {
+                try
+                {
+                    queries[index] = await this.RunQueryAsync(vectorStore, req, new Embedding(req.Vectors[index]), ct).ConfigureAwait(false)
+                                     ?? new SearchResponse { Error = "Storage type not supported" };
+                }
+                catch (Exception e) when (e is VectorStoreRecordMappingException
+                                          || (e is VectorStoreOperationException operationException && !IsCollectionNotFound(operationException)))
+                {
+                    this._log.LogWarning(e, "Query {Index} failed", index);
+                    queries[index] = new SearchResponse { Error = e.Message };
+                }
+            }).ConfigureAwait(false);
         }
-        catch (VectorStoreOperationException e) when (Regex.IsMatch(e.Message, @"collection '.*' does not exist", RegexOptions.IgnoreCase))
+        catch (VectorStoreOperationException e) when (IsCollectionNotFound(e))
         {
             return Results.BadRequest($"Collection {req.CollectionName} not found");
         }
+
+        return Results.Ok(new SearchBatchResponse { Queries = [..queries] });
+    }
+
+    private async Task<SearchResponse?> RunQueryAsync(IVectorStore vectorStore, SearchRequest req, Embedding vector, CancellationToken cancellationToken)
+    {
+        VectorSearchResults<TRecord> results = await this.SearchAsync(vectorStore, req, vector, null!, cancellationToken).ConfigureAwait(false);
+        if (results == null) { return null; }
+
+        // Copy only the fields requested, when vectors or some fields are not needed
+        bool project = RecordProjection<TRecord>.IsNeeded(req.Select, req.IncludeVectors);
+        JsonNamingPolicy? namingPolicy = project ? this.GetNamingPolicy() : null;
+
+        var response = new SearchResponse();
+        await foreach (VectorSearchResult<TRecord> x in results.Results.WithCancellation(cancellationToken))
+        {
+            if (x.Record == null) { continue; }
+
+            response.Results.Add(new SearchResponse.SearchResult
+            {
+                Record = project ? RecordProjection<TRecord>.Project(x.Record, req.Select, req.IncludeVectors, namingPolicy) : (object)x.Record,
+                Score = x.Score is > -100000 ? x.Score.Value : 0 // workaround for JSON serialization issue
+            });
+        }
+
+        return response;
+    }
+
+    private JsonNamingPolicy? GetNamingPolicy()
+    {
+        // Use the same names used by ASP.NET to serialize the records, e.g. camelCase
+        return (this._sp.GetService<IOptions<Microsoft.AspNetCore.Http.Json.JsonOptions>>()?.Value.SerializerOptions
+                ?? JsonSerializerOptions.Web).PropertyNamingPolicy;
+    }
+
+    private static bool IsCollectionNotFound(VectorStoreOperationException e)
+    {
+        return Regex.IsMatch(e.Message, @"collection '.*' does not exist", RegexOptions.IgnoreCase);
     }
 
     private async Task<VectorSearchResults<TRecord>> SearchAsync(
@@ -131,7 +206,7 @@ internal sealed class SearchFunction<TKey, TRecord> where TKey : notnull
         {
             Top = req.Top ?? 10,
             Skip = req.Skip ?? 0,
-            IncludeVectors = true,
+            IncludeVectors = req.IncludeVectors,
             Filter = ODataFilterTranslator.BuildFilterExpression<TRecord>(req.Filter, this._log),
         };
     }
@@ -142,7 +217,7 @@ internal sealed class SearchFunction<TKey, TRecord> where TKey : notnull
         {
             Top = req.Top ?? 10,
             Skip = req.Skip ?? 0,
-            IncludeVectors = true,
+            IncludeVectors = req.IncludeVectors,
             Filter = ODataFilterTranslator.BuildFilterExpression<TRecord>(req.Filter, this._log),
         };
     }
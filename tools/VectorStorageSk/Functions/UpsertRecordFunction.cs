@@ -1,7 +1,9 @@
 // Copyright (c) Microsoft. All rights reserved.
 
+using System.Runtime.CompilerServices;
 using System.Text.Json;
 using Microsoft.Extensions.Logging.Abstractions;
+using Microsoft.Extensions.Options;
 using Microsoft.Extensions.VectorData;
 using Microsoft.SemanticKernel.Connectors.AzureAISearch;
 using Microsoft.SemanticKernel.Connectors.InMemory;
@@ -14,6 +16,9 @@ namespace VectorStorageSk.Functions;
 
 internal sealed class UpsertRecordFunction
 {
+    // Max number of invalid records described in the response, the others are only counted
+    private const int MaxReportedErrors = 100;
+
     private readonly IServiceProvider _sp;
     private readonly ILogger<UpsertRecordFunction> _log;
 
@@ -29,6 +34,43 @@ internal sealed class UpsertRecordFunction
 
         if (req.Validate() is { } error) { return Results.BadRequest(error); }
 
+        return await this.UpsertAsync(req, GetValuesAsync(req.Values), cancellationToken).ConfigureAwait(false);
+    }
+
+    /// <summary>
+    /// Upsert records sent as NDJSON: the first line contains the request settings (storage type, collection,
+    /// fields, etc.) without values, and each following line contains one record. Records are written while
+    /// the request is read, so the number of records in memory doesn't depend on the size of the request.
+    /// </summary>
+    public async Task<IResult> InvokeBulkAsync(Stream body, CancellationToken cancellationToken = default)
+    {
+        this._log.LogTrace("Starting {FunctionName} bulk", this.GetType().Name);
+
+        var jsonOptions = this._sp.GetService<IOptions<Microsoft.AspNetCore.Http.Json.JsonOptions>>()?.Value.SerializerOptions;
+        using var reader = new StreamReader(body);
+
+        UpsertRecordRequest? req;
+        try
+        {
+            string? header = await reader.ReadLineAsync(cancellationToken).ConfigureAwait(false);
+            req = string.IsNullOrWhiteSpace(header) ? null : JsonSerializer.Deserialize<UpsertRecordRequest>(header, jsonOptions);
+        }
+        catch (JsonException e)
+        {
+            return Results.BadRequest($"The first line is not a valid request: {e.Message}");
+        }
+
+        if (req == null) { return Results.BadRequest("The first line must contain the request settings"); }
+
+        if (req.Values.Count > 0) { return Results.BadRequest("The first line cannot contain values, send one record per line after the first line"); }
+
+        if (req.Validate() is { } error) { return Results.BadRequest(error); }
+
+        return await this.UpsertAsync(req, ReadValuesAsync(reader, cancellationToken), cancellationToken).ConfigureAwait(false);
+    }
+
+    private async Task<IResult> UpsertAsync(UpsertRecordRequest req, IAsyncEnumerable<JsonElement> values, CancellationToken cancellationToken)
+    {
         (IVectorStore? vectorStore, IResult? err) = StorageLib.GetVectorStore(req.StorageType, this._sp, this._log);
         if (err != null) { return err; }
 
@@ -38,155 +80,116 @@ internal sealed class UpsertRecordFunction
             return Results.InternalServerError("Unable to instantiate vector store");
         }
 
-        var recordsByGuid = new List<GuidKeyedMemoryModel>();
-        var recordsByString = new List<StringKeyedMemoryModel>();
-        foreach (JsonElement value in req.Values)
+        // TODO: don't override primary keys if set by the client
+        UpsertRecordResponse response;
+        switch (vectorStore)
         {
-            Dictionary<string, JsonElement>? fieldValues = value.Deserialize<Dictionary<string, JsonElement>>();
-            if (fieldValues == null) { return Results.InternalServerError("Values deserialization failed"); }
+            case QdrantVectorStore:
+                // TODO: support ulong, check user request
+                response = await this.WriteAsync(req, vectorStore, values, () => Guid.NewGuid(), cancellationToken).ConfigureAwait(false);
+                break;
 
-            Dictionary<string, object?> data = new();
-            Dictionary<string, object?> vectors = new();
+            case AzureAISearchVectorStore:
+            case InMemoryVectorStore:
+            case LocalVectorStore:
+            case PostgresVectorStore:
+                response = await this.WriteAsync(req, vectorStore, values, () => Guid.NewGuid().ToString("D"), cancellationToken).ConfigureAwait(false);
+                break;
 
-            var idFieldName = string.Empty;
-            foreach (FieldDefinition field in req.Fields)
-            {
-                bool useDefaultValue = false;
-
-                // Note: clients do/might not set primary keys, asking to auto-generate them
-                if (!fieldValues.TryGetValue(field.Name, out JsonElement fieldValue))
-                {
-                    // Store the primary key field name, so that we can set it later
-                    if (field.Type == FieldTypes.PrimaryKey)
-                    {
-                        idFieldName = field.Name;
-                    }
-
-                    // If a field is not set, we set a default value (below) and avoid null which cause to SQL exceptions
-                    useDefaultValue = true;
-                }
-
-                switch (field.Type)
-                {
-                    case FieldTypes.PrimaryKey:
-                        idFieldName = field.Name;
-                        break;
-                    case FieldTypes.Vector:
-                        vectors[field.Name] = useDefaultValue ? new float[field.VectorSize ?? 1] : fieldValue.Deserialize<Embedding>();
-                        break;
-                    case FieldTypes.Text:
-                        data[field.Name] = useDefaultValue ? string.Empty : fieldValue.Deserialize<string>();
-                        break;
-                    case FieldTypes.Bool:
-                        try
-                        {
-                            data[field.Name] = useDefaultValue ? false : fieldValue.Deserialize<bool>();
-                        }
-                        catch (JsonException)
-                        {
-                            // Note: value validated earlier in the model
-                            data[field.Name] = YamlExtensions.AsBoolean(fieldValue);
-                        }
-
-                        break;
-                    case FieldTypes.Int:
-                        data[field.Name] = useDefaultValue ? 0 : fieldValue.Deserialize<int>();
-                        break;
-                    case FieldTypes.Number:
-                        data[field.Name] = useDefaultValue ? 0 : fieldValue.Deserialize<float>();
-                        break;
-                    case FieldTypes.DateTime:
-                        data[field.Name] = useDefaultValue
-                            ? DateTimeOffset.UtcNow.ToUnixTimeMilliseconds()
-                            : fieldValue.Deserialize<DateTimeOffset>().ToUnixTimeMilliseconds();
-                        break;
-                    case FieldTypes.Object:
-                        data[field.Name] = useDefaultValue ? new object() : JsonSerializer.Serialize(fieldValue);
-                        break;
-
-                    case FieldTypes.ListOfNumber:
-                        data[field.Name] = useDefaultValue ? [] : fieldValue.Deserialize<List<float>>();
-                        break;
-                    case FieldTypes.ListOfText:
-                        data[field.Name] = useDefaultValue ? [] : fieldValue.Deserialize<List<string>>();
-                        break;
-                    case FieldTypes.ListOfBoolean:
-                        data[field.Name] = useDefaultValue ? [] : fieldValue.Deserialize<List<bool>>();
-                        break;
-
-                    case FieldTypes.Undefined:
-                    default:
-                        // skip
-                        break;
-                }
-            }
+            default:
+                return Results.InternalServerError("Storage type not supported");
+        }
 
-            // TODO: don't override primary keys if set by the client
-            switch (vectorStore)
-            {
-                case QdrantVectorStore:
-                {
-                    // TODO: support ulong, check user request
-                    var record = new GuidKeyedMemoryModel(Guid.NewGuid())
-                    {
-                        Data = data, Vectors = vectors
-                    };
-                    record.Data[idFieldName] = record.Key;
-                    recordsByGuid.Add(record);
-                    break;
-                }
-                case AzureAISearchVectorStore:
-                case InMemoryVectorStore:
-                case PostgresVectorStore:
-                {
-                    var record = new StringKeyedMemoryModel(Guid.NewGuid().ToString("D"))
-                    {
-                        Data = data, Vectors = vectors
-                    };
-                    record.Data[idFieldName] = record.Key;
-                    recordsByString.Add(record);
-                    break;
-                }
-
-                default:
-                    return Results.InternalServerError("Storage type not supported");
-            }
+        // Report the result of each batch, failing only if nothing could be written
+        if (response.Written == 0 && response.Failed > 0)
+        {
+            return Results.Json(response, statusCode: StatusCodes.Status500InternalServerError);
         }
 
+        return Results.Ok(response);
+    }
+
+    private async Task<UpsertRecordResponse> WriteAsync<TKey>(
+        UpsertRecordRequest req,
+        IVectorStore vectorStore,
+        IAsyncEnumerable<JsonElement> values,
+        Func<TKey> newKey,
+        CancellationToken cancellationToken) where TKey : notnull
+    {
         VectorStoreRecordDefinition recordDefinition = StorageLib.PrepareRecordDefinition(req.Fields, vectorStore);
-        switch (vectorStore)
+        var collection = vectorStore.GetCollection<TKey, VectorStoreGenericDataModel<TKey>>(req.CollectionName, recordDefinition);
+        var converter = new RecordConverter(req.Fields);
+        var response = new UpsertRecordResponse();
+
+        var writer = new BatchUpsertWriter<TKey>(collection, req.BatchSize, req.MaxConcurrentBatches, this._log);
+        int position = 0;
+        await foreach (JsonElement value in values.WithCancellation(cancellationToken).ConfigureAwait(false))
         {
-            case QdrantVectorStore:
-            {
-                // TODO: support ulong, check user request
-                var collection = vectorStore.GetCollection<Guid, GuidKeyedMemoryModel>(req.CollectionName, recordDefinition);
-                foreach (var rec in recordsByGuid)
-                {
-                    await collection.UpsertAsync(rec, cancellationToken: cancellationToken).ConfigureAwait(false);
-                }
+            position++;
 
-                break;
+            Dictionary<string, object?> data;
+            Dictionary<string, object?> vectors;
+            try
+            {
+                (data, vectors) = converter.Convert(value);
             }
-            case AzureAISearchVectorStore:
-            case InMemoryVectorStore:
-            case PostgresVectorStore:
+            catch (Exception e) when (e is JsonException or InvalidOperationException or FormatException)
             {
-                var collection = vectorStore.GetCollection<string, StringKeyedMemoryModel>(req.CollectionName, recordDefinition);
-                foreach (var rec in recordsByString)
-                {
-                    await collection.UpsertAsync(rec, cancellationToken: cancellationToken).ConfigureAwait(false);
-                }
+                response.Failed++;
+                response.Errors ??= new();
+                if (response.Errors.Count < MaxReportedErrors) { response.Errors.Add($"Record {position}: {e.Message}"); }
 
-                break;
+                continue;
             }
 
-            default:
-                return Results.InternalServerError("Storage type not supported");
+            var record = new VectorStoreGenericDataModel<TKey>(newKey()) { Data = data, Vectors = vectors };
+            record.Data[converter.IdFieldName] = record.Key;
+            await writer.AddAsync(record, position, cancellationToken).ConfigureAwait(false);
         }
 
-        return Results.Ok(new UpsertRecordResponse()
+        response.Batches = await writer.CompleteAsync(cancellationToken).ConfigureAwait(false);
+        foreach (UpsertBatchResult batch in response.Batches)
         {
-            Message = $"{recordsByGuid.Count + recordsByString.Count} records written",
-        });
+            if (batch.Success) { response.Written += batch.Count; }
+            else { response.Failed += batch.Count; }
+        }
+
+        response.Message = response.Failed == 0
+            ? $"{response.Written} records written"
+            : $"{response.Written} records written, {response.Failed} records failed";
+
+        return response;
+    }
+
+    private static async IAsyncEnumerable<JsonElement> GetValuesAsync(List<object> values)
+    {
+        foreach (object value in values)
+        {
+            yield return (JsonElement)value;
+        }
+
+        await Task.CompletedTask.ConfigureAwait(false);
+    }
+
+    private static async IAsyncEnumerable<JsonElement> ReadValuesAsync(
+        StreamReader reader, [EnumeratorCancellation] CancellationToken cancellationToken)
+    {
+        while (await reader.ReadLineAsync(cancellationToken).ConfigureAwait(false) is { } line)
+        {
+            if (string.IsNullOrWhiteSpace(line)) { continue; }
+
+            JsonElement value;
+            try
+            {
+                value = JsonSerializer.Deserialize<JsonElement>(line);
+            }
+            catch (JsonException)
+            {
+                // Reported as an invalid record
+                value = default;
+            }
+
+            yield return value;
+        }
     }
 }
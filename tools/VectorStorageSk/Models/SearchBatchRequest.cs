@@ -0,0 +1,54 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.ComponentModel.DataAnnotations;
+using System.Text.Json.Serialization;
+using CommonDotNet.Embeddings;
+
+namespace VectorStorageSk.Models;
+
+internal sealed class SearchBatchRequest : SearchRequest, IValidatableObject
+{
+    // Max number of queries per request
+    private const int MaxQueries = 1000;
+
+    // List of query vectors, each one as a list of numbers or as a string encoded with EmbeddingEncoding
+    [JsonPropertyName("vectors")]
+    [JsonConverter(typeof(EmbeddingListJsonConverter))]
+    public List<float[]> Vectors { get; set; } = new();
+
+    // Max number of queries running in parallel
+    [JsonPropertyName("maxConcurrentQueries")]
+    public int MaxConcurrentQueries { get; set; } = 4;
+
+    public new IEnumerable<ValidationResult> Validate(ValidationContext validationContext)
+    {
+        foreach (var result in base.Validate(validationContext))
+        {
+            yield return result;
+        }
+
+        if (this.Vector != null)
+        {
+            yield return new ValidationResult($"Use {nameof(this.Vectors)} to pass the query vectors", [nameof(this.Vector)]);
+        }
+
+        if (this.Vectors.Count is 0 or > MaxQueries)
+        {
+            yield return new ValidationResult($"The number of vectors must be between 1 and {MaxQueries}", [nameof(this.Vectors)]);
+        }
+
+        var vectorField = this.Fields.FirstOrDefault(f => f.Type == FieldTypes.Embedding);
+        for (int index = 0; index < this.Vectors.Count; index++)
+        {
+            if (vectorField != null && this.Vectors[index].Length != vectorField.VectorSize)
+            {
+                yield return new ValidationResult($"The size of vector {index + 1} must be {vectorField.VectorSize}", [nameof(this.Vectors)]);
+            }
+        }
+
+        if (this.MaxConcurrentQueries < 1)
+        {
+            yield return new ValidationResult("The max number of concurrent queries must be greater than zero", [nameof(this.MaxConcurrentQueries)]);
+        }
+    }
+}
@@ -0,0 +1,12 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace VectorStorageSk.Models;
+
+internal sealed class SearchBatchResponse
+{
+    // Results of each query, in the same order of the query vectors
+    [JsonPropertyName("queries")]
+    public List<SearchResponse> Queries { get; set; } = new();
+}
@@ -2,10 +2,11 @@
 
 using System.ComponentModel.DataAnnotations;
 using System.Text.Json.Serialization;
+using CommonDotNet.Embeddings;
 
 namespace VectorStorageSk.Models;
 
-internal sealed class SearchRequest : CollectionRequest, IValidatableObject
+internal class SearchRequest : CollectionRequest, IValidatableObject
 {
     // Temporary workaround for the lack of support for VectorStoreGenericDataModel in MEVD
     [JsonPropertyName("dataType")]
@@ -20,8 +21,10 @@ internal sealed class SearchRequest : CollectionRequest, IValidatableObject
     [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
     public string? Filter { get; set; }
 
+    // List of numbers, or string encoded with EmbeddingEncoding, e.g. "base64"
     [JsonPropertyName("vector")]
     [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    [JsonConverter(typeof(EmbeddingJsonConverter))]
     public float[]? Vector { get; set; }
 
     // Full text search
@@ -37,6 +40,15 @@ internal sealed class SearchRequest : CollectionRequest, IValidatableObject
     [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
     public int? Skip { get; set; }
 
+    // Whether to return the vectors of each record. Vectors are usually not needed, and much larger than the other fields.
+    [JsonPropertyName("includeVectors")]
+    public bool IncludeVectors { get; set; } = false;
+
+    // Optional list of fields to return, e.g. [ "id", "content" ]. All fields are returned when not set.
+    [JsonPropertyName("select")]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public List<string>? Select { get; set; }
+
     [JsonIgnore]
     public bool IsHybridSearch
     {
@@ -84,5 +96,10 @@ internal sealed class SearchRequest : CollectionRequest, IValidatableObject
         {
             yield return new ValidationResult("The value of Skip cannot be negative", [nameof(this.Skip)]);
         }
+
+        if (this.Select?.Any(string.IsNullOrWhiteSpace) == true)
+        {
+            yield return new ValidationResult("The list of fields to select contains empty names", [nameof(this.Select)]);
+        }
     }
 }
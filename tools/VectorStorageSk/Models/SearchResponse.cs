@@ -17,4 +17,9 @@ internal sealed class SearchResponse
 
     [JsonPropertyName("results")]
     public List<SearchResult> Results { get; set; } = new();
+
+    // Set when a query of a batch fails
+    [JsonPropertyName("error")]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public string? Error { get; set; }
 }
@@ -14,6 +14,7 @@ internal enum StorageTypes
     Chroma,
     DuckDb,
     InMemory,
+    Local,
     Milvus,
     MongoDB,
     Pinecone,
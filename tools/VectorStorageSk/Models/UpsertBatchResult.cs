@@ -0,0 +1,48 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json.Serialization;
+
+namespace VectorStorageSk.Models;
+
+internal sealed class UpsertBatchResult
+{
+    [JsonPropertyName("index")]
+    [JsonPropertyOrder(0)]
+    public int Index { get; set; }
+
+    /// <summary>
+    /// Position of the first record of the batch in the request, starting from 1, as in the "Record N" errors.
+    /// </summary>
+    [JsonPropertyName("firstRecord")]
+    [JsonPropertyOrder(1)]
+    public int FirstRecord { get; set; }
+
+    /// <summary>
+    /// Position of the last record of the batch in the request. Invalid records between the first and
+    /// the last record are not part of the batch, see "errors".
+    /// </summary>
+    [JsonPropertyName("lastRecord")]
+    [JsonPropertyOrder(2)]
+    public int LastRecord { get; set; }
+
+    [JsonPropertyName("count")]
+    [JsonPropertyOrder(3)]
+    public int Count { get; set; }
+
+    [JsonPropertyName("success")]
+    [JsonPropertyOrder(4)]
+    public bool Success { get; set; }
+
+    [JsonPropertyName("error")]
+    [JsonPropertyOrder(5)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public string? Error { get; set; }
+
+    /// <summary>
+    /// Position of each record of a failed batch in the request, to send the records again.
+    /// </summary>
+    [JsonPropertyName("records")]
+    [JsonPropertyOrder(6)]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public List<int>? Records { get; set; }
+}
@@ -3,17 +3,29 @@
 using System.ComponentModel.DataAnnotations;
 using System.Text.Json;
 using System.Text.Json.Serialization;
+using CommonDotNet.Embeddings;
 
 namespace VectorStorageSk.Models;
 
 internal sealed class UpsertRecordRequest : CollectionRequest, IValidatableObject
 {
+    // Max number of records per batch, e.g. Azure AI Search accepts up to 1000 documents per call
+    private const int MaxBatchSize = 1000;
+
     [JsonPropertyName("fields")]
     public List<FieldDefinition> Fields { get; set; } = new();
 
     [JsonPropertyName("values")]
     public List<object> Values { get; set; } = new();
 
+    // Number of records written to storage with a single call
+    [JsonPropertyName("batchSize")]
+    public int BatchSize { get; set; } = 100;
+
+    // Max number of batches written in parallel
+    [JsonPropertyName("maxConcurrentBatches")]
+    public int MaxConcurrentBatches { get; set; } = 4;
+
     public new IEnumerable<ValidationResult> Validate(ValidationContext validationContext)
     {
         foreach (var result in base.Validate(validationContext))
@@ -29,24 +41,50 @@ internal sealed class UpsertRecordRequest : CollectionRequest, IValidatableObjec
             }
         }
 
+        if (this.BatchSize is < 1 or > MaxBatchSize)
+        {
+            yield return new ValidationResult($"The batch size must be between 1 and {MaxBatchSize}", [nameof(this.BatchSize)]);
+        }
+
+        if (this.MaxConcurrentBatches < 1)
+        {
+            yield return new ValidationResult("The max number of concurrent batches must be greater than zero", [nameof(this.MaxConcurrentBatches)]);
+        }
+
         for (int index = 0; index < this.Values.Count; index++)
         {
             // Check that each value is serialized correctly
             JsonElement value = (JsonElement)this.Values[index];
-            Dictionary<string, JsonElement>? fieldValues = value.Deserialize<Dictionary<string, JsonElement>>();
-            if (fieldValues == null)
+            if (value.ValueKind != JsonValueKind.Object)
             {
                 yield return new ValidationResult($"Failed to deserialize value {index + 1} of {this.Values.Count}", [nameof(this.Values)]);
             }
             else
             {
+                // Check encoded vectors, e.g. base64 strings returned by EmbeddingGenerator
+                foreach (FieldDefinition field in this.Fields)
+                {
+                    if (field.Type != FieldTypes.Vector) { continue; }
+
+                    if (!value.TryGetProperty(field.Name, out JsonElement fieldValue) || fieldValue.ValueKind != JsonValueKind.String) { continue; }
+
+                    if (!EmbeddingEncoding.TryDecode(fieldValue.GetString()!, out float[] vector))
+                    {
+                        yield return new ValidationResult($"Invalid encoded vector for {field.Name}, value {index + 1} of {this.Values.Count}", [nameof(this.Values)]);
+                    }
+                    else if (field.VectorSize.HasValue && vector.Length != field.VectorSize)
+                    {
+                        yield return new ValidationResult($"The size of the vector {field.Name} must be {field.VectorSize}, value {index + 1} of {this.Values.Count}", [nameof(this.Values)]);
+                    }
+                }
+
                 // Check boolean values syntax, needed to support YAML input
                 foreach (FieldDefinition field in this.Fields)
                 {
                     if (field.Type != FieldTypes.Bool) { continue; }
 
                     // Skip fields that are not set
-                    if (!fieldValues.TryGetValue(field.Name, out JsonElement fieldValue)) { continue; }
+                    if (!value.TryGetProperty(field.Name, out JsonElement fieldValue)) { continue; }
 
                     bool? booleanValue;
                     try
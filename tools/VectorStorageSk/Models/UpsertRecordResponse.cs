@@ -8,4 +8,18 @@ internal sealed class UpsertRecordResponse
 {
     [JsonPropertyName("message")]
     public string Message { get; set; } = string.Empty;
+
+    [JsonPropertyName("written")]
+    public int Written { get; set; }
+
+    [JsonPropertyName("failed")]
+    public int Failed { get; set; }
+
+    [JsonPropertyName("batches")]
+    public List<UpsertBatchResult> Batches { get; set; } = new();
+
+    // Records that could not be converted, e.g. invalid JSON or values with the wrong type
+    [JsonPropertyName("errors")]
+    [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+    public List<string>? Errors { get; set; }
 }
@@ -26,6 +26,7 @@ internal static class Program
         builder.Services.ConfigureSerializationOptions();
         builder.AddRedisToolsRegistry();
         builder.AddInMemoryVectorStore();
+        builder.AddLocalVectorStore();
         builder.AddQdrantVectorStore(connectionName: "qdrantstorage");
         builder.AddPostgresVectorStore(connectionName: "postgresstorage");
         builder.AddAzureAiSearchVectorStore(connectionName: "aisearchstorage");
@@ -148,80 +149,45 @@ internal static class Program
             .WithDescription("Update an existing record or create if not exists")
             .WithSummary("Update an existing record or create if not exists");
 
+        const string UpsertBulkFunctionName = "upsert-bulk";
+
+        // Note: not registered in the tool registry, because the orchestrator sends JSON requests,
+        //       while this endpoint reads NDJSON. Clients call it directly.
+        app.MapPost($"/{UpsertBulkFunctionName}", async Task<IResult> (
+                UpsertRecordFunction function,
+                HttpRequest request,
+                CancellationToken cancellationToken) => await function.InvokeBulkAsync(request.Body, cancellationToken).ConfigureAwait(false))
+            .Accepts<UpsertRecordRequest>("application/x-ndjson")
+            .Produces<UpsertRecordResponse>(StatusCodes.Status200OK)
+            .WithName(UpsertBulkFunctionName)
+            .WithDisplayName("Upsert records in bulk")
+            .WithDescription("Update existing records or create if not exist, reading one record per NDJSON line after a first line with the request settings, and writing records in batches")
+            .WithSummary("Upsert records sent as NDJSON, in batches");
+
         const string SearchFunctionName = "search";
         registry?.RegisterPostFunction($"/{SearchFunctionName}", "Vector search");
         app.MapPost($"/{SearchFunctionName}", async Task<IResult> (
                     SearchRequest req,
-                    CancellationToken cancellationToken) =>
-                {
-                    // Note: SK doesn't support search on generic data classes yet, so we use reflection to dynamically handle
-                    // multiple model types with a single endpoint. The SearchFunction is not registered with DI, it's handled
-                    // dynamically with reflection and uses ActivatorUtilities.CreateInstance to work out the correct types.
-
-                    // Which class to use? MemoryRecord<Guid>, MemoryRecord<string>, MyClass, YourClass<ulong>, etc.
-                    Type keyType = GetKeyType(req.PrimaryKeyType, req.StorageType);
-                    Type? dataType = GetDataType(req.DataType, keyType);
-                    if (dataType == null) { return Results.BadRequest($"Unknown data type: {req.DataType}"); }
-
-                    // Dynamically build SearchFunction<TKey, TRecord> and InvokeAsync()
-                    (object methodContainer, MethodInfo? method) caller = GetSearchMethod(keyType, dataType, app.Services);
-                    if (caller.method == null) { return Results.BadRequest($"Search function not available for data type {req.DataType}"); }
-
-                    // Dynamically call SearchFunction<T>.InvokeAsync()
-                    var result = caller.method.Invoke(caller.methodContainer, [req, cancellationToken]);
-                    if (result is not Task<IResult> task)
-                    {
-                        return Results.InternalServerError($"Failed to invoke search function, {nameof(SearchFunction<object, object>.InvokeAsync)} method returns null or an unexpected type");
-                    }
-
-                    return await task.ConfigureAwait(false);
-
-                    #region internals
-
-                    // Dynamically create the search function and get the InvokeAsync method
-                    static (object methodContainer, MethodInfo? method) GetSearchMethod(Type keyType, Type dataType, IServiceProvider serviceProvider)
-                    {
-                        // Instantiate the search function, generic on data model <T>, using the model class name from the request
-                        var functionGenericType = typeof(SearchFunction<,>);
-                        var functionCloseType = functionGenericType.MakeGenericType(keyType, dataType);
-                        var function = ActivatorUtilities.CreateInstance(serviceProvider, functionCloseType);
-
-                        // Return InvokeAsync method used to search records
-                        return (function, functionCloseType.GetMethod("InvokeAsync"));
-                    }
-
-                    // Get the type (string, Guid, ulong, etc.) of the data model key (aka Record ID)
-                    static Type GetKeyType(PrimaryKeyTypes pkType, StorageTypes storageType) => pkType switch
-                    {
-                        PrimaryKeyTypes.String => typeof(string),
-                        PrimaryKeyTypes.Guid => typeof(Guid),
-                        PrimaryKeyTypes.Number => typeof(ulong),
-                        _ => storageType == StorageTypes.Qdrant ? typeof(Guid) : typeof(string)
-                    };
-
-                    // Get the data type for the given data type name, primary key type and storage type
-                    static Type? GetDataType(string dataType, Type primaryKeyType)
-                    {
-                        Type? result = Type.GetType(dataType)
-                                       ?? Type.GetType($"{dataType}`1")
-                                       ?? Type.GetType($"VectorStorageSk.SemanticKernel.{dataType}")
-                                       ?? Type.GetType($"VectorStorageSk.SemanticKernel.{dataType}`1");
-
-                        // Error: data model type not found
-                        if (result == null) { return null; }
-
-                        return !result.IsGenericType ? result : result.MakeGenericType(primaryKeyType);
-                    }
-
-                    #endregion
-                }
-            )
+                    CancellationToken cancellationToken)
+                => await InvokeSearchFunctionAsync(req, "InvokeAsync", app.Services, cancellationToken).ConfigureAwait(false))
             .Produces<SearchResponse>(StatusCodes.Status200OK)
             .WithName(SearchFunctionName)
             .WithDisplayName("Vector search for MemoryRecord<Guid>")
             .WithDescription("Search records by vector similarity")
             .WithSummary("Search records by vector similarity");
 
+        const string SearchBatchFunctionName = "search/batch";
+        registry?.RegisterPostFunction($"/{SearchBatchFunctionName}", "Vector search with multiple query vectors");
+        app.MapPost($"/{SearchBatchFunctionName}", async Task<IResult> (
+                    SearchBatchRequest req,
+                    CancellationToken cancellationToken)
+                => await InvokeSearchFunctionAsync(req, "InvokeBatchAsync", app.Services, cancellationToken).ConfigureAwait(false))
+            .Produces<SearchBatchResponse>(StatusCodes.Status200OK)
+            .WithName(SearchBatchFunctionName)
+            .WithDisplayName("Vector search with multiple queries")
+            .WithDescription("Search records by vector similarity for multiple query vectors in parallel, returning the results of each query")
+            .WithSummary("Search records by vector similarity for multiple query vectors");
+
         // Error handling
         app.UseExceptionHandler(errorApp =>
         {
@@ -258,4 +224,68 @@ internal static class Program
 
         app.Run();
     }
+
+    // Note: SK doesn't support search on generic data classes yet, so we use reflection to dynamically handle
+    // multiple model types with a single endpoint. The SearchFunction is not registered with DI, it's handled
+    // dynamically with reflection and uses ActivatorUtilities.CreateInstance to work out the correct types.
+    private static async Task<IResult> InvokeSearchFunctionAsync(
+        SearchRequest req, string methodName, IServiceProvider serviceProvider, CancellationToken cancellationToken)
+    {
+        // Which class to use? MemoryRecord<Guid>, MemoryRecord<string>, MyClass, YourClass<ulong>, etc.
+        Type keyType = GetKeyType(req.PrimaryKeyType, req.StorageType);
+        Type? dataType = GetDataType(req.DataType, keyType);
+        if (dataType == null) { return Results.BadRequest($"Unknown data type: {req.DataType}"); }
+
+        // Dynamically build SearchFunction<TKey, TRecord> and get the method to call, e.g. InvokeAsync()
+        (object methodContainer, MethodInfo? method) caller = GetSearchMethod(keyType, dataType, methodName, serviceProvider);
+        if (caller.method == null) { return Results.BadRequest($"Search function not available for data type {req.DataType}"); }
+
+        // Dynamically call SearchFunction<T>.InvokeAsync()
+        var result = caller.method.Invoke(caller.methodContainer, [req, cancellationToken]);
+        if (result is not Task<IResult> task)
+        {
+            return Results.InternalServerError($"Failed to invoke search function, {methodName} method returns null or an unexpected type");
+        }
+
+        return await task.ConfigureAwait(false);
+
+        #region internals
+
+        // Dynamically create the search function and get the method
+        static (object methodContainer, MethodInfo? method) GetSearchMethod(Type keyType, Type dataType, string methodName, IServiceProvider serviceProvider)
+        {
+            // Instantiate the search function, generic on data model <T>, using the model class name from the request
+            var functionGenericType = typeof(SearchFunction<,>);
+            var functionCloseType = functionGenericType.MakeGenericType(keyType, dataType);
+            var function = ActivatorUtilities.CreateInstance(serviceProvider, functionCloseType);
+
+            // Return the method used to search records
+            return (function, functionCloseType.GetMethod(methodName));
+        }
+
+        // Get the type (string, Guid, ulong, etc.) of the data model key (aka Record ID)
+        static Type GetKeyType(PrimaryKeyTypes pkType, StorageTypes storageType) => pkType switch
+        {
+            PrimaryKeyTypes.String => typeof(string),
+            PrimaryKeyTypes.Guid => typeof(Guid),
+            PrimaryKeyTypes.Number => typeof(ulong),
+            _ => storageType == StorageTypes.Qdrant ? typeof(Guid) : typeof(string)
+        };
+
+        // Get the data type for the given data type name, primary key type and storage type
+        static Type? GetDataType(string dataType, Type primaryKeyType)
+        {
+            Type? result = Type.GetType(dataType)
+                           ?? Type.GetType($"{dataType}`1")
+                           ?? Type.GetType($"VectorStorageSk.SemanticKernel.{dataType}")
+                           ?? Type.GetType($"VectorStorageSk.SemanticKernel.{dataType}`1");
+
+            // Error: data model type not found
+            if (result == null) { return null; }
+
+            return !result.IsGenericType ? result : result.MakeGenericType(primaryKeyType);
+        }
+
+        #endregion
+    }
 }
@@ -0,0 +1,112 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using Microsoft.Extensions.VectorData;
+using VectorStorageSk.Models;
+
+namespace VectorStorageSk.Storage;
+
+/// <summary>
+/// Write records in batches, with a limited number of batches written concurrently.
+/// Records are added while they are read from the request, and a batch is written as soon as it's full,
+/// waiting when too many batches are in progress, so the number of records in memory is bounded.
+/// A failed batch doesn't stop the others, and the result of each batch is reported at the end,
+/// with the position of its records in the request, so the client can tell which records to send again.
+/// </summary>
+internal sealed class BatchUpsertWriter<TKey> where TKey : notnull
+{
+    private readonly IVectorStoreRecordCollection<TKey, VectorStoreGenericDataModel<TKey>> _collection;
+    private readonly int _batchSize;
+    // Note: not disposed, batches might still be running when the request is cancelled
+    private readonly SemaphoreSlim _slots;
+    private readonly List<Task<UpsertBatchResult>> _tasks = new();
+    private readonly ILogger _log;
+    private List<VectorStoreGenericDataModel<TKey>> _batch;
+
+    // Position of each record of the current batch in the request
+    private List<int> _positions;
+
+    public BatchUpsertWriter(
+        IVectorStoreRecordCollection<TKey, VectorStoreGenericDataModel<TKey>> collection,
+        int batchSize,
+        int maxConcurrentBatches,
+        ILogger log)
+    {
+        this._collection = collection;
+        this._batchSize = batchSize;
+        this._slots = new SemaphoreSlim(maxConcurrentBatches, maxConcurrentBatches);
+        this._log = log;
+        this._batch = new List<VectorStoreGenericDataModel<TKey>>(batchSize);
+        this._positions = new List<int>(batchSize);
+    }
+
+    /// <summary>
+    /// Add a record to the current batch.
+    /// </summary>
+    /// <param name="record">Record to write</param>
+    /// <param name="position">Position of the record in the request, starting from 1, including invalid records</param>
+    /// <param name="cancellationToken">Async task cancellation token</param>
+    public async Task AddAsync(VectorStoreGenericDataModel<TKey> record, int position, CancellationToken cancellationToken = default)
+    {
+        this._batch.Add(record);
+        this._positions.Add(position);
+        if (this._batch.Count >= this._batchSize)
+        {
+            await this.FlushAsync(cancellationToken).ConfigureAwait(false);
+        }
+    }
+
+    /// <summary>
+    /// Write the last batch, and wait for all batches to complete.
+    /// </summary>
+    public async Task<List<UpsertBatchResult>> CompleteAsync(CancellationToken cancellationToken = default)
+    {
+        await this.FlushAsync(cancellationToken).ConfigureAwait(false);
+        return (await Task.WhenAll(this._tasks).ConfigureAwait(false)).ToList();
+    }
+
+    private async Task FlushAsync(CancellationToken cancellationToken)
+    {
+        if (this._batch.Count == 0) { return; }
+
+        var batch = this._batch;
+        var positions = this._positions;
+        this._batch = new List<VectorStoreGenericDataModel<TKey>>(this._batchSize);
+        this._positions = new List<int>(this._batchSize);
+
+        var result = new UpsertBatchResult
+        {
+            Index = this._tasks.Count,
+            FirstRecord = positions[0],
+            LastRecord = positions[^1],
+            Count = batch.Count,
+        };
+
+        await this._slots.WaitAsync(cancellationToken).ConfigureAwait(false);
+        this._tasks.Add(this.WriteAsync(batch, positions, result, cancellationToken));
+    }
+
+#pragma warning disable CA1031 // Errors are reported to the client, per batch
+    private async Task<UpsertBatchResult> WriteAsync(
+        List<VectorStoreGenericDataModel<TKey>> batch, List<int> positions, UpsertBatchResult result, CancellationToken cancellationToken)
+    {
+        try
+        {
+            await foreach (TKey _ in this._collection.UpsertBatchAsync(batch, cancellationToken: cancellationToken).ConfigureAwait(false)) { }
+
+            result.Success = true;
+        }
+        catch (Exception e) when (e is not OperationCanceledException || !cancellationToken.IsCancellationRequested)
+        {
+            this._log.LogWarning(e, "Batch {Index} upsert failed, {Count} records", result.Index, result.Count);
+            result.Error = e.Message;
+            result.Records = positions;
+        }
+        finally
+        {
+            this._slots.Release();
+        }
+
+        return result;
+    }
+#pragma warning restore CA1031
+}
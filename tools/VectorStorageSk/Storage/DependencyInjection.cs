@@ -65,6 +65,24 @@ internal static class DependencyInjection
         builder.Services.AddSingleton<InMemoryVectorStore>();
     }
 
+    public static void AddLocalVectorStore(this IHostApplicationBuilder builder)
+    {
+        ArgumentNullException.ThrowIfNull(builder);
+        builder.Services.AddSingleton<LocalVectorStore>(sp =>
+        {
+            const string Section = "App:VectorStores:Local";
+
+            var loggerFactory = sp.GetRequiredService<ILoggerFactory>();
+            var log = loggerFactory.CreateLogger(nameof(AddLocalVectorStore));
+
+            var config = sp.GetService<IConfiguration>()?.GetSection(Section).Get<LocalVectorStoreConfig>() ?? new LocalVectorStoreConfig();
+            if (!config.IsValid(log)) { throw new InvalidOperationException($"Unable to load local vector store, invalid settings in {Section}"); }
+
+            // Note: disposed on shutdown, saving a snapshot of the collections changed
+            return new LocalVectorStore(config, loggerFactory);
+        });
+    }
+
     public static void AddPostgresVectorStore(
         this IHostApplicationBuilder builder,
         string connectionName)
@@ -0,0 +1,249 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+namespace VectorStorageSk.Storage;
+
+/// <summary>
+/// Hierarchical Navigable Small World graph, used to find approximate nearest neighbours
+/// without comparing the query with all vectors. Nodes are identified by consecutive numbers,
+/// and distances are calculated by the caller, so the graph doesn't hold any vector.
+/// Not thread safe: searches can run in parallel, but not while a node is being added.
+/// See https://arxiv.org/abs/1603.09320
+/// </summary>
+internal sealed class HnswGraph
+{
+    private readonly int _m;
+    private readonly int _maxLinksLevel0;
+    private readonly int _efConstruction;
+    private readonly double _levelMultiplier;
+    private readonly Random _random = new(42);
+
+    // Links of each node, one list per level
+    private readonly List<List<int>[]> _links = new();
+    private int _entryPoint = -1;
+    private int _maxLevel = -1;
+
+    public HnswGraph(int m, int efConstruction)
+    {
+        this._m = m;
+        this._maxLinksLevel0 = m * 2;
+        this._efConstruction = efConstruction;
+        this._levelMultiplier = 1 / Math.Log(m);
+    }
+
+    public int Count => this._links.Count;
+
+    /// <summary>
+    /// Add a node, with id equal to the current number of nodes.
+    /// </summary>
+    /// <param name="distanceToNew">Distance between the new node and a node in the graph</param>
+    /// <param name="distance">Distance between two nodes in the graph</param>
+    public void Add(Func<int, float> distanceToNew, Func<int, int, float> distance)
+    {
+        int id = this._links.Count;
+        int level = (int)(-Math.Log(1 - this._random.NextDouble()) * this._levelMultiplier);
+        var links = new List<int>[level + 1];
+        for (int l = 0; l <= level; l++) { links[l] = new List<int>(l == 0 ? this._maxLinksLevel0 + 1 : this._m + 1); }
+
+        this._links.Add(links);
+
+        if (this._entryPoint < 0)
+        {
+            this._entryPoint = id;
+            this._maxLevel = level;
+            return;
+        }
+
+        // Greedy search on the levels above the new node
+        var entry = (id: this._entryPoint, distance: distanceToNew(this._entryPoint));
+        for (int l = this._maxLevel; l > level; l--)
+        {
+            entry = this.GreedySearch(distanceToNew, entry, l);
+        }
+
+        List<(int id, float distance)> entryPoints = [entry];
+        for (int l = Math.Min(level, this._maxLevel); l >= 0; l--)
+        {
+            List<(int id, float distance)> candidates = this.SearchLevel(distanceToNew, entryPoints, this._efConstruction, l);
+            int maxLinks = l == 0 ? this._maxLinksLevel0 : this._m;
+            foreach (int neighbour in this.SelectNeighbours(candidates, this._m, distance))
+            {
+                links[l].Add(neighbour);
+
+                List<int> neighbourLinks = this._links[neighbour][l];
+                neighbourLinks.Add(id);
+                if (neighbourLinks.Count > maxLinks)
+                {
+                    var neighbourCandidates = new List<(int id, float distance)>(neighbourLinks.Count);
+                    foreach (int x in neighbourLinks) { neighbourCandidates.Add((x, distance(neighbour, x))); }
+
+                    neighbourCandidates.Sort((a, b) => a.distance.CompareTo(b.distance));
+                    neighbourLinks.Clear();
+                    neighbourLinks.AddRange(this.SelectNeighbours(neighbourCandidates, maxLinks, distance));
+                }
+            }
+
+            entryPoints = candidates;
+        }
+
+        if (level > this._maxLevel)
+        {
+            this._entryPoint = id;
+            this._maxLevel = level;
+        }
+    }
+
+    /// <summary>
+    /// Find the approximate nearest nodes, sorted by distance.
+    /// </summary>
+    /// <param name="distanceToQuery">Distance between the query and a node</param>
+    /// <param name="ef">Number of candidates to explore, the higher the more accurate and slower</param>
+    public List<(int id, float distance)> Search(Func<int, float> distanceToQuery, int ef)
+    {
+        if (this._entryPoint < 0) { return []; }
+
+        var entry = (id: this._entryPoint, distance: distanceToQuery(this._entryPoint));
+        for (int l = this._maxLevel; l > 0; l--)
+        {
+            entry = this.GreedySearch(distanceToQuery, entry, l);
+        }
+
+        return this.SearchLevel(distanceToQuery, [entry], ef, 0);
+    }
+
+    public void Write(BinaryWriter writer)
+    {
+        writer.Write(this._links.Count);
+        writer.Write(this._entryPoint);
+        writer.Write(this._maxLevel);
+        foreach (List<int>[] levels in this._links)
+        {
+            writer.Write(levels.Length);
+            foreach (List<int> links in levels)
+            {
+                writer.Write(links.Count);
+                foreach (int x in links) { writer.Write(x); }
+            }
+        }
+    }
+
+    public void Read(BinaryReader reader)
+    {
+        this._links.Clear();
+        int count = reader.ReadInt32();
+        this._entryPoint = reader.ReadInt32();
+        this._maxLevel = reader.ReadInt32();
+        for (int i = 0; i < count; i++)
+        {
+            var levels = new List<int>[reader.ReadInt32()];
+            for (int l = 0; l < levels.Length; l++)
+            {
+                int linkCount = reader.ReadInt32();
+                levels[l] = new List<int>(linkCount + 1);
+                for (int j = 0; j < linkCount; j++) { levels[l].Add(reader.ReadInt32()); }
+            }
+
+            this._links.Add(levels);
+        }
+    }
+
+    private (int id, float distance) GreedySearch(Func<int, float> distanceTo, (int id, float distance) entry, int level)
+    {
+        bool changed = true;
+        while (changed)
+        {
+            changed = false;
+            foreach (int x in this._links[entry.id][level])
+            {
+                float d = distanceTo(x);
+                if (d < entry.distance)
+                {
+                    entry = (x, d);
+                    changed = true;
+                }
+            }
+        }
+
+        return entry;
+    }
+
+    private List<(int id, float distance)> SearchLevel(Func<int, float> distanceTo, List<(int id, float distance)> entryPoints, int ef, int level)
+    {
+        var visited = new HashSet<int>();
+        var candidates = new PriorityQueue<int, float>(); // closest first
+        var results = new PriorityQueue<int, float>(); // farthest first, using negative distances
+        foreach ((int id, float distance) x in entryPoints)
+        {
+            visited.Add(x.id);
+            candidates.Enqueue(x.id, x.distance);
+            results.Enqueue(x.id, -x.distance);
+        }
+
+        while (results.Count > ef) { results.Dequeue(); }
+
+        while (candidates.TryDequeue(out int current, out float currentDistance))
+        {
+            results.TryPeek(out _, out float farthest);
+            if (currentDistance > -farthest && results.Count >= ef) { break; }
+
+            foreach (int x in this._links[current][level])
+            {
+                if (!visited.Add(x)) { continue; }
+
+                float d = distanceTo(x);
+                results.TryPeek(out _, out farthest);
+                if (results.Count < ef || d < -farthest)
+                {
+                    candidates.Enqueue(x, d);
+                    results.Enqueue(x, -d);
+                    if (results.Count > ef) { results.Dequeue(); }
+                }
+            }
+        }
+
+        var list = new List<(int id, float distance)>(results.Count);
+        while (results.TryDequeue(out int id, out float distance)) { list.Add((id, -distance)); }
+
+        list.Reverse();
+        return list;
+    }
+
+    // Neighbour selection heuristic: prefer candidates closer to the node than to the neighbours already
+    // selected, to link different regions of the graph, then fill the remaining links with the closest ones.
+    private List<int> SelectNeighbours(List<(int id, float distance)> candidates, int max, Func<int, int, float> distance)
+    {
+        var selected = new List<int>(max);
+        var skipped = new List<int>();
+        foreach ((int id, float d) in candidates)
+        {
+            if (selected.Count >= max) { break; }
+
+            bool keep = true;
+            foreach (int s in selected)
+            {
+                if (distance(id, s) <= d)
+                {
+                    keep = false;
+                    break;
+                }
+            }
+
+            if (keep)
+            {
+                selected.Add(id);
+            }
+            else
+            {
+                skipped.Add(id);
+            }
+        }
+
+        foreach (int id in skipped)
+        {
+            if (selected.Count >= max) { break; }
+
+            selected.Add(id);
+        }
+
+        return selected;
+    }
+}
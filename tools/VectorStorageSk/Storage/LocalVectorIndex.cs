@@ -0,0 +1,748 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Diagnostics;
+using System.IO.MemoryMappedFiles;
+using System.Numerics;
+using System.Runtime.InteropServices;
+using System.Text.Json;
+using System.Text.Json.Serialization;
+using VectorStorageSk.Models;
+
+namespace VectorStorageSk.Storage;
+
+/// <summary>
+/// Collection of records stored on disk, with an HNSW graph for approximate nearest neighbour search.
+/// Files in the collection directory:
+/// - collection.json: vector size and distance function
+/// - vectors.f32: float32 vectors, one slot per record, memory mapped
+/// - records.jsonl: log of record keys and data, one line per upsert/delete, compacted by snapshots
+/// - graph.bin: snapshot of the HNSW graph, vectors added after the snapshot are indexed when loading
+/// Updating a record writes the vector in a new slot, so the graph is only extended, never modified.
+/// Old slots stay in the graph and are skipped in the results, until a snapshot finds that too many
+/// slots are unused: the snapshot then compacts the vectors file and rebuilds the graph, see Compact.
+/// Searches run concurrently, while writes are serialized.
+/// </summary>
+internal sealed class LocalVectorIndex : IDisposable
+{
+    public sealed record Hit(string Key, JsonElement Data, float[]? Vector, float Score);
+
+    private const string ManifestFile = "collection.json";
+    private const string VectorsFile = "vectors.f32";
+    private const string RecordsFile = "records.jsonl";
+    private const string GraphFile = "graph.bin";
+    private const string CompactionFile = "compaction.tmp";
+    private const int InitialCapacity = 1024;
+
+    private readonly string _path;
+    private readonly LocalVectorStoreConfig _config;
+    private readonly ILogger _log;
+    private readonly ReaderWriterLockSlim _lock = new();
+    private HnswGraph _graph;
+
+    // Record key => slot
+    private readonly Dictionary<string, int> _keys = new(StringComparer.Ordinal);
+
+    // Slot => record, null if the record has been deleted or updated
+    private readonly List<Entry?> _entries = new();
+
+    // Slot => vector norm, used by cosine distance
+    private readonly List<float> _norms = new();
+
+    private readonly Manifest _manifest;
+    private readonly VectorDistanceFunctions _distance;
+    private MemoryMappedFile? _file;
+    private MemoryMappedViewAccessor? _vectors;
+
+    // Start of the mapped vectors, used to read vectors without copying them
+    private unsafe byte* _pointer;
+    private long _capacity;
+    private StreamWriter? _records;
+    private int _changes;
+    private bool _disposed;
+
+    private LocalVectorIndex(string path, Manifest manifest, LocalVectorStoreConfig config, ILogger log)
+    {
+        this._path = path;
+        this._manifest = manifest;
+        this._config = config;
+        this._log = log;
+        this._distance = ParseDistanceFunction(manifest.DistanceFunction);
+        this._graph = new HnswGraph(config.HnswM, config.HnswEfConstruction);
+    }
+
+    /// <summary>
+    /// Vector size, zero until the first record is stored if the size was not defined when creating the collection.
+    /// </summary>
+    public int Dimensions => this._manifest.Dimensions;
+
+    public static bool Exists(string path)
+    {
+        return File.Exists(Path.Combine(path, ManifestFile));
+    }
+
+    /// <exception cref="NotSupportedException">The distance function is not supported</exception>
+    public static LocalVectorIndex Create(string path, int dimensions, string? distanceFunction, LocalVectorStoreConfig config, ILogger log)
+    {
+        var manifest = new Manifest { Dimensions = dimensions, DistanceFunction = ParseDistanceFunction(distanceFunction).ToString("G") };
+        Directory.CreateDirectory(path);
+        var index = new LocalVectorIndex(path, manifest, config, log);
+        index.SaveManifest();
+        index.OpenFiles();
+        return index;
+    }
+
+    public static LocalVectorIndex Open(string path, LocalVectorStoreConfig config, ILogger log)
+    {
+        var manifest = JsonSerializer.Deserialize<Manifest>(File.ReadAllText(Path.Combine(path, ManifestFile)))
+                       ?? throw new InvalidDataException($"Invalid collection manifest {path}");
+        var index = new LocalVectorIndex(path, manifest, config, log);
+        index.Load();
+        index.OpenFiles();
+        return index;
+    }
+
+    /// <summary>
+    /// Store records, replacing records with the same key.
+    /// </summary>
+    /// <exception cref="ArgumentException">A vector size doesn't match the collection vector size</exception>
+    public void Upsert(IReadOnlyList<(string key, JsonElement data, ReadOnlyMemory<float> vector)> records)
+    {
+        if (records.Count == 0) { return; }
+
+        this._lock.EnterWriteLock();
+        try
+        {
+            ObjectDisposedException.ThrowIf(this._disposed, this);
+
+            // The first vector defines the size, when not defined on creation
+            if (this._manifest.Dimensions == 0)
+            {
+                this._manifest.Dimensions = records[0].vector.Length;
+                this.SaveManifest();
+                this.OpenFiles();
+            }
+
+            // Check all the records first, to avoid writing only part of the batch
+            foreach ((string key, JsonElement _, ReadOnlyMemory<float> vector) in records)
+            {
+                if (vector.Length != this._manifest.Dimensions)
+                {
+                    throw new ArgumentException($"Record '{key}' vector size {vector.Length} doesn't match the collection vector size {this._manifest.Dimensions}");
+                }
+            }
+
+            foreach ((string key, JsonElement data, ReadOnlyMemory<float> vector) in records)
+            {
+                int slot = this._entries.Count;
+                this.EnsureCapacity(slot + 1);
+                vector.Span.CopyTo(this.GetVectorSpan(slot));
+
+                if (this._keys.TryGetValue(key, out int oldSlot)) { this._entries[oldSlot] = null; }
+
+                this._keys[key] = slot;
+                this._entries.Add(new Entry(key, data.Clone()));
+                this._norms.Add(Norm(vector.Span));
+                this.AppendRecord(new RecordLine { Slot = slot, Key = key, Data = data });
+                this.AddToGraph(slot);
+            }
+
+            this._records!.Flush();
+            this.TrackChanges(records.Count);
+        }
+        finally
+        {
+            this._lock.ExitWriteLock();
+        }
+    }
+
+    public void Delete(IEnumerable<string> keys)
+    {
+        this._lock.EnterWriteLock();
+        try
+        {
+            ObjectDisposedException.ThrowIf(this._disposed, this);
+
+            int count = 0;
+            foreach (string key in keys)
+            {
+                if (!this._keys.Remove(key, out int slot)) { continue; }
+
+                this._entries[slot] = null;
+                this.AppendRecord(new RecordLine { Key = key, Deleted = true });
+                count++;
+            }
+
+            this._records!.Flush();
+            this.TrackChanges(count);
+        }
+        finally
+        {
+            this._lock.ExitWriteLock();
+        }
+    }
+
+    public Hit? Get(string key, bool includeVector)
+    {
+        this._lock.EnterReadLock();
+        try
+        {
+            ObjectDisposedException.ThrowIf(this._disposed, this);
+
+            if (!this._keys.TryGetValue(key, out int slot)) { return null; }
+
+            Entry entry = this._entries[slot]!;
+            return new Hit(entry.Key, entry.Data, includeVector ? this.ReadVector(slot) : null, 0);
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    /// <summary>
+    /// Find the records closest to the query vector, sorted by relevance.
+    /// The graph search is approximate. When it doesn't return enough records, e.g. because the filter
+    /// excludes most of the candidates, the search falls back to comparing the query with all the records.
+    /// </summary>
+    /// <param name="query">Query vector</param>
+    /// <param name="count">Max number of records</param>
+    /// <param name="filter">Optional filter, applied to record key and data</param>
+    /// <param name="includeVectors">Whether to read and return the vectors</param>
+    /// <exception cref="ArgumentException">The query vector size doesn't match the collection vector size</exception>
+    public List<Hit> Search(ReadOnlyMemory<float> query, int count, Func<string, JsonElement, bool>? filter, bool includeVectors)
+    {
+        this._lock.EnterReadLock();
+        try
+        {
+            ObjectDisposedException.ThrowIf(this._disposed, this);
+
+            if (count < 1 || this._keys.Count == 0) { return []; }
+
+            if (query.Length != this._manifest.Dimensions)
+            {
+                throw new ArgumentException($"Query vector size {query.Length} doesn't match the collection vector size {this._manifest.Dimensions}");
+            }
+
+            float qNorm = Norm(query.Span);
+            float DistanceTo(int slot) => this.GetDistance(query.Span, qNorm, this.GetVectorSpan(slot), this._norms[slot]);
+
+            var hits = new List<Hit>(count);
+            foreach ((int slot, float distance) in this._graph.Search(DistanceTo, Math.Max(this._config.HnswEfSearch, count)))
+            {
+                if (hits.Count >= count) { break; }
+
+                if (this._entries[slot] is not { } entry) { continue; }
+
+                if (filter != null && !filter(entry.Key, entry.Data)) { continue; }
+
+                hits.Add(new Hit(entry.Key, entry.Data, includeVectors ? this.ReadVector(slot) : null, this.ToScore(distance)));
+            }
+
+            if (hits.Count < count && hits.Count < this._keys.Count)
+            {
+                hits = this.Scan(DistanceTo, count, filter, includeVectors);
+            }
+
+            return hits;
+        }
+        finally
+        {
+            this._lock.ExitReadLock();
+        }
+    }
+
+    /// <summary>
+    /// Save a snapshot, compacting the records log and saving the graph, so the graph doesn't need to be rebuilt when loading.
+    /// </summary>
+    public void Snapshot()
+    {
+        this._lock.EnterWriteLock();
+        try
+        {
+            if (!this._disposed) { this.SaveSnapshot(); }
+        }
+        finally
+        {
+            this._lock.ExitWriteLock();
+        }
+    }
+
+    /// <summary>
+    /// Close the collection and delete its files.
+    /// </summary>
+    public void DeleteFiles()
+    {
+        this._lock.EnterWriteLock();
+        try
+        {
+            this.CloseFiles();
+            this._disposed = true;
+            if (Directory.Exists(this._path)) { Directory.Delete(this._path, recursive: true); }
+        }
+        finally
+        {
+            this._lock.ExitWriteLock();
+        }
+    }
+
+    public void Dispose()
+    {
+        this._lock.EnterWriteLock();
+        try
+        {
+            if (this._disposed) { return; }
+
+            if (this._changes > 0) { this.SaveSnapshot(); }
+
+            this.CloseFiles();
+            this._disposed = true;
+        }
+        finally
+        {
+            this._lock.ExitWriteLock();
+        }
+    }
+
+    // Exact search, comparing the query with all the records
+    private List<Hit> Scan(Func<int, float> distanceTo, int count, Func<string, JsonElement, bool>? filter, bool includeVectors)
+    {
+        var top = new PriorityQueue<int, float>(Comparer<float>.Create((a, b) => b.CompareTo(a))); // farthest first
+        foreach (int slot in this._keys.Values)
+        {
+            float distance = distanceTo(slot);
+            if (top.Count >= count && top.TryPeek(out _, out float farthest) && distance >= farthest) { continue; }
+
+            Entry entry = this._entries[slot]!;
+            if (filter != null && !filter(entry.Key, entry.Data)) { continue; }
+
+            top.Enqueue(slot, distance);
+            if (top.Count > count) { top.Dequeue(); }
+        }
+
+        var hits = new List<Hit>(top.Count);
+        while (top.TryDequeue(out int slot, out float distance))
+        {
+            Entry entry = this._entries[slot]!;
+            hits.Add(new Hit(entry.Key, entry.Data, includeVectors ? this.ReadVector(slot) : null, this.ToScore(distance)));
+        }
+
+        hits.Reverse();
+        return hits;
+    }
+
+    private void AddToGraph(int slot)
+    {
+        float norm = this._norms[slot];
+        this._graph.Add(
+            x => this.GetDistance(this.GetVectorSpan(slot), norm, this.GetVectorSpan(x), this._norms[x]),
+            (a, b) => this.GetDistance(this.GetVectorSpan(a), this._norms[a], this.GetVectorSpan(b), this._norms[b]));
+    }
+
+    private void Load()
+    {
+        this.RecoverCompaction();
+
+        // Replay the records log
+        int slotCount = 0;
+        string recordsPath = Path.Combine(this._path, RecordsFile);
+        if (File.Exists(recordsPath))
+        {
+            foreach (string line in File.ReadLines(recordsPath))
+            {
+                if (string.IsNullOrWhiteSpace(line)) { continue; }
+
+                RecordLine? record;
+                try
+                {
+                    record = JsonSerializer.Deserialize<RecordLine>(line);
+                }
+                catch (JsonException)
+                {
+                    // Incomplete line written before a crash
+                    this._log.LogWarning("Skipping invalid line in {Path}", recordsPath);
+                    continue;
+                }
+
+                if (record == null) { continue; }
+
+                if (this._keys.Remove(record.Key, out int oldSlot)) { this._entries[oldSlot] = null; }
+
+                if (record.Deleted || record.Slot is not { } slot) { continue; }
+
+                while (this._entries.Count <= slot) { this._entries.Add(null); }
+
+                this._entries[slot] = new Entry(record.Key, record.Data ?? default);
+                this._keys[record.Key] = slot;
+                slotCount = Math.Max(slotCount, slot + 1);
+            }
+        }
+
+        // Load the graph snapshot
+        string graphPath = Path.Combine(this._path, GraphFile);
+        if (File.Exists(graphPath))
+        {
+            using var reader = new BinaryReader(File.OpenRead(graphPath));
+            this._graph.Read(reader);
+        }
+
+        slotCount = Math.Max(slotCount, this._graph.Count);
+        while (this._entries.Count < slotCount) { this._entries.Add(null); }
+
+        if (this._manifest.Dimensions == 0) { return; }
+
+        this.OpenFiles();
+        for (int slot = 0; slot < slotCount; slot++)
+        {
+            this._norms.Add(Norm(this.GetVectorSpan(slot)));
+        }
+
+        // Index the vectors added after the last snapshot
+        int missing = slotCount - this._graph.Count;
+        if (missing > 0)
+        {
+            this._log.LogInformation("Indexing {Count} vectors not included in the last snapshot of {Path}", missing, this._path);
+            for (int slot = this._graph.Count; slot < slotCount; slot++) { this.AddToGraph(slot); }
+
+            this._changes = missing;
+        }
+    }
+
+    private void SaveSnapshot()
+    {
+        int unused = this._entries.Count - this._keys.Count;
+        if (this._vectors != null && unused > 0 && unused >= this._entries.Count * this._config.CompactionThreshold)
+        {
+            this.Compact();
+            return;
+        }
+
+        this._vectors?.Flush();
+
+        // Compact the records log, keeping only the current version of each record
+        string recordsPath = Path.Combine(this._path, RecordsFile);
+        this._records?.Dispose();
+        WriteRecords(recordsPath + ".tmp", this._entries);
+        File.Move(recordsPath + ".tmp", recordsPath, overwrite: true);
+        this._records = new StreamWriter(recordsPath, append: true);
+
+        string graphPath = Path.Combine(this._path, GraphFile);
+        WriteGraph(graphPath + ".tmp", this._graph);
+        File.Move(graphPath + ".tmp", graphPath, overwrite: true);
+
+        this._log.LogDebug("Snapshot saved, {Path}, {Count} records", this._path, this._keys.Count);
+        this._changes = 0;
+    }
+
+    /// <summary>
+    /// Save a snapshot removing the slots of deleted and updated records: the current vectors are copied to a new
+    /// file, one after the other, and the graph is rebuilt with only these vectors, without the unused nodes.
+    /// The new files are written next to the current ones, and a marker file is created before replacing them,
+    /// so that a compaction interrupted while replacing the files is completed when loading, see RecoverCompaction.
+    /// </summary>
+    private void Compact()
+    {
+        var clock = Stopwatch.StartNew();
+        List<int> slots = Enumerable.Range(0, this._entries.Count).Where(slot => this._entries[slot] != null).ToList();
+        List<Entry?> entries = slots.Select(slot => this._entries[slot]).ToList();
+        List<float> norms = slots.Select(slot => this._norms[slot]).ToList();
+
+        string vectorsPath = Path.Combine(this._path, VectorsFile);
+        using (var stream = new FileStream(vectorsPath + ".tmp", FileMode.Create, FileAccess.Write))
+        {
+            foreach (int slot in slots) { stream.Write(MemoryMarshal.AsBytes(this.GetVectorSpan(slot))); }
+        }
+
+        string recordsPath = Path.Combine(this._path, RecordsFile);
+        WriteRecords(recordsPath + ".tmp", entries);
+
+        // Rebuild the graph, reading the vectors from the current file, i.e. using the current slots
+        var graph = new HnswGraph(this._config.HnswM, this._config.HnswEfConstruction);
+        for (int i = 0; i < slots.Count; i++)
+        {
+            int slot = slots[i];
+            float norm = norms[i];
+            graph.Add(
+                x => this.GetDistance(this.GetVectorSpan(slot), norm, this.GetVectorSpan(slots[x]), norms[x]),
+                (a, b) => this.GetDistance(this.GetVectorSpan(slots[a]), norms[a], this.GetVectorSpan(slots[b]), norms[b]));
+        }
+
+        string graphPath = Path.Combine(this._path, GraphFile);
+        WriteGraph(graphPath + ".tmp", graph);
+
+        // Replace the files
+        string markerPath = Path.Combine(this._path, CompactionFile);
+        File.WriteAllText(markerPath, string.Empty);
+        this.CloseFiles();
+        File.Move(vectorsPath + ".tmp", vectorsPath, overwrite: true);
+        File.Move(recordsPath + ".tmp", recordsPath, overwrite: true);
+        File.Move(graphPath + ".tmp", graphPath, overwrite: true);
+        File.Delete(markerPath);
+
+        int unused = this._entries.Count - slots.Count;
+        this._entries.Clear();
+        this._entries.AddRange(entries);
+        this._norms.Clear();
+        this._norms.AddRange(norms);
+        for (int slot = 0; slot < entries.Count; slot++) { this._keys[entries[slot]!.Key] = slot; }
+
+        this._graph = graph;
+        this.OpenFiles();
+
+        this._log.LogInformation("Snapshot saved, {Path}, {Count} records, removed {Unused} unused slots in {Time} ms",
+            this._path, this._keys.Count, unused, clock.ElapsedMilliseconds);
+        this._changes = 0;
+    }
+
+    // Complete a compaction interrupted while replacing the files, or discard the files of an incomplete one
+    private void RecoverCompaction()
+    {
+        string markerPath = Path.Combine(this._path, CompactionFile);
+        bool completed = File.Exists(markerPath);
+        foreach (string file in new[] { VectorsFile, RecordsFile, GraphFile })
+        {
+            string path = Path.Combine(this._path, file);
+            if (!File.Exists(path + ".tmp")) { continue; }
+
+            if (completed) { File.Move(path + ".tmp", path, overwrite: true); }
+            else { File.Delete(path + ".tmp"); }
+        }
+
+        if (completed)
+        {
+            this._log.LogWarning("Completed the compaction of {Path} interrupted while replacing the files", this._path);
+            File.Delete(markerPath);
+        }
+    }
+
+    private static void WriteRecords(string path, List<Entry?> entries)
+    {
+        using var writer = new StreamWriter(path, append: false);
+        for (int slot = 0; slot < entries.Count; slot++)
+        {
+            if (entries[slot] is not { } entry) { continue; }
+
+            writer.WriteLine(JsonSerializer.Serialize(new RecordLine { Slot = slot, Key = entry.Key, Data = entry.Data }));
+        }
+    }
+
+    private static void WriteGraph(string path, HnswGraph graph)
+    {
+        using var writer = new BinaryWriter(File.Create(path));
+        graph.Write(writer);
+    }
+
+    private void TrackChanges(int count)
+    {
+        this._changes += count;
+        if (this._changes >= this._config.SnapshotEveryChanges) { this.SaveSnapshot(); }
+    }
+
+    private void AppendRecord(RecordLine record)
+    {
+        this._records!.WriteLine(JsonSerializer.Serialize(record));
+    }
+
+    private void SaveManifest()
+    {
+        string manifestPath = Path.Combine(this._path, ManifestFile);
+        File.WriteAllText(manifestPath + ".tmp", JsonSerializer.Serialize(this._manifest));
+        File.Move(manifestPath + ".tmp", manifestPath, overwrite: true);
+    }
+
+    private void OpenFiles()
+    {
+        this._records ??= new StreamWriter(Path.Combine(this._path, RecordsFile), append: true);
+
+        if (this._manifest.Dimensions == 0 || this._vectors != null) { return; }
+
+        var file = new FileInfo(Path.Combine(this._path, VectorsFile));
+        long slots = file.Exists ? file.Length / this.GetOffset(1) : 0;
+        this.MapVectors(Math.Max(slots, InitialCapacity));
+    }
+
+    private void CloseFiles()
+    {
+        this._records?.Dispose();
+        this._records = null;
+        this.UnmapVectors();
+    }
+
+    // Grow the vectors file, doubling its size to limit the number of remaps
+    private void EnsureCapacity(long slots)
+    {
+        if (slots <= this._capacity) { return; }
+
+        this.UnmapVectors();
+        this.MapVectors(Math.Max(slots, this._capacity * 2));
+    }
+
+    private unsafe void MapVectors(long slots)
+    {
+        this._file = MemoryMappedFile.CreateFromFile(
+            Path.Combine(this._path, VectorsFile), FileMode.OpenOrCreate, mapName: null, this.GetOffset(slots), MemoryMappedFileAccess.ReadWrite);
+        this._vectors = this._file.CreateViewAccessor(0, 0, MemoryMappedFileAccess.ReadWrite);
+        this._capacity = slots;
+
+        // Note: reading with the accessor copies each vector, and is much slower than reading the memory directly
+        byte* pointer = null;
+        this._vectors.SafeMemoryMappedViewHandle.AcquirePointer(ref pointer);
+        this._pointer = pointer + this._vectors.PointerOffset;
+    }
+
+    private unsafe void UnmapVectors()
+    {
+        if (this._vectors == null) { return; }
+
+        this._vectors.Flush();
+        this._vectors.SafeMemoryMappedViewHandle.ReleasePointer();
+        this._pointer = null;
+        this._vectors.Dispose();
+        this._vectors = null;
+        this._file?.Dispose();
+        this._file = null;
+    }
+
+    private long GetOffset(long slot)
+    {
+        return slot * this._manifest.Dimensions * sizeof(float);
+    }
+
+    private float[] ReadVector(int slot)
+    {
+        return this.GetVectorSpan(slot).ToArray();
+    }
+
+    // Vector in the mapped file, valid until the file is remapped, i.e. while holding the lock
+    private unsafe Span<float> GetVectorSpan(int slot)
+    {
+        return new Span<float>(this._pointer + this.GetOffset(slot), this._manifest.Dimensions);
+    }
+
+    // Distance used to sort the results, the lower the closer
+    private float GetDistance(ReadOnlySpan<float> a, float normA, ReadOnlySpan<float> b, float normB)
+    {
+        switch (this._distance)
+        {
+            case VectorDistanceFunctions.CosineSimilarity:
+            case VectorDistanceFunctions.CosineDistance:
+                float norms = normA * normB;
+                return norms == 0 ? 1 : 1 - (Dot(a, b) / norms);
+
+            case VectorDistanceFunctions.DotProductSimilarity:
+            case VectorDistanceFunctions.NegativeDotProductSimilarity:
+                return -Dot(a, b);
+
+            case VectorDistanceFunctions.EuclideanDistance:
+                return MathF.Sqrt(SquaredDistance(a, b));
+
+            case VectorDistanceFunctions.EuclideanSquaredDistance:
+                return SquaredDistance(a, b);
+
+            case VectorDistanceFunctions.ManhattanDistance:
+                float sum = 0;
+                for (int i = 0; i < a.Length; i++) { sum += MathF.Abs(a[i] - b[i]); }
+
+                return sum;
+
+            case VectorDistanceFunctions.Hamming:
+                int count = 0;
+                for (int i = 0; i < a.Length; i++) { count += a[i] != b[i] ? 1 : 0; }
+
+                return count;
+
+            default:
+                throw new NotSupportedException($"Distance function {this._distance:G} not supported");
+        }
+    }
+
+    // Score returned to the client, using the same scale of the other vector stores
+    private float ToScore(float distance)
+    {
+        return this._distance switch
+        {
+            VectorDistanceFunctions.CosineSimilarity => 1 - distance,
+            VectorDistanceFunctions.DotProductSimilarity => -distance,
+            _ => distance
+        };
+    }
+
+    private static VectorDistanceFunctions ParseDistanceFunction(string? value)
+    {
+        if (string.IsNullOrWhiteSpace(value)) { return VectorDistanceFunctions.CosineSimilarity; }
+
+        if (Enum.TryParse(value, ignoreCase: true, out VectorDistanceFunctions result) && result != VectorDistanceFunctions.Undefined)
+        {
+            return result;
+        }
+
+        throw new NotSupportedException($"Distance function '{value}' not supported");
+    }
+
+    private static float Dot(ReadOnlySpan<float> a, ReadOnlySpan<float> b)
+    {
+        ReadOnlySpan<Vector<float>> va = MemoryMarshal.Cast<float, Vector<float>>(a);
+        ReadOnlySpan<Vector<float>> vb = MemoryMarshal.Cast<float, Vector<float>>(b);
+        var sum = Vector<float>.Zero;
+        for (int i = 0; i < va.Length; i++) { sum += va[i] * vb[i]; }
+
+        float result = Vector.Sum(sum);
+        for (int i = va.Length * Vector<float>.Count; i < a.Length; i++) { result += a[i] * b[i]; }
+
+        return result;
+    }
+
+    private static float SquaredDistance(ReadOnlySpan<float> a, ReadOnlySpan<float> b)
+    {
+        ReadOnlySpan<Vector<float>> va = MemoryMarshal.Cast<float, Vector<float>>(a);
+        ReadOnlySpan<Vector<float>> vb = MemoryMarshal.Cast<float, Vector<float>>(b);
+        var sum = Vector<float>.Zero;
+        for (int i = 0; i < va.Length; i++)
+        {
+            Vector<float> d = va[i] - vb[i];
+            sum += d * d;
+        }
+
+        float result = Vector.Sum(sum);
+        for (int i = va.Length * Vector<float>.Count; i < a.Length; i++)
+        {
+            float d = a[i] - b[i];
+            result += d * d;
+        }
+
+        return result;
+    }
+
+    private static float Norm(ReadOnlySpan<float> a)
+    {
+        return MathF.Sqrt(Dot(a, a));
+    }
+
+    private sealed record Entry(string Key, JsonElement Data);
+
+    private sealed class Manifest
+    {
+        [JsonPropertyName("dimensions")]
+        public int Dimensions { get; set; }
+
+        [JsonPropertyName("distanceFunction")]
+        public string DistanceFunction { get; set; } = string.Empty;
+    }
+
+    private sealed class RecordLine
+    {
+        [JsonPropertyName("slot")]
+        [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+        public int? Slot { get; set; }
+
+        [JsonPropertyName("key")]
+        public string Key { get; set; } = string.Empty;
+
+        [JsonPropertyName("data")]
+        [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingNull)]
+        public JsonElement? Data { get; set; }
+
+        [JsonPropertyName("deleted")]
+        [JsonIgnore(Condition = JsonIgnoreCondition.WhenWritingDefault)]
+        public bool Deleted { get; set; }
+    }
+}
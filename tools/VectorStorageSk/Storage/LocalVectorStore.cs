@@ -0,0 +1,124 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Runtime.CompilerServices;
+using System.Text.RegularExpressions;
+using Microsoft.Extensions.Logging.Abstractions;
+using Microsoft.Extensions.VectorData;
+
+namespace VectorStorageSk.Storage;
+
+/// <summary>
+/// Vector store persisted on the local file system, for single node deployments and offline tests,
+/// not requiring external services. Each collection is stored in a subdirectory, see LocalVectorIndex.
+/// Collections are loaded on first use and kept in memory, except for the vectors which are memory mapped.
+/// </summary>
+internal sealed class LocalVectorStore : IVectorStore, IDisposable
+{
+    private readonly LocalVectorStoreConfig _config;
+    private readonly ILogger<LocalVectorStore> _log;
+    private readonly Dictionary<string, LocalVectorIndex> _collections = new(StringComparer.Ordinal);
+    private readonly object _lock = new();
+
+    public LocalVectorStore(LocalVectorStoreConfig config, ILoggerFactory? lf = null)
+    {
+        this._config = config;
+        this._log = (lf ?? NullLoggerFactory.Instance).CreateLogger<LocalVectorStore>();
+    }
+
+    public IVectorStoreRecordCollection<TKey, TRecord> GetCollection<TKey, TRecord>(string name, VectorStoreRecordDefinition? vectorStoreRecordDefinition = null)
+        where TKey : notnull
+    {
+        return new LocalVectorStoreRecordCollection<TKey, TRecord>(this, name, vectorStoreRecordDefinition);
+    }
+
+    public async IAsyncEnumerable<string> ListCollectionNamesAsync([EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        if (!Directory.Exists(this._config.Directory)) { yield break; }
+
+        foreach (string path in Directory.EnumerateDirectories(this._config.Directory))
+        {
+            cancellationToken.ThrowIfCancellationRequested();
+            if (LocalVectorIndex.Exists(path)) { yield return Path.GetFileName(path); }
+        }
+
+        await Task.CompletedTask.ConfigureAwait(false);
+    }
+
+    public object? GetService(Type serviceType, object? serviceKey = null)
+    {
+        ArgumentNullException.ThrowIfNull(serviceType);
+        return serviceKey == null && serviceType.IsInstanceOfType(this) ? this : null;
+    }
+
+    public void Dispose()
+    {
+        lock (this._lock)
+        {
+            foreach (LocalVectorIndex collection in this._collections.Values) { collection.Dispose(); }
+
+            this._collections.Clear();
+        }
+    }
+
+    /// <summary>
+    /// Get a collection, loading it from disk on first use. Returns null if the collection doesn't exist.
+    /// </summary>
+    internal LocalVectorIndex? GetIndex(string name)
+    {
+        string path = this.GetPath(name);
+        lock (this._lock)
+        {
+            if (this._collections.TryGetValue(name, out LocalVectorIndex? collection)) { return collection; }
+
+            if (!LocalVectorIndex.Exists(path)) { return null; }
+
+            this._log.LogInformation("Loading collection {CollectionName} from {Path}", name, path);
+            collection = LocalVectorIndex.Open(path, this._config, this._log);
+            this._collections[name] = collection;
+            return collection;
+        }
+    }
+
+    /// <summary>
+    /// Create a collection, returning false if it already exists.
+    /// </summary>
+    /// <param name="name">Collection name</param>
+    /// <param name="dimensions">Vector size, zero to use the size of the first vector stored</param>
+    /// <param name="distanceFunction">Distance function, see VectorDistanceFunctions</param>
+    internal bool CreateIndex(string name, int dimensions, string? distanceFunction)
+    {
+        string path = this.GetPath(name);
+        lock (this._lock)
+        {
+            if (this._collections.ContainsKey(name) || LocalVectorIndex.Exists(path)) { return false; }
+
+            this._log.LogInformation("Creating collection {CollectionName} in {Path}", name, path);
+            this._collections[name] = LocalVectorIndex.Create(path, dimensions, distanceFunction, this._config, this._log);
+            return true;
+        }
+    }
+
+    internal void DeleteIndex(string name)
+    {
+        LocalVectorIndex? collection = this.GetIndex(name);
+        if (collection == null) { return; }
+
+        lock (this._lock)
+        {
+            this._log.LogInformation("Deleting collection {CollectionName}", name);
+            this._collections.Remove(name);
+            collection.DeleteFiles();
+        }
+    }
+
+    private string GetPath(string name)
+    {
+        // Collection names are used as directory names
+        if (!Regex.IsMatch(name, "^[a-zA-Z0-9][a-zA-Z0-9_.-]{0,127}$"))
+        {
+            throw new ArgumentException($"Invalid collection name '{name}', only letters, digits, '_', '-' and '.' are allowed", nameof(name));
+        }
+
+        return Path.Combine(this._config.Directory, name);
+    }
+}
@@ -0,0 +1,79 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+namespace VectorStorageSk.Storage;
+
+internal sealed class LocalVectorStoreConfig
+{
+    /// <summary>
+    /// Directory where collections are stored, one subdirectory per collection.
+    /// Relative paths are relative to the current directory.
+    /// </summary>
+    public string Directory { get; set; } = "data/vectors";
+
+    /// <summary>
+    /// Max number of links per node in the HNSW graph (twice on the lowest level).
+    /// Higher values improve recall, using more memory and slowing down inserts.
+    /// </summary>
+    public int HnswM { get; set; } = 16;
+
+    /// <summary>
+    /// Number of candidates explored when adding a node to the HNSW graph.
+    /// Higher values improve the quality of the graph, slowing down inserts.
+    /// </summary>
+    public int HnswEfConstruction { get; set; } = 200;
+
+    /// <summary>
+    /// Min number of candidates explored when searching, increased automatically when asking for more results.
+    /// Higher values improve recall, slowing down searches.
+    /// </summary>
+    public int HnswEfSearch { get; set; } = 100;
+
+    /// <summary>
+    /// Number of inserts/deletes after which a snapshot is saved, compacting the records log and saving the graph,
+    /// so that the graph doesn't need to be rebuilt on restart. Snapshots are also saved on shutdown.
+    /// </summary>
+    public int SnapshotEveryChanges { get; set; } = 10000;
+
+    /// <summary>
+    /// Fraction of unused vector slots, left by deleted and updated records, above which a snapshot compacts
+    /// the vectors file and rebuilds the graph without the unused slots. Rebuilding the graph takes about as
+    /// long as inserting all the records again, so low values slow down collections updated often.
+    /// </summary>
+    public double CompactionThreshold { get; set; } = 0.25;
+
+    public bool IsValid(ILogger? log = null)
+    {
+        if (string.IsNullOrWhiteSpace(this.Directory))
+        {
+            log?.LogError("Local vector store directory is empty");
+            return false;
+        }
+
+        if (this.HnswM < 2)
+        {
+            log?.LogError("Local vector store HnswM must be greater than 1");
+            return false;
+        }
+
+        if (this.HnswEfConstruction < 1 || this.HnswEfSearch < 1)
+        {
+            log?.LogError("Local vector store HnswEfConstruction and HnswEfSearch must be greater than 0");
+            return false;
+        }
+
+        if (this.SnapshotEveryChanges < 1)
+        {
+            log?.LogError("Local vector store SnapshotEveryChanges must be greater than 0");
+            return false;
+        }
+
+        if (this.CompactionThreshold is <= 0 or > 1)
+        {
+            log?.LogError("Local vector store CompactionThreshold must be greater than 0 and not greater than 1");
+            return false;
+        }
+
+        log?.LogDebug("Local vector store configuration is valid");
+        return true;
+    }
+}
@@ -0,0 +1,299 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Globalization;
+using System.Reflection;
+using System.Runtime.CompilerServices;
+using System.Text.Json;
+using System.Text.Json.Nodes;
+using System.Text.Json.Serialization;
+using Microsoft.Extensions.VectorData;
+
+namespace VectorStorageSk.Storage;
+
+/// <summary>
+/// Collection of a LocalVectorStore, mapping records to the key, data and vector stored in LocalVectorIndex.
+/// Records can be VectorStoreGenericDataModel or POCO classes like MemoryRecord, with one vector per record.
+/// Data is stored as JSON, so records written with the generic model can be read with a POCO class,
+/// matching field names case-insensitively.
+/// Filters are evaluated in memory, compiling the filter expressions, e.g. created by ODataFilterTranslator.
+/// </summary>
+internal sealed class LocalVectorStoreRecordCollection<TKey, TRecord> : IVectorStoreRecordCollection<TKey, TRecord>
+    where TKey : notnull
+{
+    private static readonly bool s_isGenericModel = typeof(TRecord) == typeof(VectorStoreGenericDataModel<TKey>);
+
+    private static readonly PropertyInfo? s_keyProperty = typeof(TRecord).GetProperties(BindingFlags.Public | BindingFlags.Instance)
+        .FirstOrDefault(p => p.GetCustomAttribute<VectorStoreRecordKeyAttribute>() != null);
+
+    private static readonly PropertyInfo? s_vectorProperty = typeof(TRecord).GetProperties(BindingFlags.Public | BindingFlags.Instance)
+        .FirstOrDefault(p => p.GetCustomAttribute<VectorStoreRecordVectorAttribute>() != null);
+
+    private static readonly JsonSerializerOptions s_jsonOptions = new(JsonSerializerDefaults.Web);
+
+    private readonly LocalVectorStore _store;
+    private readonly VectorStoreRecordVectorProperty? _vectorProperty;
+
+    public LocalVectorStoreRecordCollection(LocalVectorStore store, string name, VectorStoreRecordDefinition? definition)
+    {
+        if (!s_isGenericModel && (s_keyProperty == null || s_vectorProperty == null))
+        {
+            throw new NotSupportedException($"{typeof(TRecord).Name} must have a key property and a vector property");
+        }
+
+        this._store = store;
+        this.CollectionName = name;
+        this._vectorProperty = definition?.Properties.OfType<VectorStoreRecordVectorProperty>().FirstOrDefault();
+    }
+
+    public string CollectionName { get; }
+
+    public Task<bool> CollectionExistsAsync(CancellationToken cancellationToken = default)
+    {
+        return Task.FromResult(this._store.GetIndex(this.CollectionName) != null);
+    }
+
+    public Task CreateCollectionAsync(CancellationToken cancellationToken = default)
+    {
+        if (!this.CreateIndex())
+        {
+            throw new VectorStoreOperationException($"Collection '{this.CollectionName}' already exists");
+        }
+
+        return Task.CompletedTask;
+    }
+
+    public Task CreateCollectionIfNotExistsAsync(CancellationToken cancellationToken = default)
+    {
+        this.CreateIndex();
+        return Task.CompletedTask;
+    }
+
+    public Task DeleteCollectionAsync(CancellationToken cancellationToken = default)
+    {
+        this._store.DeleteIndex(this.CollectionName);
+        return Task.CompletedTask;
+    }
+
+    public Task<TRecord?> GetAsync(TKey key, GetRecordOptions? options = default, CancellationToken cancellationToken = default)
+    {
+        LocalVectorIndex.Hit? hit = this.GetIndexOrThrow().Get(KeyToString(key), options?.IncludeVectors ?? false);
+        return Task.FromResult<TRecord?>(hit == null ? default : ToRecord(hit, this._vectorProperty));
+    }
+
+    public async IAsyncEnumerable<TRecord> GetBatchAsync(
+        IEnumerable<TKey> keys, GetRecordOptions? options = default, [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        LocalVectorIndex index = this.GetIndexOrThrow();
+        foreach (TKey key in keys)
+        {
+            cancellationToken.ThrowIfCancellationRequested();
+            LocalVectorIndex.Hit? hit = index.Get(KeyToString(key), options?.IncludeVectors ?? false);
+            if (hit != null) { yield return ToRecord(hit, this._vectorProperty); }
+        }
+
+        await Task.CompletedTask.ConfigureAwait(false);
+    }
+
+    public Task DeleteAsync(TKey key, CancellationToken cancellationToken = default)
+    {
+        return this.DeleteBatchAsync([key], cancellationToken);
+    }
+
+    public Task DeleteBatchAsync(IEnumerable<TKey> keys, CancellationToken cancellationToken = default)
+    {
+        this.GetIndexOrThrow().Delete(keys.Select(x => KeyToString(x)));
+        return Task.CompletedTask;
+    }
+
+    public async Task<TKey> UpsertAsync(TRecord record, CancellationToken cancellationToken = default)
+    {
+        TKey result = default!;
+        await foreach (TKey key in this.UpsertBatchAsync([record], cancellationToken).ConfigureAwait(false)) { result = key; }
+
+        return result;
+    }
+
+    public async IAsyncEnumerable<TKey> UpsertBatchAsync(IEnumerable<TRecord> records, [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        LocalVectorIndex index = this.GetIndexOrThrow();
+
+        var keys = new List<TKey>();
+        var values = new List<(string key, JsonElement data, ReadOnlyMemory<float> vector)>();
+        try
+        {
+            foreach (TRecord record in records)
+            {
+                (TKey key, JsonElement data, ReadOnlyMemory<float> vector) = FromRecord(record);
+                keys.Add(key);
+                values.Add((KeyToString(key), data, vector));
+            }
+
+            index.Upsert(values);
+        }
+        catch (Exception e) when (e is ArgumentException or NotSupportedException)
+        {
+            throw new VectorStoreOperationException(e.Message, e);
+        }
+
+        foreach (TKey key in keys)
+        {
+            cancellationToken.ThrowIfCancellationRequested();
+            yield return key;
+        }
+
+        await Task.CompletedTask.ConfigureAwait(false);
+    }
+
+    public Task<VectorSearchResults<TRecord>> VectorizedSearchAsync<TVector>(
+        TVector vector, VectorSearchOptions<TRecord>? options = default, CancellationToken cancellationToken = default)
+    {
+        LocalVectorIndex index = this.GetIndexOrThrow();
+        options ??= new VectorSearchOptions<TRecord>();
+
+        Func<string, JsonElement, bool>? filter = null;
+        if (options.Filter != null)
+        {
+            Func<TRecord, bool> predicate = options.Filter.Compile();
+            filter = (key, data) => predicate(ToRecord(new LocalVectorIndex.Hit(key, data, null, 0), this._vectorProperty));
+        }
+
+        List<LocalVectorIndex.Hit> hits;
+        try
+        {
+            hits = index.Search(ToVector(vector), options.Skip + options.Top, filter, options.IncludeVectors);
+        }
+        catch (Exception e) when (e is ArgumentException or NotSupportedException)
+        {
+            throw new VectorStoreOperationException(e.Message, e);
+        }
+
+        var results = hits.Skip(options.Skip)
+            .Select(x => new VectorSearchResult<TRecord>(ToRecord(x, this._vectorProperty), x.Score))
+            .ToList();
+
+        return Task.FromResult(new VectorSearchResults<TRecord>(ToAsyncEnumerable(results)));
+    }
+
+    public object? GetService(Type serviceType, object? serviceKey = null)
+    {
+        ArgumentNullException.ThrowIfNull(serviceType);
+        return serviceKey == null && serviceType.IsInstanceOfType(this) ? this : null;
+    }
+
+    private bool CreateIndex()
+    {
+        try
+        {
+            return this._store.CreateIndex(this.CollectionName, this._vectorProperty?.Dimensions ?? 0, this._vectorProperty?.DistanceFunction);
+        }
+        catch (NotSupportedException e)
+        {
+            throw new VectorStoreOperationException(e.Message, e);
+        }
+    }
+
+    private LocalVectorIndex GetIndexOrThrow()
+    {
+        return this._store.GetIndex(this.CollectionName)
+               ?? throw new VectorStoreOperationException($"Collection '{this.CollectionName}' does not exist");
+    }
+
+    private static (TKey key, JsonElement data, ReadOnlyMemory<float> vector) FromRecord(TRecord record)
+    {
+        ArgumentNullException.ThrowIfNull(record);
+
+        if (record is VectorStoreGenericDataModel<TKey> genericRecord)
+        {
+            if (genericRecord.Vectors.Count != 1) { throw new NotSupportedException("Records must have one vector"); }
+
+            return (genericRecord.Key, JsonSerializer.SerializeToElement(genericRecord.Data, s_jsonOptions), ToVector(genericRecord.Vectors.Values.First()));
+        }
+
+        object key = s_keyProperty!.GetValue(record) ?? throw new ArgumentException("Record key not set");
+        JsonObject data = JsonSerializer.SerializeToNode(record, s_jsonOptions)!.AsObject();
+        data.Remove(GetJsonName(s_keyProperty));
+        data.Remove(GetJsonName(s_vectorProperty!));
+
+        return ((TKey)key, JsonSerializer.SerializeToElement(data, s_jsonOptions), ToVector(s_vectorProperty!.GetValue(record)));
+    }
+
+    private static TRecord ToRecord(LocalVectorIndex.Hit hit, VectorStoreRecordVectorProperty? vectorProperty)
+    {
+        if (s_isGenericModel)
+        {
+            var genericRecord = new VectorStoreGenericDataModel<TKey>((TKey)ParseKey(hit.Key, typeof(TKey)))
+            {
+                Data = hit.Data.EnumerateObject().ToDictionary(x => x.Name, x => (object?)x.Value),
+                Vectors = hit.Vector == null
+                    ? new Dictionary<string, object?>()
+                    : new Dictionary<string, object?> { [vectorProperty?.DataModelPropertyName ?? "vector"] = new Embedding(hit.Vector) }
+            };
+
+            return (TRecord)(object)genericRecord;
+        }
+
+        TRecord record;
+        try
+        {
+            record = hit.Data.Deserialize<TRecord>(s_jsonOptions)!;
+        }
+        catch (JsonException e)
+        {
+            throw new VectorStoreRecordMappingException($"Unable to read record '{hit.Key}' as {typeof(TRecord).Name}", e);
+        }
+
+        s_keyProperty!.SetValue(record, ParseKey(hit.Key, s_keyProperty.PropertyType));
+        if (hit.Vector != null)
+        {
+            s_vectorProperty!.SetValue(record, s_vectorProperty.PropertyType == typeof(float[]) ? hit.Vector : new Embedding(hit.Vector));
+        }
+
+        return record;
+    }
+
+    private static ReadOnlyMemory<float> ToVector(object? vector)
+    {
+        return vector switch
+        {
+            ReadOnlyMemory<float> x => x,
+            float[] x => x,
+            IEnumerable<float> x => x.ToArray(),
+            null => throw new ArgumentException("Record vector not set"),
+            _ => throw new NotSupportedException($"Vector type {vector.GetType().Name} not supported, use ReadOnlyMemory<float> or float[]")
+        };
+    }
+
+    private static string KeyToString(object key)
+    {
+        return key switch
+        {
+            string x => x,
+            Guid x => x.ToString("D"),
+            IFormattable x => x.ToString(null, CultureInfo.InvariantCulture),
+            _ => key.ToString() ?? string.Empty
+        };
+    }
+
+    private static object ParseKey(string key, Type type)
+    {
+        if (type == typeof(string)) { return key; }
+
+        if (type == typeof(Guid)) { return Guid.Parse(key); }
+
+        return Convert.ChangeType(key, type, CultureInfo.InvariantCulture);
+    }
+
+    private static string GetJsonName(PropertyInfo property)
+    {
+        return property.GetCustomAttribute<JsonPropertyNameAttribute>()?.Name
+               ?? s_jsonOptions.PropertyNamingPolicy?.ConvertName(property.Name)
+               ?? property.Name;
+    }
+
+    private static async IAsyncEnumerable<VectorSearchResult<TRecord>> ToAsyncEnumerable(List<VectorSearchResult<TRecord>> results)
+    {
+        foreach (VectorSearchResult<TRecord> x in results) { yield return x; }
+
+        await Task.CompletedTask.ConfigureAwait(false);
+    }
+}
@@ -0,0 +1,116 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json;
+using CommonDotNet.Embeddings;
+using VectorStorageSk.Models;
+
+namespace VectorStorageSk.Storage;
+
+/// <summary>
+/// Convert JSON values to record fields, preparing the conversion of each field once per schema,
+/// rather than deserializing each value to a dictionary and checking the type of each field.
+/// Fields not set in a value get a default value, to avoid nulls which cause SQL exceptions.
+/// </summary>
+internal sealed class RecordConverter
+{
+    private readonly FieldConverter[] _fields;
+
+    public RecordConverter(List<FieldDefinition> fields)
+    {
+        // Note: clients do/might not set primary keys, asking to auto-generate them
+        this.IdFieldName = fields.LastOrDefault(f => f.Type == FieldTypes.PrimaryKey)?.Name ?? string.Empty;
+        this._fields = fields.Select(GetConverter).OfType<FieldConverter>().ToArray();
+    }
+
+    /// <summary>
+    /// Name of the primary key field, set by the caller.
+    /// </summary>
+    public string IdFieldName { get; }
+
+    /// <summary>
+    /// Convert a JSON object to the data fields and the vectors of a record.
+    /// </summary>
+    /// <exception cref="JsonException">The value is not a JSON object, or a field value has the wrong type</exception>
+    /// <exception cref="FormatException">An encoded vector is not valid</exception>
+    public (Dictionary<string, object?> data, Dictionary<string, object?> vectors) Convert(JsonElement value)
+    {
+        if (value.ValueKind != JsonValueKind.Object) { throw new JsonException("The record is not a valid JSON object"); }
+
+        var data = new Dictionary<string, object?>(this._fields.Length);
+        var vectors = new Dictionary<string, object?>();
+        foreach (FieldConverter field in this._fields)
+        {
+            object? fieldValue = value.TryGetProperty(field.Name, out JsonElement x) ? field.Convert(x) : field.GetDefault();
+            if (field.IsVector)
+            {
+                vectors[field.Name] = fieldValue;
+            }
+            else
+            {
+                data[field.Name] = fieldValue;
+            }
+        }
+
+        return (data, vectors);
+    }
+
+    private static FieldConverter? GetConverter(FieldDefinition field)
+    {
+        switch (field.Type)
+        {
+            case FieldTypes.Vector:
+                // Note: encoded vectors are decoded directly, see EmbeddingEncoding
+                return new FieldConverter(field.Name, true,
+                    x => x.ValueKind == JsonValueKind.String ? new Embedding(EmbeddingEncoding.Decode(x.GetString()!)) : x.Deserialize<Embedding>(),
+                    () => new Embedding(new float[field.VectorSize ?? 1]));
+
+            case FieldTypes.Text:
+                return new FieldConverter(field.Name, false, x => x.Deserialize<string>(), () => string.Empty);
+
+            case FieldTypes.Bool:
+                return new FieldConverter(field.Name, false, x =>
+                {
+                    try
+                    {
+                        return x.Deserialize<bool>();
+                    }
+                    catch (JsonException)
+                    {
+                        // Note: value validated earlier in the model
+                        return YamlExtensions.AsBoolean(x);
+                    }
+                }, () => false);
+
+            case FieldTypes.Int:
+                return new FieldConverter(field.Name, false, x => x.Deserialize<int>(), () => 0);
+
+            case FieldTypes.Number:
+                return new FieldConverter(field.Name, false, x => x.Deserialize<float>(), () => 0f);
+
+            case FieldTypes.DateTime:
+                return new FieldConverter(field.Name, false,
+                    x => x.Deserialize<DateTimeOffset>().ToUnixTimeMilliseconds(),
+                    () => DateTimeOffset.UtcNow.ToUnixTimeMilliseconds());
+
+            case FieldTypes.Object:
+                return new FieldConverter(field.Name, false, x => JsonSerializer.Serialize(x), () => new object());
+
+            case FieldTypes.ListOfNumber:
+                return new FieldConverter(field.Name, false, x => x.Deserialize<List<float>>(), () => new List<float>());
+
+            case FieldTypes.ListOfText:
+                return new FieldConverter(field.Name, false, x => x.Deserialize<List<string>>(), () => new List<string>());
+
+            case FieldTypes.ListOfBoolean:
+                return new FieldConverter(field.Name, false, x => x.Deserialize<List<bool>>(), () => new List<bool>());
+
+            case FieldTypes.PrimaryKey:
+            case FieldTypes.Undefined:
+            default:
+                // skip
+                return null;
+        }
+    }
+
+    private sealed record FieldConverter(string Name, bool IsVector, Func<JsonElement, object?> Convert, Func<object?> GetDefault);
+}
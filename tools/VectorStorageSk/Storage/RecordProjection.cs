@@ -0,0 +1,76 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Collections.Concurrent;
+using System.Reflection;
+using System.Text.Json;
+using System.Text.Json.Serialization;
+using Microsoft.Extensions.VectorData;
+
+namespace VectorStorageSk.Storage;
+
+/// <summary>
+/// Copy the selected fields of a search result, skipping vectors unless requested,
+/// to reduce the size of the results returned to the client.
+/// </summary>
+internal static class RecordProjection<TRecord>
+{
+    // Record properties, found once per record type
+    private static readonly PropertyInfo[] s_properties = typeof(TRecord)
+        .GetProperties(BindingFlags.Public | BindingFlags.Instance)
+        .Where(p => p.CanRead && p.GetIndexParameters().Length == 0 && p.GetCustomAttribute<JsonIgnoreAttribute>() == null)
+        .ToArray();
+
+    private static readonly bool[] s_isVector = s_properties
+        .Select(p => p.GetCustomAttribute<VectorStoreRecordVectorAttribute>() != null || p.PropertyType == typeof(Embedding))
+        .ToArray();
+
+    // Names set with [JsonPropertyName], null for the properties named by the naming policy
+    private static readonly string?[] s_jsonNames = s_properties
+        .Select(p => p.GetCustomAttribute<JsonPropertyNameAttribute>()?.Name)
+        .ToArray();
+
+    // Serialized name of each property, per naming policy, calculated on first use. Usually there's only one policy.
+    private static readonly string[] s_defaultNames = s_properties.Select((p, i) => s_jsonNames[i] ?? p.Name).ToArray();
+    private static readonly ConcurrentDictionary<JsonNamingPolicy, string[]> s_names = new();
+
+    /// <summary>
+    /// Whether fields must be copied, or the record can be returned as is.
+    /// </summary>
+    public static bool IsNeeded(IReadOnlyCollection<string>? select, bool includeVectors)
+    {
+        return select != null || (!includeVectors && s_isVector.Contains(true));
+    }
+
+    /// <summary>
+    /// Copy the selected fields, using the same names used to serialize the record.
+    /// Field names in the selection are case-insensitive, and can be the C# or the JSON name.
+    /// </summary>
+    public static Dictionary<string, object?> Project(
+        TRecord record, IReadOnlyCollection<string>? select, bool includeVectors, JsonNamingPolicy? namingPolicy)
+    {
+        string[] names = GetNames(namingPolicy);
+        var result = new Dictionary<string, object?>(StringComparer.Ordinal);
+        for (int i = 0; i < s_properties.Length; i++)
+        {
+            PropertyInfo p = s_properties[i];
+
+            // Vectors are returned only if requested, even when selected
+            if (!includeVectors && s_isVector[i]) { continue; }
+
+            if (select != null
+                && !select.Contains(p.Name, StringComparer.OrdinalIgnoreCase)
+                && !select.Contains(names[i], StringComparer.OrdinalIgnoreCase)) { continue; }
+
+            result[names[i]] = p.GetValue(record);
+        }
+
+        return result;
+    }
+
+    private static string[] GetNames(JsonNamingPolicy? namingPolicy)
+    {
+        if (namingPolicy == null) { return s_defaultNames; }
+
+        return s_names.GetOrAdd(namingPolicy, policy => s_properties.Select((p, i) => s_jsonNames[i] ?? policy.ConvertName(p.Name)).ToArray());
+    }
+}
@@ -18,6 +18,7 @@ internal sealed class StorageLib
             StorageTypes.AzureAISearch => true,
             StorageTypes.Qdrant => true,
             StorageTypes.InMemory => true,
+            StorageTypes.Local => true,
             StorageTypes.Postgres => true,
 
             StorageTypes.AzureCosmosDbMongoDB => false,
@@ -52,6 +53,11 @@ internal sealed class StorageLib
                 vectorStore = sp.GetRequiredService<InMemoryVectorStore>();
                 break;
             }
+            case StorageTypes.Local:
+            {
+                vectorStore = sp.GetRequiredService<LocalVectorStore>();
+                break;
+            }
             case StorageTypes.Qdrant:
             {
                 vectorStore = sp.GetRequiredService<QdrantVectorStore>();
@@ -0,0 +1,76 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache with TTL, for responses of upstream services.
+
+    Concurrent lookups of the same key share a single fetch: the first caller starts the
+    fetch, and the others wait for its result. Failed fetches are not cached.
+    Not thread safe, use from a single event loop.
+    """
+
+    def __init__(self, max_size: int, ttl_secs: float):
+        """
+        Args:
+            max_size (int): Max number of responses kept in memory, least recently used first out. 0 to disable caching.
+            ttl_secs (float): Number of seconds a response is cached.
+        """
+        self._max_size = max_size
+        self._ttl_secs = ttl_secs
+        self._items: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._pending: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached response, or None if not cached or expired."""
+        item = self._items.get(key)
+        if item is None:
+            return None
+
+        expiration, value = item
+        if expiration <= time.monotonic():
+            del self._items[key]
+            return None
+
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Stores a response, removing the least recently used ones if the cache is full."""
+        if self._max_size == 0:
+            return
+
+        self._items[key] = (time.monotonic() + self._ttl_secs, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the cached response, or fetches it, sharing the fetch with concurrent lookups of the same key."""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(fetch())
+            self._pending[key] = pending
+            pending.add_done_callback(lambda task: self._fetched(key, task))
+
+        # A caller cancelling its request doesn't cancel the fetch shared with other callers
+        return await asyncio.shield(pending)
+
+    def _fetched(self, key: Hashable, task: "asyncio.Future[Any]"):
+        self._pending.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        self.set(key, task.result())
@@ -5,7 +5,7 @@ import redis
 import json
 import logging
 from enum import Enum
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -66,37 +66,55 @@ def get_redis_client() -> Optional[redis.Redis]:
     return _redis_client
 
 
+# Redis channel used to notify the orchestrator when functions are registered
+FUNCTIONS_CHANGED_CHANNEL = "functions:changed"
+
+
 def register_function(url: str, method: str, is_json: bool, description: str):
     """Registers a function in Redis."""
+    register_functions([dict(url=url, method=method, is_json=is_json, description=description)])
+
+
+def register_functions(functions: List[Dict[str, Any]]):
+    """
+    Registers multiple functions in Redis, in a single transaction, e.g. all the functions of a tool at startup.
+    Each item contains the register_function arguments: url, method, is_json and description.
+    """
     redis_client = get_redis_client()
-    if not redis_client:
+    if not redis_client or not functions:
         return
 
     # The tool name should be set using an env var, e.g. injected by the hosting environment
     tool_name = os.getenv("TOOL_NAME", "unknown-python-app")
 
-    data = FunctionDescription(
-        id=f"{tool_name}{url}",
-        tool=tool_name,
-        url=url,
-        method=method,
-        input_type=ContentType.JSON if is_json else ContentType.MULTIPART,
-        output_type=ContentType.JSON,
-        description=description
-    )
-
     # Store a unique ID into a "functions" Redis set, used to index key-values.
     # The ID points to a Redis key where the entire function description is stored.
     # This approach allows to modify function details without causing
     # duplicate entries in the Redis set.
-
-    # Data stored in Redis KV
-    redis_data_key = f"FunctionDetails:{tool_name}:{url}"
-    redis_data_value = json.dumps(to_camel_case(data.to_dict()))
-    redis_client.set(redis_data_key, redis_data_value)
-
-    # Pointer stored in Redis Set
-    redis_client.sadd("functions", redis_data_key)
+    # All the commands are sent in one round trip, and the orchestrator, which caches
+    # the registry, is notified of the change via pub/sub.
+    pipe = redis_client.pipeline(transaction=True)
+    for f in functions:
+        data = FunctionDescription(
+            id=f"{tool_name}{f['url']}",
+            tool=tool_name,
+            url=f["url"],
+            method=f["method"],
+            input_type=ContentType.JSON if f["is_json"] else ContentType.MULTIPART,
+            output_type=ContentType.JSON,
+            description=f["description"]
+        )
+
+        # Data stored in Redis KV
+        redis_data_key = f"FunctionDetails:{tool_name}:{f['url']}"
+        pipe.set(redis_data_key, json.dumps(to_camel_case(data.to_dict())))
+
+        # Pointer stored in Redis Set
+        pipe.sadd("functions", redis_data_key)
+
+    pipe.publish(FUNCTIONS_CHANGED_CHANNEL, tool_name)
+    pipe.execute()
+    log.info(f"Registered {len(functions)} functions")
 
 
 def to_camel_case(obj: Any) -> Any:
@@ -1,11 +1,69 @@
 # Copyright (c) Microsoft. All rights reserved.
 
+import asyncio
+import logging
+import os
+import re
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import httpx
-from app.libs.tool_registry import register_function
+from app.libs.response_cache import ResponseCache
+from app.libs.tool_registry import register_functions
+
+log = logging.getLogger(__name__)
+
+# MediaWiki API endpoint, "{lang}" is replaced with the language code. Can point to a local stub, e.g. for tests.
+WIKIPEDIA_API_URL = os.getenv("WIKIPEDIA_API_URL", "https://{lang}.wikipedia.org/w/api.php")
+
+# Max number of articles kept in memory, and for how long
+CACHE_SIZE = int(os.getenv("WIKIPEDIA_CACHE_SIZE", "1000"))
+CACHE_TTL_SECS = float(os.getenv("WIKIPEDIA_CACHE_TTL_SECS", "3600"))
+
+# Max number of seconds to wait for Wikipedia
+TIMEOUT_SECS = float(os.getenv("WIKIPEDIA_TIMEOUT_SECS", "30"))
+
+# Max number of titles accepted by /batch
+MAX_BATCH_SIZE = int(os.getenv("WIKIPEDIA_MAX_BATCH_SIZE", "500"))
+
+# Max number of extracts returned by one MediaWiki query: up to 20 intros, while full articles are
+# returned one per query, see https://www.mediawiki.org/wiki/Extension:TextExtracts#API
+INTROS_PER_QUERY = 20
+
+# Max number of concurrent Wikipedia calls per /batch request
+MAX_CONCURRENT_QUERIES = int(os.getenv("WIKIPEDIA_MAX_CONCURRENT_QUERIES", "10"))
+
+# Language codes are used in the API host name
+LANG_PATTERN = re.compile(r"^[a-z][a-z0-9-]{1,15}$")
+
+# HTTP/2 requires the "h2" package, installed with httpx[http2]
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+# HTTP client shared by all requests, to reuse connections, see lifespan()
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Articles fetched, by (lang, title)
+_cache = ResponseCache(max_size=CACHE_SIZE, ttl_secs=CACHE_TTL_SECS)
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    global _http_client
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+    async with httpx.AsyncClient(http2=HTTP2_ENABLED, limits=limits, timeout=TIMEOUT_SECS) as client:
+        _http_client = client
+        log.info(f"HTTP client ready, HTTP/2 {'enabled' if HTTP2_ENABLED else 'not available'}")
+        yield
+        _http_client = None
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 class WikipediaGenericRequest(BaseModel):
@@ -22,9 +80,40 @@ class WikipediaResponse(BaseModel):
     content: str
 
 
+class WikipediaBatchRequest(BaseModel):
+    lang: str = "en"
+    titles: List[str] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+    # Fetch only the text before the first section, allowing up to 20 articles per Wikipedia call, rather than one.
+    # Full articles are fetched with one call per title, up to MAX_CONCURRENT_QUERIES calls at a time.
+    intro: bool = False
+
+
+class WikipediaBatchResult(BaseModel):
+    title: str
+    content: Optional[str] = None
+    error: Optional[str] = None
+
+
+class WikipediaBatchResponse(BaseModel):
+    # Same order of the titles in the request
+    results: List[WikipediaBatchResult]
+
+
 async def fetch_wikipedia_content(title: str, lang: str = "en") -> WikipediaResponse:
-    """Fetches Wikipedia content in the specified language."""
-    api_url = f"https://{lang}.wikipedia.org/w/api.php"
+    """Fetches Wikipedia content in the specified language, from cache when available."""
+    if not LANG_PATTERN.match(lang):
+        raise HTTPException(status_code=400, detail=f"Invalid language code '{lang}'")
+
+    return await _cache.get_or_fetch(_cache_key(lang, title), lambda: _fetch_wikipedia_content(title, lang))
+
+
+def _cache_key(lang: str, title: str, intro: bool = False) -> tuple:
+    # Full articles are shared by all the functions, intros are cached separately
+    return (lang, title, "intro") if intro else (lang, title)
+
+
+async def _fetch_wikipedia_content(title: str, lang: str) -> WikipediaResponse:
+    api_url = WIKIPEDIA_API_URL.format(lang=lang)
     params = {
         "action": "query",
         "format": "json",
@@ -33,8 +122,11 @@ async def fetch_wikipedia_content(title: str, lang: str = "en") -> WikipediaResp
         "explaintext": "1"
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(api_url, params=params)
+    try:
+        response = await _http_client.get(api_url, params=params)
+    except httpx.HTTPError as e:
+        log.warning(f"Wikipedia API request failed: {e}")
+        raise HTTPException(status_code=502, detail="Failed to fetch data from Wikipedia API")
 
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Failed to fetch data from Wikipedia API")
@@ -51,6 +143,97 @@ async def fetch_wikipedia_content(title: str, lang: str = "en") -> WikipediaResp
     raise HTTPException(status_code=500, detail="Could not parse Wikipedia API response")
 
 
+async def fetch_wikipedia_batch(titles: List[str], lang: str, intro: bool) -> List[WikipediaBatchResult]:
+    """
+    Fetches multiple articles not in cache, with concurrent Wikipedia API calls. Intros are grouped,
+    up to INTROS_PER_QUERY titles per call, while full articles require one call per title.
+    """
+    if not LANG_PATTERN.match(lang):
+        raise HTTPException(status_code=400, detail=f"Invalid language code '{lang}'")
+
+    found: Dict[str, WikipediaBatchResult] = {}
+    missing: List[str] = []
+    for title in dict.fromkeys(titles):
+        cached = _cache.get(_cache_key(lang, title, intro))
+        if cached is not None:
+            found[title] = WikipediaBatchResult(title=cached.title, content=cached.content)
+        elif not title.strip() or "|" in title:
+            found[title] = WikipediaBatchResult(title=title, error="Invalid title")
+        else:
+            missing.append(title)
+
+    group_size = INTROS_PER_QUERY if intro else 1
+    groups = [missing[i:i + group_size] for i in range(0, len(missing), group_size)]
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+
+    async def fetch_group(group: List[str]) -> Dict[str, WikipediaBatchResult]:
+        async with semaphore:
+            return await _fetch_wikipedia_group(group, lang, intro)
+
+    for group_results in await asyncio.gather(*[fetch_group(group) for group in groups]):
+        found.update(group_results)
+
+    return [found[title] for title in titles]
+
+
+async def _fetch_wikipedia_group(titles: List[str], lang: str, intro: bool) -> Dict[str, WikipediaBatchResult]:
+    api_url = WIKIPEDIA_API_URL.format(lang=lang)
+    params = {
+        "action": "query",
+        "format": "json",
+        "formatversion": "2",
+        "titles": "|".join(titles),
+        "prop": "extracts",
+        "explaintext": "1"
+    }
+    if intro:
+        params.update(exintro="1", exlimit="max")
+
+    # Groups fit in one call, "continue" tokens are followed only if Wikipedia returns fewer extracts than expected
+    normalized: Dict[str, str] = {}
+    pages: Dict[str, dict] = {}
+    continuation: dict = {}
+    for _ in range(len(titles) + 1):
+        try:
+            response = await _http_client.get(api_url, params={**params, **continuation})
+        except httpx.HTTPError as e:
+            log.warning(f"Wikipedia API request failed: {e}")
+            return {t: WikipediaBatchResult(title=t, error="Failed to fetch data from Wikipedia API") for t in titles}
+
+        if response.status_code != 200:
+            return {t: WikipediaBatchResult(title=t, error="Failed to fetch data from Wikipedia API") for t in titles}
+
+        data = response.json()
+        query = data.get("query", {})
+        normalized.update({x["from"]: x["to"] for x in query.get("normalized", [])})
+        for page in query.get("pages", []):
+            page_title = page.get("title", "")
+            if "extract" in page or page_title not in pages:
+                pages[page_title] = page
+
+        continuation = data.get("continue")
+        if not continuation:
+            break
+
+    results = {}
+    for title in titles:
+        page = pages.get(normalized.get(title, title))
+        if page is None or page.get("missing") or page.get("invalid"):
+            results[title] = WikipediaBatchResult(title=title, error="Page not found")
+            continue
+
+        # Extracts not returned, e.g. after too many continuations, are not cached
+        if "extract" not in page:
+            results[title] = WikipediaBatchResult(title=title, error="Content not available")
+            continue
+
+        result = WikipediaResponse(title=page.get("title", ""), content=page["extract"])
+        _cache.set(_cache_key(lang, title, intro), result)
+        results[title] = WikipediaBatchResult(title=result.title, content=result.content)
+
+    return results
+
+
 @app.post("/", response_model=WikipediaResponse)
 async def get_wikipedia_content_en(request: WikipediaGenericRequest):
     return await fetch_wikipedia_content(request.title, lang=request.lang)
@@ -76,9 +259,17 @@ async def get_wikipedia_content_it(request: WikipediaRequest):
     return await fetch_wikipedia_content(request.title, lang="it")
 
 
+@app.post("/batch", response_model=WikipediaBatchResponse)
+async def get_wikipedia_content_batch(request: WikipediaBatchRequest):
+    return WikipediaBatchResponse(results=await fetch_wikipedia_batch(request.titles, lang=request.lang, intro=request.intro))
+
+
 # Register functions in Orchestrator's registry
-register_function(url="/", method="POST", is_json=True, description="Fetch Wikipedia content by language and title")
-register_function(url="/cn", method="POST", is_json=True, description="Fetch Wikipedia Chinese content by title")
-register_function(url="/en", method="POST", is_json=True, description="Fetch Wikipedia English content by title")
-register_function(url="/es", method="POST", is_json=True, description="Fetch Wikipedia Spanish content by title")
-register_function(url="/it", method="POST", is_json=True, description="Fetch Wikipedia Italian content by title")
+register_functions([
+    dict(url="/", method="POST", is_json=True, description="Fetch Wikipedia content by language and title"),
+    dict(url="/cn", method="POST", is_json=True, description="Fetch Wikipedia Chinese content by title"),
+    dict(url="/en", method="POST", is_json=True, description="Fetch Wikipedia English content by title"),
+    dict(url="/es", method="POST", is_json=True, description="Fetch Wikipedia Spanish content by title"),
+    dict(url="/it", method="POST", is_json=True, description="Fetch Wikipedia Italian content by title"),
+    dict(url="/batch", method="POST", is_json=True, description="Fetch multiple Wikipedia pages by language and titles"),
+])
@@ -0,0 +1,64 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app import main
+from app.libs.response_cache import ResponseCache
+
+
+class WikipediaStub:
+    """
+    Local HTTP server standing in for the MediaWiki API.
+    Set `respond` to a function receiving the query parameters and returning (status code, JSON body).
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.respond = lambda params: (200, {"query": {"pages": {}}})
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/{{lang}}/api.php"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                params["lang"] = url.path.split("/")[1]
+                stub.requests.append(params)
+                status, body = stub.respond(params)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def wikipedia_stub(monkeypatch):
+    """Starts a MediaWiki API stub, used by the app via WIKIPEDIA_API_URL, with an empty cache."""
+    stub = WikipediaStub()
+    stub.start()
+    monkeypatch.setattr(main, "WIKIPEDIA_API_URL", stub.url)
+    monkeypatch.setattr(main, "_cache", ResponseCache(max_size=100, ttl_secs=60))
+    yield stub
+    stub.stop()
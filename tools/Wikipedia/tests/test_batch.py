@@ -0,0 +1,119 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+def respond_with_pages(pages, normalized=None):
+    """MediaWiki stub returning the requested pages, in formatversion=2 format, and the title normalization."""
+    normalized = normalized or {}
+
+    def respond(params):
+        titles = params["titles"].split("|")
+        query = {"pages": [], "normalized": [{"from": t, "to": normalized[t]} for t in titles if t in normalized]}
+        for title in titles:
+            title = normalized.get(title, title)
+            if title in pages:
+                query["pages"].append({"pageid": 1, "ns": 0, "title": title, "extract": pages[title]})
+            else:
+                query["pages"].append({"ns": 0, "title": title, "missing": True})
+        return 200, {"batchcomplete": True, "query": query}
+
+    return respond
+
+
+def fetch_batch(request):
+    with TestClient(main.app) as client:
+        response = client.post("/batch", json=request)
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+def test_results_are_in_the_same_order_of_the_titles(wikipedia_stub):
+    wikipedia_stub.respond = respond_with_pages({"Rome": "Text of Rome", "Paris": "Text of Paris", "Oslo": "Text of Oslo"})
+
+    results = fetch_batch({"lang": "en", "titles": ["Rome", "Paris", "Oslo"]})
+
+    assert [r["title"] for r in results] == ["Rome", "Paris", "Oslo"]
+    assert [r["content"] for r in results] == ["Text of Rome", "Text of Paris", "Text of Oslo"]
+
+
+def test_full_articles_are_fetched_with_one_call_per_title(wikipedia_stub):
+    wikipedia_stub.respond = respond_with_pages({"Rome": "Text", "Paris": "Text"})
+
+    fetch_batch({"lang": "en", "titles": ["Rome", "Paris"]})
+
+    assert sorted(r["titles"] for r in wikipedia_stub.requests) == ["Paris", "Rome"]
+
+
+def test_intros_are_grouped(wikipedia_stub, monkeypatch):
+    monkeypatch.setattr(main, "INTROS_PER_QUERY", 2)
+    wikipedia_stub.respond = respond_with_pages({"A": "a", "B": "b", "C": "c"})
+
+    results = fetch_batch({"lang": "en", "titles": ["A", "B", "C"], "intro": True})
+
+    assert [r["content"] for r in results] == ["a", "b", "c"]
+    assert sorted(r["titles"] for r in wikipedia_stub.requests) == ["A|B", "C"]
+    assert all(r["exintro"] == "1" for r in wikipedia_stub.requests)
+
+
+def test_duplicate_titles_are_fetched_once(wikipedia_stub):
+    wikipedia_stub.respond = respond_with_pages({"Rome": "Text of Rome", "Paris": "Text of Paris"})
+
+    results = fetch_batch({"lang": "en", "titles": ["Rome", "Paris", "Rome"]})
+
+    assert [r["title"] for r in results] == ["Rome", "Paris", "Rome"]
+    assert results[0] == results[2]
+    assert len(wikipedia_stub.requests) == 2
+
+
+def test_normalized_titles(wikipedia_stub, monkeypatch):
+    monkeypatch.setattr(main, "INTROS_PER_QUERY", 20)
+    wikipedia_stub.respond = respond_with_pages({"Rome": "Text of Rome"}, normalized={"rome": "Rome"})
+
+    results = fetch_batch({"lang": "en", "titles": ["rome", "Rome"], "intro": True})
+
+    assert results[0] == {"title": "Rome", "content": "Text of Rome", "error": None}
+    assert results[1] == {"title": "Rome", "content": "Text of Rome", "error": None}
+
+
+def test_errors_are_reported_per_title(wikipedia_stub):
+    wikipedia_stub.respond = respond_with_pages({"Rome": "Text of Rome"})
+
+    results = fetch_batch({"lang": "en", "titles": ["Rome", "Atlantis", " ", "A|B"]})
+
+    assert results[0]["content"] == "Text of Rome"
+    assert results[1] == {"title": "Atlantis", "content": None, "error": "Page not found"}
+    assert results[2]["error"] == "Invalid title"
+    assert results[3]["error"] == "Invalid title"
+    assert sorted(r["titles"] for r in wikipedia_stub.requests) == ["Atlantis", "Rome"]
+
+
+def test_failed_calls_dont_fail_the_other_titles(wikipedia_stub):
+    pages = respond_with_pages({"Rome": "Text of Rome"})
+    wikipedia_stub.respond = lambda params: (503, {}) if params["titles"] == "Paris" else pages(params)
+
+    results = fetch_batch({"lang": "en", "titles": ["Rome", "Paris"]})
+
+    assert results[0]["content"] == "Text of Rome"
+    assert results[1]["error"] == "Failed to fetch data from Wikipedia API"
+
+
+def test_pages_without_extract_are_not_cached(wikipedia_stub):
+    wikipedia_stub.respond = lambda params: (200, {"query": {"pages": [{"pageid": 1, "ns": 0, "title": "Rome"}]}})
+
+    results = fetch_batch({"lang": "en", "titles": ["Rome"]})
+
+    assert results[0]["error"] == "Content not available"
+    assert main._cache.get(main._cache_key("en", "Rome")) is None
+
+
+def test_cached_articles_are_not_fetched_again(wikipedia_stub):
+    wikipedia_stub.respond = respond_with_pages({"Rome": "Text of Rome", "Paris": "Text of Paris"})
+
+    fetch_batch({"lang": "en", "titles": ["Rome"]})
+    results = fetch_batch({"lang": "en", "titles": ["Rome", "Paris"]})
+
+    assert [r["content"] for r in results] == ["Text of Rome", "Text of Paris"]
+    assert [r["titles"] for r in wikipedia_stub.requests] == ["Rome", "Paris"]
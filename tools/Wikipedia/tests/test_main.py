@@ -0,0 +1,69 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+def page(title, extract):
+    return {"query": {"pages": {"1": {"pageid": 1, "title": title, "extract": extract}}}}
+
+
+def test_lifespan_creates_and_closes_the_shared_client(wikipedia_stub):
+    assert main._http_client is None
+
+    with TestClient(main.app):
+        client = main._http_client
+        assert isinstance(client, httpx.AsyncClient)
+
+    assert main._http_client is None
+    assert client.is_closed
+
+
+def test_http2_is_available():
+    # h2 is installed with httpx[http2]
+    assert main.HTTP2_ENABLED
+
+
+def test_fetch_article(wikipedia_stub):
+    wikipedia_stub.respond = lambda params: (200, page(params["titles"], f"Text of {params['titles']}"))
+
+    with TestClient(main.app) as client:
+        response = client.post("/", json={"lang": "it", "title": "Dolomiti"})
+
+    assert response.status_code == 200
+    assert response.json() == {"title": "Dolomiti", "content": "Text of Dolomiti"}
+    assert wikipedia_stub.requests[0]["lang"] == "it"
+    assert wikipedia_stub.requests[0]["titles"] == "Dolomiti"
+
+
+def test_articles_are_cached(wikipedia_stub):
+    wikipedia_stub.respond = lambda params: (200, page(params["titles"], "Text"))
+
+    with TestClient(main.app) as client:
+        first = client.post("/", json={"lang": "en", "title": "Alps"})
+        second = client.post("/en", json={"title": "Alps"})
+
+    assert first.json() == second.json()
+    assert len(wikipedia_stub.requests) == 1
+
+
+def test_invalid_language(wikipedia_stub):
+    with TestClient(main.app) as client:
+        response = client.post("/", json={"lang": "en.evil.com/", "title": "Alps"})
+
+    assert response.status_code == 400
+    assert wikipedia_stub.requests == []
+
+
+def test_wikipedia_errors_are_not_cached(wikipedia_stub):
+    wikipedia_stub.respond = lambda params: (503, {})
+
+    with TestClient(main.app) as client:
+        assert client.post("/", json={"lang": "en", "title": "Alps"}).status_code == 500
+
+        wikipedia_stub.respond = lambda params: (200, page(params["titles"], "Text"))
+        assert client.post("/", json={"lang": "en", "title": "Alps"}).status_code == 200
+
+    assert len(wikipedia_stub.requests) == 2
@@ -0,0 +1,135 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+import asyncio
+
+import pytest
+
+from app.libs import response_cache
+from app.libs.response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_get_returns_none_when_not_cached():
+    cache = ResponseCache(max_size=10, ttl_secs=60)
+    assert cache.get("x") is None
+    assert len(cache) == 0
+
+
+def test_items_expire_after_ttl(clock):
+    cache = ResponseCache(max_size=10, ttl_secs=60)
+    cache.set("x", "value")
+
+    clock.now += 59
+    assert cache.get("x") == "value"
+
+    clock.now += 1
+    assert cache.get("x") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_items_are_removed_first():
+    cache = ResponseCache(max_size=2, ttl_secs=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_updating_an_item_makes_it_most_recently_used():
+    cache = ResponseCache(max_size=2, ttl_secs=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    cache.set("c", 3)
+
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+
+
+def test_zero_size_disables_caching():
+    cache = ResponseCache(max_size=0, ttl_secs=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+async def test_concurrent_lookups_share_one_fetch():
+    cache = ResponseCache(max_size=10, ttl_secs=60)
+    calls = 0
+    release = asyncio.Event()
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    lookups = [asyncio.create_task(cache.get_or_fetch("x", fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*lookups) == ["value"] * 5
+    assert calls == 1
+
+    # Served from cache from now on
+    assert await cache.get_or_fetch("x", fetch) == "value"
+    assert calls == 1
+
+
+async def test_failed_fetches_are_not_cached():
+    cache = ResponseCache(max_size=10, ttl_secs=60)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ValueError("failed")
+        return "value"
+
+    with pytest.raises(ValueError):
+        await cache.get_or_fetch("x", fetch)
+
+    assert await cache.get_or_fetch("x", fetch) == "value"
+    assert calls == 2
+
+
+async def test_cancelled_lookup_doesnt_cancel_the_shared_fetch():
+    cache = ResponseCache(max_size=10, ttl_secs=60)
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "value"
+
+    first = asyncio.create_task(cache.get_or_fetch("x", fetch))
+    second = asyncio.create_task(cache.get_or_fetch("x", fetch))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    release.set()
+
+    assert await second == "value"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert cache.get("x") == "value"
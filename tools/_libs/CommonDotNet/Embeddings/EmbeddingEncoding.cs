@@ -0,0 +1,153 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Buffers.Binary;
+using System.Runtime.InteropServices;
+using System.Text.Json.Serialization;
+
+namespace CommonDotNet.Embeddings;
+
+[JsonConverter(typeof(JsonStringEnumConverter<EmbeddingEncodings>))]
+public enum EmbeddingEncodings
+{
+    // JSON list of numbers
+    [JsonStringEnumMemberName("float")]
+    Float,
+
+    // Base64 string, little-endian float32 values, same format used by OpenAI
+    [JsonStringEnumMemberName("base64")]
+    Base64,
+
+    // "f16:" + Base64 string, little-endian float16 values
+    [JsonStringEnumMemberName("base64-float16")]
+    Base64Float16,
+
+    // "i8:" + Base64 string, little-endian float32 scale, followed by one signed byte per value
+    [JsonStringEnumMemberName("base64-int8")]
+    Base64Int8,
+}
+
+/// <summary>
+/// Compact text encoding of embeddings, to reduce the size of JSON payloads and the cost of parsing
+/// them, compared to lists of numbers. The format is detected from the prefix of the string, so
+/// decoding doesn't require knowing the encoding in advance. Float16 and Int8 encodings are lossy.
+/// </summary>
+public static class EmbeddingEncoding
+{
+    private const string Float16Prefix = "f16:";
+    private const string Int8Prefix = "i8:";
+
+    public static string Encode(ReadOnlySpan<float> vector, EmbeddingEncodings encoding)
+    {
+        switch (encoding)
+        {
+            case EmbeddingEncodings.Base64:
+            {
+                if (BitConverter.IsLittleEndian) { return Convert.ToBase64String(MemoryMarshal.AsBytes(vector)); }
+
+                var bytes = new byte[vector.Length * sizeof(float)];
+                for (int i = 0; i < vector.Length; i++)
+                {
+                    BinaryPrimitives.WriteSingleLittleEndian(bytes.AsSpan(i * sizeof(float)), vector[i]);
+                }
+
+                return Convert.ToBase64String(bytes);
+            }
+
+            case EmbeddingEncodings.Base64Float16:
+            {
+                var bytes = new byte[vector.Length * 2];
+                for (int i = 0; i < vector.Length; i++)
+                {
+                    BinaryPrimitives.WriteHalfLittleEndian(bytes.AsSpan(i * 2), (Half)vector[i]);
+                }
+
+                return Float16Prefix + Convert.ToBase64String(bytes);
+            }
+
+            case EmbeddingEncodings.Base64Int8:
+            {
+                // Symmetric quantization, mapping the largest absolute value to 127
+                float maxAbs = 0;
+                foreach (float x in vector) { maxAbs = Math.Max(maxAbs, Math.Abs(x)); }
+
+                float scale = maxAbs > 0 ? maxAbs / 127 : 1;
+                var bytes = new byte[sizeof(float) + vector.Length];
+                BinaryPrimitives.WriteSingleLittleEndian(bytes, scale);
+                for (int i = 0; i < vector.Length; i++)
+                {
+                    bytes[sizeof(float) + i] = (byte)(sbyte)Math.Clamp(MathF.Round(vector[i] / scale), -127, 127);
+                }
+
+                return Int8Prefix + Convert.ToBase64String(bytes);
+            }
+
+            default:
+                throw new ArgumentOutOfRangeException(nameof(encoding), $"Embedding encoding '{encoding}' cannot be represented as a string");
+        }
+    }
+
+    /// <summary>
+    /// Decode a string generated by <see cref="Encode"/>. Returns false if the string is not a valid encoded embedding.
+    /// </summary>
+    public static bool TryDecode(string value, out float[] vector)
+    {
+        vector = [];
+        if (value.StartsWith(Float16Prefix, StringComparison.Ordinal))
+        {
+            if (!TryFromBase64(value.AsSpan(Float16Prefix.Length), out byte[] bytes) || bytes.Length % 2 != 0) { return false; }
+
+            vector = new float[bytes.Length / 2];
+            for (int i = 0; i < vector.Length; i++)
+            {
+                vector[i] = (float)BinaryPrimitives.ReadHalfLittleEndian(bytes.AsSpan(i * 2));
+            }
+
+            return true;
+        }
+
+        if (value.StartsWith(Int8Prefix, StringComparison.Ordinal))
+        {
+            if (!TryFromBase64(value.AsSpan(Int8Prefix.Length), out byte[] bytes) || bytes.Length < sizeof(float)) { return false; }
+
+            float scale = BinaryPrimitives.ReadSingleLittleEndian(bytes);
+            vector = new float[bytes.Length - sizeof(float)];
+            for (int i = 0; i < vector.Length; i++)
+            {
+                vector[i] = (sbyte)bytes[sizeof(float) + i] * scale;
+            }
+
+            return true;
+        }
+
+        if (!TryFromBase64(value, out byte[] float32Bytes) || float32Bytes.Length % sizeof(float) != 0) { return false; }
+
+        if (BitConverter.IsLittleEndian)
+        {
+            vector = MemoryMarshal.Cast<byte, float>(float32Bytes).ToArray();
+            return true;
+        }
+
+        vector = new float[float32Bytes.Length / sizeof(float)];
+        for (int i = 0; i < vector.Length; i++)
+        {
+            vector[i] = BinaryPrimitives.ReadSingleLittleEndian(float32Bytes.AsSpan(i * sizeof(float)));
+        }
+
+        return true;
+    }
+
+    public static float[] Decode(string value)
+    {
+        return TryDecode(value, out float[] vector) ? vector : throw new FormatException("The value is not a valid encoded embedding");
+    }
+
+    private static bool TryFromBase64(ReadOnlySpan<char> value, out byte[] bytes)
+    {
+        bytes = new byte[value.Length * 3 / 4];
+        if (!Convert.TryFromBase64Chars(value, bytes, out int count)) { return false; }
+
+        if (count < bytes.Length) { bytes = bytes[..count]; }
+
+        return true;
+    }
+}
@@ -0,0 +1,47 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json;
+using System.Text.Json.Serialization;
+
+namespace CommonDotNet.Embeddings;
+
+/// <summary>
+/// Read embeddings passed either as a list of numbers, or as a string encoded with <see cref="EmbeddingEncoding"/>.
+/// Embeddings are always written as a list of numbers.
+/// </summary>
+public sealed class EmbeddingJsonConverter : JsonConverter<float[]>
+{
+    public override float[]? Read(ref Utf8JsonReader reader, Type typeToConvert, JsonSerializerOptions options)
+    {
+        switch (reader.TokenType)
+        {
+            case JsonTokenType.Null:
+                return null;
+
+            case JsonTokenType.String:
+                return EmbeddingEncoding.TryDecode(reader.GetString()!, out float[] vector)
+                    ? vector
+                    : throw new JsonException("The value is not a valid encoded embedding");
+
+            case JsonTokenType.StartArray:
+                var list = new List<float>();
+                while (reader.Read() && reader.TokenType != JsonTokenType.EndArray)
+                {
+                    list.Add(reader.GetSingle());
+                }
+
+                return list.ToArray();
+
+            default:
+                throw new JsonException($"Unexpected token {reader.TokenType}, the embedding must be a list of numbers or an encoded string");
+        }
+    }
+
+    public override void Write(Utf8JsonWriter writer, float[] value, JsonSerializerOptions options)
+    {
+        writer.WriteStartArray();
+        foreach (float x in value) { writer.WriteNumberValue(x); }
+
+        writer.WriteEndArray();
+    }
+}
@@ -0,0 +1,42 @@
+// Copyright (c) Microsoft. All rights reserved.
+
+using System.Text.Json;
+using System.Text.Json.Serialization;
+
+namespace CommonDotNet.Embeddings;
+
+/// <summary>
+/// Read a list of embeddings, each one passed either as a list of numbers, or as a string encoded
+/// with <see cref="EmbeddingEncoding"/>. Embeddings are always written as lists of numbers.
+/// </summary>
+public sealed class EmbeddingListJsonConverter : JsonConverter<List<float[]>>
+{
+    private static readonly EmbeddingJsonConverter s_embeddingConverter = new();
+
+    public override List<float[]>? Read(ref Utf8JsonReader reader, Type typeToConvert, JsonSerializerOptions options)
+    {
+        if (reader.TokenType == JsonTokenType.Null) { return null; }
+
+        if (reader.TokenType != JsonTokenType.StartArray)
+        {
+            throw new JsonException($"Unexpected token {reader.TokenType}, expecting a list of embeddings");
+        }
+
+        var list = new List<float[]>();
+        while (reader.Read() && reader.TokenType != JsonTokenType.EndArray)
+        {
+            list.Add(s_embeddingConverter.Read(ref reader, typeof(float[]), options)
+                     ?? throw new JsonException("The list of embeddings contains null values"));
+        }
+
+        return list;
+    }
+
+    public override void Write(Utf8JsonWriter writer, List<float[]> value, JsonSerializerOptions options)
+    {
+        writer.WriteStartArray();
+        foreach (float[] x in value) { s_embeddingConverter.Write(writer, x, options); }
+
+        writer.WriteEndArray();
+    }
+}
@@ -16,6 +16,9 @@ public sealed class ToolRegistry : IDisposable, IAsyncDisposable
     // Redis set containing the list of registered functions
     private const string FunctionsRedisSetName = "functions";
 
+    // Redis channel used to notify the orchestrator when functions are registered
+    private const string FunctionsChangedRedisChannel = "functions:changed";
+
     private readonly bool _isDisabled = false;
     private readonly IConnectionMultiplexer? _redisConn = null;
     private readonly IDatabase? _db = null;
@@ -117,13 +120,15 @@ public sealed class ToolRegistry : IDisposable, IAsyncDisposable
          * This approach allows to modify function details without causing
          * duplicate entries in the Redis set. */
 
-        // Data stored in Redis KV
+        // Data stored in Redis KV, and pointer stored in Redis Set, in a single round trip.
+        // The orchestrator caches the registry, and is notified of the change via pub/sub.
         var redisDataKey = $"FunctionDetails:{toolName}:{url}";
         var redisDataValue = JsonSerializer.Serialize(data);
-        this._db.StringSet(redisDataKey, redisDataValue, TimeSpan.MaxValue);
-
-        // Pointer stored in Redis Set
-        this._db.SetAdd(FunctionsRedisSetName, redisDataKey);
+        ITransaction transaction = this._db.CreateTransaction();
+        _ = transaction.StringSetAsync(redisDataKey, redisDataValue, TimeSpan.MaxValue);
+        _ = transaction.SetAddAsync(FunctionsRedisSetName, redisDataKey);
+        _ = transaction.PublishAsync(RedisChannel.Literal(FunctionsChangedRedisChannel), redisDataKey);
+        transaction.Execute();
     }
 
     public void Dispose()